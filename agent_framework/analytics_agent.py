@@ -5,14 +5,22 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from .memory_agent import MemoryAgent
+from .registry import get_service
+from .holdings_store import HoldingsStore, MEASURE_COLUMNS, get_holdings_store
 
 
 class AnalyticsAgent:
     """סוכן לניתוח מתקדם של נתונים פיננסיים."""
 
-    def __init__(self, memory_agent: Optional[MemoryAgent] = None):
+    def __init__(
+        self,
+        memory_agent: Optional[MemoryAgent] = None,
+        holdings_store: Optional[HoldingsStore] = None,
+    ):
         self.logger = logging.getLogger(__name__)
-        self.memory_agent = memory_agent or MemoryAgent()
+        self.memory_agent = memory_agent or get_service("memory_agent")
+        self.holdings_store = holdings_store or get_holdings_store()
+        self._backfilled = set()
 
     def analyze_portfolio_trends(
         self, user_id: str, time_period: int = 180
@@ -27,51 +35,32 @@ class AnalyticsAgent:
             מילון עם תוצאות הניתוח
         """
         try:
-            # שליפת מסמכים רלוונטיים מתקופת הזמן המבוקשת
+            # שליפת שורות האחזקות מתקופת הזמן המבוקשת בשאילתה אחת
             since_date = datetime.now() - timedelta(days=time_period)
-
-            # במערכת אמיתית, נשלוף את המסמכים ישירות עם שאילתת מסד נתונים
-            docs = self.memory_agent.get_user_documents(user_id)
-            docs = [doc for doc in docs if doc.upload_date >= since_date]
-
-            if not docs:
+            self._ensure_holdings(user_id)
+            df = self.holdings_store.load_window(
+                user_id,
+                since=since_date,
+                columns=["date", "document_id", "security_type", "weight", "yield_percent"],
+            )
+
+            if df.empty:
                 return {"message": "No documents found in the specified time period"}
 
-            # איסוף נתונים פיננסיים
-            portfolio_data = []
-            for doc in docs:
-                if doc.financial_data:
-                    # שליפת התאריך מהמסמך
-                    doc_date = doc.upload_date
-
-                    # איסוף נתוני תיק ההשקעות
-                    for table_id, table_info in doc.financial_data.items():
-                        if isinstance(table_info, dict) and "dataframe" in table_info:
-                            for row in table_info["dataframe"]:
-                                row_data = dict(row)
-                                row_data["date"] = doc_date
-                                portfolio_data.append(row_data)
-
-            if not portfolio_data:
-                return {"message": "No financial data found in the documents"}
-
-            # יצירת DataFrame לניתוח
-            df = pd.DataFrame(portfolio_data)
-
             # חישוב מגמות ותובנות
             analysis = {
                 "time_period": time_period,
-                "document_count": len(docs),
+                "document_count": int(df["document_id"].nunique()),
                 "date_range": {
-                    "start": min(doc.upload_date for doc in docs),
-                    "end": max(doc.upload_date for doc in docs),
+                    "start": df["date"].min().to_pydatetime(),
+                    "end": df["date"].max().to_pydatetime(),
                 },
                 "trends": {},
                 "insights": [],
             }
 
             # דוגמה לניתוח - אם יש נתוני תשואה
-            if "yield_percent" in df.columns:
+            if df["yield_percent"].notna().any():
                 analysis["trends"]["yield"] = {
                     "mean": df["yield_percent"].mean(),
                     "trend": self._calculate_trend(df, "date", "yield_percent"),
@@ -87,25 +76,11 @@ class AnalyticsAgent:
                         "תשואת התיק במגמת ירידה משמעותית בתקופה האחרונה"
                     )
 
-            # ניתוח הרכב התיק
-            if "security_type" in df.columns and "portfolio_weight" in df.columns:
-                latest_doc = max(docs, key=lambda d: d.upload_date)
-                latest_data = [
-                    row
-                    for table in latest_doc.financial_data.values()
-                    for row in table.get("dataframe", [])
-                ]
-
-                if latest_data:
-                    latest_df = pd.DataFrame(latest_data)
-                    if (
-                        "security_type" in latest_df.columns
-                        and "portfolio_weight" in latest_df.columns
-                    ):
-                        composition = latest_df.groupby("security_type")[
-                            "portfolio_weight"
-                        ].sum()
-                        analysis["portfolio_composition"] = composition.to_dict()
+            # ניתוח הרכב התיק לפי הדוח האחרון בחלון
+            latest = df[df["date"] == df["date"].max()]
+            if latest["security_type"].notna().any() and latest["weight"].notna().any():
+                composition = latest.groupby("security_type")["weight"].sum()
+                analysis["portfolio_composition"] = composition.to_dict()
 
             return analysis
 
@@ -118,6 +93,7 @@ class AnalyticsAgent:
         user_id: str,
         metric: str = "yield_percent",
         z_score_threshold: float = 2.0,
+        time_period: Optional[int] = None,
     ) -> Dict[str, Any]:
         """זיהוי חריגות בנתונים פיננסיים.
 
@@ -125,53 +101,46 @@ class AnalyticsAgent:
             user_id: מזהה המשתמש
             metric: המדד לבדיקת חריגות
             z_score_threshold: סף ה-Z-score להגדרת חריגות
+            time_period: תקופת הזמן בימים (ברירת מחדל: כל ההיסטוריה)
 
         Returns:
             מילון עם תוצאות הניתוח
         """
         try:
-            # שליפת מסמכים
-            docs = self.memory_agent.get_user_documents(user_id)
+            metric_column = self._metric_column(metric)
+            if metric_column is None:
+                return {"message": f"No data found for metric: {metric}"}
 
-            if not docs:
+            since_date = (
+                datetime.now() - timedelta(days=time_period) if time_period else None
+            )
+            self._ensure_holdings(user_id)
+            df = self.holdings_store.load_window(
+                user_id,
+                since=since_date,
+                columns=[
+                    "date",
+                    "document_id",
+                    "security_name",
+                    "security_type",
+                    metric_column,
+                ],
+            )
+
+            if df.empty:
                 return {"message": "No documents found"}
 
-            # איסוף נתונים פיננסיים
-            financial_data = []
-            for doc in docs:
-                if doc.financial_data:
-                    for table_id, table_info in doc.financial_data.items():
-                        if isinstance(table_info, dict) and "dataframe" in table_info:
-                            for row in table_info["dataframe"]:
-                                if metric in row:
-                                    financial_data.append(
-                                        {
-                                            "document_id": doc.id,
-                                            "filename": doc.filename,
-                                            "date": doc.upload_date,
-                                            "value": row[metric],
-                                            "security_name": row.get(
-                                                "security_name", "Unknown"
-                                            ),
-                                            "security_type": row.get(
-                                                "security_type", "Unknown"
-                                            ),
-                                        }
-                                    )
-
-            if not financial_data:
+            df = df[df[metric_column].notna()].rename(columns={metric_column: "value"})
+            if df.empty:
                 return {"message": f"No data found for metric: {metric}"}
 
-            # יצירת DataFrame לניתוח
-            df = pd.DataFrame(financial_data)
-
             # חישוב Z-scores
             mean = df["value"].mean()
             std = df["value"].std() or 1  # במקרה שסטיית התקן היא 0
             df["z_score"] = (df["value"] - mean) / std
 
             # זיהוי חריגות
-            outliers = df[abs(df["z_score"]) > z_score_threshold]
+            outliers = df[df["z_score"].abs() > z_score_threshold]
 
             result = {
                 "metric": metric,
@@ -187,18 +156,23 @@ class AnalyticsAgent:
             }
 
             # מידע על החריגות
-            for _, row in outliers.iterrows():
-                result["outliers"].append(
-                    {
-                        "document_id": row["document_id"],
-                        "document_name": row["filename"],
-                        "date": row["date"],
-                        "security_name": row["security_name"],
-                        "security_type": row["security_type"],
-                        "value": row["value"],
-                        "z_score": row["z_score"],
-                    }
-                )
+            outliers = outliers.assign(
+                document_name=outliers["document_id"],
+                date=outliers["date"].dt.to_pydatetime(),
+                security_name=outliers["security_name"].fillna("Unknown"),
+                security_type=outliers["security_type"].fillna("Unknown"),
+            )
+            result["outliers"] = outliers[
+                [
+                    "document_id",
+                    "document_name",
+                    "date",
+                    "security_name",
+                    "security_type",
+                    "value",
+                    "z_score",
+                ]
+            ].to_dict(orient="records")
 
             return result
 
@@ -206,6 +180,46 @@ class AnalyticsAgent:
             self.logger.error(f"Error detecting outliers: {str(e)}")
             return {"error": str(e)}
 
+    def _metric_column(self, metric: str) -> Optional[str]:
+        """מיפוי שם מדד לעמודה בטבלת האחזקות."""
+        if metric in MEASURE_COLUMNS:
+            return metric
+        if metric == "portfolio_weight":
+            return "weight"
+        return None
+
+    def _ensure_holdings(self, user_id: str) -> None:
+        """טעינת מסמכים ישנים לטבלת האחזקות (מסמכים שנקלטו לפני שנשמרה).
+
+        המעקב הוא לפי מסמך, כך שמסמכים ישנים נטענים גם כשלמשתמש כבר יש שורות בטבלה.
+        """
+        get_user_documents = getattr(self.memory_agent, "get_user_documents", None)
+        if get_user_documents is None:
+            return
+
+        pending = [
+            doc for doc in get_user_documents(user_id) or []
+            if (user_id, doc.id) not in self._backfilled
+        ]
+        if not pending:
+            return
+        stored = self.holdings_store.document_ids(user_id)
+
+        for doc in pending:
+            self._backfilled.add((user_id, doc.id))
+            if doc.id in stored or not doc.financial_data:
+                continue
+            rows = [
+                row
+                for table_info in doc.financial_data.values()
+                if isinstance(table_info, dict)
+                for row in table_info.get("dataframe", [])
+            ]
+            if rows:
+                self.holdings_store.append_document(
+                    user_id, doc.id, doc.upload_date, rows
+                )
+
     def generate_insights(self, document_id: str) -> Dict[str, Any]:
         """הפקת תובנות אוטומטיות ממסמך פיננסי.
 
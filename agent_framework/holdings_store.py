@@ -0,0 +1,306 @@
+# agent_framework/holdings_store.py
+"""
+Persisted holdings time series for portfolio analytics.
+
+Every tenant gets its own SQLite file (one partition per tenant) holding a single
+fact table keyed by (date, isin, document_id, line). Rows are appended when a document is
+ingested, so analytics only read the requested date window with one indexed query
+instead of reloading and flattening every stored document.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "HOLDINGS_STORE_DIR", os.path.join("data", "holdings")
+)
+
+# Numeric measures stored per holding; also the metrics analytics may query
+MEASURE_COLUMNS = ("quantity", "price", "value", "weight", "yield_percent", "performance")
+ATTRIBUTE_COLUMNS = ("security_name", "security_type", "currency")
+FACT_COLUMNS = ("date", "isin", "document_id") + ATTRIBUTE_COLUMNS + MEASURE_COLUMNS
+# Position of the row in its statement: one ISIN may be listed on several lines
+# (e.g. lots or custody accounts), and each line is kept as its own row
+_STORED_COLUMNS = FACT_COLUMNS + ("line",)
+
+# Alternative field names produced by the different extractors
+_FIELD_ALIASES = {
+    "security_name": ("security_name", "name", "description"),
+    "security_type": ("security_type", "type", "asset_class"),
+    "quantity": ("quantity", "nominal", "amount"),
+    "price": ("price", "market_price"),
+    "value": ("value", "market_value", "valuation"),
+    "weight": ("weight", "portfolio_weight", "percentage_in_portfolio", "percentage"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS holdings (
+    date TEXT NOT NULL,
+    isin TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    security_name TEXT,
+    security_type TEXT,
+    currency TEXT,
+    quantity REAL,
+    price REAL,
+    value REAL,
+    weight REAL,
+    yield_percent REAL,
+    performance REAL,
+    line INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, isin, document_id, line)
+);
+CREATE INDEX IF NOT EXISTS idx_holdings_date ON holdings (date);
+CREATE INDEX IF NOT EXISTS idx_holdings_isin_date ON holdings (isin, date);
+CREATE INDEX IF NOT EXISTS idx_holdings_document ON holdings (document_id);
+"""
+
+DateLike = Union[str, date, datetime]
+
+
+def _to_date_key(value: DateLike) -> str:
+    """Normalize a date-like value to the ISO string used as partition key."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return pd.Timestamp(value).date().isoformat()
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Parse numbers as extracted from statements ("1'234.50", "12.5%", "(3.2)")."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip()
+    negative = text.startswith("(") and text.endswith(")")
+    text = re.sub(r"[^\d.\-]", "", text)
+    if not text or text in ("-", "."):
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return -abs(number) if negative else number
+
+
+class HoldingsStore:
+    """Per-tenant holdings fact table stored in indexed SQLite files."""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or DEFAULT_STORE_DIR
+        self.logger = logging.getLogger(__name__)
+        self._initialized = set()
+        self._lock = threading.Lock()
+
+    def _db_path(self, tenant_id: str) -> str:
+        safe_tenant = re.sub(r"[^A-Za-z0-9_.-]", "_", str(tenant_id))
+        return os.path.join(self.base_dir, f"{safe_tenant}.sqlite")
+
+    def _connect(self, tenant_id: str) -> sqlite3.Connection:
+        path = self._db_path(tenant_id)
+        if path in self._initialized:
+            return sqlite3.connect(path)
+        with self._lock:
+            # SQLite does not create missing directories
+            os.makedirs(self.base_dir, exist_ok=True)
+            conn = sqlite3.connect(path)
+            if path not in self._initialized:
+                self._migrate(conn)
+                conn.executescript(_SCHEMA)
+                self._initialized.add(path)
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Rebuild partitions created before rows had a line index (part of the key)."""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(holdings)")]
+        if not columns or "line" in columns:
+            return
+        with conn:
+            conn.execute("ALTER TABLE holdings RENAME TO holdings_unlined")
+            for index in ("idx_holdings_date", "idx_holdings_isin_date", "idx_holdings_document"):
+                conn.execute(f"DROP INDEX IF EXISTS {index}")
+        conn.executescript(_SCHEMA)
+        with conn:
+            conn.execute(
+                f"INSERT INTO holdings ({', '.join(FACT_COLUMNS)}) "
+                f"SELECT {', '.join(FACT_COLUMNS)} FROM holdings_unlined"
+            )
+            conn.execute("DROP TABLE holdings_unlined")
+
+    def has_data(self, tenant_id: str) -> bool:
+        """Whether the tenant partition exists and holds any rows."""
+        if not os.path.exists(self._db_path(tenant_id)):
+            return False
+        with closing(self._connect(tenant_id)) as conn:
+            return conn.execute("SELECT 1 FROM holdings LIMIT 1").fetchone() is not None
+
+    def document_ids(self, tenant_id: str) -> set:
+        """IDs of the documents that have rows in the tenant partition."""
+        if not os.path.exists(self._db_path(tenant_id)):
+            return set()
+        with closing(self._connect(tenant_id)) as conn:
+            return {row[0] for row in conn.execute("SELECT DISTINCT document_id FROM holdings")}
+
+    def normalize_holding(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Map an extracted holding row onto the fact table columns."""
+        fact = {}
+        for column, aliases in _FIELD_ALIASES.items():
+            fact[column] = next(
+                (row[alias] for alias in aliases if row.get(alias) not in (None, "")),
+                None,
+            )
+        fact["currency"] = row.get("currency")
+        fact["yield_percent"] = row.get("yield_percent")
+        fact["performance"] = row.get("performance")
+
+        for column in MEASURE_COLUMNS:
+            fact[column] = _to_float(fact[column])
+
+        # Rows without an ISIN are keyed by name so re-ingestion stays idempotent
+        isin = row.get("isin") or row.get("ISIN") or fact["security_name"]
+        if not isin:
+            return None
+        fact["isin"] = str(isin).strip()
+        return fact
+
+    def append_document(
+        self,
+        tenant_id: str,
+        document_id: str,
+        statement_date: DateLike,
+        holdings: Iterable[Dict[str, Any]],
+    ) -> int:
+        """Append (or replace) the holdings of one document.
+
+        Args:
+            tenant_id: Tenant / user the document belongs to
+            document_id: Document identifier
+            statement_date: Valuation date of the statement
+            holdings: Extracted holding rows (instrument dicts or table rows)
+
+        Returns:
+            Number of rows written
+        """
+        date_key = _to_date_key(statement_date)
+        records = []
+        for row in holdings:
+            fact = self.normalize_holding(row)
+            if fact is None:
+                continue
+            fact["date"] = date_key
+            fact["document_id"] = document_id
+            fact["line"] = len(records)
+            records.append(tuple(fact[column] for column in _STORED_COLUMNS))
+
+        # Derive weights when the statement only lists market values
+        total_value = sum(r[FACT_COLUMNS.index("value")] or 0 for r in records)
+        if total_value:
+            weight_idx = FACT_COLUMNS.index("weight")
+            value_idx = FACT_COLUMNS.index("value")
+            records = [
+                r[:weight_idx] + ((r[value_idx] or 0) / total_value * 100,) + r[weight_idx + 1:]
+                if r[weight_idx] is None else r
+                for r in records
+            ]
+
+        placeholders = ", ".join("?" for _ in _STORED_COLUMNS)
+        with closing(self._connect(tenant_id)) as conn:
+            with conn:
+                # Reprocessing a document replaces its previous rows
+                conn.execute("DELETE FROM holdings WHERE document_id = ?", (document_id,))
+                conn.executemany(
+                    f"INSERT INTO holdings ({', '.join(_STORED_COLUMNS)}) "
+                    f"VALUES ({placeholders})",
+                    records,
+                )
+
+        self.logger.info(
+            f"Stored {len(records)} holdings for document {document_id} (tenant {tenant_id})"
+        )
+        return len(records)
+
+    def remove_document(self, tenant_id: str, document_id: str) -> None:
+        """Remove all holdings rows of a document."""
+        if not os.path.exists(self._db_path(tenant_id)):
+            return
+        with closing(self._connect(tenant_id)) as conn:
+            with conn:
+                conn.execute("DELETE FROM holdings WHERE document_id = ?", (document_id,))
+
+    def load_window(
+        self,
+        tenant_id: str,
+        since: Optional[DateLike] = None,
+        until: Optional[DateLike] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Load the fact rows of a date window as a DataFrame (one indexed query)."""
+        selected = [c for c in (columns or FACT_COLUMNS) if c in FACT_COLUMNS]
+        if "date" not in selected:
+            selected.insert(0, "date")
+
+        if not os.path.exists(self._db_path(tenant_id)):
+            return pd.DataFrame(columns=selected)
+
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(_to_date_key(since))
+        if until is not None:
+            clauses.append("date <= ?")
+            params.append(_to_date_key(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with closing(self._connect(tenant_id)) as conn:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(selected)} FROM holdings{where} ORDER BY date",
+                conn,
+                params=params,
+            )
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def composition(
+        self, tenant_id: str, as_of: Optional[DateLike] = None
+    ) -> Dict[str, float]:
+        """Weight per security type on the latest statement date (up to as_of)."""
+        if not os.path.exists(self._db_path(tenant_id)):
+            return {}
+
+        bound, params = "", []
+        if as_of is not None:
+            bound = " WHERE date <= ?"
+            params.append(_to_date_key(as_of))
+
+        with closing(self._connect(tenant_id)) as conn:
+            rows = conn.execute(
+                "SELECT COALESCE(security_type, 'Unknown'), SUM(weight) FROM holdings "
+                f"WHERE date = (SELECT MAX(date) FROM holdings{bound}) "
+                "GROUP BY COALESCE(security_type, 'Unknown')",
+                params,
+            ).fetchall()
+        return {security_type: weight or 0.0 for security_type, weight in rows}
+
+
+_default_store = None
+
+
+def get_holdings_store() -> HoldingsStore:
+    """Process-wide holdings store rooted at HOLDINGS_STORE_DIR."""
+    global _default_store
+    if _default_store is None:
+        _default_store = HoldingsStore()
+    return _default_store
@@ -8,6 +8,7 @@ import numpy as np
 
 # Import the database instance
 from shared.database import db
+from agent_framework.registry import get_service
 
 # Import sentence transformer
 try:
@@ -30,6 +31,28 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+def load_embedding_model():
+    """
+    Load the sentence embedding model, or return None if it is unavailable.
+
+    Use ``get_service("embedding_model")`` from ``agent_framework.registry``
+    instead of calling this directly, so the model is loaded once per process.
+    """
+    if not SENTENCE_TRANSFORMER_AVAILABLE:
+        logger.warning(
+            "Sentence Transformer library not available. Vector search disabled."
+        )
+        return None
+    try:
+        # Using a multilingual model suitable for both English and Hebrew
+        model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+        logger.info("Sentence Transformer model loaded successfully.")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load Sentence Transformer model: {e}")
+        return None
+
+
 class MemoryAgent:
     """
     Agent responsible for managing document memory using MongoDB for persistence
@@ -42,21 +65,8 @@ class MemoryAgent:
     def __init__(self):
         """Initialize the memory agent"""
         self.collection_name = "document_analysis_store"
-        self.embedding_model = None
-        if SENTENCE_TRANSFORMER_AVAILABLE:
-            try:
-                # Using a multilingual model suitable for both English and Hebrew
-                self.embedding_model = SentenceTransformer(
-                    "paraphrase-multilingual-MiniLM-L12-v2"
-                )
-                logger.info("Sentence Transformer model loaded successfully.")
-            except Exception as e:
-                logger.error(f"Failed to load Sentence Transformer model: {e}")
-                self.embedding_model = None
-        else:
-            logger.warning(
-                "Sentence Transformer library not available. Vector search disabled."
-            )
+        # The embedding model is loaded once per process and shared by all instances
+        self.embedding_model = get_service("embedding_model")
 
         # Removed check for db.use_mongo and db.db, as the Database class handles DynamoDB resource state internally.
         # Methods will log errors if the resource is unavailable.
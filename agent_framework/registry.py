@@ -0,0 +1,254 @@
+# agent_framework/registry.py
+"""
+Process-wide registry of heavy shared objects (models, extractors, LLM clients).
+
+Services are registered with a factory and built lazily on first use, once per
+process. Worker entry points warm the registry up front so the first request on
+a worker does not pay for model loading:
+
+- Objects marked ``fork_safe`` (pure in-memory models and extractors) are built
+  in the parent process before workers fork (Celery ``worker_init``, gunicorn
+  ``when_ready`` with ``preload_app``), so their memory is shared copy-on-write.
+- Everything else (network clients, DB connections, agents holding them) is
+  built in each worker after the fork (Celery ``worker_process_init``, gunicorn
+  ``post_fork``). Such an object inherited through a fork is rebuilt on first
+  use instead of being shared with the parent.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated service names to warm up; empty means every registered service
+DEFAULT_PRELOAD = os.environ.get("PRELOAD_SERVICES", "")
+
+
+class _Entry:
+    __slots__ = ("factory", "fork_safe", "instance", "pid", "lock")
+
+    def __init__(self, factory: Callable[[], Any], fork_safe: bool):
+        self.factory = factory
+        self.fork_safe = fork_safe
+        self.instance = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def is_built(self) -> bool:
+        # Fork-unsafe objects built by another process do not count
+        return self.pid is not None and (self.fork_safe or self.pid == os.getpid())
+
+
+class ServiceProxy:
+    """Module-level stand-in for a registered service.
+
+    Attribute access is forwarded to ``registry.get(name)``, so importing a
+    module that holds a proxy builds nothing, and after a fork the proxy
+    resolves to the worker's own instance.
+    """
+
+    def __init__(self, registry: "ServiceRegistry", name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        return f"<ServiceProxy {self._name!r}>"
+
+
+class ServiceRegistry:
+    """Lazily built, process-wide named services."""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], fork_safe: bool = False) -> None:
+        """Register (or replace) a service factory.
+
+        Args:
+            name: Service name
+            factory: Zero-argument callable building the service
+            fork_safe: Whether the instance may be built before forking and shared
+        """
+        self._entries[name] = _Entry(factory, fork_safe)
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.is_built()
+
+    def get(self, name: str) -> Any:
+        """Return the service, building it on first use in this process.
+
+        Raises:
+            KeyError: If no service is registered under ``name``
+        """
+        entry = self._entries[name]
+        if entry.is_built():
+            return entry.instance
+        # A lock inherited through fork may be held by a thread that does not exist here
+        if entry.pid is not None and entry.pid != os.getpid():
+            entry.lock = threading.Lock()
+        with entry.lock:
+            if not entry.is_built():
+                start = time.perf_counter()
+                entry.instance = entry.factory()
+                entry.pid = os.getpid()
+                logger.info(f"Service '{name}' initialized in {time.perf_counter() - start:.2f}s")
+        return entry.instance
+
+    def available(self, name: str) -> Optional[Any]:
+        """Return the service, or None if it is not registered or cannot be built.
+
+        For callers with a fallback: a ``ServiceProxy`` is always truthy, so it
+        cannot tell whether the service works. A failed build is retried on the
+        next call.
+        """
+        if name not in self._entries:
+            return None
+        try:
+            return self.get(name)
+        except Exception as e:
+            logger.error(f"Service '{name}' is not available: {e}")
+            return None
+
+    def proxy(self, name: str) -> ServiceProxy:
+        """Lazy module-level handle for a service (see ``ServiceProxy``)."""
+        return ServiceProxy(self, name)
+
+    def set(self, name: str, instance: Any) -> None:
+        """Install a ready-made instance (e.g. a test double)."""
+        entry = self._entries.setdefault(name, _Entry(lambda: instance, fork_safe=True))
+        entry.instance = instance
+        entry.pid = os.getpid()
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """Drop built instances so they are rebuilt on next use."""
+        entries = [self._entries[name]] if name else self._entries.values()
+        for entry in entries:
+            entry.instance = None
+            entry.pid = None
+
+    def preload(self, names: Optional[Iterable[str]] = None, fork_safe_only: bool = False) -> Dict[str, Any]:
+        """Build services ahead of the first request.
+
+        Failures are logged and reported, not raised: a service that cannot be
+        built now is retried on first use.
+
+        Args:
+            names: Services to build; defaults to ``PRELOAD_SERVICES`` or all services
+            fork_safe_only: Only build services that may be shared across a fork
+
+        Returns:
+            Dict with 'loaded' (name -> seconds) and 'failed' (name -> error)
+        """
+        if names is None:
+            names = [n.strip() for n in DEFAULT_PRELOAD.split(",") if n.strip()] or self.names()
+
+        report = {"loaded": {}, "failed": {}}
+        for name in names:
+            entry = self._entries.get(name)
+            if entry is None:
+                report["failed"][name] = "not registered"
+                continue
+            if fork_safe_only and not entry.fork_safe:
+                continue
+            start = time.perf_counter()
+            try:
+                self.get(name)
+                report["loaded"][name] = round(time.perf_counter() - start, 3)
+            except Exception as e:
+                logger.error(f"Failed to preload service '{name}': {e}")
+                report["failed"][name] = str(e)
+
+        logger.info(f"Preloaded services in process {os.getpid()}: {report}")
+        return report
+
+
+registry = ServiceRegistry()
+
+
+def get_service(name: str) -> Any:
+    """Shortcut for ``registry.get(name)``."""
+    return registry.get(name)
+
+
+# Default services. Factories import lazily so registering costs nothing.
+
+def _document_processor():
+    from pdf_processor import DocumentProcessor
+    from config.configuration import document_processor_config
+    return DocumentProcessor(config=document_processor_config)
+
+
+def _pdf_text_extractor():
+    from pdf_processor.extraction.text_extractor import PDFTextExtractor
+    return PDFTextExtractor()
+
+
+def _table_extractor():
+    from pdf_processor.tables.table_extractor import TableExtractor
+    return TableExtractor()
+
+
+def _financial_analyzer():
+    from pdf_processor.analysis.financial_analyzer import FinancialAnalyzer
+    return FinancialAnalyzer()
+
+
+def _embedding_model():
+    from agent_framework.memory_agent import load_embedding_model
+    return load_embedding_model()
+
+
+def _gemini_financial_processor():
+    from gemini_financial_processor import GeminiFinancialProcessor
+    return GeminiFinancialProcessor()
+
+
+def _memory_agent():
+    from agent_framework.memory_agent import MemoryAgent
+    return MemoryAgent()
+
+
+def _progress_publisher():
+    from services.progress_events import ProgressPublisher
+    return ProgressPublisher()
+
+
+def _agent_coordinator():
+    from agent_framework.coordinator import AgentCoordinator
+    models_config = {
+        "default": os.environ.get("DEFAULT_MODEL", "gemini"),
+        "available": ["gemini", "llama", "mistral"]
+    }
+    try:
+        return AgentCoordinator(models_config)
+    except Exception as e:
+        logger.error(f"Failed to initialize global agent coordinator: {e}")
+        # Fallback instance for error situations
+        return AgentCoordinator({
+            "default": "fallback",
+            "available": ["fallback"]
+        })
+
+
+registry.register("document_processor", _document_processor, fork_safe=True)
+registry.register("pdf_text_extractor", _pdf_text_extractor, fork_safe=True)
+registry.register("table_extractor", _table_extractor, fork_safe=True)
+registry.register("financial_analyzer", _financial_analyzer, fork_safe=True)
+registry.register("embedding_model", _embedding_model, fork_safe=True)
+registry.register("gemini_financial_processor", _gemini_financial_processor)
+registry.register("memory_agent", _memory_agent)
+registry.register("agent_coordinator", _agent_coordinator)
+registry.register("progress_publisher", _progress_publisher)
@@ -3,25 +3,118 @@ Table generator module for creating custom tables based on financial data
 
 This module provides functionality to generate structured tables from financial data
 based on user queries and specifications.
+
+The specification (columns, filters, sort_by, group_by) is compiled into a single
+vectorized plan over a pandas frame: filters are pushed down ahead of grouping,
+sorting and projection, each filter is evaluated only on the rows that survived the
+previous ones, and comparisons run against typed (numeric / lower-cased string)
+column views. When the caller supplies a ``data_version`` the compiled frame and the
+results for repeated specs are cached under that version.
 """
 
+import json
 import logging
-from typing import Dict, List, Any
+import numbers
+from collections import OrderedDict
+from typing import Dict, List, Any, Hashable, Optional
+
+import numpy as np
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# infer_dtype() kinds whose values can be aggregated numerically
+_NUMERIC_KINDS = {"integer", "floating", "mixed-integer-float", "decimal", "boolean"}
+
+
+def _is_number(value: Any) -> bool:
+    """True for real numbers used as filter values (bools are compared as-is)"""
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+class _CompiledFrame:
+    """
+    Column-oriented view of a list of records with lazily built typed views
+    """
+
+    def __init__(self, data: List[Dict[str, Any]]):
+        # dtype=object keeps the original Python values (ints stay ints)
+        self.frame = pd.DataFrame(data, dtype=object)
+        self.size = len(data)
+        self._views: Dict[tuple, np.ndarray] = {}
+
+    def raw(self, field: str) -> np.ndarray:
+        key = ("raw", field)
+        if key not in self._views:
+            if field in self.frame.columns:
+                self._views[key] = self.frame[field].to_numpy(dtype=object)
+            else:
+                self._views[key] = np.full(self.size, None, dtype=object)
+        return self._views[key]
+
+    def present(self, field: str) -> np.ndarray:
+        key = ("present", field)
+        if key not in self._views:
+            self._views[key] = ~pd.isna(self.raw(field))
+        return self._views[key]
+
+    def numeric(self, field: str) -> np.ndarray:
+        key = ("numeric", field)
+        if key not in self._views:
+            values = pd.to_numeric(pd.Series(self.raw(field)), errors="coerce")
+            self._views[key] = values.to_numpy(dtype=float, na_value=np.nan)
+        return self._views[key]
+
+    def lowered(self, field: str) -> np.ndarray:
+        key = ("lowered", field)
+        if key not in self._views:
+            values = pd.Series(self.raw(field)).astype(str).str.lower()
+            self._views[key] = values.to_numpy(dtype=object)
+        return self._views[key]
+
+    def number_mask(self, field: str) -> np.ndarray:
+        """Rows whose value is a real number (not merely numeric-looking text)"""
+        key = ("is_number", field)
+        if key not in self._views:
+            raw = self.raw(field)
+            present = self.present(field)
+            kind = pd.api.types.infer_dtype(raw[present], skipna=True)
+            if kind in _NUMERIC_KINDS:
+                mask = present.copy()
+            elif kind in ("string", "empty", "date", "datetime"):
+                mask = np.zeros(self.size, dtype=bool)
+            else:
+                mask = np.fromiter(
+                    (isinstance(value, numbers.Number) for value in raw),
+                    dtype=bool,
+                    count=self.size,
+                ) & present
+            self._views[key] = mask
+        return self._views[key]
+
+    def is_integer(self, field: str) -> bool:
+        raw = self.raw(field)
+        kind = pd.api.types.infer_dtype(raw[self.present(field)], skipna=True)
+        return kind in ("integer", "boolean")
+
 
 class CustomTableGenerator:
     """
     Class to generate custom tables based on financial data
     """
 
-    def __init__(self):
+    def __init__(self, cache_size: int = 64):
         """Initialize the table generator"""
         self.logger = logging.getLogger(__name__)
+        self.cache_size = cache_size
+        self._frame_cache: "OrderedDict[Hashable, _CompiledFrame]" = OrderedDict()
+        self._result_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
 
     def generate_custom_table(
-        self, data: List[Dict[str, Any]], spec: Dict[str, Any]
+        self,
+        data: List[Dict[str, Any]],
+        spec: Dict[str, Any],
+        data_version: Optional[Hashable] = None,
     ) -> Dict[str, Any]:
         """
         Generate a custom table based on financial data and a specification
@@ -29,44 +122,51 @@ class CustomTableGenerator:
         Args:
             data: List of data dictionaries (usually financial data points)
             spec: A specification for the table including columns, filters, etc.
+            data_version: Optional version key of ``data`` (e.g. document id and
+                processing timestamp). When given, results for repeated specs are
+                served from cache until the version changes.
 
         Returns:
             A structured table in dictionary format
         """
         try:
+            cache_key = None
+            if data_version is not None:
+                cache_key = (data_version, self._spec_key(spec))
+                cached = self._result_cache.get(cache_key)
+                if cached is not None:
+                    self._result_cache.move_to_end(cache_key)
+                    return {**cached, "rows": list(cached["rows"])}
+
             # Extract table components from spec
             columns = spec.get("columns", [])
             filters = spec.get("filters", [])
             sort_by = spec.get("sort_by", {})
             group_by = spec.get("group_by")
 
-            # Apply filters to data
-            filtered_data = self._apply_filters(data, filters)
+            compiled = self._compile_frame(data, data_version)
+
+            # Filters are applied first so every later stage only sees matching rows
+            positions = self._filter_positions(compiled, filters)
 
-            # Group data if needed
             if group_by:
-                result_data = self._group_data(filtered_data, group_by, columns)
+                result_data = self._group_data(
+                    compiled, data, positions, group_by, columns
+                )
+                if sort_by:
+                    result_data = self._sort_data(result_data, sort_by)
+                # Grouped rows carry the aggregates (sum_/avg_/count_<column>),
+                # not the requested columns themselves
+                headers = list(dict.fromkeys(key for item in result_data for key in item))
+                rows = [
+                    [str(item.get(col, "")) for col in headers] for item in result_data
+                ]
             else:
-                # Select only the specified columns
-                result_data = self._select_columns(filtered_data, columns)
-
-            # Sort the results
-            if sort_by:
-                result_data = self._sort_data(result_data, sort_by)
-
-            # Construct the table
-            headers = (
-                columns
-                if columns
-                else (list(result_data[0].keys()) if result_data else [])
-            )
-            rows = []
-
-            for item in result_data:
-                row = [str(item.get(col, "")) for col in headers]
-                rows.append(row)
+                if sort_by:
+                    positions = self._sort_positions(compiled, positions, sort_by)
+                rows, headers = self._project_rows(data, positions, columns)
 
-            return {
+            result = {
                 "headers": headers,
                 "rows": rows,
                 "count": len(rows),
@@ -78,21 +178,61 @@ class CustomTableGenerator:
                 },
             }
 
+            if cache_key is not None:
+                self._remember(self._result_cache, cache_key, result)
+                result = {**result, "rows": list(rows)}
+
+            return result
+
         except Exception as e:
             self.logger.error(f"Error generating custom table: {str(e)}")
             # Return a minimal structure in case of error
             return {"headers": [], "rows": [], "count": 0, "error": str(e)}
 
-    def _apply_filters(
-        self, data: List[Dict[str, Any]], filters: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Apply filters to the data"""
-        if not filters:
-            return data
-
-        filtered_data = data.copy()
-
-        for filter_spec in filters:
+    def invalidate(self, data_version: Optional[Hashable] = None) -> None:
+        """Drop cached frames and results for one data version (or all of them)"""
+        if data_version is None:
+            self._frame_cache.clear()
+            self._result_cache.clear()
+            return
+
+        self._frame_cache.pop(data_version, None)
+        for key in [key for key in self._result_cache if key[0] == data_version]:
+            del self._result_cache[key]
+
+    def _spec_key(self, spec: Dict[str, Any]) -> str:
+        """Canonical cache key for a table specification"""
+        return json.dumps(spec, sort_keys=True, default=str)
+
+    def _remember(self, cache: OrderedDict, key: Hashable, value: Any) -> None:
+        """Insert into an LRU cache bounded by cache_size"""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _compile_frame(
+        self, data: List[Dict[str, Any]], data_version: Optional[Hashable]
+    ) -> _CompiledFrame:
+        """Build (or reuse) the columnar representation of the data"""
+        if data_version is None:
+            return _CompiledFrame(data)
+
+        compiled = self._frame_cache.get(data_version)
+        if compiled is None or compiled.size != len(data):
+            compiled = _CompiledFrame(data)
+            self._remember(self._frame_cache, data_version, compiled)
+        else:
+            self._frame_cache.move_to_end(data_version)
+        return compiled
+
+    def _filter_positions(
+        self, compiled: _CompiledFrame, filters: List[Dict[str, Any]]
+    ) -> np.ndarray:
+        """Evaluate all filters and return the positions of matching rows"""
+        positions = np.arange(compiled.size)
+
+        for filter_spec in filters or []:
             field = filter_spec.get("field")
             operator = filter_spec.get("operator")
             value = filter_spec.get("value")
@@ -100,50 +240,101 @@ class CustomTableGenerator:
             if not field or not operator:
                 continue
 
-            filtered_data = [
-                item
-                for item in filtered_data
-                if self._matches_filter(item.get(field), operator, value)
-            ]
+            keep = self._filter_mask(compiled, positions, field, operator, value)
+            positions = positions[keep]
+            if positions.size == 0:
+                break
+
+        return positions
+
+    def _filter_mask(
+        self,
+        compiled: _CompiledFrame,
+        positions: np.ndarray,
+        field: str,
+        operator: str,
+        filter_value: Any,
+    ) -> np.ndarray:
+        """Typed comparison of one column against a filter value"""
+        present = compiled.present(field)[positions]
+
+        if operator in ("=", ">", "<") and _is_number(filter_value):
+            values = compiled.numeric(field)[positions]
+            with np.errstate(invalid="ignore"):
+                if operator == "=":
+                    return values == filter_value
+                if operator == ">":
+                    return values > filter_value
+                return values < filter_value
 
-        return filtered_data
+        if operator == "=":
+            values = compiled.raw(field)[positions]
+            return present & (values == filter_value)
+
+        if operator in (">", "<"):
+            values = compiled.raw(field)[positions][present]
+            if isinstance(filter_value, str):
+                values = values.astype(str)
+            mask = np.zeros(positions.size, dtype=bool)
+            if operator == ">":
+                mask[present] = values > filter_value
+            else:
+                mask[present] = values < filter_value
+            return mask
+
+        if operator == "contains":
+            values = pd.Series(compiled.lowered(field)[positions])
+            needle = str(filter_value).lower()
+            return present & values.str.contains(needle, regex=False).to_numpy(
+                dtype=bool
+            )
 
-    def _matches_filter(
-        self, item_value: Any, operator: str, filter_value: Any
-    ) -> bool:
-        """Check if a value matches a filter condition"""
-        if item_value is None:
-            return False
+        return np.zeros(positions.size, dtype=bool)
 
-        if operator == "=":
-            return item_value == filter_value
-        elif operator == ">":
-            return item_value > filter_value
-        elif operator == "<":
-            return item_value < filter_value
-        elif operator == "contains":
-            return str(filter_value).lower() in str(item_value).lower()
-
-        return False
-
-    def _select_columns(
-        self, data: List[Dict[str, Any]], columns: List[str]
-    ) -> List[Dict[str, Any]]:
-        """Select only the specified columns from the data"""
-        if not columns:
-            return data
+    def _sort_positions(
+        self,
+        compiled: _CompiledFrame,
+        positions: np.ndarray,
+        sort_spec: Dict[str, Any],
+    ) -> np.ndarray:
+        """Stable sort of the matching rows on a typed key, missing values last"""
+        field = sort_spec.get("field")
+        direction = sort_spec.get("direction", "asc")
 
-        result = []
-        for item in data:
-            filtered_item = {col: item.get(col) for col in columns}
-            result.append(filtered_item)
+        if not field or positions.size == 0:
+            return positions
 
-        return result
+        present = compiled.present(field)[positions]
+        if compiled.number_mask(field)[positions][present].all():
+            keys = pd.Series(compiled.numeric(field)[positions])
+        else:
+            raw = compiled.raw(field)[positions]
+            keys = pd.Series(np.where(present, raw.astype(str), None), dtype=object)
+
+        order = keys.sort_values(
+            ascending=direction.lower() != "desc", kind="stable", na_position="last"
+        ).index.to_numpy()
+        return positions[order]
+
+    def _project_rows(
+        self, data: List[Dict[str, Any]], positions: np.ndarray, columns: List[str]
+    ) -> tuple:
+        """Materialize the selected rows as strings in the requested column order"""
+        if columns:
+            rows = [[str(data[i].get(col)) for col in columns] for i in positions]
+            return rows, columns
+
+        if positions.size == 0:
+            return [], []
+
+        headers = list(data[positions[0]].keys())
+        rows = [[str(data[i].get(col, "")) for col in headers] for i in positions]
+        return rows, headers
 
     def _sort_data(
         self, data: List[Dict[str, Any]], sort_spec: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
-        """Sort the data based on a field and direction"""
+        """Sort (already aggregated) data based on a field and direction"""
         field = sort_spec.get("field")
         direction = sort_spec.get("direction", "asc")
 
@@ -162,42 +353,53 @@ class CustomTableGenerator:
         return sorted(data, key=get_sort_key, reverse=reverse)
 
     def _group_data(
-        self, data: List[Dict[str, Any]], group_by: str, metrics: List[str]
+        self,
+        compiled: _CompiledFrame,
+        data: List[Dict[str, Any]],
+        positions: np.ndarray,
+        group_by: str,
+        metrics: List[str],
     ) -> List[Dict[str, Any]]:
-        """Group the data by a field and calculate aggregates for metrics"""
-        if not group_by or not data:
-            return data
-
-        groups = {}
-        for item in data:
-            key = item.get(group_by)
-            if key not in groups:
-                groups[key] = []
-            groups[key].append(item)
+        """Group the matching rows by a field and calculate aggregates for metrics"""
+        if positions.size == 0:
+            return []
+
+        codes, uniques = pd.factorize(
+            pd.Series(compiled.raw(group_by)[positions]), use_na_sentinel=False
+        )
+        group_count = len(uniques)
+        _, first_seen = np.unique(codes, return_index=True)
+
+        result = [
+            {group_by: data[positions[first]].get(group_by)} for first in first_seen
+        ]
+
+        for metric in metrics:
+            if metric == group_by:
+                continue
 
-        result = []
-        for key, items in groups.items():
-            grouped_item = {group_by: key}
+            present = compiled.present(metric)[positions]
+            is_number = compiled.number_mask(metric)[positions]
+            counts = np.bincount(codes, weights=present, minlength=group_count)
+            non_numeric = np.bincount(
+                codes, weights=present & ~is_number, minlength=group_count
+            )
+            sums = np.bincount(
+                codes,
+                weights=np.where(is_number, compiled.numeric(metric)[positions], 0.0),
+                minlength=group_count,
+            )
+            as_int = compiled.is_integer(metric)
 
-            for metric in metrics:
-                if metric == group_by:
+            for code, grouped_item in enumerate(result):
+                count = int(counts[code])
+                if not count:
                     continue
-
-                # Calculate different aggregates based on data type
-                values = [
-                    item.get(metric) for item in items if item.get(metric) is not None
-                ]
-
-                if values:
-                    # Try numeric operations first
-                    try:
-                        grouped_item[f"sum_{metric}"] = sum(values)
-                        grouped_item[f"avg_{metric}"] = sum(values) / len(values)
-                        grouped_item[f"count_{metric}"] = len(values)
-                    except (TypeError, ValueError):
-                        # For non-numeric data, just count occurrences
-                        grouped_item[f"count_{metric}"] = len(values)
-
-            result.append(grouped_item)
+                if not non_numeric[code]:
+                    total = int(sums[code]) if as_int else float(sums[code])
+                    grouped_item[f"sum_{metric}"] = total
+                    grouped_item[f"avg_{metric}"] = total / count
+                # For non-numeric data, just count occurrences
+                grouped_item[f"count_{metric}"] = count
 
         return result
@@ -4,9 +4,15 @@ import json
 import os
 import time
 
+from ..memory.memory_store import AgentMemory, open_agent_memory
+from utils.async_runtime import run_blocking
+
 class BaseAgent:
     """Base class for all specialized agents."""
     
+    # Memory keys holding large collections; their entries are stored individually
+    memory_namespaces: tuple = ()
+    
     def __init__(self, name: str, memory_path: Optional[str] = None):
         """Initialize the agent.
         
@@ -19,8 +25,8 @@ class BaseAgent:
         self.memory_path = memory_path
         self.logger = logging.getLogger(f"agent.{name}")
         
-        # Load memory if path is provided and file exists
-        if memory_path and os.path.exists(memory_path):
+        # Persistent memory is read lazily, key by key
+        if memory_path:
             self._load_memory()
     
     async def process(self, task: Dict[str, Any]) -> Dict[str, Any]:
@@ -34,6 +40,18 @@ class BaseAgent:
         """
         raise NotImplementedError("Subclasses must implement this method")
     
+    async def run_blocking(self, func, *args, **kwargs) -> Any:
+        """Run a blocking call (DB query, pandas I/O) without blocking the event loop.
+        
+        Args:
+            func: Function to call in the shared agent executor
+            *args, **kwargs: Arguments for ``func``
+            
+        Returns:
+            The return value of ``func``
+        """
+        return await run_blocking(func, *args, **kwargs)
+    
     def store_result(self, key: str, value: Any) -> None:
         """Store a result in agent memory.
         
@@ -41,9 +59,8 @@ class BaseAgent:
             key: Key to store the value under
             value: Value to store
         """
+        # Persisted in batches by the memory store (write-behind)
         self.memory[key] = value
-        if self.memory_path:
-            self._save_memory()
     
     def get_result(self, key: str, default: Any = None) -> Any:
         """Get a result from agent memory.
@@ -78,22 +95,37 @@ class BaseAgent:
     
     def clear_memory(self) -> None:
         """Clear all stored memory."""
-        self.memory = {}
+        if isinstance(self.memory, AgentMemory):
+            self.memory.clear()
+        else:
+            self.memory = {}
+        # Also drop a legacy JSON file so it is not imported again
         if self.memory_path and os.path.exists(self.memory_path):
             os.remove(self.memory_path)
     
+    def flush_memory(self) -> None:
+        """Write buffered memory changes to persistent storage now."""
+        if isinstance(self.memory, AgentMemory):
+            self.memory.flush()
+    
     def _save_memory(self) -> None:
-        """Save memory to persistent storage."""
+        """Save memory to persistent storage.
+        
+        Only entries read or written since the last save are written, so
+        in-place changes to a loaded entry are persisted too.
+        """
         try:
-            with open(self.memory_path, 'w') as f:
-                json.dump(self.memory, f)
+            if isinstance(self.memory, AgentMemory):
+                self.memory.save()
+            else:
+                with open(self.memory_path, 'w') as f:
+                    json.dump(self.memory, f)
         except Exception as e:
             self.logger.error(f"Failed to save memory: {str(e)}")
     
     def _load_memory(self) -> None:
-        """Load memory from persistent storage."""
+        """Open the persistent memory store (entries are loaded on access)."""
         try:
-            with open(self.memory_path, 'r') as f:
-                self.memory = json.load(f)
+            self.memory = open_agent_memory(self.memory_path, namespaces=self.memory_namespaces)
         except Exception as e:
             self.logger.error(f"Failed to load memory: {str(e)}")
@@ -1,3 +1,5 @@
+import asyncio
+import json
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
@@ -53,101 +55,22 @@ class ChatbotAgent(BaseAgent):
         response = {"status": "success", "response_text": "I'm sorry, I didn't understand that."} # Default response
 
         try:
+            # A message can ask for several things; the sub-queries are independent,
+            # so they run concurrently and their answers are joined in order
+            handlers = []
             if "show summary for document" in user_input.lower():
-                # Example: "show summary for document doc123"
-                parts = user_input.split()
-                doc_id_index = parts.index("document") + 1
-                if doc_id_index < len(parts):
-                    document_id = parts[doc_id_index]
-                    query_task = {
-                        "type": "get_summary",
-                        "tenant_id": tenant_id,
-                        "document_id": document_id
-                    }
-                    summary_result = await self.query_agent.process(query_task)
-                    if summary_result.get("status") == "success":
-                        # Format the summary for the user
-                        summary_data = summary_result.get("results", {})
-                        # Remove internal fields before showing user
-                        if '_id' in summary_data: del summary_data['_id'] 
-                        if 'tenant_id' in summary_data: del summary_data['tenant_id']
-                        response["response_text"] = f"Summary for {document_id}:\n```json\n{json.dumps(summary_data, indent=2, default=str)}\n```" # Added default=str
-                    else:
-                        response["response_text"] = f"Could not retrieve summary for {document_id}. Reason: {summary_result.get('message')}"
-                else:
-                     response["response_text"] = "Please specify the document ID after 'document'."
-
-            elif "list instruments" in user_input.lower():
-                 # Example: "list instruments for document doc123 type bond"
-                 parts = user_input.lower().split()
-                 doc_id = None
-                 criteria = {}
-                 if "document" in parts:
-                     doc_id_index = parts.index("document") + 1
-                     if doc_id_index < len(parts):
-                         doc_id = parts[doc_id_index] # Assuming original case ID is needed later
-                         criteria["document_id"] = doc_id 
-                 # Simple criteria parsing (needs improvement)
-                 if "type" in parts:
-                     type_index = parts.index("type") + 1
-                     if type_index < len(parts):
-                         criteria["type"] = parts[type_index]
-                 
-                 query_task = {
-                     "type": "query_instruments",
-                     "tenant_id": tenant_id,
-                     "query_criteria": criteria,
-                     "limit": 20 # Limit results for chat
-                 }
-                 query_result = await self.query_agent.process(query_task)
-                 if query_result.get("status") == "success":
-                     instruments = query_result.get("results", [])
-                     if instruments:
-                         # Format instruments list
-                         formatted_list = []
-                         for inst in instruments:
-                              # Remove internal fields
-                              if '_id' in inst: del inst['_id']
-                              if 'tenant_id' in inst: del inst['tenant_id']
-                              formatted_list.append(f"- {inst.get('name', 'N/A')} ({inst.get('isin', 'N/A')}), Type: {inst.get('type', 'N/A')}, Value: {inst.get('value', 'N/A')} {inst.get('currency', '')}")
-                         response["response_text"] = f"Found {len(instruments)} instruments:\n" + "\n".join(formatted_list)
-                         if len(instruments) >= query_task["limit"]:
-                              response["response_text"] += "\n(Result limited, refine your query for more specific results)"
-                     else:
-                         response["response_text"] = "No instruments found matching your criteria."
-                 else:
-                     response["response_text"] = f"Could not query instruments. Reason: {query_result.get('message')}"
-
-            elif "generate report" in user_input.lower():
-                 # Example: "generate report instrument table for document doc123"
-                 parts = user_input.lower().split()
-                 doc_id = None
-                 report_type = "instrument_table" # Default or parse
-                 # Basic parsing - needs improvement
-                 if "document" in parts:
-                     doc_id_index = parts.index("document") + 1
-                     if doc_id_index < len(parts):
-                         doc_id = parts[doc_id_index]
-                 
-                 if doc_id:
-                     report_task = {
-                         "type": f"generate_{report_type}", # e.g., generate_instrument_table
-                         "tenant_id": tenant_id,
-                         "document_id": doc_id,
-                         "report_config": {"title": f"Requested Table for {doc_id}"} # Example config
-                     }
-                     report_result = await self.report_agent.process(report_task)
-                     if report_result.get("status") == "success":
-                          # Provide link or summary of the report
-                          report_data = report_result.get("report", {})
-                          response["response_text"] = f"Generated report '{report_data.get('title', 'Report')}' ({report_type}).\nData:\n```json\n{json.dumps(report_data.get('data', 'No data'), indent=2)}\n```" # Simple display for now
-                     else:
-                          response["response_text"] = f"Could not generate report. Reason: {report_result.get('message')}"
-                 else:
-                      response["response_text"] = "Please specify the document ID for the report."
+                handlers.append(self._summary_reply)
+            if "list instruments" in user_input.lower():
+                handlers.append(self._instruments_reply)
+            if "generate report" in user_input.lower():
+                handlers.append(self._report_reply)
 
             # Add more intent handling rules here...
 
+            if handlers:
+                replies = await asyncio.gather(*(handler(tenant_id, user_input) for handler in handlers))
+                response["response_text"] = "\n\n".join(replies)
+
         except Exception as e:
             self.logger.error(f"Error processing user input '{user_input}': {e}", exc_info=True)
             response = {"status": "error", "response_text": "An internal error occurred while processing your request."}
@@ -158,8 +81,96 @@ class ChatbotAgent(BaseAgent):
 
         return response
 
+    async def _summary_reply(self, tenant_id: str, user_input: str) -> str:
+        """Answer "show summary for document <id>"."""
+        # Example: "show summary for document doc123"
+        parts = user_input.split()
+        doc_id_index = parts.index("document") + 1
+        if doc_id_index >= len(parts):
+            return "Please specify the document ID after 'document'."
+        document_id = parts[doc_id_index]
+        query_task = {
+            "type": "get_summary",
+            "tenant_id": tenant_id,
+            "document_id": document_id
+        }
+        summary_result = await self.query_agent.process(query_task)
+        if summary_result.get("status") != "success":
+            return f"Could not retrieve summary for {document_id}. Reason: {summary_result.get('message')}"
+        # Format the summary for the user
+        summary_data = summary_result.get("results", {})
+        # Remove internal fields before showing user
+        if '_id' in summary_data: del summary_data['_id'] 
+        if 'tenant_id' in summary_data: del summary_data['tenant_id']
+        return f"Summary for {document_id}:\n```json\n{json.dumps(summary_data, indent=2, default=str)}\n```" # Added default=str
+
+    async def _instruments_reply(self, tenant_id: str, user_input: str) -> str:
+        """Answer "list instruments [for document <id>] [type <type>]"."""
+        # Example: "list instruments for document doc123 type bond"
+        parts = user_input.lower().split()
+        criteria = {}
+        if "document" in parts:
+            doc_id_index = parts.index("document") + 1
+            if doc_id_index < len(parts):
+                criteria["document_id"] = parts[doc_id_index] # Assuming original case ID is needed later
+        # Simple criteria parsing (needs improvement)
+        if "type" in parts:
+            type_index = parts.index("type") + 1
+            if type_index < len(parts):
+                criteria["type"] = parts[type_index]
+        
+        query_task = {
+            "type": "query_instruments",
+            "tenant_id": tenant_id,
+            "query_criteria": criteria,
+            "limit": 20 # Limit results for chat
+        }
+        query_result = await self.query_agent.process(query_task)
+        if query_result.get("status") != "success":
+            return f"Could not query instruments. Reason: {query_result.get('message')}"
+        instruments = query_result.get("results", [])
+        if not instruments:
+            return "No instruments found matching your criteria."
+        # Format instruments list
+        formatted_list = []
+        for inst in instruments:
+            # Remove internal fields
+            if '_id' in inst: del inst['_id']
+            if 'tenant_id' in inst: del inst['tenant_id']
+            formatted_list.append(f"- {inst.get('name', 'N/A')} ({inst.get('isin', 'N/A')}), Type: {inst.get('type', 'N/A')}, Value: {inst.get('value', 'N/A')} {inst.get('currency', '')}")
+        text = f"Found {len(instruments)} instruments:\n" + "\n".join(formatted_list)
+        if len(instruments) >= query_task["limit"]:
+            text += "\n(Result limited, refine your query for more specific results)"
+        return text
+
+    async def _report_reply(self, tenant_id: str, user_input: str) -> str:
+        """Answer "generate report ... for document <id>"."""
+        # Example: "generate report instrument table for document doc123"
+        parts = user_input.lower().split()
+        doc_id = None
+        report_type = "instrument_table" # Default or parse
+        # Basic parsing - needs improvement
+        if "document" in parts:
+            doc_id_index = parts.index("document") + 1
+            if doc_id_index < len(parts):
+                doc_id = parts[doc_id_index]
+        if not doc_id:
+            return "Please specify the document ID for the report."
+
+        report_task = {
+            "type": f"generate_{report_type}", # e.g., generate_instrument_table
+            "tenant_id": tenant_id,
+            "document_id": doc_id,
+            "report_config": {"title": f"Requested Table for {doc_id}"} # Example config
+        }
+        report_result = await self.report_agent.process(report_task)
+        if report_result.get("status") != "success":
+            return f"Could not generate report. Reason: {report_result.get('message')}"
+        # Provide link or summary of the report
+        report_data = report_result.get("report", {})
+        return f"Generated report '{report_data.get('title', 'Report')}' ({report_type}).\nData:\n```json\n{json.dumps(report_data.get('data', 'No data'), indent=2)}\n```" # Simple display for now
+
 # Helper function for JSON serialization if needed (e.g., for complex objects in responses)
-import json
 class CustomEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, datetime):
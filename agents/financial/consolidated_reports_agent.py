@@ -1,86 +1,69 @@
 # back-repo/agents/financial/consolidated_reports_agent.py
-import asyncio
-from typing import Dict, Any, List, Tuple
-import pandas as pd
+from typing import Dict, Any, Optional
 
 # Assuming BaseAgent is located here, adjust if necessary
 from ..base.base_agent import BaseAgent
+from .report_consolidation import CONSOLIDATION_WORKERS, ReportConsolidator, frame_to_records
 
 class ConsolidatedReportsAgent(BaseAgent):
     """
     Agent responsible for consolidating data from multiple report files using pandas.
     """
+    def __init__(self, name: str = "consolidated_reports", memory_path: Optional[str] = None,
+                 max_workers: int = CONSOLIDATION_WORKERS):
+        """Initialize the consolidated reports agent.
+
+        Args:
+            name: Name of the agent
+            memory_path: Optional path to persist agent memory
+            max_workers: Worker processes used to parse report files
+        """
+        super().__init__(name, memory_path)
+        self.consolidator = ReportConsolidator(max_workers=max_workers)
+
     async def process(self, task: Dict[str, Any]) -> Any:
         """
         Consolidates data from a list of report files (e.g., CSV, Excel).
 
+        Files are parsed in worker processes and aligned to one typed schema
+        (see ``report_consolidation``).
+
         Args:
             task: A dictionary containing the task details.
                   Expected keys:
                   - 'report_files': A list of paths to the report files.
+                  - 'output_path': (Optional) Write the consolidated table to
+                    this Parquet file instead of returning records.
 
         Returns:
-            A tuple containing the consolidated data (e.g., as a list of dicts)
-            and a summary dictionary.
+            A tuple containing the consolidated data (a list of dicts, or the
+            Parquet path if 'output_path' was given) and a summary dictionary.
             Returns None if 'report_files' is missing or processing fails.
         """
         report_files = task.get('report_files')
         if not report_files or not isinstance(report_files, list):
-            # TODO: Implement proper logging
-            print("Error: 'report_files' (list) not found or invalid in task for ConsolidatedReportsAgent.")
+            self.logger.error("'report_files' (list) not found or invalid in task for ConsolidatedReportsAgent.")
             return None
 
-        print(f"ConsolidatedReportsAgent processing files: {report_files}") # Placeholder
+        output_path = task.get('output_path')
+        self.logger.info(f"Consolidating {len(report_files)} report files")
 
         try:
-            # Adapt the synchronous pandas logic.
-            # File I/O and pandas operations are blocking. Run in an executor for real async apps.
-            all_data = []
-            for file_path in report_files:
-                print(f"Reading file: {file_path}") # Placeholder
-                # Simulate reading based on extension - add more types as needed
-                await asyncio.sleep(0.05) # Simulate I/O
-                try:
-                    if file_path.endswith('.csv'):
-                        # df = pd.read_csv(file_path) # Actual pandas call
-                        print(f"Simulating read_csv for {file_path}")
-                        # Placeholder DataFrame structure
-                        df = pd.DataFrame({'col1': [1, 2], 'col2': [3, 4], 'source_file': file_path})
-                    elif file_path.endswith(('.xls', '.xlsx')):
-                        # df = pd.read_excel(file_path) # Actual pandas call
-                        print(f"Simulating read_excel for {file_path}")
-                        df = pd.DataFrame({'colA': ['A', 'B'], 'colB': ['C', 'D'], 'source_file': file_path})
-                    else:
-                        print(f"Warning: Unsupported file type {file_path}, skipping.")
-                        continue
-                    all_data.append(df)
-                except Exception as read_e:
-                    print(f"Error reading file {file_path}: {read_e}") # Log specific file error
-                    # Decide whether to continue or fail the whole task
+            # The consolidation blocks on the worker processes: wait for it in the agent executor
+            consolidated, summary = await self.run_blocking(
+                self.consolidator.consolidate, report_files, output_path=output_path
+            )
 
-            if not all_data:
-                print("No dataframes were successfully read.")
-                return None, {"error": "No data could be read from the provided files."}
+            if summary["total_files_processed"] == 0:
+                self.logger.warning("No report files could be read.")
+                return None, {"error": "No data could be read from the provided files.", **summary}
 
-            # consolidated_df = pd.concat(all_data, ignore_index=True) # Actual pandas call
-            print("Simulating pd.concat")
-            # Combine placeholder data - real concat might need more complex logic
-            # For simplicity, just return the list of placeholder dataframes converted to dicts
-            consolidated_data_list = [df.to_dict(orient='records') for df in all_data]
-
-
-            # Placeholder summary logic
-            summary = {
-                "total_files_processed": len(all_data),
-                "total_records_simulated": sum(len(df) for df in all_data),
-                "files_attempted": len(report_files)
-            }
-
-            print(f"ConsolidatedReportsAgent completed.") # Placeholder
-            # Return list of records instead of DataFrame for easier JSON handling if needed
-            return consolidated_data_list, summary
+            if output_path:
+                return output_path, summary
+            # Converting to records is CPU-bound too
+            records = await self.run_blocking(frame_to_records, consolidated)
+            return records, summary
 
         except Exception as e:
-            # TODO: Implement proper logging
-            print(f"Error consolidating reports for {report_files}: {e}")
-            return None
\ No newline at end of file
+            self.logger.error(f"Error consolidating reports for {report_files}: {e}", exc_info=True)
+            return None
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional, Union
 import pandas as pd
@@ -7,17 +8,18 @@ from datetime import datetime
 
 from ..base.base_agent import BaseAgent
 # Import the specific Gemini processor we validated
-from gemini_financial_processor import GeminiFinancialProcessor, FinancialInstrument
-# Keep other processors if needed for different analyses
-from pdf_processor.extraction.text_extractor import PDFTextExtractor
-from pdf_processor.tables.table_extractor import TableExtractor
-from pdf_processor.analysis.financial_analyzer import FinancialAnalyzer
+from gemini_financial_processor import FinancialInstrument
 # Import database functions
 from database import add_financial_instruments, add_document_summary, get_db
+from agent_framework.holdings_store import get_holdings_store
+from agent_framework.registry import get_service
 
 class FinancialAgent(BaseAgent):
     """Agent specialized in financial document analysis."""
     
+    # Each cached document, template and report is stored as its own memory entry
+    memory_namespaces = ("documents", "templates", "reports")
+    
     def __init__(self, name: str = "financial", memory_path: Optional[str] = None):
         """Initialize the financial agent.
         
@@ -28,15 +30,16 @@ class FinancialAgent(BaseAgent):
         super().__init__(name, memory_path)
         # Instantiate the Gemini processor (ensure API key is available via Config/dotenv)
         try:
-            self.gemini_processor = GeminiFinancialProcessor()
+            self.gemini_processor = get_service("gemini_financial_processor")
         except ValueError as e:
             self.logger.error(f"Failed to initialize GeminiFinancialProcessor: {e}. Agent may not function correctly for instrument extraction.")
             self.gemini_processor = None # Handle initialization failure gracefully
         
         # Keep other tools if they serve different purposes (e.g., basic text/table extraction for other analyses)
-        self.text_extractor = PDFTextExtractor()
-        self.table_extractor = TableExtractor()
-        self.financial_analyzer = FinancialAnalyzer() # May be used for non-instrument analysis
+        # Shared per process through the service registry
+        self.text_extractor = get_service("pdf_text_extractor")
+        self.table_extractor = get_service("table_extractor")
+        self.financial_analyzer = get_service("financial_analyzer") # May be used for non-instrument analysis
         
         # Initialize memory structures if they don't exist
         if "documents" not in self.memory:
@@ -117,9 +120,14 @@ class FinancialAgent(BaseAgent):
             # --- Primary Instrument Extraction using Gemini ---
             instruments_to_save = []
             if self.gemini_processor:
-                self.logger.info(f"Processing document for instrument extraction using Gemini: {pdf_path}")
-                # process_document returns a list of FinancialInstrument Pydantic objects
-                extracted_instruments = self.gemini_processor.process_document(pdf_path)
+                extraction_mode = task.get("extraction_mode", "chunked")
+                self.logger.info(f"Processing document for instrument extraction using Gemini ({extraction_mode}): {pdf_path}")
+                # Both modes return a list of FinancialInstrument Pydantic objects
+                if extraction_mode == "chunked":
+                    # Page-level requests with bounded concurrency; unchanged pages come from cache
+                    extracted_instruments = await self.gemini_processor.process_document_chunked(pdf_path)
+                else:
+                    extracted_instruments = await self.run_blocking(self.gemini_processor.process_document, pdf_path)
                 if extracted_instruments:
                      # Convert Pydantic models to dictionaries for saving
                     instruments_to_save = [inst.model_dump() for inst in extracted_instruments]
@@ -136,8 +144,11 @@ class FinancialAgent(BaseAgent):
             # Example: Get overall text summary or analyze specific tables differently.
             
             self.logger.info(f"Performing additional analysis (text/tables) on {pdf_path}")
-            text_data = self.text_extractor.extract_document(pdf_path) # Still useful for context/other analysis
-            tables_data = self.table_extractor.extract_tables(pdf_path) # Still useful
+            # Text (context/other analysis) and tables are independent: extract them concurrently
+            text_data, tables_data = await asyncio.gather(
+                self.run_blocking(self.text_extractor.extract_document, pdf_path),
+                self.run_blocking(self.table_extractor.extract_tables, pdf_path),
+            )
             
             # Use FinancialAnalyzer for other metrics if needed
             other_financial_metrics = {}
@@ -159,19 +170,37 @@ class FinancialAgent(BaseAgent):
             }
             
             # Store results in Database
+            # The two writes are independent: run them concurrently in the agent executor
             db_success = True
+            writes = {}
             if instruments_to_save:
                 self.logger.info(f"Attempting to save {len(instruments_to_save)} instruments to DB for doc {doc_id}, tenant {tenant_id}")
-                if not add_financial_instruments(document_id=doc_id, tenant_id=tenant_id, instruments_data=instruments_to_save):
-                    self.logger.error(f"Failed to save financial instruments to DB for doc {doc_id}")
-                    db_success = False # Mark as failed but continue to save summary if possible
-            
+                writes["instruments"] = self.run_blocking(add_financial_instruments, document_id=doc_id, tenant_id=tenant_id, instruments_data=instruments_to_save)
             if summary_to_save:
                 self.logger.info(f"Attempting to save document summary to DB for doc {doc_id}, tenant {tenant_id}")
-                if not add_document_summary(document_id=doc_id, tenant_id=tenant_id, summary_data=summary_to_save):
-                     self.logger.error(f"Failed to save document summary to DB for doc {doc_id}")
-                     db_success = False # Mark as failed
+                writes["summary"] = self.run_blocking(add_document_summary, document_id=doc_id, tenant_id=tenant_id, summary_data=summary_to_save)
+            saved = dict(zip(writes, await asyncio.gather(*writes.values())))
             
+            if "instruments" in saved and not saved["instruments"]:
+                self.logger.error(f"Failed to save financial instruments to DB for doc {doc_id}")
+                db_success = False # Mark as failed; the summary is saved independently
+            if "summary" in saved and not saved["summary"]:
+                self.logger.error(f"Failed to save document summary to DB for doc {doc_id}")
+                db_success = False # Mark as failed
+            
+            # Append to the tenant's holdings time series used by portfolio analytics
+            if instruments_to_save:
+                try:
+                    await self.run_blocking(
+                        get_holdings_store().append_document,
+                        tenant_id,
+                        doc_id,
+                        task.get("statement_date") or datetime.now(),
+                        instruments_to_save,
+                    )
+                except Exception as e:
+                    self.logger.error(f"Failed to append holdings for doc {doc_id}: {e}")
+
             # Optionally, store raw/intermediate data in agent memory or separate DB collection if needed
             # self.memory["documents"][doc_id] = { ... } # If local caching is still desired
             # if self.memory_path:
@@ -242,7 +271,7 @@ class FinancialAgent(BaseAgent):
         page_numbers = task.get("page_numbers")
         
         try:
-            tables_data = self.table_extractor.extract_tables(pdf_path, page_numbers)
+            tables_data = await self.run_blocking(self.table_extractor.extract_tables, pdf_path, page_numbers)
             
             # Convert tables to DataFrames
             tables_df = {}
@@ -291,19 +320,16 @@ class FinancialAgent(BaseAgent):
             }
         
         try:
-            analyses = []
-            
-            for table in tables:
-                # Convert dict back to DataFrame
-                df_dict = table.get("dataframe")
-                if df_dict:
-                    df = pd.DataFrame.from_dict(df_dict)
-                    analysis = self.financial_analyzer.analyze_financial_table(df)
-                    
-                    analyses.append({
-                        "table_id": table.get("id"),
-                        "analysis": analysis
-                    })
+            # Convert dicts back to DataFrames and analyze them in one batch
+            tables = [table for table in tables if table.get("dataframe")]
+            frames = [pd.DataFrame.from_dict(table["dataframe"]) for table in tables]
+            analyses = [
+                {
+                    "table_id": table.get("id"),
+                    "analysis": analysis
+                }
+                for table, analysis in zip(tables, self.financial_analyzer.analyze_financial_tables(frames))
+            ]
             
             return {
                 "status": "success",
@@ -0,0 +1,375 @@
+"""
+Consolidation engine for report files (CSV / Excel custody exports).
+
+Files are parsed concurrently in worker processes, each into a DataFrame with
+normalized column names and a column kind per column (integer, float, boolean,
+datetime, string; 'empty' for columns without any value, which do not
+constrain the unified kind). The kinds of all files are unified into one typed schema,
+every file is aligned to it and the files are combined with a single
+``pd.concat``. Summary statistics are computed per column on the combined
+table, not per record.
+
+With an output path the result is written to Parquet instead: workers spill
+their parsed file to a temporary Parquet part and only return its schema, and
+the parts are then aligned and appended to the output one at a time, so memory
+stays bounded by the largest file rather than the whole consolidation.
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import uuid
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Worker processes used to parse files (default: number of cores)
+CONSOLIDATION_WORKERS = int(os.environ.get("CONSOLIDATION_WORKERS", "0")) or (os.cpu_count() or 1)
+SUPPORTED_EXTENSIONS = ('.csv', '.xls', '.xlsx')
+SOURCE_COLUMN = 'source_file'
+
+# Column kind -> pandas dtype of the consolidated table (nullable where possible)
+KIND_DTYPES = {
+    'integer': 'Int64',
+    'float': 'float64',
+    'boolean': 'boolean',
+    'datetime': 'datetime64[ns]',
+    'string': 'string',
+}
+
+_NUMBER_NOISE = re.compile(r'[,\s]')
+# Codes such as account numbers: leading zeros would be lost as numbers
+_LEADING_ZERO = re.compile(r'^\s*0\d')
+_DATE_COLUMN = re.compile(r'date|time|as_of|period')
+
+
+def normalize_column(name: Any) -> str:
+    """Column name used to align files: stripped, lower case, spaces as underscores."""
+    return re.sub(r'\s+', '_', str(name).strip().lower())
+
+
+def _unique_columns(columns: Sequence[Any]) -> List[str]:
+    seen: Dict[str, int] = {}
+    result = []
+    for column in columns:
+        name = normalize_column(column)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        result.append(name)
+    return result
+
+
+def _typed_column(series: pd.Series, name: str) -> Tuple[pd.Series, str]:
+    """The column converted to its kind (numbers and dates stored as text are parsed)."""
+    if pd.api.types.is_bool_dtype(series):
+        return series, 'boolean'
+    if pd.api.types.is_integer_dtype(series):
+        return series, 'integer'
+    if pd.api.types.is_float_dtype(series):
+        return series, 'float'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, 'datetime'
+
+    present = series.notna()
+    if not present.any():
+        # Blank in this file: the other files decide the column's kind
+        return series, 'empty'
+    text = series[present].astype(str)
+    # A column converts only if every value does: check the first value before the whole column
+    first = text.iloc[0]
+    if _parses_as_number(first) and not _LEADING_ZERO.match(first):
+        try:
+            numbers = text.astype('float64')
+        except (TypeError, ValueError):
+            numbers = pd.to_numeric(text, errors='coerce')
+            failed = numbers.isna()
+            # Thousands separators ("1,234.50")
+            numbers[failed] = pd.to_numeric(text[failed].str.replace(',', '', regex=False).str.strip(), errors='coerce')
+        if numbers.notna().all() and not text.str.match(_LEADING_ZERO).any():
+            converted = pd.Series(np.nan, index=series.index)
+            converted[present] = numbers
+            if (numbers == numbers.round()).all():
+                return converted.astype('Int64'), 'integer'
+            return converted, 'float'
+    if _DATE_COLUMN.search(name):
+        with warnings.catch_warnings():
+            # Values not in the inferred format become NaT and keep the column as text
+            warnings.simplefilter('ignore', UserWarning)
+            dates = pd.to_datetime(text, errors='coerce')
+        if dates.notna().all():
+            converted = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+            converted[present] = dates
+            return converted, 'datetime'
+    return series, 'string'
+
+
+def _parses_as_number(value: str) -> bool:
+    try:
+        float(_NUMBER_NOISE.sub('', value))
+        return True
+    except ValueError:
+        return False
+
+
+def read_report(file_path: str) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """Read one report file with typed, normalized columns.
+
+    Returns:
+        (DataFrame, {column: kind})
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    lower = file_path.lower()
+    if not lower.endswith(SUPPORTED_EXTENSIONS):
+        raise ValueError(f"Unsupported file type: {file_path}")
+    # CSV cells are read as text and typed here, so codes keep their leading zeros
+    df = pd.read_csv(file_path, dtype=str) if lower.endswith('.csv') else pd.read_excel(file_path)
+
+    df.columns = _unique_columns(df.columns)
+    schema = {}
+    for column in df.columns:
+        df[column], schema[column] = _typed_column(df[column], column)
+    return df, schema
+
+
+def parse_report(file_path: str, spill_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Worker entry point: parse a file, optionally spilling it to a Parquet part.
+
+    Returns:
+        Dict with ``source_file``, ``rows``, ``schema`` and either ``frame`` or
+        ``part_path``; ``error`` is set instead if the file could not be read
+    """
+    try:
+        df, schema = read_report(file_path)
+    except Exception as e:
+        return {'source_file': file_path, 'error': f"{type(e).__name__}: {e}"}
+
+    result = {'source_file': file_path, 'rows': len(df), 'schema': schema, 'frame': None, 'part_path': None}
+    if spill_dir is None:
+        result['frame'] = df
+    else:
+        part_path = os.path.join(spill_dir, f"part-{uuid.uuid4().hex}.parquet")
+        df.to_parquet(part_path, index=False)
+        result['part_path'] = part_path
+    return result
+
+
+def unify_schemas(schemas: Sequence[Dict[str, str]]) -> Dict[str, str]:
+    """One kind per column over all files (columns in first-seen order).
+
+    Files where the column is empty are ignored. Integer and float columns
+    unify to float; any other mix becomes string, as do columns that are
+    empty in every file.
+    """
+    kinds: Dict[str, set] = {}
+    for schema in schemas:
+        for column, kind in schema.items():
+            column_kinds = kinds.setdefault(column, set())
+            if kind != 'empty':
+                column_kinds.add(kind)
+
+    unified = {}
+    for column, column_kinds in kinds.items():
+        if not column_kinds:
+            unified[column] = 'string'
+        elif len(column_kinds) == 1:
+            unified[column] = next(iter(column_kinds))
+        elif column_kinds <= {'integer', 'float'}:
+            unified[column] = 'float'
+        else:
+            unified[column] = 'string'
+    return unified
+
+
+def align_frame(df: pd.DataFrame, schema: Dict[str, str], source_file: str,
+                sources: Sequence[str]) -> pd.DataFrame:
+    """The file's rows with every schema column, in schema order and dtype."""
+    columns = {}
+    for column, kind in schema.items():
+        dtype = pd.api.types.pandas_dtype(KIND_DTYPES[kind])
+        if column not in df.columns:
+            columns[column] = pd.Series(pd.NaT if kind == 'datetime' else pd.NA, index=df.index, dtype=dtype)
+        elif df[column].dtype == dtype:
+            columns[column] = df[column]
+        else:
+            columns[column] = df[column].astype(dtype)
+    aligned = pd.DataFrame(columns, index=df.index)
+    categories = list(dict.fromkeys(sources))
+    aligned[SOURCE_COLUMN] = pd.Categorical.from_codes(
+        np.full(len(df), categories.index(source_file)), categories=categories)
+    return aligned.reset_index(drop=True)
+
+
+def column_statistics(df: pd.DataFrame) -> pd.DataFrame:
+    """count / sum / min / max of each numeric column, indexed by column."""
+    numeric = df.select_dtypes(include='number')
+    values = numeric.to_numpy(dtype=float, na_value=np.nan)
+    present = ~np.isnan(values)
+    count = present.sum(axis=0)
+    has_values = count > 0
+    # Columns without values get NaN instead of the all-NaN warnings of nanmin / nanmax
+    filled_low = np.where(present, values, np.inf)
+    filled_high = np.where(present, values, -np.inf)
+    return pd.DataFrame({
+        'count': count.astype(float),
+        'sum': np.where(present, values, 0.0).sum(axis=0),
+        'min': np.where(has_values, filled_low.min(axis=0, initial=np.inf), np.nan),
+        'max': np.where(has_values, filled_high.max(axis=0, initial=-np.inf), np.nan),
+    }, index=numeric.columns)
+
+
+def combine_statistics(parts: Sequence[pd.DataFrame]) -> Dict[str, Dict[str, Any]]:
+    """Summary per numeric column from the statistics of one or more parts."""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return {}
+    stacked = pd.concat(parts)
+    grouped = stacked.groupby(level=0, sort=False)
+    combined = pd.DataFrame({
+        'count': grouped['count'].sum(),
+        'sum': grouped['sum'].sum(),
+        'min': grouped['min'].min(),
+        'max': grouped['max'].max(),
+    })
+    combined['mean'] = combined['sum'] / combined['count'].where(combined['count'] > 0)
+    combined = combined.astype(object).where(combined.notna(), None)
+    combined['count'] = combined['count'].map(lambda v: int(v) if v is not None else 0)
+    return combined.to_dict(orient='index')
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-friendly records: missing values become None."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+class ReportConsolidator:
+    """Consolidates report files into one typed table (see module docstring)."""
+
+    def __init__(self, max_workers: int = CONSOLIDATION_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # Started once and reused by every consolidation. Workers are spawned, not
+                # forked: consolidations run on agent executor threads of a threaded process.
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def close(self) -> None:
+        """Stop the worker processes (a later consolidation starts new ones)."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _parse_all(self, report_files: Sequence[str], spill_dir: Optional[str]) -> List[Dict[str, Any]]:
+        # Handing work to processes costs more than parsing a single file
+        if self.max_workers <= 1 or len(report_files) <= 1:
+            return [parse_report(path, spill_dir) for path in report_files]
+        return list(self._pool().map(parse_report, report_files, [spill_dir] * len(report_files),
+                                     chunksize=max(1, len(report_files) // (self.max_workers * 4))))
+
+    def consolidate(self, report_files: Sequence[str],
+                    output_path: Optional[str] = None) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+        """Consolidate report files.
+
+        Args:
+            report_files: Paths of CSV / Excel files
+            output_path: Write the consolidated table to this Parquet file
+                instead of returning it
+
+        Returns:
+            (consolidated DataFrame, or None if written to ``output_path`` or
+            nothing could be read; summary dict)
+        """
+        if output_path and not PYARROW_AVAILABLE:
+            raise RuntimeError("Parquet output requires pyarrow")
+
+        if output_path:
+            output_dir = os.path.dirname(os.path.abspath(output_path))
+            os.makedirs(output_dir, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=output_dir, prefix='.consolidation-') as spill_dir:
+                parsed = self._parse_all(report_files, spill_dir)
+                return None, self._write_parquet(parsed, report_files, output_path)
+
+        parsed = self._parse_all(report_files, None)
+        ok = [result for result in parsed if 'error' not in result]
+        schema = unify_schemas([result['schema'] for result in ok])
+        summary = self._summary(parsed, report_files, schema)
+        if not ok:
+            return None, summary
+
+        consolidated = pd.concat(
+            [align_frame(result['frame'], schema, result['source_file'], report_files) for result in ok],
+            ignore_index=True,
+        )
+        summary['numeric_summary'] = combine_statistics([column_statistics(consolidated)])
+        return consolidated, summary
+
+    def _write_parquet(self, parsed: List[Dict[str, Any]], report_files: Sequence[str],
+                       output_path: str) -> Dict[str, Any]:
+        ok = [result for result in parsed if 'error' not in result]
+        schema = unify_schemas([result['schema'] for result in ok])
+        summary = self._summary(parsed, report_files, schema)
+        if not ok:
+            return summary
+
+        statistics = []
+        writer = None
+        try:
+            for result in ok:
+                part = align_frame(pd.read_parquet(result['part_path']), schema,
+                                   result['source_file'], report_files)
+                os.remove(result['part_path'])
+                statistics.append(column_statistics(part))
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+
+        summary['numeric_summary'] = combine_statistics(statistics)
+        summary['output_path'] = output_path
+        return summary
+
+    @staticmethod
+    def _summary(parsed: List[Dict[str, Any]], report_files: Sequence[str],
+                 schema: Dict[str, str]) -> Dict[str, Any]:
+        ok = [result for result in parsed if 'error' not in result]
+        failed = {result['source_file']: result['error'] for result in parsed if 'error' in result}
+        for path, error in failed.items():
+            logger.warning(f"Could not read report file {path}: {error}")
+        return {
+            "total_files_processed": len(ok),
+            "total_records": sum(result['rows'] for result in ok),
+            "files_attempted": len(report_files),
+            "failed_files": failed,
+            "records_per_file": {result['source_file']: result['rows'] for result in ok},
+            "columns": dict(schema),
+            "numeric_summary": {},
+        }
@@ -1,9 +1,10 @@
 import os
-import json
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from .memory_store import open_agent_memory
+
 class MemoryManager:
     """Manager for persistent agent memory storage."""
     
@@ -15,6 +16,7 @@ class MemoryManager:
         """
         self.storage_dir = storage_dir
         self.logger = logging.getLogger("memory_manager")
+        self._global_memory = None
         
         # Create storage directory if it doesn't exist
         os.makedirs(storage_dir, exist_ok=True)
@@ -40,23 +42,10 @@ class MemoryManager:
         Returns:
             True if successful, False otherwise
         """
-        global_memory_path = os.path.join(self.storage_dir, "global.json")
-        
         try:
-            # Load existing memory
-            memory = {}
-            if os.path.exists(global_memory_path):
-                with open(global_memory_path, 'r') as f:
-                    memory = json.load(f)
-            
-            # Update memory
+            memory = self._get_global_store()
             memory[key] = value
             memory["_last_updated"] = datetime.now().isoformat()
-            
-            # Save memory
-            with open(global_memory_path, 'w') as f:
-                json.dump(memory, f)
-                
             return True
             
         except Exception as e:
@@ -73,24 +62,24 @@ class MemoryManager:
         Returns:
             Value if found, default otherwise
         """
-        global_memory_path = os.path.join(self.storage_dir, "global.json")
-        
         try:
-            # Check if memory file exists
-            if not os.path.exists(global_memory_path):
-                return default
-                
-            # Load memory
-            with open(global_memory_path, 'r') as f:
-                memory = json.load(f)
-                
-            # Return value if found
-            return memory.get(key, default)
+            return self._get_global_store().get(key, default)
             
         except Exception as e:
             self.logger.error(f"Error getting global memory: {str(e)}")
             return default
     
+    def flush(self) -> None:
+        """Write buffered global memory changes to storage now."""
+        if self._global_memory is not None:
+            self._global_memory.flush()
+    
+    def _get_global_store(self):
+        """Open the global memory store on first use (entries are read per key)."""
+        if self._global_memory is None:
+            self._global_memory = open_agent_memory(os.path.join(self.storage_dir, "global.json"))
+        return self._global_memory
+    
     def list_all_memories(self) -> Dict[str, Any]:
         """List all stored memories.
         
@@ -100,14 +89,20 @@ class MemoryManager:
         memories = {}
         
         try:
-            for filename in os.listdir(self.storage_dir):
-                if filename.endswith(".json"):
-                    agent_name = os.path.splitext(filename)[0]
-                    memory_path = os.path.join(self.storage_dir, filename)
-                    
-                    with open(memory_path, 'r') as f:
-                        memory = json.load(f)
-                        memories[agent_name] = memory
+            for filename in sorted(os.listdir(self.storage_dir)):
+                agent_name, ext = os.path.splitext(filename)
+                if ext not in (".json", ".sqlite") or agent_name in memories:
+                    continue
+                
+                # Read through the configured backend (imports legacy JSON files)
+                memory_path = os.path.join(self.storage_dir, f"{agent_name}.json")
+                if agent_name == "global" and self._global_memory is not None:
+                    memory = self._global_memory
+                else:
+                    memory = open_agent_memory(memory_path)
+                memories[agent_name] = memory.to_dict()
+                if memory is not self._global_memory:
+                    memory.close()
                         
             return memories
             
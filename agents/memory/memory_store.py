@@ -0,0 +1,498 @@
+"""
+Key-value storage backends for agent memory.
+
+Agent memory used to be a single JSON file that was parsed completely on
+startup and rewritten completely on every store. ``AgentMemory`` is a dict-like
+front end that instead reads entries lazily, one key at a time, and buffers
+writes (write-behind) so they reach the backend in batches.
+
+Large collections (e.g. the financial agent's ``documents``) can be declared as
+*namespaces*: ``memory["documents"]`` then returns a view whose entries are
+stored as separate rows, so caching one more analysis writes one row instead of
+the whole collection.
+
+Backends:
+    - ``SQLiteMemoryBackend`` (default): one row per (namespace, key)
+    - ``JsonFileMemoryBackend``: the legacy single-file format
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = os.environ.get("AGENT_MEMORY_BACKEND", "sqlite")
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("AGENT_MEMORY_FLUSH_INTERVAL", "2.0"))
+DEFAULT_MAX_PENDING = int(os.environ.get("AGENT_MEMORY_MAX_PENDING", "100"))
+
+# Top-level (non-namespaced) keys live in the empty namespace
+ROOT = ""
+
+_MISSING = object()
+_DELETED = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+# (namespace, key, value or _DELETED)
+Write = Tuple[str, str, Any]
+
+
+class SQLiteMemoryBackend:
+    """Memory entries stored as JSON values in an indexed SQLite table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, namespace: str, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM memory WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else _MISSING
+
+    def contains(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM memory WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return row is not None
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM memory WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def namespaces(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT namespace FROM memory WHERE namespace != ?", (ROOT,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM memory LIMIT 1").fetchone() is None
+
+    def write_many(self, writes: Sequence[Write]) -> None:
+        now = datetime.now().isoformat()
+        upserts = [(ns, key, json.dumps(value), now) for ns, key, value in writes if value is not _DELETED]
+        deletes = [(ns, key) for ns, key, value in writes if value is _DELETED]
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO memory (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                    upserts)
+            if deletes:
+                self._conn.executemany("DELETE FROM memory WHERE namespace = ? AND key = ?", deletes)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM memory")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JsonFileMemoryBackend:
+    """Legacy format: the whole memory in one JSON file, namespaces as nested dicts.
+
+    The file is parsed on first access and rewritten once per flushed batch.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as f:
+                        self._data = json.load(f)
+                except Exception as e:
+                    logger.error(f"Failed to load memory from {self.path}: {str(e)}")
+        return self._data
+
+    def _container(self, namespace: str, create: bool = False) -> Optional[Dict[str, Any]]:
+        data = self._load()
+        if namespace == ROOT:
+            return data
+        container = data.get(namespace)
+        if not isinstance(container, dict):
+            if not create:
+                return None
+            container = data[namespace] = {}
+        return container
+
+    def get(self, namespace: str, key: str) -> Any:
+        with self._lock:
+            container = self._container(namespace)
+            return container.get(key, _MISSING) if container is not None else _MISSING
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return self.get(namespace, key) is not _MISSING
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            container = self._container(namespace)
+            return list(container) if container is not None else []
+
+    def namespaces(self) -> List[str]:
+        # Namespaces are nested dicts inside the root object
+        return []
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not self._load()
+
+    def write_many(self, writes: Sequence[Write]) -> None:
+        with self._lock:
+            for namespace, key, value in writes:
+                container = self._container(namespace, create=value is not _DELETED)
+                if value is _DELETED:
+                    if container is not None:
+                        container.pop(key, None)
+                else:
+                    container[key] = value
+            self._dump()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def close(self) -> None:
+        pass
+
+    def _dump(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
+
+
+# Memories with pending writes are flushed when the interpreter exits
+_open_memories: "weakref.WeakSet[AgentMemory]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_memories() -> None:
+    for memory in list(_open_memories):
+        try:
+            memory.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush agent memory on exit: {str(e)}")
+
+
+class NamespaceView(MutableMapping):
+    """Dict-like view of one namespace; every entry is stored as its own key."""
+
+    def __init__(self, memory: "AgentMemory", namespace: str):
+        self._memory = memory
+        self.namespace = namespace
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._memory._get(self.namespace, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._memory._set(self.namespace, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._memory._set(self.namespace, key, _DELETED)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._memory._contains(self.namespace, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._memory._keys(self.namespace))
+
+    def __len__(self) -> int:
+        return len(self._memory._keys(self.namespace))
+
+    def __repr__(self) -> str:
+        return f"NamespaceView({self.namespace!r}, {len(self)} entries)"
+
+
+class AgentMemory(MutableMapping):
+    """Dict-like agent memory with lazy per-key reads and write-behind batching.
+
+    Writes are buffered and flushed when ``max_pending`` writes are waiting,
+    ``flush_interval`` seconds after the first buffered write, on ``save()`` /
+    ``flush()`` / ``close()``, and at interpreter exit. Entries handed out to
+    callers may be mutated in place (``memory["documents"][doc_id]["status"] = ...``):
+    reading a dict or list entry marks its key dirty, and the next flush writes
+    back the dirty keys only. The batch is serialized and written under the
+    memory lock.
+
+    Args:
+        backend: Storage backend (see ``SQLiteMemoryBackend``)
+        namespaces: Top-level keys whose entries are stored individually
+        flush_interval: Maximum seconds a write stays buffered
+        max_pending: Number of buffered writes that triggers a flush
+    """
+
+    def __init__(self, backend, namespaces: Iterable[str] = (),
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.backend = backend
+        self.namespaces = tuple(namespaces)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._cache: Dict[Tuple[str, str], Any] = {}
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        # Keys whose (mutable) cached value was handed out since the last flush
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        _open_memories.add(self)
+
+    # Compare by identity: Mapping equality would load every entry
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    # Internal per-key access, shared with NamespaceView
+
+    def _get(self, namespace: str, key: str, track: bool = True) -> Any:
+        with self._lock:
+            entry = (namespace, key)
+            if entry in self._pending:
+                value = self._pending[entry]
+                return _MISSING if value is _DELETED else value
+            if entry not in self._cache:
+                self._cache[entry] = self.backend.get(namespace, key)
+            value = self._cache[entry]
+            # The caller may change a dict or list in place
+            if track and isinstance(value, (dict, list)):
+                self._dirty.add(entry)
+            return value
+
+    def _contains(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            entry = (namespace, key)
+            if entry in self._pending:
+                return self._pending[entry] is not _DELETED
+            if entry in self._cache:
+                return self._cache[entry] is not _MISSING
+        return self.backend.contains(namespace, key)
+
+    def _keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            keys = dict.fromkeys(self.backend.keys(namespace))
+            for (ns, key), value in self._pending.items():
+                if ns != namespace:
+                    continue
+                if value is _DELETED:
+                    keys.pop(key, None)
+                else:
+                    keys[key] = None
+            return list(keys)
+
+    def _set(self, namespace: str, key: str, value: Any) -> None:
+        with self._lock:
+            entry = (namespace, key)
+            self._pending[entry] = value
+            self._cache[entry] = _MISSING if value is _DELETED else value
+            if len(self._pending) >= self.max_pending:
+                self.flush()
+            elif self._timer is None and self.flush_interval > 0:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    # Mapping interface for top-level keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.namespaces:
+            return NamespaceView(self, key)
+        value = self._get(ROOT, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self.namespaces:
+            # Assigning a whole collection replaces the namespace contents
+            view = NamespaceView(self, key)
+            for existing in list(view):
+                if existing not in value:
+                    del view[existing]
+            for item_key, item_value in dict(value).items():
+                view[item_key] = item_value
+            return
+        self._set(ROOT, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key in self.namespaces:
+            NamespaceView(self, key).clear()
+            return
+        if not self._contains(ROOT, key):
+            raise KeyError(key)
+        self._set(ROOT, key, _DELETED)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self.namespaces:
+            return True
+        return isinstance(key, str) and self._contains(ROOT, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.namespaces) + [k for k in self._keys(ROOT) if k not in self.namespaces])
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the full memory (loads every entry, including undeclared namespaces)."""
+        result = {}
+        # A read-only snapshot: entries read here are not marked dirty
+        for key in self:
+            if key in self.namespaces:
+                result[key] = self._namespace_dict(key)
+            else:
+                result[key] = self._get(ROOT, key, track=False)
+        for namespace in self.backend.namespaces():
+            if namespace not in self.namespaces:
+                result[namespace] = self._namespace_dict(namespace)
+        return result
+
+    def _namespace_dict(self, namespace: str) -> Dict[str, Any]:
+        items = ((key, self._get(namespace, key, track=False)) for key in self._keys(namespace))
+        return {key: value for key, value in items if value is not _MISSING}
+
+    # Persistence
+
+    def save(self) -> None:
+        """Persist everything written or changed in place since the last flush."""
+        self.flush()
+
+    def flush(self) -> None:
+        """Write buffered writes and in-place changes to the backend in one batch."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            for entry in self._dirty:
+                value = self._cache.get(entry, _MISSING)
+                if value is not _MISSING and entry not in self._pending:
+                    self._pending[entry] = value
+            if not self._pending:
+                self._dirty.clear()
+                return
+            writes = [(ns, key, value) for (ns, key), value in self._pending.items()]
+            try:
+                self.backend.write_many(writes)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(writes)} memory writes: {str(e)}")
+                return
+            self._pending.clear()
+            self._dirty.clear()
+            # Keep the read cache from growing without bound (everything in it is persisted now)
+            if len(self._cache) > self.max_pending * 10:
+                self._cache.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+            self._dirty.clear()
+            self._cache.clear()
+            self.backend.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.backend.close()
+        _open_memories.discard(self)
+
+
+def _import_legacy_json(memory: AgentMemory, json_path: str) -> None:
+    """Copy a legacy JSON memory file into an empty key-value store (once)."""
+    try:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to import legacy memory {json_path}: {str(e)}")
+        return
+
+    writes: List[Write] = []
+    for key, value in data.items():
+        if key in memory.namespaces and isinstance(value, dict):
+            writes.extend((key, item_key, item_value) for item_key, item_value in value.items())
+        else:
+            writes.append((ROOT, key, value))
+    memory.backend.write_many(writes)
+    logger.info(f"Imported {len(writes)} memory entries from {json_path}")
+
+
+def storage_path(memory_path: str, backend: str = DEFAULT_BACKEND) -> str:
+    """Path of the file actually used for a (``.json``) memory path."""
+    if backend == "json":
+        return memory_path
+    root, ext = os.path.splitext(memory_path)
+    return f"{root}.sqlite" if ext == ".json" else memory_path
+
+
+def open_agent_memory(memory_path: str, namespaces: Sequence[str] = (),
+                      backend: str = DEFAULT_BACKEND, **kwargs) -> AgentMemory:
+    """Open the memory stored at ``memory_path``.
+
+    With the SQLite backend a ``.json`` path is mapped to a ``.sqlite`` file next
+    to it; an existing JSON file is imported on first use.
+
+    Args:
+        memory_path: Memory path as configured for the agent
+        namespaces: Top-level keys whose entries are stored individually
+        backend: "sqlite" or "json"
+        **kwargs: Passed on to ``AgentMemory``
+
+    Returns:
+        AgentMemory instance
+    """
+    if backend == "json":
+        return AgentMemory(JsonFileMemoryBackend(memory_path), namespaces, **kwargs)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown agent memory backend: {backend}")
+
+    path = storage_path(memory_path, backend)
+    memory = AgentMemory(SQLiteMemoryBackend(path), namespaces, **kwargs)
+    if path != memory_path and os.path.exists(memory_path) and memory.backend.is_empty():
+        _import_legacy_json(memory, memory_path)
+    return memory
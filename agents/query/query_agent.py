@@ -1,7 +1,8 @@
 import logging
 from typing import Dict, List, Any, Optional
 from ..base.base_agent import BaseAgent
-from database import query_instruments, get_document_summary # Import necessary DB functions
+# Async variants: Motor if available, otherwise the blocking call runs in the agent executor
+from database import query_instruments_async, get_document_summary_async
 
 class QueryAgent(BaseAgent):
     """Agent specialized in querying stored financial data."""
@@ -41,7 +42,7 @@ class QueryAgent(BaseAgent):
                  return {"status": "error", "message": "query_criteria must be a dictionary."}
             
             self.logger.info(f"Querying instruments for tenant {tenant_id} with criteria: {criteria}")
-            results = query_instruments(tenant_id=tenant_id, query_criteria=criteria, limit=limit)
+            results = await query_instruments_async(tenant_id=tenant_id, query_criteria=criteria, limit=limit)
             return {"status": "success", "results": results}
 
         elif task_type == "get_summary":
@@ -50,7 +51,7 @@ class QueryAgent(BaseAgent):
                  return {"status": "error", "message": "Missing document_id for get_summary task."}
             
             self.logger.info(f"Getting summary for document {document_id}, tenant {tenant_id}")
-            summary = get_document_summary(document_id=document_id, tenant_id=tenant_id)
+            summary = await get_document_summary_async(document_id=document_id, tenant_id=tenant_id)
             if summary:
                 return {"status": "success", "results": summary}
             else:
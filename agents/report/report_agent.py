@@ -1,11 +1,12 @@
 import logging
+import math
 from typing import Dict, List, Any, Optional
-import pandas as pd
 from datetime import datetime
 
 from ..base.base_agent import BaseAgent
-# Assuming QueryAgent might be used, or direct DB access
-from database import query_instruments, get_document_summary, get_financial_instruments 
+# Report data is aggregated in MongoDB (see database.py "Report Aggregations" and "Async Access")
+from database import (get_document_summary_async, aggregate_instrument_table_async,
+                      aggregate_document_comparison_async)
 
 class ReportAgent(BaseAgent):
     """Agent specialized in generating financial reports."""
@@ -40,7 +41,7 @@ class ReportAgent(BaseAgent):
             document_id = task.get("document_id")
             if not document_id:
                  return {"status": "error", "message": "Missing document_id for summary report."}
-            return self._generate_summary(tenant_id, document_id, task.get("report_config", {}))
+            return await self._generate_summary(tenant_id, document_id, task.get("report_config", {}))
 
         elif task_type == "generate_instrument_table":
             document_id = task.get("document_id")
@@ -48,14 +49,14 @@ class ReportAgent(BaseAgent):
             if not document_id:
                  # Could generate table across all docs for tenant if needed, but require explicit flag?
                  return {"status": "error", "message": "Missing document_id for instrument table report."}
-            return self._generate_instrument_table(tenant_id, document_id, query_criteria, task.get("report_config", {}))
+            return await self._generate_instrument_table(tenant_id, document_id, query_criteria, task.get("report_config", {}))
         
         elif task_type == "generate_comparison_report":
             document_id = task.get("document_id")
             comparison_doc_ids = task.get("comparison_document_ids", [])
             if not document_id or not comparison_doc_ids:
                  return {"status": "error", "message": "Missing document_id or comparison_document_ids for comparison report."}
-            return self._generate_comparison(tenant_id, document_id, comparison_doc_ids, task.get("report_config", {}))
+            return await self._generate_comparison(tenant_id, document_id, comparison_doc_ids, task.get("report_config", {}))
 
         # TODO: Add more report types (e.g., consolidated portfolio)
 
@@ -65,10 +66,10 @@ class ReportAgent(BaseAgent):
                 "message": f"Unknown report task type: {task_type}"
             }
 
-    def _generate_summary(self, tenant_id: str, document_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    async def _generate_summary(self, tenant_id: str, document_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Generates a summary report for a document."""
         self.logger.info(f"Generating summary report for doc {document_id}, tenant {tenant_id}")
-        summary_data = get_document_summary(document_id=document_id, tenant_id=tenant_id)
+        summary_data = await get_document_summary_async(document_id=document_id, tenant_id=tenant_id)
         
         if not summary_data:
             return {"status": "error", "message": f"Could not retrieve summary data for document {document_id}."}
@@ -84,31 +85,43 @@ class ReportAgent(BaseAgent):
         }
         return {"status": "success", "report": report}
 
-    def _generate_instrument_table(self, tenant_id: str, document_id: str, criteria: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
-        """Generates a table of financial instruments."""
+    async def _generate_instrument_table(self, tenant_id: str, document_id: str, criteria: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+        """Generates a table of financial instruments.
+
+        Filtering and projection run in the database. Large tables are paged:
+        pass the returned ``next_cursor`` as ``report_config["cursor"]`` to get
+        the next page.
+        """
         self.logger.info(f"Generating instrument table for doc {document_id}, tenant {tenant_id}, criteria: {criteria}")
         
-        # Add document_id to criteria if querying within a single document
-        query_criteria = {"document_id": document_id, **criteria}
-        instruments = query_instruments(tenant_id=tenant_id, query_criteria=query_criteria, limit=config.get("limit", 1000)) # High limit for tables
+        page = await aggregate_instrument_table_async(
+            tenant_id=tenant_id,
+            document_id=document_id,
+            query_criteria=criteria,
+            limit=config.get("limit", 1000), # High limit for tables
+            cursor=config.get("cursor"),
+            fields=config.get("columns")
+        )
+        instruments = page["instruments"]
         
         if not instruments:
             # Don't treat empty results as error necessarily, could be valid filter
              self.logger.warning(f"No instruments found matching criteria for doc {document_id}, tenant {tenant_id}")
-             # Fallback: maybe get all instruments for the doc if criteria yielded nothing? Optional.
-             # instruments = get_financial_instruments(document_id=document_id, tenant_id=tenant_id)
-
-        # Format as DataFrame then dict/list for output (e.g., JSON for UI, maybe CSV option later)
-        if instruments:
-            df = pd.DataFrame(instruments)
-            # Clean up internal fields if desired
-            if '_id' in df.columns: df = df.drop(columns=['_id'])
-            if 'tenant_id' in df.columns: df = df.drop(columns=['tenant_id'])
-            # Convert NaN to None for JSON compatibility
-            df = df.where(pd.notnull(df), None)
-            table_data = df.to_dict(orient='records')
-        else:
-            table_data = []
+
+        # Drop internal fields, convert NaN to None for JSON compatibility
+        table_data = []
+        columns: List[str] = []
+        for instrument in instruments:
+            row = {}
+            for key, value in instrument.items():
+                if key == '_id':
+                    continue
+                if isinstance(value, float) and math.isnan(value):
+                    value = None
+                row[key] = value
+                if key not in columns:
+                    columns.append(key)
+            table_data.append(row)
 
         report = {
             "report_type": "instrument_table",
@@ -117,31 +130,44 @@ class ReportAgent(BaseAgent):
             "generated_at": datetime.now().isoformat(),
             "title": config.get("title", f"Instrument Table for {document_id}"),
             "data": table_data,
-            "columns": list(df.columns) if instruments else []
+            "columns": columns,
+            "next_cursor": page["next_cursor"]
         }
         return {"status": "success", "report": report}
 
-    def _generate_comparison(self, tenant_id: str, doc_id1: str, doc_ids2: List[str], config: Dict[str, Any]) -> Dict[str, Any]:
-        """Generates a comparison report between documents (placeholder)."""
+    async def _generate_comparison(self, tenant_id: str, doc_id1: str, doc_ids2: List[str], config: Dict[str, Any]) -> Dict[str, Any]:
+        """Generates a comparison report between documents.
+
+        Instruments are grouped by ISIN across all documents and diffed
+        against the base document in one aggregation; per-document totals and
+        summaries come back in the same round-trip.
+        """
         self.logger.info(f"Generating comparison report for docs {doc_id1} vs {doc_ids2}, tenant {tenant_id}")
         
-        # 1. Fetch data for doc1
-        instruments1 = get_financial_instruments(document_id=doc_id1, tenant_id=tenant_id)
-        summary1 = get_document_summary(document_id=doc_id1, tenant_id=tenant_id)
-        
-        # 2. Fetch data for comparison docs
-        comparison_data = {}
-        for doc_id2 in doc_ids2:
-            instruments2 = get_financial_instruments(document_id=doc_id2, tenant_id=tenant_id)
-            summary2 = get_document_summary(document_id=doc_id2, tenant_id=tenant_id)
-            comparison_data[doc_id2] = {"instruments": instruments2, "summary": summary2}
-            
-        # 3. Perform comparison logic (e.g., diff instruments by ISIN, compare summary metrics)
-        # This logic can be complex and depends on the desired comparison type
+        comparison = await aggregate_document_comparison_async(
+            tenant_id=tenant_id,
+            base_document_id=doc_id1,
+            comparison_document_ids=doc_ids2,
+            limit=config.get("limit", 1000),
+            cursor=config.get("cursor")
+        )
+
+        base_totals = comparison["totals"].get(doc_id1, {})
+        summary_comparison = {}
+        for doc_id in [doc_id1] + list(doc_ids2):
+            totals = comparison["totals"].get(doc_id, {})
+            summary_comparison[doc_id] = {
+                "total_value": totals.get("total_value"),
+                "instrument_count": totals.get("instrument_count", 0),
+                "total_value_change": (totals.get("total_value") or 0) - (base_totals.get("total_value") or 0),
+                "summary": totals.get("summary")
+            }
+
         comparison_results = {
-             "instruments_diff": "TODO: Implement instrument comparison",
-             "summary_comparison": "TODO: Implement summary comparison"
-        } # Placeholder
+             "instruments_diff": comparison["instruments"],
+             "summary_comparison": summary_comparison,
+             "next_cursor": comparison["next_cursor"]
+        }
 
         report = {
             "report_type": "comparison",
@@ -0,0 +1,158 @@
+"""
+מאגר תהליכים לניתוח PDF מחוץ ללולאת האירועים של FastAPI
+
+ניתוח PDF (PyMuPDF, זיהוי טבלאות, regex פיננסי) הוא עבודת CPU. הרצה שלו ישירות
+בתוך נקודת קצה async חוסמת את לולאת האירועים של uvicorn עבור כל הלקוחות.
+המודול מריץ את העבודה ב-ProcessPoolExecutor מוגבל, מגביל את מספר העבודות
+הממתינות (תור מלא = HTTP 429), ושומר קבצים מועלים לדיסק בלי לחסום את הלולאה.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# מספר תהליכי הניתוח (ברירת מחדל: מספר ליבות)
+DEFAULT_WORKERS = int(os.environ.get("PDF_ANALYSIS_WORKERS", "0")) or (os.cpu_count() or 1)
+# מספר עבודות (בקשות) שמותר להן להיות בתהליך או בהמתנה בו-זמנית
+DEFAULT_MAX_PENDING = int(os.environ.get("PDF_ANALYSIS_MAX_PENDING", "0")) or DEFAULT_WORKERS * 4
+# כמה שניות הלקוח מתבקש להמתין לפני ניסיון חוזר (כותרת Retry-After)
+DEFAULT_RETRY_AFTER = int(os.environ.get("PDF_ANALYSIS_RETRY_AFTER", "5"))
+# גודל מקטע בקריאת קובץ מועלה, וגודל קובץ מרבי (0 = ללא הגבלה)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("PDF_MAX_UPLOAD_MB", "100")) * 1024 * 1024
+
+
+class PoolBusyError(Exception):
+    """התור מלא - יש להחזיר ללקוח 429"""
+
+    def __init__(self, retry_after: int = DEFAULT_RETRY_AFTER):
+        super().__init__("Analysis queue is full")
+        self.retry_after = retry_after
+
+
+class UploadTooLargeError(Exception):
+    """הקובץ המועלה גדול מהמותר - יש להחזיר ללקוח 413"""
+
+
+class AnalysisPool:
+    """מאגר תהליכים מוגבל עם בקרת עומס
+
+    כל בקשה תופסת מקום אחד (``admit``) לכל אורך הטיפול בה, גם אם היא מפוצלת
+    למשימות רבות (למשל משימה לכל עמוד). כשכל המקומות תפוסים, ``admit`` זורק
+    ``PoolBusyError`` מיד במקום לצבור תור בלתי מוגבל בזיכרון.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING,
+                 retry_after: int = DEFAULT_RETRY_AFTER):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    logger.info(f"Started PDF analysis pool with {self.max_workers} workers")
+        return self._executor
+
+    def acquire(self) -> None:
+        """תפיסת מקום בתור. יש לשחרר עם ``release``
+
+        Raises:
+            PoolBusyError: אם מספר העבודות הממתינות הגיע למקסימום
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PoolBusyError(self.retry_after)
+            self._pending += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    @contextmanager
+    def admit(self):
+        """תפיסת מקום בתור לכל אורך הבקשה (ראו ``acquire``)"""
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """הרצת פונקציה (ברמת מודול, ניתנת ל-pickle) בתהליך נפרד והמתנה לתוצאה"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool: Optional[AnalysisPool] = None
+
+
+def get_analysis_pool() -> AnalysisPool:
+    """המאגר המשותף של התהליך (נוצר בשימוש הראשון)"""
+    global _pool
+    if _pool is None:
+        _pool = AnalysisPool()
+    return _pool
+
+
+def shutdown_analysis_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+async def save_upload(upload, dest_dir: str, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """שמירת קובץ מועלה לדיסק במקטעים בלי לחסום את לולאת האירועים
+
+    Args:
+        upload: אובייקט UploadFile של FastAPI (כל אובייקט עם ``filename`` ו-``async read(n)``)
+        dest_dir: תיקיית היעד
+        max_bytes: גודל מרבי בבתים (0 = ללא הגבלה)
+
+    Returns:
+        הנתיב לקובץ שנשמר
+
+    Raises:
+        UploadTooLargeError: אם הקובץ גדול מ-``max_bytes``
+    """
+    # שם הקובץ מגיע מהלקוח - משתמשים רק בשם הבסיס
+    filename = os.path.basename(upload.filename or "") or "upload.pdf"
+    path = os.path.join(dest_dir, filename)
+
+    size = 0
+    # פתיחה, כתיבה וסגירה של הקובץ רצות ב-thread ולא בלולאת האירועים
+    buffer = await asyncio.to_thread(open, path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+            await asyncio.to_thread(buffer.write, chunk)
+    finally:
+        await asyncio.to_thread(buffer.close)
+    return path
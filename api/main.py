@@ -33,6 +33,9 @@ app = FastAPI(
 
 # ייבוא נתיבים
 from api.routes.pdf_analysis import router as pdf_router
+from api.analysis_pool import (
+    PoolBusyError, UploadTooLargeError, get_analysis_pool, save_upload, shutdown_analysis_pool
+)
 
 # רישום נתיבים
 app.include_router(pdf_router)
@@ -50,6 +53,64 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@app.on_event("shutdown")
+def shutdown_pool():
+    """סגירת מאגר תהליכי הניתוח בעת כיבוי השרת"""
+    shutdown_analysis_pool()
+
+def _busy_response(e: PoolBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="השרת עמוס, נסו שוב מאוחר יותר",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+def analyze_page_image(pdf_path, temp_dir, page_num, use_new_version):
+    """
+    ניתוח עמוד בודד (המרה לתמונה, OCR, טבלאות וניירות ערך)
+    
+    רץ בתהליך נפרד של מאגר הניתוח, ולכן מוגדר ברמת המודול.
+    
+    Returns:
+        מילון התוצאות, או None אם לא ניתן להמיר/לטעון את העמוד
+    """
+    import cv2
+
+    # המרת העמוד לתמונה
+    image_paths = convert_pdf_to_images(pdf_path, temp_dir, page_num, page_num)
+    if not image_paths:
+        return None
+
+    # טעינת התמונה
+    img = cv2.imread(image_paths[0])
+    if img is None:
+        return None
+
+    results = {}
+
+    # חילוץ טקסט מהתמונה
+    text = extract_text_from_image(img)
+    results["extracted_text"] = text
+
+    # חילוץ טבלאות
+    if use_new_version:
+        tables = extract_tables_hybrid(img)
+    else:
+        tables = extract_tables_from_image(img, page_number=page_num)
+
+    results["tables_count"] = len(tables)
+    results["tables"] = tables
+
+    # זיהוי ניירות ערך
+    if use_new_version:
+        securities = extract_securities_hybrid(img=img)
+    else:
+        securities = extract_securities(text, tables=tables, img=img)
+
+    results["securities_count"] = len(securities)
+    results["securities"] = securities
+    return results
+
 class PageRange(BaseModel):
     start_page: int
     end_page: Optional[int] = None
@@ -76,19 +137,17 @@ async def analyze_benchmark(
     Returns:
         תוצאות ההשוואה והקישור לגרף ההשוואה
     """
+    pool = get_analysis_pool()
+    temp_dir = tempfile.mkdtemp()
     try:
-        # יצירת תיקייה זמנית
-        temp_dir = tempfile.mkdtemp()
-        pdf_path = os.path.join(temp_dir, file.filename)
-        
-        # שמירת הקובץ המועלה
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        logger.info(f"הקובץ {file.filename} הועלה בהצלחה")
-        
-        # ניתוח העמודים הספציפיים
-        results = analyze_specific_pages(pdf_path, start_page, end_page)
+        with pool.admit():
+            # שמירת הקובץ המועלה
+            pdf_path = await save_upload(file, temp_dir)
+
+            logger.info(f"הקובץ {file.filename} הועלה בהצלחה")
+
+            # ניתוח העמודים הספציפיים (במאגר התהליכים)
+            results = await pool.run(analyze_specific_pages, pdf_path, start_page, end_page)
         
         # הכנת התוצאות
         output = {
@@ -103,13 +162,16 @@ async def analyze_benchmark(
         # החזרת התוצאות
         return JSONResponse(content=output)
         
+    except PoolBusyError as e:
+        raise _busy_response(e)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="הקובץ גדול מדי")
     except Exception as e:
         logger.error(f"שגיאה בעיבוד הקובץ: {str(e)}")
         raise HTTPException(status_code=500, detail=f"שגיאה בעיבוד הקובץ: {str(e)}")
     finally:
         # ניקוי התיקייה הזמנית
-        if 'temp_dir' in locals():
-            shutil.rmtree(temp_dir)
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 @app.post("/analyze/page")
 async def analyze_single_page(
@@ -128,66 +190,36 @@ async def analyze_single_page(
     Returns:
         תוצאות הניתוח
     """
+    pool = get_analysis_pool()
+    temp_dir = tempfile.mkdtemp()
     try:
-        # יצירת תיקייה זמנית
-        temp_dir = tempfile.mkdtemp()
-        pdf_path = os.path.join(temp_dir, file.filename)
-        
-        # שמירת הקובץ המועלה
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        logger.info(f"הקובץ {file.filename} הועלה בהצלחה")
-        
-        # המרת העמוד לתמונה
-        image_paths = convert_pdf_to_images(pdf_path, temp_dir, page_num, page_num)
-        
-        if not image_paths:
+        with pool.admit():
+            # שמירת הקובץ המועלה
+            pdf_path = await save_upload(file, temp_dir)
+
+            logger.info(f"הקובץ {file.filename} הועלה בהצלחה")
+
+            # המרה וניתוח העמוד (במאגר התהליכים)
+            results = await pool.run(analyze_page_image, pdf_path, temp_dir, page_num, use_new_version)
+
+        if results is None:
             raise HTTPException(status_code=400, detail="לא ניתן להמיר את העמוד לתמונה")
         
-        image_path = image_paths[0]
-        import cv2
-        import numpy as np
-        
-        # טעינת התמונה
-        img = cv2.imread(image_path)
-        if img is None:
-            raise HTTPException(status_code=400, detail="לא ניתן לטעון את התמונה")
-        
-        results = {}
-        
-        # חילוץ טקסט מהתמונה
-        text = extract_text_from_image(img)
-        results["extracted_text"] = text
-        
-        # חילוץ טבלאות
-        if use_new_version:
-            tables = extract_tables_hybrid(img)
-        else:
-            tables = extract_tables_from_image(img, page_number=page_num)
-        
-        results["tables_count"] = len(tables)
-        results["tables"] = tables
-        
-        # זיהוי ניירות ערך
-        if use_new_version:
-            securities = extract_securities_hybrid(img=img)
-        else:
-            securities = extract_securities(text, tables=tables, img=img)
-        
-        results["securities_count"] = len(securities)
-        results["securities"] = securities
-        
         # החזרת התוצאות
         return JSONResponse(content=results)
         
+    except PoolBusyError as e:
+        raise _busy_response(e)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="הקובץ גדול מדי")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"שגיאה בעיבוד העמוד: {str(e)}")
         raise HTTPException(status_code=500, detail=f"שגיאה בעיבוד העמוד: {str(e)}")
     finally:
         # ניקוי התיקייה הזמנית
-        if 'temp_dir' in locals():
-            shutil.rmtree(temp_dir)
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 @app.post("/analyze/document")
 async def analyze_document(
@@ -4,14 +4,17 @@
 מאפשר גישה לפונקציות מתוך הסקריפט pdf_mupdf_reader.py דרך ממשק REST
 """
 
+import asyncio
+import json
 import os
 import sys
 import tempfile
 import shutil
 from typing import List, Optional
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
 # הוספת נתיב הפרויקט ל-Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -19,10 +22,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 # ייבוא הפונקציות מהסקריפט
 from scripts.pdf_mupdf_reader import (
     extract_text_from_pdf,
-    extract_tables_from_page,
+    extract_tables_from_pdf_page,
     extract_financial_data,
-    analyze_pdf_content
+    get_pdf_info,
+    analyze_pdf_page
 )
+from api.analysis_pool import PoolBusyError, UploadTooLargeError, get_analysis_pool, save_upload
 
 router = APIRouter(
     prefix="/pdf",
@@ -36,6 +41,32 @@ class PdfAnalysisResponse(BaseModel):
     pages: dict
     metadata: Optional[dict] = None
 
+def _busy(e: PoolBusyError) -> HTTPException:
+    """תשובת 429 כשתור הניתוח מלא"""
+    return HTTPException(
+        status_code=429,
+        detail="השרת עמוס, נסו שוב מאוחר יותר",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+async def _receive_upload(file: UploadFile):
+    """שמירת הקובץ המועלה בתיקייה זמנית. מחזיר (temp_dir, pdf_path)"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        return temp_dir, await save_upload(file, temp_dir)
+    except UploadTooLargeError:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise HTTPException(status_code=413, detail="הקובץ גדול מדי")
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+def _select_pages(total_pages: int, pages: Optional[List[int]]) -> List[int]:
+    """מספרי העמודים לניתוח (רק עמודים בטווח התקין)"""
+    if not pages:
+        return list(range(1, total_pages + 1))
+    return [p for p in pages if 0 < p <= total_pages]
+
 @router.post("/analyze", response_model=PdfAnalysisResponse)
 async def analyze_pdf(
     file: UploadFile = File(...),
@@ -49,6 +80,9 @@ async def analyze_pdf(
     - זיהוי טבלאות וניתוח מבנה
     - חילוץ מידע פיננסי (מספרי ISIN, תאריכים, סכומים)
     
+    הניתוח רץ במאגר התהליכים, עמוד לכל משימה, כך שלולאת האירועים נשארת פנויה.
+    עמוד שהניתוח שלו נכשל מוחזר כ-{"error": ...} ושאר העמודים מוחזרים כרגיל.
+    
     Args:
         file: קובץ ה-PDF לניתוח
         pages: מספרי עמודים ספציפיים לניתוח (אם ריק, ינותחו כל העמודים)
@@ -56,30 +90,126 @@ async def analyze_pdf(
     Returns:
         תוצאות הניתוח בפורמט JSON
     """
+    pool = get_analysis_pool()
     try:
-        # יצירת תיקייה זמנית
-        temp_dir = tempfile.mkdtemp()
-        pdf_path = os.path.join(temp_dir, file.filename)
-        
-        # שמירת הקובץ המועלה
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # אם הועברו מספרי עמודים, המר אותם למספרים
-        page_numbers = pages if pages else None
-        
-        # ניתוח המסמך
-        output_dir = os.path.join(temp_dir, "results")
-        results = analyze_pdf_content(pdf_path, page_numbers, output_dir)
-        
-        return results
-        
+        with pool.admit():
+            temp_dir, pdf_path = await _receive_upload(file)
+            try:
+                info = await pool.run(get_pdf_info, pdf_path)
+                page_numbers = _select_pages(info["total_pages"], pages)
+                if not page_numbers:
+                    raise HTTPException(status_code=400, detail="לא נמצאו מספרי עמודים תקינים לניתוח")
+
+                # כשל בעמוד בודד מדווח בעמוד הזה בלבד ולא מפיל את כל הבקשה
+                page_results = await asyncio.gather(
+                    *(pool.run(analyze_pdf_page, pdf_path, page_num) for page_num in page_numbers),
+                    return_exceptions=True,
+                )
+                return {
+                    "filename": os.path.basename(pdf_path),
+                    "total_pages_analyzed": len(page_numbers),
+                    "metadata": info["metadata"],
+                    "pages": {
+                        str(n): {"error": str(result)} if isinstance(result, Exception) else result
+                        for n, result in zip(page_numbers, page_results)
+                    },
+                }
+            finally:
+                # ניקוי התיקייה הזמנית
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+    except PoolBusyError as e:
+        raise _busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה בעיבוד ה-PDF: {str(e)}")
-    finally:
-        # ניקוי התיקייה הזמנית
-        if 'temp_dir' in locals():
-            shutil.rmtree(temp_dir)
+
+@router.post("/analyze/stream")
+async def analyze_pdf_stream(
+    file: UploadFile = File(...),
+    pages: List[int] = Query(None, description="מספרי עמודים לניתוח (ריק = כל העמודים)"),
+):
+    """
+    ניתוח קובץ PDF עם החזרת תוצאות עמוד-אחר-עמוד (NDJSON)
+    
+    כל שורה בתשובה היא אובייקט JSON:
+    - {"type": "document", ...} - פרטי המסמך, נשלח ראשון
+    - {"type": "page", "page": n, ...} - תוצאות עמוד, לפי סדר הסיום
+    - {"type": "error", "page": n, "error": ...} - כשל בעמוד בודד
+    - {"type": "done", "pages_analyzed": n} - סיום
+    
+    Args:
+        file: קובץ ה-PDF לניתוח
+        pages: מספרי עמודים ספציפיים לניתוח (אם ריק, ינותחו כל העמודים)
+    
+    Returns:
+        StreamingResponse מסוג application/x-ndjson
+    """
+    pool = get_analysis_pool()
+    try:
+        # המקום בתור משוחרר רק בסוף הזרם
+        pool.acquire()
+    except PoolBusyError as e:
+        raise _busy(e)
+
+    temp_dir = None
+    try:
+        temp_dir, pdf_path = await _receive_upload(file)
+        info = await pool.run(get_pdf_info, pdf_path)
+    except Exception as e:
+        pool.release()
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"שגיאה בעיבוד ה-PDF: {str(e)}")
+
+    page_numbers = _select_pages(info["total_pages"], pages)
+    tasks = []
+
+    async def run_page(page_num):
+        try:
+            return page_num, await pool.run(analyze_pdf_page, pdf_path, page_num), None
+        except Exception as e:
+            return page_num, None, str(e)
+
+    async def generate():
+        tasks.extend(asyncio.ensure_future(run_page(n)) for n in page_numbers)
+        try:
+            yield _ndjson({
+                "type": "document",
+                "filename": os.path.basename(pdf_path),
+                "total_pages": info["total_pages"],
+                "pages_requested": page_numbers,
+                "metadata": info["metadata"],
+            })
+            for next_done in asyncio.as_completed(tasks):
+                page_num, result, error = await next_done
+                if error is not None:
+                    yield _ndjson({"type": "error", "page": page_num, "error": error})
+                else:
+                    yield _ndjson({"type": "page", "page": page_num, **result})
+            yield _ndjson({"type": "done", "pages_analyzed": len(page_numbers)})
+        finally:
+            # הלקוח התנתק או שהזרם הסתיים - ביטול עמודים שלא התחילו
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def cleanup():
+        # רץ אחרי התשובה, גם כשהלקוח התנתק לפני שהזרם התחיל (והמחולל לא רץ כלל)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.to_thread(shutil.rmtree, temp_dir, ignore_errors=True)
+        pool.release()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson",
+                             background=BackgroundTask(cleanup))
+
+def _ndjson(obj) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
 
 @router.post("/extract-text")
 async def extract_text_from_document(
@@ -98,32 +228,31 @@ async def extract_text_from_document(
     Returns:
         הטקסט שחולץ לפי מספרי עמודים
     """
+    pool = get_analysis_pool()
     try:
-        # יצירת תיקייה זמנית
-        temp_dir = tempfile.mkdtemp()
-        pdf_path = os.path.join(temp_dir, file.filename)
-        
-        # שמירת הקובץ המועלה
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # אם הועברו מספרי עמודים, המר אותם למספרים
-        page_numbers = pages if pages else None
-        
-        # חילוץ הטקסט
-        text_results = extract_text_from_pdf(pdf_path, page_numbers)
-        
+        with pool.admit():
+            temp_dir, pdf_path = await _receive_upload(file)
+            try:
+                # אם הועברו מספרי עמודים, המר אותם למספרים
+                page_numbers = pages if pages else None
+                
+                # חילוץ הטקסט
+                text_results = await pool.run(extract_text_from_pdf, pdf_path, page_numbers)
+            finally:
+                # ניקוי התיקייה הזמנית
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
         return JSONResponse(content={
             "filename": file.filename,
             "pages": text_results
         })
-        
+
+    except PoolBusyError as e:
+        raise _busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה בחילוץ טקסט מה-PDF: {str(e)}")
-    finally:
-        # ניקוי התיקייה הזמנית
-        if 'temp_dir' in locals():
-            shutil.rmtree(temp_dir)
 
 @router.post("/extract-tables")
 async def extract_tables(
@@ -140,39 +269,32 @@ async def extract_tables(
     Returns:
         הטבלאות שזוהו בעמוד
     """
+    pool = get_analysis_pool()
     try:
-        # יצירת תיקייה זמנית
-        temp_dir = tempfile.mkdtemp()
-        pdf_path = os.path.join(temp_dir, file.filename)
-        
-        # שמירת הקובץ המועלה
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # פתיחת הקובץ וקבלת העמוד
-        import fitz
-        doc = fitz.open(pdf_path)
-        
-        if page < 1 or page > len(doc):
-            raise HTTPException(status_code=400, detail=f"מספר עמוד לא תקין: {page}, הקובץ מכיל {len(doc)} עמודים")
-        
-        # חילוץ טבלאות מהעמוד
-        pdf_page = doc[page - 1]
-        tables = extract_tables_from_page(pdf_page)
-        
+        with pool.admit():
+            temp_dir, pdf_path = await _receive_upload(file)
+            try:
+                tables = await pool.run(extract_tables_from_pdf_page, pdf_path, page)
+            finally:
+                # ניקוי התיקייה הזמנית
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        if tables is None:
+            raise HTTPException(status_code=400, detail=f"מספר עמוד לא תקין: {page}")
+
         return JSONResponse(content={
             "filename": file.filename,
             "page": page,
             "tables_count": len(tables),
             "tables": tables
         })
-        
+
+    except PoolBusyError as e:
+        raise _busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה בחילוץ טבלאות מה-PDF: {str(e)}")
-    finally:
-        # ניקוי התיקייה הזמנית
-        if 'temp_dir' in locals():
-            shutil.rmtree(temp_dir)
 
 @router.post("/extract-financial-data")
 async def extract_financial(
@@ -191,18 +313,17 @@ async def extract_financial(
     Returns:
         המידע הפיננסי שחולץ
     """
+    pool = get_analysis_pool()
     try:
-        # יצירת תיקייה זמנית
-        temp_dir = tempfile.mkdtemp()
-        pdf_path = os.path.join(temp_dir, file.filename)
-        
-        # שמירת הקובץ המועלה
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # חילוץ טקסט מהמסמך
-        text_results = extract_text_from_pdf(pdf_path, pages)
-        
+        with pool.admit():
+            temp_dir, pdf_path = await _receive_upload(file)
+            try:
+                # חילוץ טקסט מהמסמך
+                text_results = await pool.run(extract_text_from_pdf, pdf_path, pages)
+            finally:
+                # ניקוי התיקייה הזמנית
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
         # חילוץ מידע פיננסי מכל עמוד
         financial_data = {}
         for page_num, text in text_results.items():
@@ -212,16 +333,16 @@ async def extract_financial(
             else:
                 # בגרסה ישנה יותר, הטקסט מוחזר כמחרוזת
                 financial_data[str(page_num)] = extract_financial_data(text)
-        
+
         return JSONResponse(content={
             "filename": file.filename,
             "pages_analyzed": list(financial_data.keys()),
             "financial_data": financial_data
         })
-        
+
+    except PoolBusyError as e:
+        raise _busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה בחילוץ מידע פיננסי מה-PDF: {str(e)}")
-    finally:
-        # ניקוי התיקייה הזמנית
-        if 'temp_dir' in locals():
-            shutil.rmtree(temp_dir) 
\ No newline at end of file
@@ -1,32 +1,32 @@
-from services.auth_service import AuthService
-import requests
-
 # file: app.py
 
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, request, jsonify, render_template, send_from_directory, Response, stream_with_context
 import os
 import json
 import uuid
 import logging
+import time
+from functools import wraps
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import tempfile
 import shutil
 from config import Config  # Import the Config class
-from tasks import process_document_task # Import the Celery task
-import database # Add this
-from database import ( # Add these specific imports
-    add_document_record,
-    update_document_status,
-    get_document_by_id,
-    list_all_documents,
-    close_db_connection # For teardown
-)
-from celery.result import AsyncResult
-from celery_worker import celery_app # Ensure celery_app is imported
-from enhanced_financial_extractor import EnhancedFinancialExtractor
-
-
+from utils.lazy_imports import lazy_import, is_loaded
+from utils.response_cache import document_responses
+
+# Heavy dependencies (Celery, pymongo, OCR, pandas, HTTP client) are imported on
+# first use so the process starts, and answers /health, quickly.
+# Run `python dev_tools/importtime_report.py app` to see what startup imports.
+tasks = lazy_import("tasks")  # Celery task process_document_task
+celery_result = lazy_import("celery.result")
+celery_worker = lazy_import("celery_worker")
+database = lazy_import("database")
+ocr_text_extractor = lazy_import("ocr_text_extractor")
+enhanced_financial_extractor = lazy_import("enhanced_financial_extractor")
+requests = lazy_import("requests")
+service_registry = lazy_import("agent_framework.registry")
+progress_events = lazy_import("services.progress_events")
 
 # Import enhanced endpoints
 from services.payment_service import PaymentService
@@ -34,14 +34,8 @@ from services.auth_service import AuthService
 
 
 from enhanced_api_endpoints import register_enhanced_endpoints
-# Import our processing modules
-from ocr_text_extractor import extract_text_with_ocr, OCRQuestionAnswering
-from financial_data_extractor import (
-    extract_isin_numbers, 
-    find_associated_data,
-    extract_tables_from_text,
-    convert_tables_to_dataframes
-)
+
+_process_started = time.monotonic()
 
 # Configure app
 app = Flask(__name__, static_folder='frontend/build', static_url_path='/')
@@ -67,6 +61,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger("app")
 
+
+def create_app():
+    """Return the configured application (used by the test fixtures and WSGI servers)."""
+    return app
+
 # Utility function (keep allowed_file, remove others)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
@@ -74,9 +73,11 @@ def allowed_file(filename):
 # Routes
 @app.route('/health')
 def health_check():
+    # Liveness only: must not touch the database or load models
     return jsonify({
         "status": "ok",
-        "message": "System is operational"
+        "message": "System is operational",
+        "uptime_seconds": round(time.monotonic() - _process_started, 3)
     })
 
 @app.route('/api/documents/upload', methods=['POST'])
@@ -107,7 +108,7 @@ def upload_document():
 
             # --- DB INSERTION START ---
             logger.info(f"Attempting to add document record to DB for {document_id}")
-            db_id = add_document_record(
+            db_id = database.add_document_record(
                 document_id=document_id,
                 filename=original_filename,
                 language=language
@@ -126,14 +127,17 @@ def upload_document():
 
             # Queue the processing task to run in the background
             logger.info(f"Queueing document processing task for: {document_id}")
+            progress = service_registry.get_service("progress_publisher")
+            # Published before queueing so it cannot overwrite the worker's first event
+            progress.publish(document_id, "queued")
             try:
                 # Pass the file_path for now, assuming shared filesystem access for worker
-                task = process_document_task.delay(file_path, document_id, original_filename, language)
+                task = tasks.process_document_task.delay(file_path, document_id, original_filename, language)
                 logger.info(f"Task {task.id} queued for document {document_id}")
 
                 # --- DB UPDATE START ---
                 # Update DB record with task_id and initial file_path
-                update_success = update_document_status(
+                update_success = database.update_document_status(
                     document_id=document_id,
                     status="queued",
                     task_id=task.id,
@@ -155,12 +159,13 @@ def upload_document():
             except Exception as e:
                  logger.error(f"Error queueing task for document {document_id}: {str(e)}")
                  # --- DB UPDATE ON QUEUE FAIL START ---
-                 update_document_status(
+                 database.update_document_status(
                      document_id=document_id,
                      status="queue_failed",
                      error_message=f"Failed to queue task: {str(e)}"
                  )
                  # --- DB UPDATE ON QUEUE FAIL END ---
+                 progress.publish(document_id, "failed", error=f"Failed to queue task: {str(e)}")
                  # Consider deleting the uploaded file if queuing fails
                  # os.remove(file_path) # Optional cleanup
                  return jsonify({
@@ -181,7 +186,7 @@ def upload_document():
 def get_document(document_id):
     """Get document details and status from DB"""
     try:
-        document_record = get_document_by_id(document_id)
+        document_record = database.get_document_by_id(document_id)
 
         if not document_record:
             return jsonify({"error": "Document not found"}), 404
@@ -204,11 +209,52 @@ def get_document(document_id):
         logger.error(f"Error getting document {document_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/documents/<document_id>/events', methods=['GET'])
+def stream_document_events(document_id):
+    """Stream processing progress of a document as Server-Sent Events.
+
+    Replaces polling /api/documents/<id> and /api/tasks/<task_id>/status:
+    events are pushed by the Celery task through Redis pub/sub. The database
+    is read at most once, when Redis has no state for the document. In
+    production this path is served by gunicorn_events.conf.py (gevent workers).
+    """
+    def initial_state():
+        document_record = database.get_document_by_id(document_id)
+        if not document_record:
+            return {"document_id": document_id, "stage": "failed", "error": "Document not found"}
+        status = document_record.get("status")
+        # queue_failed ends the stream like "failed"
+        stage = "failed" if status == "queue_failed" else status
+        event = {"document_id": document_id, "stage": stage, "status": status}
+        if document_record.get("error_message"):
+            event["error"] = document_record["error_message"]
+        return event
+
+    def generate():
+        # Ask EventSource to wait 3s before reconnecting
+        yield "retry: 3000\n\n"
+        try:
+            client = service_registry.get_service("progress_publisher").client
+            for event in progress_events.stream_progress(document_id, client=client, initial_state=initial_state):
+                yield progress_events.format_sse(event)
+        except Exception as e:
+            logger.error(f"Progress stream failed for {document_id}: {str(e)}")
+            yield progress_events.format_sse({"document_id": document_id, "stage": "error", "error": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+    )
+
 @app.route('/api/documents/<document_id>/content', methods=['GET'])
 def get_document_content(document_id):
     """Get the extracted content of a document using path from DB"""
     try:
-        document_record = get_document_by_id(document_id)
+        document_record = database.get_document_by_id(document_id)
         if not document_record:
             return jsonify({"error": "Document not found"}), 404
 
@@ -231,7 +277,7 @@ def get_document_content(document_id):
         
         # Filter pages by the requested range
         filtered_document = {}
-        for page_num, page_data in document.items():
+        for page_num, page_data in document_content.items():
             page_index = int(page_num)
             if start_page <= page_index <= end_page:
                 filtered_document[page_num] = page_data
@@ -250,7 +296,12 @@ def get_document_content(document_id):
 def get_document_financial(document_id):
     """Get the financial data extracted from a document using path from DB"""
     try:
-        document_record = get_document_by_id(document_id)
+        # Repeat views only stat() the result file: no DB read, no JSON work
+        cached = document_responses.get((document_id, "financial"))
+        if cached is not None:
+            return document_responses.respond(cached)
+
+        document_record = database.get_document_by_id(document_id)
         if not document_record:
             return jsonify({"error": "Document not found"}), 404
 
@@ -262,15 +313,15 @@ def get_document_financial(document_id):
              else:
                  return jsonify({"error": "Financial data not available or processing failed."}), 404
 
-        # Load the financial data from the path stored in DB
-        with open(financial_path, 'r', encoding='utf-8') as f:
-            financial_data = json.load(f)
-        
-        return jsonify({
-            "document_id": document_id,
-            "isin_count": len(financial_data), # Get count from loaded data
-            "financial_data": financial_data
-        }), 200
+        # Load the financial data from the path stored in DB (serialized once, then cached)
+        return document_responses.serve(
+            (document_id, "financial"), financial_path,
+            lambda financial_data: {
+                "document_id": document_id,
+                "isin_count": len(financial_data), # Get count from loaded data
+                "financial_data": financial_data
+            }
+        )
         
     except Exception as e:
         logger.error(f"Error getting financial data for {document_id}: {str(e)}")
@@ -280,7 +331,11 @@ def get_document_financial(document_id):
 def get_document_tables(document_id):
     """Get tables extracted from a document using path from DB"""
     try:
-        document_record = get_document_by_id(document_id)
+        cached = document_responses.get((document_id, "tables"))
+        if cached is not None:
+            return document_responses.respond(cached)
+
+        document_record = database.get_document_by_id(document_id)
         if not document_record:
             return jsonify({"error": "Document not found"}), 404
 
@@ -290,10 +345,15 @@ def get_document_tables(document_id):
 
         if tables_path and os.path.exists(tables_path):
             try:
-                with open(tables_path, 'r', encoding='utf-8') as f:
-                    tables = json.load(f) # Assuming tables are stored as a list directly
-                table_count = len(tables)
-                logger.info(f"Loaded {table_count} tables from {tables_path}")
+                # Tables are stored as a list directly
+                return document_responses.serve(
+                    (document_id, "tables"), tables_path,
+                    lambda tables: {
+                        "document_id": document_id,
+                        "tables": tables,
+                        "table_count": len(tables)
+                    }
+                )
             except Exception as e:
                 logger.error(f"Error reading tables file {tables_path}: {e}")
                 # Decide how to handle: return error or empty list?
@@ -322,6 +382,7 @@ def get_document_tables(document_id):
 @app.route('/api/qa/ask', methods=['POST'])
 def ask_question():
     """Ask a question about a document"""
+    try:
         # Get request data
         data = request.json
         
@@ -338,7 +399,7 @@ def ask_question():
             return jsonify({"error": "No question provided"}), 400
 
         # Get document record from DB
-        document_record = get_document_by_id(document_id)
+        document_record = database.get_document_by_id(document_id)
         if not document_record:
             return jsonify({"error": "Document not found"}), 404
 
@@ -351,11 +412,11 @@ def ask_question():
             logger.info(f"Using pre-extracted OCR data for QA: {ocr_path}")
             with open(ocr_path, 'r', encoding='utf-8') as f:
                 extracted_text_data = json.load(f)
-            qa_system = OCRQuestionAnswering(extracted_text=extracted_text_data)
+            qa_system = ocr_text_extractor.OCRQuestionAnswering(extracted_text=extracted_text_data)
         elif original_file_path and os.path.exists(original_file_path):
              # Fallback to processing original PDF if OCR data missing (might be slow)
              logger.warning(f"OCR data path not found for {document_id}. Falling back to processing PDF: {original_file_path}")
-             qa_system = OCRQuestionAnswering(pdf_path=original_file_path)
+             qa_system = ocr_text_extractor.OCRQuestionAnswering(pdf_path=original_file_path)
         else:
              logger.error(f"Neither OCR data nor original file path found for document {document_id}")
              return jsonify({"error": "Required document data not found for Q&A."}), 404
@@ -369,6 +430,9 @@ def ask_question():
             "answer": answer,
             "confidence": 0.8  # This is a placeholder - you would compute this properly
         }), 200
+    except Exception as e:
+        logger.error(f"Error answering question: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/api/qa/deepseek', methods=['POST'])
 def ask_deepseek():
@@ -434,7 +498,7 @@ def list_documents():
     try:
         # Fetch documents from database
         # Add user_id filtering later when auth is implemented
-        documents_from_db = list_all_documents() # Limit can be added here
+        documents_from_db = database.list_all_documents() # Limit can be added here
 
         # Format response (convert datetime, etc. if needed)
         response_documents = []
@@ -472,8 +536,9 @@ def serve_frontend(path):
 def get_document_enhanced(document_id):
     """Get enhanced financial extraction for a document"""
     # Check if the document exists
-    document_path = get_document_path(document_id)
-    if not os.path.exists(document_path):
+    document_record = database.get_document_by_id(document_id)
+    document_path = document_record.get("file_path") if document_record else None
+    if not document_path or not os.path.exists(document_path):
         return jsonify({"error": "Document not found"}), 404
     
     # Check if enhanced extraction already exists
@@ -490,13 +555,26 @@ def get_document_enhanced(document_id):
             app.logger.error(f"Error reading enhanced extraction: {e}")
     
     # Perform enhanced extraction
+    try:
+        extractor = enhanced_financial_extractor.EnhancedFinancialExtractor()
+        result = extractor.process_document(document_id)
+        if result:
+            return jsonify({
+                "document_id": document_id,
+                "enhanced_data": result
+            })
+        else:
+            return jsonify({"error": "Enhanced extraction failed"}), 500
+    except Exception as e:
+        app.logger.error(f"Error during enhanced extraction: {e}")
+        return jsonify({"error": f"Enhanced extraction error: {str(e)}"}), 500
 
 
 @app.route('/api/tasks/<task_id>/status', methods=['GET'])
 def get_task_status(task_id):
     """Check the status of a Celery task."""
     try:
-        task_result = AsyncResult(task_id, app=celery_app)
+        task_result = celery_result.AsyncResult(task_id, app=celery_worker.celery_app)
 
         status = task_result.status
         result = None
@@ -528,24 +606,12 @@ def get_task_status(task_id):
         logger.error(f"Error checking task status for {task_id}: {str(e)}")
         return jsonify({"error": f"Failed to get task status: {str(e)}"}), 500
 
-    try:
-        extractor = EnhancedFinancialExtractor()
-        result = extractor.process_document(document_id)
-        if result:
-            return jsonify({
-                "document_id": document_id,
-                "enhanced_data": result
-            })
-        else:
-            return jsonify({"error": "Enhanced extraction failed"}), 500
-    except Exception as e:
-        app.logger.error(f"Error during enhanced extraction: {e}")
-        return jsonify({"error": f"Enhanced extraction error: {str(e)}"}), 500
-
 
 @app.teardown_appcontext
 def teardown_db(exception):
-    close_db_connection()
+    # Nothing to close if no request has touched the database yet
+    if is_loaded(database):
+        database.close_db_connection()
 
 
 # Service initializations
@@ -554,28 +620,6 @@ auth_service = AuthService()
 
 # Payment routes
 
-@app.route('/api/subscribe', methods=['POST'])
-def create_subscription():
-    """Create a new subscription"""
-    try:
-        data = request.json
-        user_id = data.get('user_id')
-        plan_id = data.get('plan_id')
-        
-        if not user_id or not plan_id:
-            return jsonify({"error": "Missing user_id or plan_id"}), 400
-            
-        # In production, verify user auth here
-        subscription = payment_service.create_subscription(user_id, plan_id)
-        
-        return jsonify({
-            "message": "Subscription created",
-            "subscription_id": subscription['id']
-        }), 201
-    except Exception as e:
-        logger.error(f"Error processing payment webhook: {str(e)}")
-        return jsonify({"error": str(e)}), 500
-
 # Auth routes
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -675,11 +719,6 @@ def create_subscription():
     except Exception as e:
         logger.error(f"Error creating subscription: {str(e)}")
         return jsonify({"error": str(e)}), 500
-        logger.error(f"Error creating subscription: {str(e)}")
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/api/payment/webhook', methods=['POST'])
-@payment_service.webhook_handler
 
 # Authentication routes
 
@@ -736,22 +775,8 @@ def login_user():
         logger.error(f"Error during login: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-def auth_required(f):
-    """Decorator for routes that require authentication"""
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
-            return jsonify({"error": "Authorization token missing"}), 401
-            
-        user_id = auth_service.verify_token(token)
-        if isinstance(user_id, str):
-            request.user_id = user_id
-            return f(*args, **kwargs)
-        else:
-            return jsonify({"error": user_id}), 401
-    return decorated
-
+@app.route('/api/payment/webhook', methods=['POST'])
+@payment_service.webhook_handler
 def payment_webhook():
     """Handle Paddle payment webhooks"""
     try:
@@ -1,6 +1,7 @@
 # file: celery_worker.py
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from config import Config
 
 # Initialize Celery
@@ -24,5 +25,21 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+
+# Warm up shared models and clients so the first task on a worker is not a cold start.
+# Fork-safe models are loaded once in the parent and shared copy-on-write with the
+# pool processes; network clients are created in each child after the fork.
+@worker_init.connect
+def preload_shared_services(**kwargs):
+    from agent_framework.registry import registry
+    registry.preload(fork_safe_only=True)
+
+
+@worker_process_init.connect
+def preload_worker_services(**kwargs):
+    from agent_framework.registry import registry
+    registry.preload()
+
+
 if __name__ == '__main__':
     celery_app.start()
\ No newline at end of file
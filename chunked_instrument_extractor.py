@@ -0,0 +1,288 @@
+"""
+Chunked, concurrent LLM extraction of financial instruments.
+
+Long statements are split per page (and per holdings section when a page is
+very long); every chunk is sent to the model as its own request, with a bounded
+number of requests in flight. Chunk results are cached by content hash, so
+re-processing a document only pays for pages that changed, and the results of
+all chunks are merged and deduplicated by ISIN.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import urllib.error
+import urllib.request
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from shared.map_reduce_llm import DEFAULT_MAX_CONCURRENCY
+from shared.result_cache import ChunkResultCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+
+# Bump when the prompt changes so cached chunk results are not reused
+PROMPT_VERSION = "instruments-v1"
+
+INSTRUMENT_PROMPT = """
+Analyze the following financial document text and extract all identifiable financial instruments.
+For each instrument, provide the ISIN code (12-character alphanumeric), name, type (e.g., stock, bond, ETF), value, currency, and percentage in the portfolio if available.
+Format the output as a JSON list of objects, where each object adheres *exactly* to the following structure (use null for missing optional fields):
+{{
+    "isin": "string (12 chars)",
+    "name": "string",
+    "type": "string or null",
+    "value": "float or null",
+    "currency": "string or null",
+    "percentage_in_portfolio": "float or null"
+}}
+
+Ensure the output is *only* the JSON list, without any introductory text, explanations, or markdown formatting.
+
+Document Text:
+---
+{text}
+---
+
+JSON Output:
+"""
+
+INSTRUMENT_FIELDS = ("isin", "name", "type", "value", "currency", "percentage_in_portfolio")
+
+_ISIN_CANDIDATE = re.compile(r'\b[A-Z]{2}[A-Z0-9]{9}\d\b')
+_SECTION_BREAK = re.compile(r'\n\s*\n')
+
+
+def build_prompt(text: str) -> str:
+    return INSTRUMENT_PROMPT.format(text=text)
+
+
+def parse_instrument_json(response_text: str) -> List[Dict[str, Any]]:
+    """Parse a model response into a list of instrument dicts (invalid items dropped)."""
+    cleaned = (response_text or "").strip()
+    if cleaned.startswith("```"):
+        # Tolerate fenced JSON even though JSON output is requested
+        cleaned = cleaned.strip("`")
+        cleaned = cleaned[cleaned.find("["):] if "[" in cleaned else cleaned
+    if not cleaned:
+        return []
+    data = json.loads(cleaned)
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        logger.warning(f"Unexpected JSON structure from model: {type(data)}")
+        return []
+    return [item for item in data if isinstance(item, dict) and item.get("isin")]
+
+
+class DocumentChunk:
+    """A piece of a document sent to the model in one request."""
+
+    def __init__(self, text: str, pages: Sequence[int], part: int = 0):
+        self.text = text
+        self.pages = list(pages)
+        self.part = part
+        self.key = hashlib.sha256(
+            f"{PROMPT_VERSION}\n{text}".encode("utf-8")
+        ).hexdigest()
+
+    def __repr__(self) -> str:
+        return f"DocumentChunk(pages={self.pages}, part={self.part}, chars={len(self.text)})"
+
+
+def split_into_chunks(page_texts: Sequence[str],
+                      max_chars: int = 12000,
+                      skip_pages_without_isin: bool = True) -> List[DocumentChunk]:
+    """Split a document into per-page chunks.
+
+    Each page is its own chunk so editing one page never invalidates the cached
+    results of the others. Pages longer than max_chars are split on blank lines
+    (holdings sections), falling back to line boundaries.
+
+    Args:
+        page_texts: Text of each page
+        max_chars: Maximum characters per chunk
+        skip_pages_without_isin: Do not send pages without any ISIN-like token
+
+    Returns:
+        List of DocumentChunk
+    """
+    chunks = []
+    for page_index, page_text in enumerate(page_texts):
+        if not page_text or not page_text.strip():
+            continue
+        if skip_pages_without_isin and not _ISIN_CANDIDATE.search(page_text):
+            continue
+
+        # No page header in the chunk text: the cache key only depends on content
+        for part, body in enumerate(_split_text(page_text, max_chars)):
+            chunks.append(DocumentChunk(body, [page_index], part))
+    return chunks
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces = []
+    current = ""
+    for section in _SECTION_BREAK.split(text):
+        # Sections that are still too long are cut on line boundaries
+        units = [section] if len(section) <= max_chars else section.splitlines()
+        for unit in units:
+            unit = unit[:max_chars]
+            if current and len(current) + len(unit) + 2 > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current}\n\n{unit}" if current else unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def merge_instruments(chunk_results: Sequence[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge chunk results, deduplicating by ISIN.
+
+    The first occurrence of an ISIN (in document order) wins; fields it left
+    empty are filled from later occurrences.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for instruments in chunk_results:
+        for item in instruments:
+            isin = str(item.get("isin", "")).strip().upper()
+            if not isin:
+                continue
+            if isin not in merged:
+                merged[isin] = {field: item.get(field) for field in INSTRUMENT_FIELDS}
+                merged[isin]["isin"] = isin
+                continue
+            existing = merged[isin]
+            for field in INSTRUMENT_FIELDS:
+                if existing.get(field) in (None, "") and item.get(field) not in (None, ""):
+                    existing[field] = item[field]
+    return list(merged.values())
+
+
+class GeminiRestClient:
+    """Minimal async client for the Gemini ``generateContent`` REST endpoint.
+
+    Uses the standard library (requests run in worker threads), so the base URL
+    can point at any compatible server, e.g. a local stub in tests.
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, api_key: str, model: str = "gemini-1.5-flash",
+                 api_base: Optional[str] = None, timeout: float = 120.0,
+                 max_retries: int = 2):
+        self.api_key = api_key
+        self.model = model
+        self.api_base = (api_base or DEFAULT_API_BASE).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    def _post(self, prompt: str) -> Dict[str, Any]:
+        body = json.dumps({
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"responseMimeType": "application/json"},
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.api_base}/v1beta/models/{self.model}:generateContent",
+            data=body,
+            headers={"Content-Type": "application/json", "x-goog-api-key": self.api_key},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    async def generate(self, prompt: str) -> str:
+        """Send a prompt and return the text of the first candidate."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                payload = await asyncio.to_thread(self._post, prompt)
+                break
+            except urllib.error.HTTPError as e:
+                if e.code not in self.RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+        candidates = payload.get("candidates") or []
+        if not candidates:
+            logger.warning(f"Gemini response blocked or empty: {payload.get('promptFeedback')}")
+            return ""
+        candidate = candidates[0]
+        if candidate.get("finishReason", "STOP") != "STOP":
+            logger.warning(f"Gemini generation finished unexpectedly: {candidate.get('finishReason')}")
+            return ""
+        parts = candidate.get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+
+class ChunkedInstrumentExtractor:
+    """Extract instruments chunk by chunk with bounded concurrency and caching."""
+
+    def __init__(self, generate: Callable[[str], Awaitable[str]],
+                 cache: Optional[ChunkResultCache] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_chunk_chars: int = 12000,
+                 skip_pages_without_isin: bool = True):
+        """Create the extractor.
+
+        Args:
+            generate: Async function sending a prompt to the model and returning its text
+            cache: Chunk result cache (a default on-disk cache if None)
+            max_concurrency: Maximum number of requests in flight
+            max_chunk_chars: Maximum characters per chunk
+            skip_pages_without_isin: Do not send pages without any ISIN-like token
+        """
+        self.generate = generate
+        self.cache = cache if cache is not None else ChunkResultCache()
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_chunk_chars = max_chunk_chars
+        self.skip_pages_without_isin = skip_pages_without_isin
+        self.stats = {"chunks": 0, "cache_hits": 0, "requests": 0, "failures": 0}
+
+    async def extract(self, page_texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Extract and merge the instruments of a document.
+
+        Args:
+            page_texts: Text of each page
+
+        Returns:
+            Instrument dicts deduplicated by ISIN, in document order
+        """
+        chunks = split_into_chunks(page_texts, self.max_chunk_chars, self.skip_pages_without_isin)
+        self.stats["chunks"] += len(chunks)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._extract_chunk(chunk, semaphore) for chunk in chunks))
+        instruments = merge_instruments(results)
+        logger.info(f"Extracted {len(instruments)} instruments from {len(chunks)} chunks "
+                    f"({self.stats['cache_hits']} cached so far)")
+        return instruments
+
+    async def _extract_chunk(self, chunk: DocumentChunk,
+                             semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        cached = self.cache.get(chunk.key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+
+        async with semaphore:
+            self.stats["requests"] += 1
+            try:
+                response_text = await self.generate(build_prompt(chunk.text))
+                if not response_text.strip():
+                    raise ValueError("empty model response")
+                instruments = parse_instrument_json(response_text)
+            except Exception as e:
+                # A failed chunk is not cached, so the next run retries it
+                self.stats["failures"] += 1
+                logger.error(f"Instrument extraction failed for {chunk}: {e}")
+                return []
+
+        self.cache.put(chunk.key, instruments)
+        return instruments
@@ -28,6 +28,7 @@ class Config:
     # Analysis settings
     ANALYSIS_CACHE_TIME = 3600  # 1 hour
     MAX_PAGES_PER_DOC = 50
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 4))  # Chunked LLM extraction requests in flight
     
     # Celery Configuration (using Redis)
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
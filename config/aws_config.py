@@ -15,6 +15,13 @@ DYNAMODB_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 
 # Textract Settings
 TEXTRACT_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+# Optional endpoint override (e.g. a local Textract stub for tests)
+TEXTRACT_ENDPOINT_URL = os.environ.get('TEXTRACT_ENDPOINT_URL') or None
+# Asynchronous (multi-page) jobs: concurrent jobs per worker process, polling backoff and timeout
+TEXTRACT_MAX_CONCURRENT_JOBS = int(os.environ.get('TEXTRACT_MAX_CONCURRENT_JOBS', 4))
+TEXTRACT_POLL_INITIAL_SECONDS = float(os.environ.get('TEXTRACT_POLL_INITIAL_SECONDS', 1))
+TEXTRACT_POLL_MAX_SECONDS = float(os.environ.get('TEXTRACT_POLL_MAX_SECONDS', 20))
+TEXTRACT_JOB_TIMEOUT_SECONDS = float(os.environ.get('TEXTRACT_JOB_TIMEOUT_SECONDS', 30 * 60))
 
 # AI API Settings
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
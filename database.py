@@ -1,17 +1,30 @@
+import asyncio
+import weakref
 from datetime import datetime
 from werkzeug.security import generate_password_hash
 from bson.objectid import ObjectId
 import os
 import logging
-from pymongo import MongoClient
+from pymongo import ASCENDING, MongoClient
 from pymongo.errors import ConnectionFailure
 from config import Config
+from utils.async_runtime import run_blocking
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    MOTOR_AVAILABLE = True
+except ImportError:
+    MOTOR_AVAILABLE = False
 
 logger = logging.getLogger("database")
 
 client = None
 db = None
 
+# Motor clients are bound to the event loop they are first used on
+_async_dbs = weakref.WeakKeyDictionary()
+_async_db_override = None
+
 def connect_db():
     """Establishes a connection to the MongoDB database."""
     global client, db
@@ -27,6 +40,7 @@ def connect_db():
             client.admin.command('ismaster')
             db = client.get_database()
             logger.info("Successfully connected to MongoDB.")
+            ensure_indexes(db)
         except ConnectionFailure as e:
             logger.error(f"Could not connect to MongoDB: {e}")
             client = None
@@ -44,6 +58,24 @@ def get_db():
         connect_db()
     return db
 
+def ensure_indexes(database):
+    """Creates the indexes used by the instrument queries and report aggregations (idempotent)."""
+    try:
+        inst_collection = database.financial_instruments
+        # Per-document instrument tables, sorted/paginated by ISIN
+        inst_collection.create_index([("tenant_id", ASCENDING), ("document_id", ASCENDING), ("isin", ASCENDING)],
+                                     name="tenant_document_isin")
+        # Cross-document lookups of one ISIN
+        inst_collection.create_index([("tenant_id", ASCENDING), ("isin", ASCENDING), ("document_id", ASCENDING)],
+                                     name="tenant_isin_document")
+        database.document_summaries.create_index([("tenant_id", ASCENDING), ("document_id", ASCENDING)],
+                                                 name="tenant_document")
+        # The report totals $lookup joins summaries on document_id alone (tenant is filtered afterwards)
+        database.document_summaries.create_index([("document_id", ASCENDING)], name="document")
+    except Exception as e:
+        # Queries still work without the indexes, only slower
+        logger.warning(f"Could not create MongoDB indexes: {e}")
+
 def add_document_record(document_id, filename, user_id=None, language=None):
     """Adds a new document record to the database."""
     database = get_db()
@@ -261,7 +293,7 @@ def query_instruments(tenant_id: str, query_criteria: dict, limit: int = 100):
         
     inst_collection = database.financial_instruments
     # Ensure tenant_id is always part of the query for security/isolation
-    full_query = {"tenant_id": tenant_id, **query_criteria}
+    full_query = {**query_criteria, "tenant_id": tenant_id}
     
     try:
         # Example: find all bonds for the tenant
@@ -274,6 +306,311 @@ def query_instruments(tenant_id: str, query_criteria: dict, limit: int = 100):
         logger.error(f"Failed to query instruments for tenant {tenant_id}: {e}")
         return []
 
+# Report Aggregations
+# ===================
+# Report data is computed in MongoDB and returned in a single round-trip.
+# Pagination uses a cursor (the last _id or ISIN of the previous page), so
+# later pages cost the same as the first one.
+
+INSTRUMENT_TABLE_HIDDEN_FIELDS = {"tenant_id": 0}
+
+def _instrument_table_pipeline(tenant_id: str, document_id: str, query_criteria: dict,
+                               limit: int, after=None, fields: list = None) -> list:
+    """Builds the aggregation pipeline of one page of a document's instrument table."""
+    # Caller criteria come first so they can never widen the tenant/document filter
+    match = {**query_criteria, "tenant_id": tenant_id, "document_id": document_id}
+    if after is not None:
+        match["_id"] = {"$gt": after}
+    projection = {field: 1 for field in fields} if fields else dict(INSTRUMENT_TABLE_HIDDEN_FIELDS)
+    return [
+        {"$match": match},
+        {"$sort": {"_id": 1}},
+        # One extra row tells whether there is a next page
+        {"$limit": limit + 1},
+        {"$project": projection},
+    ]
+
+def _comparison_value(document_id):
+    """Expression: the value of the current ISIN in one document, missing if it is not held there."""
+    return {"$arrayElemAt": [
+        {"$map": {
+            "input": {"$filter": {"input": "$holdings", "as": "h", "cond": {"$eq": ["$$h.document_id", document_id]}}},
+            "as": "h",
+            "in": "$$h.value",
+        }},
+        0,
+    ]}
+
+def _comparison_pipeline(tenant_id: str, base_document_id: str, comparison_document_ids: list,
+                         limit: int, after_isin: str = None) -> list:
+    """Builds the aggregation pipeline comparing instruments (by ISIN) and totals across documents."""
+    document_ids = [base_document_id] + [d for d in comparison_document_ids if d != base_document_id]
+    base_value = _comparison_value(base_document_id)
+
+    # Values are null where the ISIN is not held in a document
+    changes = {"$map": {
+        "input": [d for d in document_ids if d != base_document_id],
+        "as": "doc",
+        "in": {"$let": {
+            "vars": {"value": {"$ifNull": [_comparison_value("$$doc"), None]}},
+            "in": {
+                "document_id": "$$doc",
+                "value": "$$value",
+                "change": {"$subtract": [{"$ifNull": ["$$value", 0]}, {"$ifNull": ["$base_value", 0]}]},
+                "status": {"$switch": {
+                    "branches": [
+                        {"case": {"$and": [{"$eq": ["$$value", None]}, {"$eq": ["$base_value", None]}]},
+                         "then": "absent"},
+                        {"case": {"$eq": ["$$value", None]}, "then": "removed"},
+                        {"case": {"$eq": ["$base_value", None]}, "then": "added"},
+                        {"case": {"$eq": ["$$value", "$base_value"]}, "then": "unchanged"},
+                    ],
+                    "default": "changed",
+                }},
+            },
+        }},
+    }}
+
+    instruments = [
+        {"$match": {"isin": {"$ne": None}}},
+        # Total per (ISIN, document), then one row per ISIN with a value per document
+        {"$group": {
+            "_id": {"isin": "$isin", "document_id": "$document_id"},
+            "name": {"$first": "$name"},
+            "currency": {"$first": "$currency"},
+            "value": {"$sum": {"$ifNull": ["$value", 0]}},
+        }},
+        {"$group": {
+            "_id": "$_id.isin",
+            "name": {"$first": "$name"},
+            "currency": {"$first": "$currency"},
+            "holdings": {"$push": {"document_id": "$_id.document_id", "value": "$value"}},
+        }},
+    ]
+    if after_isin is not None:
+        instruments.append({"$match": {"_id": {"$gt": after_isin}}})
+    instruments += [
+        {"$sort": {"_id": 1}},
+        {"$limit": limit + 1},
+        {"$addFields": {"base_value": {"$ifNull": [base_value, None]}}},
+        {"$project": {
+            "_id": 0,
+            "isin": "$_id",
+            "name": 1,
+            "currency": 1,
+            "base_value": 1,
+            "changes": changes,
+        }},
+    ]
+
+    totals = [
+        {"$group": {
+            "_id": "$document_id",
+            "total_value": {"$sum": {"$ifNull": ["$value", 0]}},
+            "instrument_count": {"$sum": 1},
+        }},
+        {"$lookup": {
+            "from": "document_summaries",
+            "localField": "_id",
+            "foreignField": "document_id",
+            "as": "summaries",
+        }},
+        {"$project": {
+            "_id": 0,
+            "document_id": "$_id",
+            "total_value": 1,
+            "instrument_count": 1,
+            "summary": {"$arrayElemAt": [
+                {"$filter": {"input": "$summaries", "as": "s", "cond": {"$eq": ["$$s.tenant_id", tenant_id]}}},
+                0,
+            ]},
+        }},
+    ]
+
+    return [
+        {"$match": {"tenant_id": tenant_id, "document_id": {"$in": document_ids}}},
+        {"$facet": {"instruments": instruments, "totals": totals}},
+    ]
+
+def aggregate_instrument_table(tenant_id: str, document_id: str, query_criteria: dict = None,
+                               limit: int = 1000, cursor: str = None, fields: list = None) -> dict:
+    """Returns one page of a document's instruments, filtered and projected in the database.
+
+    Args:
+        tenant_id: Tenant ID
+        document_id: Document ID
+        query_criteria: Additional MongoDB filter on instrument fields
+        limit: Page size
+        cursor: ``next_cursor`` of the previous page
+        fields: Fields to return (all but tenant_id if omitted)
+
+    Returns:
+        {"instruments": [...], "next_cursor": str or None}
+    """
+    database = get_db()
+    if database is None:
+        logger.error("Database connection not available. Cannot aggregate instruments.")
+        return {"instruments": [], "next_cursor": None}
+
+    pipeline = _instrument_table_pipeline(tenant_id, document_id, query_criteria or {}, limit,
+                                          _table_cursor(cursor), fields)
+    try:
+        rows = list(database.financial_instruments.aggregate(pipeline))
+    except Exception as e:
+        logger.error(f"Failed to aggregate instruments for document {document_id}: {e}")
+        return {"instruments": [], "next_cursor": None}
+    return _instrument_table_page(rows, limit)
+
+def aggregate_document_comparison(tenant_id: str, base_document_id: str, comparison_document_ids: list,
+                                  limit: int = 1000, cursor: str = None) -> dict:
+    """Compares the instruments of documents by ISIN, computed in a single aggregation.
+
+    Args:
+        tenant_id: Tenant ID
+        base_document_id: Document the others are compared with
+        comparison_document_ids: Documents to compare
+        limit: Number of ISINs per page
+        cursor: ``next_cursor`` of the previous page (the last ISIN)
+
+    Returns:
+        {"instruments": [{isin, name, currency, base_value, changes: [...]}],
+         "totals": {document_id: {total_value, instrument_count, summary}},
+         "next_cursor": str or None}
+    """
+    empty = {"instruments": [], "totals": {}, "next_cursor": None}
+    database = get_db()
+    if database is None:
+        logger.error("Database connection not available. Cannot compare documents.")
+        return empty
+
+    pipeline = _comparison_pipeline(tenant_id, base_document_id, comparison_document_ids, limit, cursor)
+    try:
+        result = next(database.financial_instruments.aggregate(pipeline), None)
+    except Exception as e:
+        logger.error(f"Failed to compare documents {base_document_id} vs {comparison_document_ids}: {e}")
+        return empty
+    return _comparison_page(result, limit, [base_document_id, *comparison_document_ids])
+
+def _table_cursor(cursor):
+    """The _id after which an instrument table page starts."""
+    if not cursor:
+        return None
+    return ObjectId(cursor) if ObjectId.is_valid(cursor) else cursor
+
+def _instrument_table_page(rows: list, limit: int) -> dict:
+    """Trims the extra row of an instrument table page into ``next_cursor``."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(rows[-1]["_id"])
+    for row in rows:
+        row["_id"] = str(row["_id"])
+    return {"instruments": rows, "next_cursor": next_cursor}
+
+def _comparison_page(result: dict, limit: int, document_ids: list) -> dict:
+    """Shapes the ``$facet`` result of a document comparison.
+
+    Totals are grouped from the instruments, so documents without any get a zero entry here.
+    """
+    if not result:
+        return {"instruments": [], "totals": {}, "next_cursor": None}
+    instruments = result["instruments"]
+    next_cursor = None
+    if len(instruments) > limit:
+        instruments = instruments[:limit]
+        next_cursor = instruments[-1]["isin"]
+    totals = {}
+    for row in result["totals"]:
+        summary = row.get("summary")
+        if summary:
+            summary.pop("_id", None)
+            summary.pop("tenant_id", None)
+        totals[row.pop("document_id")] = row
+    for document_id in document_ids:
+        totals.setdefault(document_id, {"total_value": 0, "instrument_count": 0, "summary": None})
+    return {"instruments": instruments, "totals": totals, "next_cursor": next_cursor}
+
+# Async Access
+# ============
+# Coroutines (the agents) must not call the functions above directly: they
+# block the event loop. The *_async variants use Motor when it is installed
+# and configured, and otherwise run the blocking function in the shared
+# executor (utils.async_runtime).
+
+def set_async_db(database):
+    """Uses the given async database (e.g. a mongomock-motor database in tests); None restores Motor."""
+    global _async_db_override
+    _async_db_override = database
+
+def get_async_db():
+    """Returns the Motor database for the running event loop, or None if Motor is not available."""
+    if _async_db_override is not None:
+        return _async_db_override
+    if not MOTOR_AVAILABLE or not Config.MONGODB_URI:
+        return None
+    loop = asyncio.get_running_loop()
+    database = _async_dbs.get(loop)
+    if database is None:
+        async_client = AsyncIOMotorClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+        database = async_client.get_database()
+        _async_dbs[loop] = database
+    return database
+
+async def get_document_summary_async(document_id: str, tenant_id: str):
+    """Async ``get_document_summary``."""
+    database = get_async_db()
+    if database is None:
+        return await run_blocking(get_document_summary, document_id, tenant_id)
+    try:
+        return await database.document_summaries.find_one({"document_id": document_id, "tenant_id": tenant_id})
+    except Exception as e:
+        logger.error(f"Failed to retrieve document summary for {document_id}: {e}")
+        return None
+
+async def query_instruments_async(tenant_id: str, query_criteria: dict, limit: int = 100):
+    """Async ``query_instruments``."""
+    database = get_async_db()
+    if database is None:
+        return await run_blocking(query_instruments, tenant_id, query_criteria, limit)
+    full_query = {**query_criteria, "tenant_id": tenant_id}
+    try:
+        logger.info(f"Executing instrument query for tenant {tenant_id}: {full_query}")
+        return await database.financial_instruments.find(full_query).limit(limit).to_list(length=limit)
+    except Exception as e:
+        logger.error(f"Failed to query instruments for tenant {tenant_id}: {e}")
+        return []
+
+async def aggregate_instrument_table_async(tenant_id: str, document_id: str, query_criteria: dict = None,
+                                           limit: int = 1000, cursor: str = None, fields: list = None) -> dict:
+    """Async ``aggregate_instrument_table``."""
+    database = get_async_db()
+    if database is None:
+        return await run_blocking(aggregate_instrument_table, tenant_id, document_id, query_criteria,
+                                  limit, cursor, fields)
+    pipeline = _instrument_table_pipeline(tenant_id, document_id, query_criteria or {}, limit,
+                                          _table_cursor(cursor), fields)
+    try:
+        rows = await database.financial_instruments.aggregate(pipeline).to_list(length=None)
+    except Exception as e:
+        logger.error(f"Failed to aggregate instruments for document {document_id}: {e}")
+        return {"instruments": [], "next_cursor": None}
+    return _instrument_table_page(rows, limit)
+
+async def aggregate_document_comparison_async(tenant_id: str, base_document_id: str, comparison_document_ids: list,
+                                              limit: int = 1000, cursor: str = None) -> dict:
+    """Async ``aggregate_document_comparison``."""
+    database = get_async_db()
+    if database is None:
+        return await run_blocking(aggregate_document_comparison, tenant_id, base_document_id,
+                                  comparison_document_ids, limit, cursor)
+    pipeline = _comparison_pipeline(tenant_id, base_document_id, comparison_document_ids, limit, cursor)
+    try:
+        results = await database.financial_instruments.aggregate(pipeline).to_list(length=1)
+    except Exception as e:
+        logger.error(f"Failed to compare documents {base_document_id} vs {comparison_document_ids}: {e}")
+        return {"instruments": [], "totals": {}, "next_cursor": None}
+    return _comparison_page(results[0] if results else None, limit, [base_document_id, *comparison_document_ids])
+
 # =======================
 
 def close_db_connection():
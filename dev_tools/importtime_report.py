@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Import Time Report
+------------------
+Shows where process startup time goes by running ``python -X importtime``
+on a module and summarising the result.
+
+Usage:
+    python dev_tools/importtime_report.py app
+    python dev_tools/importtime_report.py app --top 30 --budget 1.5
+
+With ``--budget`` (seconds) the script exits non-zero when importing the module
+takes longer, so it can guard startup time in CI. It always exits non-zero
+when the import itself fails.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Project root, so "app" and friends are importable from anywhere
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """Parse ``-X importtime`` stderr output.
+
+    Args:
+        output: Text containing lines like
+            ``import time:       412 |       1830 |   json``
+
+    Returns:
+        List of (module, self_us, cumulative_us) in import order
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            # Header line: "self [us] | cumulative | imported package"
+            continue
+        entries.append((parts[2].strip(), self_us, cumulative_us))
+    return entries
+
+
+def summarize(entries: List[Tuple[str, int, int]]) -> Dict[str, object]:
+    """Aggregate parsed entries.
+
+    Args:
+        entries: Output of ``parse_importtime``
+
+    Returns:
+        Dict with 'total_us', 'modules' (sorted by self time) and
+        'packages' (top-level package -> summed self time, sorted)
+    """
+    packages = defaultdict(int)
+    for module, self_us, _ in entries:
+        packages[module.split(".")[0]] += self_us
+
+    return {
+        "total_us": sum(self_us for _, self_us, _ in entries),
+        "modules": sorted(entries, key=lambda e: e[1], reverse=True),
+        "packages": sorted(packages.items(), key=lambda p: p[1], reverse=True),
+    }
+
+
+class ImportFailedError(RuntimeError):
+    """Importing the module failed; a partial importtime log would understate startup."""
+
+    def __init__(self, module: str, returncode: int, traceback_tail: str):
+        super().__init__(f"importing {module} failed (exit code {returncode}):\n{traceback_tail}")
+        self.returncode = returncode
+
+
+def run_importtime(module: str, python: str = sys.executable) -> str:
+    """Import ``module`` in a fresh interpreter and return the importtime log.
+
+    Raises:
+        ImportFailedError: If the import exits non-zero
+    """
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = [l for l in result.stderr.splitlines() if not l.startswith("import time:")]
+        raise ImportFailedError(module, result.returncode, "\n".join(tail[-5:]))
+    return result.stderr
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Report import-time cost of a module")
+    parser.add_argument("module", nargs="?", default="app", help="Module to import (default: app)")
+    parser.add_argument("--top", type=int, default=20, help="Number of rows to show")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Fail if the total import time exceeds this many seconds")
+    args = parser.parse_args(argv)
+
+    try:
+        log = run_importtime(args.module)
+    except ImportFailedError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return e.returncode
+    summary = summarize(parse_importtime(log))
+    total = summary["total_us"] / 1e6
+
+    print(f"Importing '{args.module}' took {total:.3f}s")
+    print(f"\nTop {args.top} packages by import time:")
+    for package, self_us in summary["packages"][:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {package}")
+    print(f"\nTop {args.top} modules by self time:")
+    for module, self_us, cumulative_us in summary["modules"][:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  (cumulative {cumulative_us / 1000:9.1f} ms)  {module}")
+
+    if args.budget is not None and total > args.budget:
+        print(f"\nImport time {total:.3f}s exceeds budget of {args.budget:.3f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
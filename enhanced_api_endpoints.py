@@ -4,13 +4,11 @@ Import and use these functions in your app.py
 """
 
 from flask import jsonify, request
-import os
-import json
 import logging
-from datetime import datetime
 
-# Import enhanced extractors
-from enhanced_financial_extractor import analyze_portfolio, generate_custom_table
+from utils.response_cache import document_responses
+# Stored portfolio analyses and custom tables (the extractors are imported on first use)
+from services import portfolio_artifacts
 
 logger = logging.getLogger("app")
 
@@ -21,29 +19,17 @@ def register_enhanced_endpoints(app):
     def get_document_advanced_analysis(document_id):
         """Get advanced portfolio analysis for a document"""
         try:
-            # Check for financial data
-            financial_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{document_id}_financial.json")
-            
-            if not os.path.exists(financial_path):
+            # Precomputed when the document finished processing; computed here for older
+            # documents and whenever the financial data was rewritten since
+            key = (document_id, "advanced_analysis")
+            analysis_path = portfolio_artifacts.ensure_portfolio_analysis(app.config['UPLOAD_FOLDER'], document_id)
+            if analysis_path is None:
                 return jsonify({"error": "Financial data not found"}), 404
             
-            # Load the financial data
-            with open(financial_path, 'r', encoding='utf-8') as f:
-                financial_data = json.load(f)
-            
-            # Convert list to dictionary keyed by ISIN if necessary
-            if isinstance(financial_data, list):
-                holdings_data = {item['isin']: item for item in financial_data}
-            else:
-                holdings_data = financial_data
-            
-            # Perform portfolio analysis
-            analysis_results = analyze_portfolio(holdings_data)
-            
-            return jsonify({
+            return document_responses.serve(key, analysis_path, lambda analysis_results: {
                 "document_id": document_id,
                 "analysis": analysis_results
-            }), 200
+            })
             
         except Exception as e:
             logger.error(f"Error analyzing document {document_id}: {str(e)}")
@@ -59,36 +45,20 @@ def register_enhanced_endpoints(app):
             if not table_spec:
                 return jsonify({"error": "No table specification provided"}), 400
             
-            # Check for financial data
-            financial_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{document_id}_financial.json")
-            
-            if not os.path.exists(financial_path):
+            # Tables are generated once per specification and stored with the document
+            key = (document_id, "custom_table", portfolio_artifacts.spec_key(table_spec))
+            table_path = portfolio_artifacts.ensure_custom_table(app.config['UPLOAD_FOLDER'], document_id, table_spec)
+            if table_path is None:
                 return jsonify({"error": "Financial data not found"}), 404
             
-            # Load the financial data
-            with open(financial_path, 'r', encoding='utf-8') as f:
-                financial_data = json.load(f)
-            
-            # Convert list to dictionary keyed by ISIN if necessary
-            if isinstance(financial_data, list):
-                holdings_data = {item['isin']: item for item in financial_data}
-            else:
-                holdings_data = financial_data
-            
-            # Generate custom table
-            custom_table = generate_custom_table(holdings_data, table_spec)
-            
-            # Convert to format suitable for JSON
-            table_data = {
-                "columns": custom_table.columns.tolist(),
-                "data": custom_table.to_dict(orient='records')
-            }
-            
-            return jsonify({
+            # Served from the response cache while the stored table is unchanged; POST, so no 304 handling
+            return document_responses.serve(key, table_path, lambda table_data: {
                 "document_id": document_id,
                 "table": table_data
-            }), 200
+            }, conditional=False)
             
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             logger.error(f"Error generating custom table for {document_id}: {str(e)}")
             return jsonify({"error": str(e)}), 500
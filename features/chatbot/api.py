@@ -4,7 +4,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from .services import ChatbotService
-from agent_framework.coordinator import AgentCoordinator
+from agent_framework.registry import registry
 
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
@@ -14,7 +14,7 @@ chatbot_bp = Blueprint('chatbot', __name__, url_prefix='/api/chat')
 
 # יצירת מופעים של השירותים
 chatbot_service = ChatbotService()
-agent_coordinator = AgentCoordinator()
+agent_coordinator = registry.proxy("agent_coordinator")  # shared, built on first use
 
 @chatbot_bp.route('/session', methods=['POST'])
 def create_session():
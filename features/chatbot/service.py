@@ -3,7 +3,7 @@ import uuid
 import logging
 from datetime import datetime
 from pymongo import MongoClient
-from agent_framework.coordinator import AgentCoordinator
+from agent_framework.registry import registry
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -15,13 +15,6 @@ db = client.get_database()
 sessions_collection = db.chat_sessions
 messages_collection = db.chat_messages
 
-# Initialize agent coordinator
-try:
-    agent_coordinator = AgentCoordinator()
-except Exception as e:
-    logger.error(f"Failed to initialize AgentCoordinator: {e}")
-    agent_coordinator = None
-
 def create_session():
     """
     Create a new chat session
@@ -86,7 +79,9 @@ def process_query(question, document_ids=None, session_id=None, language='he'):
         answer = "This is a placeholder response from the chatbot."
         metadata = {}
         
-        if agent_coordinator:
+        # Shared agent coordinator, built on first use (None if it cannot be built)
+        agent_coordinator = registry.available("agent_coordinator")
+        if agent_coordinator is not None:
             try:
                 # Process query using agent framework
                 result = agent_coordinator.process_query(question, document_ids, session_id, language)
@@ -4,9 +4,9 @@ import os
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
-from agent_framework.coordinator import AgentCoordinator
+from agent_framework import get_coordinator
 from agent_framework.nlp_agent import NaturalLanguageQueryAgent
-from agent_framework.table_generator import CustomTableGenerator
+from services import portfolio_artifacts
 
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
@@ -18,9 +18,8 @@ class ChatbotService:
     
     def __init__(self):
         """אתחול שירות הצ'אטבוט"""
-        self.coordinator = AgentCoordinator()
+        self.coordinator = get_coordinator()
         self.nlp_agent = NaturalLanguageQueryAgent()
-        self.table_generator = CustomTableGenerator()
         
         # מיפוי של שיחות למשתמשים
         self.session_user_map = {}
@@ -181,6 +180,28 @@ class ChatbotService:
         
         return suggested_questions
     
+    def generate_document_table(self, upload_folder: str, document_id: str,
+                                table_spec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        יצירת טבלה מותאמת אישית מהחזקות המסמך
+
+        הטבלה נוצרת דרך portfolio_artifacts עם גרסת הנתונים של המסמך, כך שהנתונים
+        המהודרים נשמרים במטמון עד שהמסמך מעובד מחדש.
+
+        Args:
+            upload_folder: תיקיית קבצי התוצאות
+            document_id: מזהה המסמך
+            table_spec: הגדרת הטבלה (columns, filters, sort_by, group_by)
+
+        Returns:
+            הטבלה ({"columns": [...], "data": [...]}) או None אם אין למסמך נתונים פיננסיים
+        """
+        version = portfolio_artifacts.data_version(upload_folder, document_id)
+        if version is None:
+            return None
+        financial_data = portfolio_artifacts.load_financial_data(upload_folder, document_id)
+        return portfolio_artifacts.build_custom_table(financial_data, table_spec, version)
+
     def get_session_user(self, session_id: str) -> str:
         """
         קבלת מזהה המשתמש לפי מזהה השיחה
@@ -1,5 +1,14 @@
-import os
-from langchain_huggingface import HuggingFaceHub
+from shared.hf_inference import get_inference_gateway
+from shared.map_reduce_llm import (
+    MapReduceLLM,
+    RateLimitedScheduler,
+    run_sync,
+)
+from shared.result_cache import DEFAULT_CACHE_DIR, ChunkResultCache
+
+# Bump when the prompts change so cached partial analyses are not reused
+COMPLIANCE_PROMPT_VERSION = "mistral-7b-instruct-v0.2/compliance-v1"
+CHUNK_CHARS = 3000
 
 # Placeholder import - adjust based on actual project structure
 try:
@@ -25,22 +34,83 @@ class ComplianceChecker:
     Service for checking compliance issues and identifying regulatory requirements
     in financial documents using an LLM.
     """
-    def __init__(self):
-        """Initializes the ComplianceChecker with a HuggingFaceHub LLM."""
+    def __init__(self, gateway=None):
+        """Initializes the ComplianceChecker with a client of the shared inference gateway.
+
+        Args:
+            gateway: HFInferenceGateway to use (the shared one if omitted)
+        """
+        gateway = gateway or get_inference_gateway()
         # Use a model with strong understanding of legal/regulatory language
-        self.llm = HuggingFaceHub(
-            repo_id="mistralai/Mistral-7B-Instruct-v0.2",
-            huggingfacehub_api_token=os.environ.get("HUGGINGFACE_API_KEY"),
-            task="text-generation"
+        # Partial analyses are cached by the map-reduce runs (self.cache), not the gateway
+        self.llm = gateway.client("mistralai/Mistral-7B-Instruct-v0.2", task="text-generation", cache=False)
+        # Shared by all map-reduce runs so concurrent requests respect one rate limit
+        self.scheduler = RateLimitedScheduler()
+        self.cache = ChunkResultCache(DEFAULT_CACHE_DIR)
+
+    def _map_reduce(self, map_prompt, reduce_prompt=None):
+        return MapReduceLLM(
+            self.llm.invoke,
+            map_prompt=map_prompt,
+            reduce_prompt=reduce_prompt,
+            chunk_chars=CHUNK_CHARS,
+            scheduler=self.scheduler,
+            cache=self.cache,
+            namespace=COMPLIANCE_PROMPT_VERSION,
         )
 
-    def check_compliance(self, document, jurisdictions):
+    def _compliance_prompt(self, document_type, jurisdictions_text, excerpt, excerpt_label):
+        return f"""
+        Analyze the following {document_type} document for compliance with financial regulations
+        in these jurisdictions:
+        {jurisdictions_text}
+
+        Document content excerpt ({excerpt_label}):
+        {excerpt}
+
+        Identify any potential compliance issues, missing required disclosures,
+        or regulatory requirements that may apply to this document based on the specified jurisdictions.
+
+        Format your response with clear sections using markdown headers:
+        ### Potential Compliance Issues
+        [List issues found or state 'None identified']
+        ### Missing Required Elements
+        [List missing elements or state 'None identified']
+        ### Applicable Regulatory Requirements
+        [List requirements identified or state 'None identified']
+        ### Recommendations
+        [Provide actionable recommendations or state 'None']
+        """
+
+    def _consolidation_prompt(self, document_type, jurisdictions_text, analyses):
+        sections = "\n\n".join(f"--- Analysis of part {n} ---\n{analysis}"
+                                 for n, analysis in enumerate(analyses, 1))
+        return f"""
+        The following are compliance analyses of consecutive parts of one {document_type} document,
+        checked against financial regulations in these jurisdictions:
+        {jurisdictions_text}
+
+        {sections}
+
+        Consolidate them into a single analysis of the whole document. Merge duplicate findings,
+        keep every distinct issue, and note that an element is missing only if no part contains it.
+
+        Format your response with clear sections using markdown headers:
+        ### Potential Compliance Issues
+        ### Missing Required Elements
+        ### Applicable Regulatory Requirements
+        ### Recommendations
+        """
+
+    def check_compliance(self, document, jurisdictions, map_reduce=True):
         """
         Analyzes a document for compliance issues against specified jurisdictions.
 
         Args:
             document (dict): The document data (expected 'id', 'content', 'type').
             jurisdictions (list): A list of jurisdiction strings (e.g., ['US', 'EU']).
+            map_reduce (bool, optional): Analyze the whole document chunk by chunk and consolidate
+                the partial analyses. When False only the first 3000 characters are analyzed.
 
         Returns:
             dict: A dictionary containing the compliance analysis results.
@@ -56,30 +126,16 @@ class ComplianceChecker:
         jurisdiction_prompts = [f"- {j.strip()}" for j in jurisdictions if j and j.strip()]
         jurisdictions_text = "\n".join(jurisdiction_prompts) if jurisdiction_prompts else "- Default jurisdiction (interpret broadly)"
 
-        prompt = f"""
-        Analyze the following {document_type} document for compliance with financial regulations
-        in these jurisdictions:
-        {jurisdictions_text}
-
-        Document content excerpt (first 3000 chars):
-        {document_text[:3000]}
-
-        Identify any potential compliance issues, missing required disclosures,
-        or regulatory requirements that may apply to this document based on the specified jurisdictions.
-
-        Format your response with clear sections using markdown headers:
-        ### Potential Compliance Issues
-        [List issues found or state 'None identified']
-        ### Missing Required Elements
-        [List missing elements or state 'None identified']
-        ### Applicable Regulatory Requirements
-        [List requirements identified or state 'None identified']
-        ### Recommendations
-        [Provide actionable recommendations or state 'None']
-        """
-
         try:
-            analysis = self.llm.invoke(prompt)
+            if map_reduce:
+                runner = self._map_reduce(
+                    lambda chunk: self._compliance_prompt(document_type, jurisdictions_text, chunk, "part"),
+                    lambda analyses: self._consolidation_prompt(document_type, jurisdictions_text, analyses))
+                analysis = run_sync(runner.run(document_text))
+            else:
+                prompt = self._compliance_prompt(document_type, jurisdictions_text,
+                                                 document_text[:CHUNK_CHARS], "first 3000 chars")
+                analysis = self.llm.invoke(prompt)
         except Exception as e:
             print(f"Error during LLM compliance check for doc {document_id}: {e}")
             analysis = "Error generating LLM compliance analysis."
@@ -92,12 +148,30 @@ class ComplianceChecker:
             "compliance_score": self._calculate_compliance_score(analysis)  # Score based on LLM output
         }
 
-    def identify_requirements(self, document):
+    def _requirements_prompt(self, document_type, excerpt, excerpt_label):
+        return f"""
+        Review the following {document_type} document and identify all specific regulatory requirements,
+        deadlines, filing obligations, or compliance-related statements mentioned within the text.
+
+        Document content excerpt ({excerpt_label}):
+        {excerpt}
+
+        Extract each requirement clearly. If possible, include:
+        - The requirement description
+        - Relevant deadline (if mentioned)
+        - Authority or regulator mentioned (if any)
+
+        Format the output as a bulleted list. If no specific requirements are found, state 'No specific requirements identified'.
+        """
+
+    def identify_requirements(self, document, map_reduce=True):
         """
         Identifies specific regulatory requirements mentioned within the document text.
 
         Args:
             document (dict): The document data (expected 'id', 'content', 'type').
+            map_reduce (bool, optional): Extract requirements from every chunk of the document
+                (concurrently) and merge the lists. When False only the first 3000 characters are read.
 
         Returns:
             dict: A dictionary containing extracted requirements.
@@ -109,23 +183,16 @@ class ComplianceChecker:
         if not document_text:
             return {"error": f"Document {document_id} content is empty."}
 
-        prompt = f"""
-        Review the following {document_type} document and identify all specific regulatory requirements,
-        deadlines, filing obligations, or compliance-related statements mentioned within the text.
-
-        Document content excerpt (first 3000 chars):
-        {document_text[:3000]}
-
-        Extract each requirement clearly. If possible, include:
-        - The requirement description
-        - Relevant deadline (if mentioned)
-        - Authority or regulator mentioned (if any)
-
-        Format the output as a bulleted list. If no specific requirements are found, state 'No specific requirements identified'.
-        """
-
         try:
-            extraction = self.llm.invoke(prompt)
+            if map_reduce:
+                # Requirement lists are merged directly; no reduce call is needed
+                runner = self._map_reduce(lambda chunk: self._requirements_prompt(document_type, chunk, "part"))
+                partials = run_sync(runner.map(document_text))
+                found = [p for p in partials if p and not p.lower().startswith('no specific')]
+                extraction = "\n".join(found) if found else "No specific requirements identified"
+            else:
+                prompt = self._requirements_prompt(document_type, document_text[:CHUNK_CHARS], "first 3000 chars")
+                extraction = self.llm.invoke(prompt)
         except Exception as e:
             print(f"Error during LLM requirement identification for doc {document_id}: {e}")
             extraction = "Error generating LLM requirement extraction."
@@ -143,7 +210,7 @@ class ComplianceChecker:
             if line.startswith(('-', '*', '•')) or (len(line) > 2 and line[0].isdigit() and line[1] in ['.', ')']):
                 line = line[2:].strip()
             
-            if line:  # Only add non-empty lines
+            if line and line not in requirements:  # Only add non-empty, new lines
                 requirements.append(line)
 
         return {
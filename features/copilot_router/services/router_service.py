@@ -2,14 +2,17 @@ import logging
 import json
 from flask import jsonify
 import os
-import google.generativeai as genai
+from utils.lazy_imports import lazy_import
+
+# The Gemini SDK (and its gRPC stack) is imported when first used
+genai = lazy_import("google.generativeai")
 from config import Config # Import Config to access API keys
 # Import other services for routing
 try:
-    from agent_framework.coordinator import AgentCoordinator
+    from agent_framework import get_coordinator
 except ImportError:
     print("Warning: Failed to import AgentCoordinator")
-    AgentCoordinator = None
+    get_coordinator = None
 
 logger = logging.getLogger(__name__)
 
@@ -22,9 +25,10 @@ class CopilotRouterService:
     def __init__(self):
         """Initialize the router service and Gemini client."""
         self.agent_coordinator = None
-        if AgentCoordinator:
+        if get_coordinator:
             try:
-                self.agent_coordinator = AgentCoordinator()
+                # Shared with the other services; built once per process
+                self.agent_coordinator = get_coordinator()
                 logger.info("AgentCoordinator initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize AgentCoordinator: {e}")
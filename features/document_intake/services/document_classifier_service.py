@@ -1,10 +1,18 @@
-import os
 # Assuming pdf_processor and document_service might be needed later,
 # but not directly for the spec's implementation of classify/validate.
 # Imports will be adjusted if needed when integrating with actual data flow.
 
-# Use the specific HuggingFace integration package
-from langchain_huggingface import HuggingFaceHub
+from shared.hf_inference import get_inference_gateway
+
+DOCUMENT_CATEGORIES = [
+    "Bank Statement",
+    "Invoice",
+    "Tax Return",
+    "Financial Report",
+    "Investment Statement",
+    "Receipt",
+    "Other",
+]
 
 
 class DocumentClassifier:
@@ -12,12 +20,18 @@ class DocumentClassifier:
     Service for classifying financial documents and validating their completeness.
     Uses a Hugging Face model for classification.
     """
-    def __init__(self):
-        """Initializes the DocumentClassifier with a HuggingFaceHub LLM."""
-        self.llm = HuggingFaceHub(
-            repo_id="facebook/bart-large-mnli",  # Model specified for classification
-            huggingfacehub_api_token=os.environ.get("HUGGINGFACE_API_KEY"),
-            task="text-classification"  # Specify task for better results if applicable
+    def __init__(self, gateway=None):
+        """Initializes the DocumentClassifier with a client of the shared inference gateway.
+
+        Args:
+            gateway: HFInferenceGateway to use (the shared one if omitted)
+        """
+        gateway = gateway or get_inference_gateway()
+        # bart-large-mnli is an NLI model: classify zero-shot against the category names
+        self.llm = gateway.client(
+            "facebook/bart-large-mnli",
+            task="zero-shot-classification",
+            parameters={"candidate_labels": DOCUMENT_CATEGORIES},
         )
 
     def classify(self, document_text):
@@ -30,39 +44,32 @@ class DocumentClassifier:
         Returns:
             tuple: A tuple containing:
                 - document_type (str): The predicted document category.
-                - confidence (float): The confidence score (placeholder).
+                - confidence (float): The score of the category (0-100).
                 - metadata (dict): Extracted metadata (placeholder).
         """
-        # Create prompt for classification
-        # Note: bart-large-mnli might not follow instructions well with this prompt format.
-        # It's primarily a sequence classification model.
-        # A different model or prompt strategy might be needed for robust classification + confidence.
-        # For now, sticking to the spec's intent.
-        prompt = f"""
-        Classify the following financial document into one of these categories:
-        - Bank Statement
-        - Invoice
-        - Tax Return
-        - Financial Report
-        - Investment Statement
-        - Receipt
-        - Other
-
-        Document text:
-        {document_text[:2000]}...
-
-        Format: Return only the category name.
+        return self._classification(document_text, self.llm.predict(document_text[:2000]))
+
+    def classify_many(self, document_texts):
+        """
+        Classifies several documents; the texts are sent to the model in batches.
+
+        Args:
+            document_texts (list): The text content of each document.
+
+        Returns:
+            list: A (document_type, confidence, metadata) tuple per document.
         """
-        # Using invoke() which is standard for newer LangChain versions
-        # The result might just be the class name directly from bart-large-mnli
-        result = self.llm.invoke(prompt)
-
-        # Parse result - Highly dependent on the actual model output format.
-        # The spec's parsing (`result.strip().split('\n')`) is unlikely to work well
-        # with bart-large-mnli and this prompt.
-        # Using placeholder parsing for now.
-        document_type = result.strip() if result else "Other"
-        confidence = 75.0  # Placeholder confidence as per spec
+        outputs = self.llm.predict_many([text[:2000] for text in document_texts])
+        return [self._classification(text, output) for text, output in zip(document_texts, outputs)]
+
+    def _classification(self, document_text, output):
+        """Builds the classify() result from a zero-shot output ({"labels": [...], "scores": [...]})."""
+        if isinstance(output, list):
+            output = output[0] if output else {}
+        labels = output.get("labels") or ["Other"]
+        scores = output.get("scores") or [0.0]
+        document_type = labels[0]
+        confidence = round(scores[0] * 100, 2)
 
         # Extract suggested metadata based on document type
         metadata = self._extract_metadata(document_text, document_type)
@@ -29,9 +29,17 @@ except ImportError:
 
     class MockAnalysisService:
 
+        def get_analyzer(self):
+            return self
+
         def analyze_health(self, data):
             return {"error": "Analysis service unavailable"}
 
+        def analyze(self, data, comparisons=None):
+            return {"health": self.analyze_health(data),
+                    "comparisons": {label: self.compare_performance(data, comp)
+                                    for label, comp in (comparisons or {}).items()}}
+
         def get_comparison_data(self, doc, period):
             return {}
 
@@ -54,13 +62,15 @@ insights_routes = Blueprint('insights', __name__, url_prefix='/api/analysis')
 def analyze_financial_health_route():
     """
     API endpoint to analyze financial health for a document.
-    Accepts 'documentId' query parameter.
+    Accepts 'documentId' and optional (repeatable) 'compareTo' query parameters;
+    the comparisons are then run together with the health analysis.
     """
     document_id = request.args.get('documentId')
     if not document_id:
         return jsonify({"error": "Missing documentId query parameter"}), 400
+    comparison_periods = request.args.getlist('compareTo')
 
-    analyzer = financial_analysis_service  # Assuming singleton or module-level instance
+    analyzer = financial_analysis_service.get_analyzer()
     data_service = financial_data_service
 
     if not analyzer or not data_service:
@@ -74,10 +84,13 @@ def analyze_financial_health_route():
             # Could also check document_service.get_document here if needed
             return jsonify({"error": f"Financial data for document ID {document_id} not found or could not be generated"}), 404
 
-        # Analyze financial health
-        health_assessment = analyzer.analyze_health(financial_data)
+        comparisons = {period: analyzer.get_comparison_data(financial_data, period) for period in comparison_periods}
 
-        return jsonify(health_assessment)
+        # Analyze financial health (and the requested comparisons, concurrently)
+        result = analyzer.analyze(financial_data, comparisons)
+        if not comparison_periods:
+            return jsonify(result["health"])
+        return jsonify({**result["health"], "comparisons": result["comparisons"]})
     except Exception as e:
         print(f"Error analyzing financial health for document {document_id}: {e}")
         return jsonify({"error": "Failed to analyze financial health"}), 500
@@ -97,7 +110,7 @@ def compare_performance_route():
     if not comparison_period:
         return jsonify({"error": "Missing period query parameter"}), 400
 
-    analyzer = financial_analysis_service
+    analyzer = financial_analysis_service.get_analyzer()
     data_service = financial_data_service  # Needed to get current data
     doc_service = document_service  # Needed for context for comparison data
 
@@ -1,6 +1,6 @@
-import os
 import re
-from langchain_huggingface import HuggingFaceHub
+
+from shared.hf_inference import get_inference_gateway
 
 # Import the placeholder service for getting structured data
 try:
@@ -40,14 +40,15 @@ class FinancialAnalyzer:
     Service for analyzing financial data to provide insights and comparisons.
     Uses an LLM for generating qualitative assessments.
     """
-    def __init__(self):
-        """Initializes the FinancialAnalyzer with a HuggingFaceHub LLM."""
+    def __init__(self, gateway=None):
+        """Initializes the FinancialAnalyzer with a client of the shared inference gateway.
+
+        Args:
+            gateway: HFInferenceGateway to use (the shared one if omitted)
+        """
+        gateway = gateway or get_inference_gateway()
         # Use a model with strong reasoning capabilities as per spec
-        self.llm = HuggingFaceHub(
-            repo_id="mistralai/Mistral-7B-Instruct-v0.2",
-            huggingfacehub_api_token=os.environ.get("HUGGINGFACE_API_KEY"),
-            task="text-generation"
-        )
+        self.llm = gateway.client("mistralai/Mistral-7B-Instruct-v0.2", task="text-generation")
 
     def analyze_health(self, financial_data):
         """
@@ -59,8 +60,54 @@ class FinancialAnalyzer:
         Returns:
             dict: An assessment including calculated ratios and LLM-generated analysis.
         """
+        return self._start_health_analysis(financial_data)()
+
+    def compare_performance(self, current_financial_data, comparison_data):
+        """
+        Compares financial performance between two periods using LLM.
+
+        Args:
+            current_financial_data (dict): Structured data for the current period.
+            comparison_data (dict): Structured data for the comparison period.
+
+        Returns:
+            dict: Analysis results including LLM comparison and calculated changes.
+        """
+        return self._start_comparison(current_financial_data, comparison_data)()
+
+    def analyze(self, financial_data, comparisons=None):
+        """
+        Runs the health analysis and the performance comparisons together.
+        All LLM prompts are sent at once instead of one after the other.
+
+        Args:
+            financial_data (dict): Structured data for the current period.
+            comparisons (dict): Comparison data by label (e.g. 'previous-year').
+
+        Returns:
+            dict: {"health": analyze_health result, "comparisons": {label: compare_performance result}}
+        """
+        health = self._start_health_analysis(financial_data)
+        pending = {label: self._start_comparison(financial_data, data)
+                   for label, data in (comparisons or {}).items()}
+        return {
+            "health": health(),
+            "comparisons": {label: finish() for label, finish in pending.items()},
+        }
+
+    def _llm_text(self, pending, task, fallback):
+        """The stripped text of a submitted prompt, or the fallback message if it failed."""
+        try:
+            return pending.result().strip()
+        except Exception as e:
+            print(f"Error during LLM {task}: {e}")
+            return fallback
+
+    def _start_health_analysis(self, financial_data):
+        """Submits the health prompt; returns a function building the result once the LLM answered."""
         if not financial_data:
-            return {"error": "Financial data not provided for health analysis."}
+            error = {"error": "Financial data not provided for health analysis."}
+            return lambda: error
 
         # Extract key metrics safely
         revenue = financial_data.get('revenue', {})
@@ -90,21 +137,19 @@ class FinancialAnalyzer:
         including strengths, weaknesses, and recommendations. Be concise and clear.
         """
 
-        try:
-            assessment = self.llm.invoke(prompt)
-        except Exception as e:
-            print(f"Error during LLM health assessment: {e}")
-            assessment = "Error generating LLM assessment."
+        pending = self.llm.submit(prompt)
 
-        return {
-            "metrics": {
-                "current_ratio": current_ratio,
-                "profit_margin": f"{profit_margin}%" if profit_margin is not None else "N/A",
-                "debt_to_equity": debt_to_equity
-            },
-            "assessment": assessment.strip(),
-            "health_score": self._calculate_health_score(current_ratio, profit_margin, debt_to_equity)
-        }
+        def finish():
+            return {
+                "metrics": {
+                    "current_ratio": current_ratio,
+                    "profit_margin": f"{profit_margin}%" if profit_margin is not None else "N/A",
+                    "debt_to_equity": debt_to_equity
+                },
+                "assessment": self._llm_text(pending, "health assessment", "Error generating LLM assessment."),
+                "health_score": self._calculate_health_score(current_ratio, profit_margin, debt_to_equity)
+            }
+        return finish
 
     def get_comparison_data(self, document, comparison_period):
         """
@@ -142,19 +187,11 @@ class FinancialAnalyzer:
 
         return {}  # Return empty if period is unknown
 
-    def compare_performance(self, current_financial_data, comparison_data):
-        """
-        Compares financial performance between two periods using LLM.
-
-        Args:
-            current_financial_data (dict): Structured data for the current period.
-            comparison_data (dict): Structured data for the comparison period.
-
-        Returns:
-            dict: Analysis results including LLM comparison and calculated changes.
-        """
+    def _start_comparison(self, current_financial_data, comparison_data):
+        """Submits the comparison prompt; returns a function building the result once the LLM answered."""
         if not current_financial_data or not comparison_data:
-            return {"error": "Insufficient data for performance comparison."}
+            error = {"error": "Insufficient data for performance comparison."}
+            return lambda: error
 
         # Prepare data for the prompt
         current_revenue = current_financial_data.get('revenue', {}).get('total', 'N/A')
@@ -183,25 +220,24 @@ class FinancialAnalyzer:
         Be concise and focus on key differences.
         """
 
-        try:
-            analysis = self.llm.invoke(prompt)
-        except Exception as e:
-            print(f"Error during LLM performance comparison: {e}")
-            analysis = "Error generating LLM comparison analysis."
+        pending = self.llm.submit(prompt)
 
         # Calculate percentage changes
         revenue_change = self._calculate_percentage_change(current_revenue, comp_revenue)
         expenses_change = self._calculate_percentage_change(current_expenses, comp_expenses)
         net_income_change = self._calculate_percentage_change(current_net_income, comp_net_income)
 
-        return {
-            "analysis": analysis.strip(),
-            "changes": {
-                "revenue": revenue_change,
-                "expenses": expenses_change,
-                "net_income": net_income_change
+        def finish():
+            return {
+                "analysis": self._llm_text(pending, "performance comparison",
+                                           "Error generating LLM comparison analysis."),
+                "changes": {
+                    "revenue": revenue_change,
+                    "expenses": expenses_change,
+                    "net_income": net_income_change
+                }
             }
-        }
+        return finish
 
     # --- Helper methods for ratio calculations ---
 
@@ -8,19 +8,17 @@ import uuid
 from datetime import datetime
 import json
 from pathlib import Path
-from pdf_processor import DocumentProcessor # Import the new processor
 from services.database_service import save_document_results, get_document_by_id as db_get_doc_by_id, get_collection # Import DB functions
-from config.configuration import document_processor_config # Import the config for the processor
 from bson import ObjectId # For handling MongoDB ObjectIds
+from agent_framework.registry import registry
 
 logger = logging.getLogger(__name__)
 
 # In-memory document storage (in a real app, this would be in a database)
 # documents = {} # Remove in-memory storage
 
-# Instantiate the DocumentProcessor (consider making this a singleton or managed instance later)
-# Pass the specific configuration section for the processor
-document_processor = DocumentProcessor(config=document_processor_config)
+# Shared DocumentProcessor (configured from config.configuration), built on first use
+document_processor = registry.proxy("document_processor")
 
 def process_pdf_document(file_path):
     """
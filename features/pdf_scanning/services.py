@@ -75,17 +75,13 @@ class PDFScanningService:
             lang="heb+eng" if language == "he" else "eng"
         )
         
-        # חילוץ טקסט
-        text = self.pdf_processor.extract_text(file_path)
-        logger.info(f"Extracted text ({len(text)} chars) from {file_path}")
-        
-        # חילוץ טבלאות
-        tables = self.pdf_processor.extract_tables(file_path)
-        logger.info(f"Extracted {len(tables)} tables from {file_path}")
-        
-        # חילוץ מידע פיננסי
-        financial_data = self.pdf_processor.extract_financial_data(file_path)
-        logger.info(f"Extracted financial data from {file_path}")
+        # חילוץ טקסט, טבלאות ומידע פיננסי במעבר אחד (כל עמוד עובר OCR פעם אחת)
+        scan_result = self.pdf_processor.scan(file_path)
+        text = scan_result["text"]
+        tables = scan_result["tables"]
+        financial_data = scan_result["financial_data"]
+        logger.info(f"Extracted text ({len(text)} chars), {len(tables)} tables "
+                    f"and financial data from {file_path}")
         
         # יצירת מסמך סרוק
         document = ScannedDocument(
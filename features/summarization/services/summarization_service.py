@@ -1,6 +1,15 @@
-import os
-# Use the specific HuggingFace integration package
-from langchain_huggingface import HuggingFaceHub
+import asyncio
+
+from shared.hf_inference import get_inference_gateway
+from shared.map_reduce_llm import (
+    MapReduceLLM,
+    RateLimitedScheduler,
+    run_sync,
+)
+from shared.result_cache import DEFAULT_CACHE_DIR, ChunkResultCache
+
+# Bump when the prompts change so cached partial summaries are not reused
+SUMMARY_PROMPT_VERSION = "bart-large-cnn/summary-v1"
 
 
 class Summarizer:
@@ -8,15 +17,48 @@ class Summarizer:
     Service for generating summaries of financial documents.
     Uses a Hugging Face model optimized for summarization.
     """
-    def __init__(self):
-        """Initializes the Summarizer with a HuggingFaceHub LLM."""
-        self.llm = HuggingFaceHub(
-            repo_id="facebook/bart-large-cnn",  # Model specified for summarization
-            huggingfacehub_api_token=os.environ.get("HUGGINGFACE_API_KEY"),
-            task="summarization"  # Specify task for better results
+    def __init__(self, gateway=None):
+        """Initializes the Summarizer with a client of the shared inference gateway.
+
+        Args:
+            gateway: HFInferenceGateway to use (the shared one if omitted)
+        """
+        gateway = gateway or get_inference_gateway()
+        # Partial summaries are cached by the map-reduce runs (self.cache), not the gateway
+        self.llm = gateway.client("facebook/bart-large-cnn", task="summarization", cache=False)
+        # Shared by all map-reduce runs so concurrent requests respect one rate limit
+        self.scheduler = RateLimitedScheduler()
+        self.cache = ChunkResultCache(DEFAULT_CACHE_DIR)
+
+    def _map_reduce(self, chunk_chars=1024):
+        """Builds a map-reduce runner: summarize each chunk, then summarize the summaries."""
+        return MapReduceLLM(
+            self.llm.invoke,
+            map_prompt=lambda chunk: f"Summarize the following financial document text:\n\n{chunk}",
+            reduce_prompt=lambda parts: (
+                "Summarize the following summaries of consecutive sections of a financial document:\n\n"
+                + "\n\n".join(parts)
+            ),
+            chunk_chars=chunk_chars,
+            scheduler=self.scheduler,
+            cache=self.cache,
+            namespace=SUMMARY_PROMPT_VERSION,
         )
 
-    def generate_summary(self, document, format_type='narrative', max_length=250):
+    async def summarize_text(self, text):
+        """
+        Summarizes the full text: chunks are summarized concurrently and the partial
+        summaries are combined hierarchically.
+
+        Args:
+            text (str): The document text.
+
+        Returns:
+            str: The summary text.
+        """
+        return await self._map_reduce().run(text)
+
+    def generate_summary(self, document, format_type='narrative', max_length=250, map_reduce=True):
         """
         Generates a summary for a single document.
 
@@ -24,6 +66,8 @@ class Summarizer:
             document (dict): Dictionary representing the document, expected to have 'content' and 'type'.
             format_type (str, optional): The desired format ('narrative', 'bullet-points', 'key-metrics'). Defaults to 'narrative'.
             max_length (int, optional): Approximate maximum length of the summary in words. Defaults to 250.
+            map_reduce (bool, optional): Summarize the whole document in chunks. When False only
+                the first 1024 characters are summarized. Defaults to True.
 
         Returns:
             dict: A dictionary containing the summary and metadata.
@@ -44,16 +88,18 @@ class Summarizer:
         # Bart-large-cnn generally works best with just the text to summarize.
         # Adding complex instructions might confuse it. We'll keep it simple.
         # The prompt structure from the spec might be better suited for instruction-tuned models.
-        # We also need to consider the model's max input length.
-        # LangChain's HuggingFaceHub might handle truncation, but let's be explicit.
-        max_input_length = 1024  # Typical limit for BART models
-        input_text = document_text[:max_input_length]
+        if map_reduce:
+            # Each chunk stays within the model's input limit
+            summary_text = run_sync(self.summarize_text(document_text))
+        else:
+            # Single prompt: truncate to the typical BART input limit
+            input_text = document_text[:1024]
 
-        # Adjusting prompt for a summarization model
-        prompt = f"Summarize the following financial document text:\n\n{input_text}"
+            # Adjusting prompt for a summarization model
+            prompt = f"Summarize the following financial document text:\n\n{input_text}"
 
-        # Using invoke()
-        summary_text = self.llm.invoke(prompt)
+            # Using invoke()
+            summary_text = self.llm.invoke(prompt)
 
         # Post-processing for length (approximate)
         words = summary_text.split()
@@ -71,6 +117,8 @@ class Summarizer:
     def compare_documents(self, documents):
         """
         Generates a comparative summary for multiple documents.
+        Each document is first summarized in full (all documents concurrently),
+        then the summaries are compared.
 
         Args:
             documents (list): A list of document dictionaries.
@@ -87,18 +135,23 @@ class Summarizer:
         doc_titles = []
         max_input_length_per_doc = 1500 // len(documents)  # Distribute input budget
 
-        for doc in documents:
+        async def summarize_all():
+            return await asyncio.gather(*(self.summarize_text(doc.get('content', '')) for doc in documents))
+
+        summaries = run_sync(summarize_all())
+
+        for doc, doc_summary in zip(documents, summaries):
             doc_id = doc.get('id', 'Unknown')
             doc_type = doc.get('type', 'Unknown')
             doc_title = doc.get('title', f'Document {doc_id}')
-            doc_content = doc.get('content', '')[:max_input_length_per_doc]
+            doc_content = doc_summary[:max_input_length_per_doc]
 
             doc_ids.append(doc_id)
             doc_titles.append(doc_title)
 
             document_info.append(f"""
             --- Document: {doc_title} (ID: {doc_id}, Type: {doc_type}) ---
-            Content excerpt:
+            Summary:
             {doc_content}
             """)
 
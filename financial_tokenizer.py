@@ -0,0 +1,10 @@
+"""
+Adapter for financial_tokenizer.py
+This redirects to the new vertical slice architecture.
+
+New location: project_organized/features/financial_analysis/extractors/financial_tokenizer.py
+"""
+import logging
+from project_organized.features.financial_analysis.extractors.financial_tokenizer import *
+
+logging.warning("Using financial_tokenizer.py from deprecated location. Please update imports to use 'from project_organized.features.financial_analysis.extractors.financial_tokenizer import ...'")
@@ -22,6 +22,7 @@ const DocumentDetailPage = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [activeTab, setActiveTab] = useState('overview'); // Default tab
+  const [progress, setProgress] = useState(null); // Latest processing event ({ stage, done, total })
   // Removed separate tables state, assuming tables are within document.processed_data.tables
   // const [tables, setTables] = useState([]);
   // const [tablesLoading, setTablesLoading] = useState(false);
@@ -35,12 +36,6 @@ const DocumentDetailPage = () => {
       const data = await documentService.getDocument(documentId);
       setDocument(data);
 
-      // Optional: Add polling logic if status is 'processing'
-      if (data?.metadata?.status === 'processing') {
-        // Example: setTimeout(fetchDocument, 5000); // Poll again after 5s
-        console.log("Document processing, consider implementing polling...");
-      }
-
     } catch (err) {
       console.error('Error fetching document:', err);
       setError(`אירעה שגיאה בטעינת המסמך: ${err.message}.`);
@@ -53,10 +48,21 @@ const DocumentDetailPage = () => {
   // טעינת פרטי המסמך בעת טעינת הדף או שינוי ID
   useEffect(() => {
     fetchDocument();
-    // Add cleanup for polling if implemented
-    // return () => clearTimeout(pollingTimeoutId);
   }, [fetchDocument]); // Use the memoized fetchDocument function
 
+  // מעקב אחר התקדמות העיבוד (SSE) במקום polling; טעינה מחדש בסיום העיבוד
+  const documentStatus = document?.metadata?.status;
+  useEffect(() => {
+    if (documentStatus !== 'processing') return undefined;
+    const unsubscribe = documentService.subscribeToProgress(documentId, (event) => {
+      setProgress(event);
+      if (['completed', 'failed', 'error'].includes(event.stage)) {
+        fetchDocument();
+      }
+    });
+    return unsubscribe;
+  }, [documentId, documentStatus, fetchDocument]);
+
 
   // טיפול בלחיצה על כפתור "חזרה לרשימה"
   const handleBackClick = () => {
@@ -117,6 +123,12 @@ const DocumentDetailPage = () => {
               <div className="processing-notice tab-processing">
                   <i className="fas fa-spinner fa-spin"></i>
                   <p>המסמך עדיין בעיבוד. נתונים עבור לשונית זו יוצגו בסיום העיבוד.</p>
+                  {progress && (
+                      <p className="processing-stage">
+                          שלב: {progress.stage}
+                          {progress.total ? ` (${progress.done}/${progress.total})` : ''}
+                      </p>
+                  )}
               </div>
           );
       }
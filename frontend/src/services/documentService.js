@@ -57,6 +57,32 @@ const documentService = {
     }
   },
 
+  // מעקב אחר התקדמות עיבוד מסמך (Server-Sent Events) במקום polling
+  // onEvent מקבל אירועים כמו { stage: 'ocr', done, total } עד 'completed' או 'failed'
+  // מחזיר פונקציה לסגירת החיבור
+  subscribeToProgress: (documentId, onEvent, onError) => {
+    if (!documentId) {
+        throw new Error("Document ID is required");
+    }
+    const baseUrl = api.defaults.baseURL.replace(/\/$/, '');
+    const source = new EventSource(`${baseUrl}/documents/${documentId}/events`);
+    const stages = ['queued', 'processing', 'ocr', 'isins', 'tables', 'completed', 'failed', 'error'];
+    stages.forEach(stage => {
+      source.addEventListener(stage, (message) => {
+        const event = JSON.parse(message.data);
+        onEvent(event);
+        if (stage === 'completed' || stage === 'failed' || stage === 'error') {
+          source.close();
+        }
+      });
+    });
+    source.onerror = (error) => {
+      // EventSource reconnects by itself; report but keep the connection
+      if (onError) onError(error);
+    };
+    return () => source.close();
+  },
+
   // שאילת שאלה על מסמך
   askQuestion: async (documentId, question) => {
      if (!documentId || !question) {
@@ -1,11 +1,19 @@
-import google.generativeai as genai
 from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional, Generic, TypeVar
 import os
-import google.api_core.exceptions
 import json
 import fitz  # PyMuPDF
+import asyncio
 from config import Config # Import Config to get the key
+from chunked_instrument_extractor import (
+    ChunkedInstrumentExtractor, GeminiRestClient, build_prompt
+)
+from shared.map_reduce_llm import run_sync
+from utils.lazy_imports import lazy_import
+
+# The Gemini SDK (and its gRPC stack) is imported when the processor is created
+genai = lazy_import("google.generativeai")
+google_exceptions = lazy_import("google.api_core.exceptions")
 
 T = TypeVar('T')
 
@@ -30,40 +38,34 @@ class GeminiFinancialProcessor:
         try:
             genai.configure(api_key=self.gemini_api_key)
             # Using a cost-effective and capable model suitable for JSON extraction
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            self.model_name = 'gemini-1.5-flash'
+            self.model = genai.GenerativeModel(self.model_name)
             print("DEBUG: Gemini client configured successfully.")
         except Exception as e:
             print(f"ERROR: Failed to configure Gemini client: {str(e)}")
             raise  # Re-raise the exception to prevent using an uninitialized client
 
-    def process_document(self, pdf_path):
-        """Process PDF document and extract structured financial information."""
+        # Chunked mode: one request per page/holdings section, cached by content hash
+        self.chunked_extractor = ChunkedInstrumentExtractor(
+            GeminiRestClient(self.gemini_api_key, model=self.model_name).generate,
+            max_concurrency=Config.LLM_MAX_CONCURRENCY,
+        )
+
+    def process_document(self, pdf_path, chunked=False):
+        """Process PDF document and extract structured financial information.
+
+        Args:
+            pdf_path: Path to the PDF
+            chunked: Send the document page by page (see process_document_chunked)
+                     instead of as one truncated prompt
+        """
+        if chunked:
+            # Also safe when called from a running event loop (e.g. the async agents)
+            return run_sync(self.process_document_chunked(pdf_path))
+
         try:
-            # Text extraction using PyMuPDF (fitz)
-            document = {}
-            try:
-                doc = fitz.open(pdf_path)
-                if doc.is_encrypted:
-                    # PyMuPDF handles decryption attempt automatically in open()
-                    # If it fails, it raises an exception caught below.
-                    # We could try doc.authenticate('') if needed, but open usually suffices.
-                    print(f"INFO: PDF {pdf_path} is encrypted. PyMuPDF will attempt to open.")
-
-                for i, page in enumerate(doc.pages()): # Use doc.pages()
-                    try:
-                        text = page.get_text("text") or '' # Use get_text()
-                        document[str(i)] = {'text': text}
-                    except Exception as page_err:
-                        print(f"WARN: Error extracting text from page {i} using PyMuPDF in {pdf_path}: {page_err}")
-                        document[str(i)] = {'text': ''} # Add empty text on error
-                doc.close() # Close the document
-            except fitz.fitz.PasswordError as decrypt_err:
-                 print(f"ERROR: Failed to decrypt PDF {pdf_path} with empty password: {decrypt_err}")
-                 return [] # Cannot proceed with encrypted file
-            except Exception as fitz_err:
-                print(f"ERROR: Failed to process PDF {pdf_path} with PyMuPDF: {fitz_err}")
-                # Optionally, add fallback to OCR here if PyMuPDF fails fundamentally
-                # For now, return empty list on PyMuPDF failure
+            document = self._read_document(pdf_path)
+            if document is None:
                 return []
             # Simple table extraction placeholder (remains unchanged)
             tables = {}
@@ -86,6 +88,63 @@ class GeminiFinancialProcessor:
             # Consider logging traceback here
             return []
 
+    async def process_document_chunked(self, pdf_path):
+        """Extract instruments page by page with bounded concurrency.
+
+        Pages without ISIN-like tokens are skipped, long pages are split by
+        holdings section, results are deduplicated by ISIN and cached per chunk
+        content hash so unchanged pages are not resent on re-runs.
+        """
+        try:
+            # PyMuPDF parsing blocks: keep it off the event loop
+            document = await asyncio.to_thread(self._read_document, pdf_path)
+            if document is None:
+                return []
+            page_texts = [page_data.get('text', '') for page_data in document.values()]
+            if not any(text.strip() for text in page_texts):
+                print(f"WARN: No text extracted from document: {pdf_path}")
+                return []
+
+            extracted_data = await self.chunked_extractor.extract(page_texts)
+            return self._to_instruments(extracted_data)
+
+        except FileNotFoundError:
+            print(f"ERROR: PDF file not found at {pdf_path}")
+            return []
+        except Exception as e:
+            print(f"ERROR: Unexpected error processing document {pdf_path} in chunked mode: {str(e)}")
+            return []
+
+    def _read_document(self, pdf_path):
+        """Extract page texts with PyMuPDF ({page index: {'text': ...}}), None on failure."""
+        # Text extraction using PyMuPDF (fitz)
+        document = {}
+        try:
+            doc = fitz.open(pdf_path)
+            if doc.is_encrypted:
+                # PyMuPDF handles decryption attempt automatically in open()
+                # If it fails, it raises an exception caught below.
+                # We could try doc.authenticate('') if needed, but open usually suffices.
+                print(f"INFO: PDF {pdf_path} is encrypted. PyMuPDF will attempt to open.")
+
+            for i, page in enumerate(doc.pages()): # Use doc.pages()
+                try:
+                    text = page.get_text("text") or '' # Use get_text()
+                    document[str(i)] = {'text': text}
+                except Exception as page_err:
+                    print(f"WARN: Error extracting text from page {i} using PyMuPDF in {pdf_path}: {page_err}")
+                    document[str(i)] = {'text': ''} # Add empty text on error
+            doc.close() # Close the document
+        except fitz.fitz.PasswordError as decrypt_err:
+             print(f"ERROR: Failed to decrypt PDF {pdf_path} with empty password: {decrypt_err}")
+             return None # Cannot proceed with encrypted file
+        except Exception as fitz_err:
+            print(f"ERROR: Failed to process PDF {pdf_path} with PyMuPDF: {fitz_err}")
+            # Optionally, add fallback to OCR here if PyMuPDF fails fundamentally
+            # For now, return None on PyMuPDF failure
+            return None
+        return document
+
     def _combine_document_and_tables(self, document, tables):
         """Combine document text and tables into unified format."""
         content = []
@@ -103,28 +162,7 @@ class GeminiFinancialProcessor:
 
     def _extract_financial_instruments(self, text):
         """Extract financial instruments from document text using Gemini."""
-        prompt = f"""
-Analyze the following financial document text and extract all identifiable financial instruments.
-For each instrument, provide the ISIN code (12-character alphanumeric), name, type (e.g., stock, bond, ETF), value, currency, and percentage in the portfolio if available.
-Format the output as a JSON list of objects, where each object adheres *exactly* to the following structure (use null for missing optional fields):
-{{
-    "isin": "string (12 chars)",
-    "name": "string",
-    "type": "string or null",
-    "value": "float or null",
-    "currency": "string or null",
-    "percentage_in_portfolio": "float or null"
-}}
-
-Ensure the output is *only* the JSON list, without any introductory text, explanations, or markdown formatting.
-
-Document Text:
----
-{text[:30000]}
----
-
-JSON Output:
-"""
+        prompt = build_prompt(text[:30000])
         # Truncated text to avoid exceeding potential input limits, adjust as needed
 
         try:
@@ -169,25 +207,13 @@ JSON Output:
                 return []
 
             # Validate and convert JSON data to FinancialInstrument objects
-            instruments = []
-            if isinstance(extracted_data, list):
-                for item_idx, item in enumerate(extracted_data):
-                    if not isinstance(item, dict):
-                        print(f"WARN: Skipping item #{item_idx} as it's not a dictionary: {item}")
-                        continue
-                    try:
-                        # Pydantic will handle missing optional fields if they are None/null in JSON
-                        instruments.append(FinancialInstrument(**item))
-                    except ValidationError as val_err:
-                        print(f"WARN: Skipping item #{item_idx} due to validation error: {val_err}. Item: {item}")
             # Handle case where Gemini might return a single object not in a list (less likely with JSON mime type)
-            elif isinstance(extracted_data, dict):
-                 try:
-                     instruments.append(FinancialInstrument(**extracted_data))
-                 except ValidationError as val_err:
-                     print(f"WARN: Skipping single item due to validation error: {val_err}. Item: {extracted_data}")
-            else:
+            if isinstance(extracted_data, dict):
+                extracted_data = [extracted_data]
+            if not isinstance(extracted_data, list):
                 print(f"WARN: Unexpected JSON structure received from Gemini (expected list): {type(extracted_data)}")
+                return []
+            instruments = self._to_instruments(extracted_data)
 
             print(f"DEBUG: Extracted {len(instruments)} instruments.")
             return instruments
@@ -195,10 +221,10 @@ JSON Output:
         except (genai.types.BlockedPromptException, genai.types.StopCandidateException) as safety_exception:
              print(f"ERROR: Gemini request blocked due to safety settings: {safety_exception}")
              return []
-        except google.api_core.exceptions.PermissionDenied as perm_denied:
+        except google_exceptions.PermissionDenied as perm_denied:
              print(f"ERROR: Gemini API permission denied. Check API key and project permissions: {perm_denied}")
              return []
-        except google.api_core.exceptions.ResourceExhausted as rate_limit:
+        except google_exceptions.ResourceExhausted as rate_limit:
              print(f"ERROR: Gemini API rate limit exceeded: {rate_limit}")
              # Implement backoff/retry logic here if needed
              return []
@@ -209,6 +235,20 @@ JSON Output:
             print(f"Traceback: {traceback.format_exc()}")
             return []
 
+    def _to_instruments(self, extracted_data):
+        """Validate extracted dicts into FinancialInstrument objects, skipping invalid items."""
+        instruments = []
+        for item_idx, item in enumerate(extracted_data):
+            if not isinstance(item, dict):
+                print(f"WARN: Skipping item #{item_idx} as it's not a dictionary: {item}")
+                continue
+            try:
+                # Pydantic will handle missing optional fields if they are None/null in JSON
+                instruments.append(FinancialInstrument(**item))
+            except ValidationError as val_err:
+                print(f"WARN: Skipping item #{item_idx} due to validation error: {val_err}. Item: {item}")
+        return instruments
+
 
 if __name__ == "__main__":
     # This block is for basic testing of the processor
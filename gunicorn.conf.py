@@ -0,0 +1,26 @@
+# file: gunicorn.conf.py
+# Usage: gunicorn -c gunicorn.conf.py app:app
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+# Threaded workers for regular requests. Progress streams (/api/documents/<id>/events)
+# stay open for minutes; they are served by gunicorn_events.conf.py (gevent workers)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+
+# Import the app in the master so models loaded there are shared copy-on-write
+preload_app = True
+
+
+def when_ready(server):
+    """Load fork-safe models (extractors, embedding model) once, before workers fork."""
+    from agent_framework.registry import registry
+    registry.preload(fork_safe_only=True)
+
+
+def post_fork(server, worker):
+    """Build per-worker services (LLM clients, agents, DB-backed services)."""
+    from agent_framework.registry import registry
+    registry.preload()
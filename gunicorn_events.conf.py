@@ -0,0 +1,17 @@
+# file: gunicorn_events.conf.py
+# Usage: gunicorn -c gunicorn_events.conf.py app:app
+# Serves the progress streams (/api/documents/<id>/events). The reverse proxy routes
+# that path here and everything else to the gunicorn.conf.py workers, so open
+# dashboards never take threads from normal requests.
+import os
+
+bind = os.environ.get("GUNICORN_EVENTS_BIND", "0.0.0.0:5001")
+workers = int(os.environ.get("GUNICORN_EVENTS_WORKERS", 2))
+# Each open stream is a greenlet waiting on its Redis pub/sub socket
+worker_class = "gevent"
+worker_connections = int(os.environ.get("GUNICORN_EVENTS_CONNECTIONS", 1000))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+
+# Import the app in each worker, after gevent has patched it (no preloaded services:
+# streams only need the progress publisher's Redis client)
+preload_app = False
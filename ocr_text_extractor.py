@@ -1,7 +1,5 @@
 # file: ocr_text_extractor.py
 
-import pdf2image
-import pytesseract
 import os
 import json
 import sys
@@ -9,19 +7,34 @@ import re
 import logging
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f"document_processing_{datetime.now().strftime('%Y%m%d')}.log"),
-        logging.StreamHandler()
-    ]
-)
+from utils.lazy_imports import lazy_import
+
+# OCR libraries are imported on first use
+pdf2image = lazy_import("pdf2image")
+pytesseract = lazy_import("pytesseract")
+
 logger = logging.getLogger("document_processor")
 
-def extract_text_with_ocr(pdf_path, language="heb+eng", dpi=300):
-    """Extract text from a PDF using OCR with high resolution images for better accuracy"""
+def configure_logging():
+    """Log to the console and a dated file (CLI only; importing this module configures nothing)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f"document_processing_{datetime.now().strftime('%Y%m%d')}.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+def extract_text_with_ocr(pdf_path, language="heb+eng", dpi=300, progress_callback=None):
+    """Extract text from a PDF using OCR with high resolution images for better accuracy
+
+    Args:
+        pdf_path: Path to the PDF file
+        language: Tesseract language(s)
+        dpi: Resolution used to render pages
+        progress_callback: Optional callable(pages_done, total_pages) called after each page
+    """
     if not os.path.exists(pdf_path):
         logger.error(f"File not found: {pdf_path}")
         return None
@@ -40,6 +53,8 @@ def extract_text_with_ocr(pdf_path, language="heb+eng", dpi=300):
                 "page_num": i+1,
                 "text": text
             }
+            if progress_callback:
+                progress_callback(i + 1, len(images))
         
         return document
     
@@ -145,6 +160,7 @@ class OCRQuestionAnswering:
                 return "I couldn't find information related to your question."
 
 def main():
+    configure_logging()
     if len(sys.argv) < 2:
         print("Usage: python ocr_text_extractor.py <pdf_path> [question] [language]")
         print("Example: python ocr_text_extractor.py test_documents/sample.pdf 'How many pages?' 'heb+eng'")
@@ -1,6 +1,20 @@
-from .document_processor import DocumentProcessor
-from .extraction.text_extractor import PDFTextExtractor
-from .analysis.financial_analyzer import FinancialAnalyzer
-from .tables.table_extractor import TableExtractor
+import importlib
+
+# Exported classes are imported on first access, so importing one submodule
+# (e.g. pdf_processor.extraction.image_preprocessing) does not load the others
+_EXPORTS = {
+    'DocumentProcessor': '.document_processor',
+    'PDFTextExtractor': '.extraction.text_extractor',
+    'FinancialAnalyzer': '.analysis.financial_analyzer',
+    'TableExtractor': '.tables.table_extractor',
+}
 
 __all__ = ['DocumentProcessor', 'PDFTextExtractor', 'FinancialAnalyzer', 'TableExtractor']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,6 +2,8 @@ import re
 import logging
 from typing import Dict, List, Any, Optional, Union
 
+from ..language.term_matcher import get_term_matcher
+
 logger = logging.getLogger(__name__)
 
 class FinancialEntityRecognizer:
@@ -50,6 +52,10 @@ class FinancialEntityRecognizer:
             ]
         }
         
+        # Shared compiled matchers: English uses word boundaries, Hebrew plain substrings
+        self.english_term_matcher = get_term_matcher(self.financial_terms, word_boundary=True)
+        self.hebrew_term_matcher = get_term_matcher(self.hebrew_financial_terms, lowercase=False)
+        
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initialized FinancialEntityRecognizer")
     
@@ -114,23 +120,10 @@ class FinancialEntityRecognizer:
         Returns:
             List of unique financial terms found
         """
-        found_terms = set() # Use a set to store unique terms
-        
-        # Check for English terms (case-insensitive)
-        lower_text = text.lower()
-        for category, terms in self.financial_terms.items():
-            for term in terms:
-                # Use word boundaries to avoid partial matches (e.g., 'asset' in 'assets')
-                if re.search(r'\b' + re.escape(term) + r'\b', lower_text):
-                    found_terms.add(term)
-        
-        # Check for Hebrew terms (case-sensitive, as Hebrew doesn't have case)
-        for category, terms in self.hebrew_financial_terms.items():
-            for term in terms:
-                 # Use word boundaries if applicable for Hebrew (might need adjustment)
-                 # For simplicity, using basic substring check for now
-                if term in text:
-                    found_terms.add(term)
+        # English terms are matched case-insensitively on word boundaries,
+        # Hebrew terms (no case) as plain substrings
+        found_terms = self.english_term_matcher.find_terms(text)
+        found_terms |= self.hebrew_term_matcher.find_terms(text)
         
         return list(found_terms)
     
@@ -6,6 +6,12 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple, Union
 import os
 import json
+import warnings
+
+from ..language.term_matcher import get_term_matcher
+from .statement_vectors import (
+    coerce_numeric_frame, coerce_numeric_frames, find_label_rows, growth_rate_matrix, row_values, safe_ratio, to_list
+)
 
 class FinancialAnalyzer:
     """Analyze financial data extracted from documents.
@@ -21,6 +27,8 @@ class FinancialAnalyzer:
         
         # Load financial terms (English and Hebrew)
         self.financial_terms = self._load_financial_terms()
+        # Compiled once per process and shared by all analyzer instances
+        self.term_matcher = get_term_matcher(self.financial_terms)
         
         # Initialize ISIN database if available
         self.isin_database = self._load_isin_database()
@@ -117,14 +125,10 @@ class FinancialAnalyzer:
             return "unknown"
             
         # Convert dataframe to string for term matching
-        table_text = ' '.join([' '.join(map(str, row)) for row in df.values])
-        table_text = table_text.lower()
+        table_text = ' '.join(map(str, df.values.ravel()))
         
-        # Count matches for each category
-        scores = {}
-        for category, terms in self.financial_terms.items():
-            count = sum(1 for term in terms if term.lower() in table_text)
-            scores[category] = count
+        # Count matches for each category in a single pass over the text
+        scores = self.term_matcher.category_counts(table_text)
             
         # Return the category with the highest score, if any terms matched
         max_category = max(scores.items(), key=lambda x: x[1])
@@ -259,9 +263,32 @@ class FinancialAnalyzer:
         
         return computed_check == check_digit
         
+    def analyze_financial_tables(self, tables: List[pd.DataFrame],
+                                 table_types: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """Analyze a batch of tables (e.g. all tables extracted from a document).
+        
+        Args:
+            tables: DataFrames containing table data
+            table_types: Type of each table if known (classified when None)
+            
+        Returns:
+            List of analysis results, one per table
+        """
+        if table_types is None:
+            table_types = [None] * len(tables)
+        # Text cells of all tables are parsed in a single vectorized pass
+        numeric_tables = coerce_numeric_frames(tables)
+        return [
+            self._analyze_table(df, table_type, numeric_df)
+            for df, table_type, numeric_df in zip(tables, table_types, numeric_tables)
+        ]
+
     def analyze_financial_table(self, df: pd.DataFrame, table_type: str = None) -> Dict[str, Any]:
         """Perform analysis on a financial table with multilingual support.
         
+        The table is coerced to numbers once and the statement analyses work
+        on that numeric copy with array operations.
+        
         Args:
             df: DataFrame containing table data
             table_type: Type of financial table if known
@@ -269,6 +296,10 @@ class FinancialAnalyzer:
         Returns:
             Dictionary containing analysis results
         """
+        return self._analyze_table(df, table_type, coerce_numeric_frame(df))
+
+    def _analyze_table(self, df: pd.DataFrame, table_type: Optional[str], numeric_df: pd.DataFrame) -> Dict[str, Any]:
+        """Analysis of one table, given its numeric version."""
         if df.empty:
             return {"error": "Empty table provided"}
             
@@ -295,19 +326,22 @@ class FinancialAnalyzer:
             
         # Basic numerical analysis
         try:
-            # Convert to numeric where possible
-            numeric_df = df.map(self._try_numeric_conversion) # Use map instead of deprecated applymap
-            
             # Calculate basic statistics for numeric columns
             numeric_cols = numeric_df.select_dtypes(include=['number']).columns
             if not numeric_cols.empty:
-                stats = numeric_df[numeric_cols].describe()
+                values = numeric_df[numeric_cols].to_numpy(dtype=float)
+                with warnings.catch_warnings():
+                    # All-NaN columns give NaN statistics
+                    warnings.simplefilter("ignore", category=RuntimeWarning)
+                    means = np.nanmean(values, axis=0)
+                    mins = np.nanmin(values, axis=0)
+                    maxs = np.nanmax(values, axis=0)
                 analysis["statistics"] = {
                     col: {
-                        "mean": stats[col]["mean"],
-                        "min": stats[col]["min"],
-                        "max": stats[col]["max"]
-                    } for col in numeric_cols
+                        "mean": means[i],
+                        "min": mins[i],
+                        "max": maxs[i]
+                    } for i, col in enumerate(numeric_cols)
                 }
                 
                 # Calculate growth rates if time series data
@@ -320,19 +354,19 @@ class FinancialAnalyzer:
             
         # Specific analysis by table type
         if table_type == "income_statement":
-            income_analysis = self._analyze_income_statement(df)
+            income_analysis = self._analyze_income_statement(df, numeric_df)
             if income_analysis:
                 analysis["income_analysis"] = income_analysis
         elif table_type == "balance_sheet":
-            balance_analysis = self._analyze_balance_sheet(df)
+            balance_analysis = self._analyze_balance_sheet(df, numeric_df)
             if balance_analysis:
                 analysis["balance_analysis"] = balance_analysis
         elif table_type == "cash_flow":
-            cash_flow_analysis = self._analyze_cash_flow(df)
+            cash_flow_analysis = self._analyze_cash_flow(df, numeric_df)
             if cash_flow_analysis:
                 analysis["cash_flow_analysis"] = cash_flow_analysis
         elif table_type == "ratios":
-            ratio_analysis = self._analyze_ratios(df)
+            ratio_analysis = self._analyze_ratios(df, numeric_df)
             if ratio_analysis:
                 analysis["ratio_analysis"] = ratio_analysis
         elif table_type == "investment_portfolio":
@@ -471,241 +505,118 @@ class FinancialAnalyzer:
         
     def _calculate_growth_rates(self, df: pd.DataFrame) -> Dict[str, List[float]]:
         """Calculate period-over-period growth rates."""
-        growth_rates = {}
-        
         # Need at least 2 columns for growth calculation
         if len(df.columns) < 2:
             return {}
             
-        # Calculate for each row
-        for idx, row in df.iterrows():
-            values = row.values
-            rates = []
-            
-            for i in range(1, len(values)):
-                if values[i-1] != 0 and not pd.isna(values[i-1]) and not pd.isna(values[i]):
-                    rate = ((values[i] - values[i-1]) / abs(values[i-1])) * 100
-                    rates.append(round(rate, 2))
-                else:
-                    rates.append(None)
-                    
-            if any(rate is not None for rate in rates):
-                growth_rates[str(idx)] = rates
+        rates = growth_rate_matrix(df.to_numpy(dtype=float))
+        
+        growth_rates = {}
+        for idx, row_rates in zip(df.index, rates):
+            if not np.isnan(row_rates).all():
+                growth_rates[str(idx)] = to_list(row_rates)
                 
         return growth_rates
-        
-    def _analyze_income_statement(self, df: pd.DataFrame) -> Dict[str, Any]:
+    
+    # Key rows of each statement type (English and Hebrew); a row matches if
+    # its label contains any of the terms
+    INCOME_STATEMENT_ITEMS = {
+        'revenue': ['revenue', 'sales', 'total revenue', 'הכנסות', 'מכירות', 'סך הכנסות'],
+        'gross_profit': ['gross profit', 'gross margin', 'רווח גולמי', 'מרווח גולמי'],
+        'operating_income': ['operating income', 'operating profit', 'ebit', 'רווח תפעולי', 'רווח מפעולות'],
+        'net_income': ['net income', 'net profit', 'profit after tax', 'net earnings', 'רווח נקי', 'רווח אחרי מס']
+    }
+    
+    BALANCE_SHEET_ITEMS = {
+        'total_assets': ['total assets', 'assets', 'סך נכסים', 'נכסים', 'סך הנכסים'],
+        'total_liabilities': ['total liabilities', 'liabilities', 'סך התחייבויות', 'התחייבויות'],
+        'equity': ['total equity', 'shareholders equity', 'stockholders equity', 'הון עצמי', 'הון', 'סך ההון'],
+        'cash': ['cash', 'cash and cash equivalents', 'cash & equivalents', 'מזומנים', 'מזומנים ושווי מזומנים'],
+        'debt': ['total debt', 'long term debt', 'short term debt', 'חוב', 'חוב לזמן ארוך', 'חוב לזמן קצר']
+    }
+    
+    CASH_FLOW_ITEMS = {
+        'operating_cash_flow': ['operating cash flow', 'cash from operations', 'net cash from operating activities', 
+                               'תזרים מזומנים מפעילות שוטפת', 'מזומנים מפעילות תפעולית'],
+        'investing_cash_flow': ['investing cash flow', 'cash from investing', 'net cash from investing activities',
+                               'תזרים מזומנים מפעילות השקעה', 'מזומנים מפעילות השקעה'],
+        'financing_cash_flow': ['financing cash flow', 'cash from financing', 'net cash from financing activities',
+                               'תזרים מזומנים מפעילות מימון', 'מזומנים מפעילות מימון'],
+        'capex': ['capital expenditures', 'capex', 'purchases of property and equipment',
+                 'השקעות הוניות', 'רכישת רכוש קבוע'],
+        'free_cash_flow': ['free cash flow', 'fcf', 'תזרים מזומנים חופשי']
+    }
+    
+    KEY_RATIOS = {
+        'roe': ['return on equity', 'roe', 'תשואה על ההון', 'תשואה להון'],
+        'roa': ['return on assets', 'roa', 'תשואה על הנכסים', 'תשואה לנכסים'],
+        'current_ratio': ['current ratio', 'יחס שוטף'],
+        'quick_ratio': ['quick ratio', 'acid test ratio', 'יחס מהיר'],
+        'debt_to_equity': ['debt to equity', 'debt/equity', 'יחס חוב להון'],
+        'pe_ratio': ['price to earnings', 'p/e ratio', 'pe ratio', 'מכפיל רווח'],
+        'dividend_yield': ['dividend yield', 'תשואת דיבידנד'],
+        'profit_margin': ['profit margin', 'net margin', 'שולי רווח', 'מרווח נקי'],
+        'operating_margin': ['operating margin', 'מרווח תפעולי']
+    }
+    
+    def _key_rows(self, df: pd.DataFrame, numeric_df: Optional[pd.DataFrame],
+                  key_items: Dict[str, List[str]]) -> Dict[str, np.ndarray]:
+        """Find the key rows of a statement and return their numeric values (label column skipped)."""
+        if numeric_df is None:
+            numeric_df = coerce_numeric_frame(df)
+        found_rows = find_label_rows(df, key_items)
+        return {item_name: row_values(numeric_df, position) for item_name, position in found_rows.items()}
+    
+    def _analyze_income_statement(self, df: pd.DataFrame, numeric_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """Analyze income statement data with multilingual support."""
-        analysis = {}
-        
-        # Try to identify key rows with both English and Hebrew terms
-        key_items = {
-            'revenue': ['revenue', 'sales', 'total revenue', 'הכנסות', 'מכירות', 'סך הכנסות'],
-            'gross_profit': ['gross profit', 'gross margin', 'רווח גולמי', 'מרווח גולמי'],
-            'operating_income': ['operating income', 'operating profit', 'ebit', 'רווח תפעולי', 'רווח מפעולות'],
-            'net_income': ['net income', 'net profit', 'profit after tax', 'net earnings', 'רווח נקי', 'רווח אחרי מס']
-        }
-        
-        # Find indices of key rows
-        found_indices = {}
-        for item_name, search_terms in key_items.items():
-            for idx, row_label in enumerate(df.index):
-                if isinstance(row_label, str) and any(term in row_label.lower() for term in search_terms):
-                    found_indices[item_name] = idx
-                    break
-        
-        # If no match in index, try searching in the first column
-        if df.shape[1] > 0:
-            first_col = df.iloc[:, 0]
-            for item_name, search_terms in key_items.items():
-                if item_name not in found_indices:
-                    for idx, value in enumerate(first_col):
-                        if isinstance(value, str) and any(term in value.lower() for term in search_terms):
-                            found_indices[item_name] = idx
-                            break
-        
-        # Extract values for key metrics
-        for item_name, idx in found_indices.items():
-            analysis[item_name] = df.iloc[idx, 1:].tolist()  # Skip the label column
+        rows = self._key_rows(df, numeric_df, self.INCOME_STATEMENT_ITEMS)
+        analysis = {item_name: to_list(values) for item_name, values in rows.items()}
         
         # Calculate margins if we have revenue and other metrics
-        if 'revenue' in found_indices and len(analysis.get('revenue', [])) > 0:
+        revenue = rows.get('revenue')
+        if revenue is not None and len(revenue) > 0:
             for metric in ['gross_profit', 'operating_income', 'net_income']:
-                if metric in found_indices and len(analysis.get(metric, [])) == len(analysis['revenue']):
-                    margin_name = f"{metric}_margin"
-                    margins = []
-                    
-                    for i, rev in enumerate(analysis['revenue']):
-                        if rev != 0 and not pd.isna(rev) and not pd.isna(analysis[metric][i]):
-                            margin = (analysis[metric][i] / rev) * 100
-                            margins.append(round(margin, 2))
-                        else:
-                            margins.append(None)
-                            
-                    analysis[margin_name] = margins
+                if metric in rows and len(rows[metric]) == len(revenue):
+                    analysis[f"{metric}_margin"] = safe_ratio(rows[metric], revenue, scale=100)
         
         return analysis
     
-    def _analyze_balance_sheet(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_balance_sheet(self, df: pd.DataFrame, numeric_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """Analyze balance sheet data with multilingual support."""
-        analysis = {}
-        
-        # Key balance sheet items to look for (English and Hebrew)
-        key_items = {
-            'total_assets': ['total assets', 'assets', 'סך נכסים', 'נכסים', 'סך הנכסים'],
-            'total_liabilities': ['total liabilities', 'liabilities', 'סך התחייבויות', 'התחייבויות'],
-            'equity': ['total equity', 'shareholders equity', 'stockholders equity', 'הון עצמי', 'הון', 'סך ההון'],
-            'cash': ['cash', 'cash and cash equivalents', 'cash & equivalents', 'מזומנים', 'מזומנים ושווי מזומנים'],
-            'debt': ['total debt', 'long term debt', 'short term debt', 'חוב', 'חוב לזמן ארוך', 'חוב לזמן קצר']
-        }
-        
-        # Find indices of key rows (same approach as income statement)
-        found_indices = {}
-        for item_name, search_terms in key_items.items():
-            for idx, row_label in enumerate(df.index):
-                if isinstance(row_label, str) and any(term in row_label.lower() for term in search_terms):
-                    found_indices[item_name] = idx
-                    break
-        
-        # If no match in index, try searching in the first column
-        if df.shape[1] > 0:
-            first_col = df.iloc[:, 0]
-            for item_name, search_terms in key_items.items():
-                if item_name not in found_indices:
-                    for idx, value in enumerate(first_col):
-                        if isinstance(value, str) and any(term in value.lower() for term in search_terms):
-                            found_indices[item_name] = idx
-                            break
-        
-        # Extract values for key metrics
-        for item_name, idx in found_indices.items():
-            analysis[item_name] = df.iloc[idx, 1:].tolist()  # Skip the label column
+        rows = self._key_rows(df, numeric_df, self.BALANCE_SHEET_ITEMS)
+        analysis = {item_name: to_list(values) for item_name, values in rows.items()}
         
         # Calculate financial ratios if we have the necessary data
-        if 'total_assets' in found_indices and 'total_liabilities' in found_indices:
-            if len(analysis.get('total_assets', [])) > 0 and len(analysis.get('total_liabilities', [])) == len(analysis['total_assets']):
-                debt_to_assets = []
-                
-                for i, assets in enumerate(analysis['total_assets']):
-                    if assets != 0 and not pd.isna(assets) and not pd.isna(analysis['total_liabilities'][i]):
-                        ratio = (analysis['total_liabilities'][i] / assets)
-                        debt_to_assets.append(round(ratio, 2))
-                    else:
-                        debt_to_assets.append(None)
-                        
-                analysis['debt_to_assets_ratio'] = debt_to_assets
-        
-        if 'cash' in found_indices and 'total_assets' in found_indices:
-            if len(analysis.get('cash', [])) > 0 and len(analysis.get('total_assets', [])) == len(analysis['cash']):
-                cash_ratio = []
-                
-                for i, assets in enumerate(analysis['total_assets']):
-                    if assets != 0 and not pd.isna(assets) and not pd.isna(analysis['cash'][i]):
-                        ratio = (analysis['cash'][i] / assets) * 100
-                        cash_ratio.append(round(ratio, 2))
-                    else:
-                        cash_ratio.append(None)
-                        
-                analysis['cash_to_assets_percent'] = cash_ratio
+        assets = rows.get('total_assets')
+        if assets is not None and len(assets) > 0:
+            liabilities = rows.get('total_liabilities')
+            if liabilities is not None and len(liabilities) == len(assets):
+                analysis['debt_to_assets_ratio'] = safe_ratio(liabilities, assets)
+            cash = rows.get('cash')
+            if cash is not None and len(cash) == len(assets):
+                analysis['cash_to_assets_percent'] = safe_ratio(cash, assets, scale=100)
         
         return analysis
     
-    def _analyze_cash_flow(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_cash_flow(self, df: pd.DataFrame, numeric_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """Analyze cash flow statement data with multilingual support."""
-        analysis = {}
-        
-        # Key cash flow items to look for (English and Hebrew)
-        key_items = {
-            'operating_cash_flow': ['operating cash flow', 'cash from operations', 'net cash from operating activities', 
-                                   'תזרים מזומנים מפעילות שוטפת', 'מזומנים מפעילות תפעולית'],
-            'investing_cash_flow': ['investing cash flow', 'cash from investing', 'net cash from investing activities',
-                                   'תזרים מזומנים מפעילות השקעה', 'מזומנים מפעילות השקעה'],
-            'financing_cash_flow': ['financing cash flow', 'cash from financing', 'net cash from financing activities',
-                                   'תזרים מזומנים מפעילות מימון', 'מזומנים מפעילות מימון'],
-            'capex': ['capital expenditures', 'capex', 'purchases of property and equipment',
-                     'השקעות הוניות', 'רכישת רכוש קבוע'],
-            'free_cash_flow': ['free cash flow', 'fcf', 'תזרים מזומנים חופשי']
-        }
-        
-        # Find indices of key rows
-        found_indices = {}
-        for item_name, search_terms in key_items.items():
-            for idx, row_label in enumerate(df.index):
-                if isinstance(row_label, str) and any(term in row_label.lower() for term in search_terms):
-                    found_indices[item_name] = idx
-                    break
-        
-        # If no match in index, try searching in the first column
-        if df.shape[1] > 0:
-            first_col = df.iloc[:, 0]
-            for item_name, search_terms in key_items.items():
-                if item_name not in found_indices:
-                    for idx, value in enumerate(first_col):
-                        if isinstance(value, str) and any(term in value.lower() for term in search_terms):
-                            found_indices[item_name] = idx
-                            break
-        
-        # Extract values for key metrics
-        for item_name, idx in found_indices.items():
-            analysis[item_name] = df.iloc[idx, 1:].tolist()  # Skip the label column
+        rows = self._key_rows(df, numeric_df, self.CASH_FLOW_ITEMS)
+        analysis = {item_name: to_list(values) for item_name, values in rows.items()}
         
         # Calculate free cash flow if not already present and we have the necessary components
-        if 'free_cash_flow' not in found_indices and 'operating_cash_flow' in found_indices and 'capex' in found_indices:
-            if len(analysis.get('operating_cash_flow', [])) > 0 and len(analysis.get('capex', [])) == len(analysis['operating_cash_flow']):
-                fcf = []
-                
-                for i, ocf in enumerate(analysis['operating_cash_flow']):
-                    if not pd.isna(ocf) and not pd.isna(analysis['capex'][i]):
-                        # Capex is typically negative, so we add it to operating cash flow
-                        flow = ocf + analysis['capex'][i]
-                        fcf.append(flow)
-                    else:
-                        fcf.append(None)
-                        
-                analysis['calculated_free_cash_flow'] = fcf
+        operating = rows.get('operating_cash_flow')
+        capex = rows.get('capex')
+        if 'free_cash_flow' not in rows and operating is not None and capex is not None:
+            if len(operating) > 0 and len(capex) == len(operating):
+                # Capex is typically negative, so we add it to operating cash flow
+                analysis['calculated_free_cash_flow'] = to_list(operating + capex)
         
         return analysis
     
-    def _analyze_ratios(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_ratios(self, df: pd.DataFrame, numeric_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """Analyze financial ratios table with multilingual support."""
-        analysis = {}
-        
-        # Key financial ratios to look for (English and Hebrew)
-        key_ratios = {
-            'roe': ['return on equity', 'roe', 'תשואה על ההון', 'תשואה להון'],
-            'roa': ['return on assets', 'roa', 'תשואה על הנכסים', 'תשואה לנכסים'],
-            'current_ratio': ['current ratio', 'יחס שוטף'],
-            'quick_ratio': ['quick ratio', 'acid test ratio', 'יחס מהיר'],
-            'debt_to_equity': ['debt to equity', 'debt/equity', 'יחס חוב להון'],
-            'pe_ratio': ['price to earnings', 'p/e ratio', 'pe ratio', 'מכפיל רווח'],
-            'dividend_yield': ['dividend yield', 'תשואת דיבידנד'],
-            'profit_margin': ['profit margin', 'net margin', 'שולי רווח', 'מרווח נקי'],
-            'operating_margin': ['operating margin', 'מרווח תפעולי']
-        }
-        
-        # Find indices of key rows
-        found_indices = {}
-        for ratio_name, search_terms in key_ratios.items():
-            for idx, row_label in enumerate(df.index):
-                if isinstance(row_label, str) and any(term in row_label.lower() for term in search_terms):
-                    found_indices[ratio_name] = idx
-                    break
-        
-        # If no match in index, try searching in the first column
-        if df.shape[1] > 0:
-            first_col = df.iloc[:, 0]
-            for ratio_name, search_terms in key_ratios.items():
-                if ratio_name not in found_indices:
-                    for idx, value in enumerate(first_col):
-                        if isinstance(value, str) and any(term in value.lower() for term in search_terms):
-                            found_indices[ratio_name] = idx
-                            break
-        
-        # Extract values for key ratios
-        for ratio_name, idx in found_indices.items():
-            analysis[ratio_name] = df.iloc[idx, 1:].tolist()  # Skip the label column
-        
-        return analysis
+        rows = self._key_rows(df, numeric_df, self.KEY_RATIOS)
+        return {ratio_name: to_list(values) for ratio_name, values in rows.items()}
     
     def _analyze_investment_portfolio(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze investment portfolio data with ISIN detection.
@@ -0,0 +1,179 @@
+"""Vectorized helpers for financial statement tables.
+
+Used by ``FinancialAnalyzer`` so a table is coerced to numbers once, column by
+column, key rows are found with precompiled label patterns, and growth rates,
+margins and ratios are computed as array operations instead of per-cell
+Python loops.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Symbols removed before parsing; Hebrew shekel notation is removed after the
+# parentheses check, as in FinancialAnalyzer._try_numeric_conversion
+_SYMBOLS = re.compile(r'[,$€£₪%]')
+_PARENTHESES = re.compile(r'^\((.*)\)$')
+_SHEKEL = re.compile(r'ש"ח|שקל')
+_SUFFIX_MULTIPLIERS = {
+    'K': 1e3, 'k': 1e3, 'ק': 1e3,
+    'M': 1e6, 'm': 1e6, 'מ': 1e6,
+    'B': 1e9, 'b': 1e9, 'ב': 1e9,
+}
+
+
+_is_str = np.frompyfunc(lambda v: isinstance(v, str), 1, 1)
+_is_number = np.frompyfunc(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool), 1, 1)
+
+
+def parse_numbers(cells: np.ndarray) -> np.ndarray:
+    """Parse an array of strings as financial numbers (NaN where not a number).
+
+    Handles thousands separators, currency symbols, parentheses negatives,
+    shekel notation and K/M/B suffixes, like
+    ``FinancialAnalyzer._try_numeric_conversion``.
+    """
+    if len(cells) == 0:
+        return np.empty(0, dtype=float)
+    text = pd.Series(cells, dtype=object).str.strip()
+    text = text.str.replace(_SYMBOLS, '', regex=True)
+    text = text.str.replace(_PARENTHESES, r'-\1', regex=True)
+    text = text.str.replace(_SHEKEL, '', regex=True)
+
+    multiplier = text.str[-1:].map(_SUFFIX_MULTIPLIERS).fillna(1.0)
+    text = text.where(multiplier.eq(1.0), text.str[:-1])
+    # float() ignores surrounding whitespace, to_numeric does not
+    text = text.str.replace('־', '.', regex=False).str.strip()
+
+    return (pd.to_numeric(text, errors='coerce') * multiplier).to_numpy(dtype=float)
+
+
+def coerce_numeric_frames(tables: Sequence[pd.DataFrame]) -> List[pd.DataFrame]:
+    """Numeric versions of a batch of tables.
+
+    The text cells of all tables are parsed together in one vectorized pass.
+    Cells that cannot be parsed keep their original value, so a column only
+    becomes numeric if every cell in it parsed.
+    """
+    prepared = []
+    for df in tables:
+        values = df.to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = np.nan
+        is_str = _is_str(values).astype(bool) if values.size else np.zeros(values.shape, dtype=bool)
+        prepared.append((values, is_str))
+
+    all_cells = [values[is_str] for values, is_str in prepared]
+    parsed = parse_numbers(np.concatenate(all_cells)) if all_cells else np.empty(0)
+    offsets = np.cumsum([0] + [len(cells) for cells in all_cells])
+
+    frames = []
+    for i, (df, (values, is_str)) in enumerate(zip(tables, prepared)):
+        table_parsed = parsed[offsets[i]:offsets[i + 1]]
+        ok = ~np.isnan(table_parsed)
+        rows, cols = np.nonzero(is_str)
+        values[rows[ok], cols[ok]] = table_parsed[ok]
+        # Numeric where every cell is now a number or missing
+        numeric_cells = _is_number(values).astype(bool) if values.size else np.ones(values.shape, dtype=bool)
+        numeric_cols = numeric_cells.all(axis=0)
+
+        columns = {}
+        for j in range(df.shape[1]):
+            if pd.api.types.is_numeric_dtype(df.dtypes.iloc[j]):
+                columns[j] = df.iloc[:, j].to_numpy()
+            elif numeric_cols[j]:
+                columns[j] = values[:, j].astype(float)
+            else:
+                columns[j] = values[:, j]
+        frame = pd.DataFrame(columns, index=df.index)
+        frame.columns = df.columns
+        frames.append(frame)
+    return frames
+
+
+def coerce_numeric_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Numeric version of a table (see ``coerce_numeric_frames``)."""
+    return coerce_numeric_frames([df])[0]
+
+
+@lru_cache(maxsize=64)
+def _compile_label_patterns(frozen_items: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Tuple[Tuple[str, re.Pattern], ...]:
+    return tuple(
+        (name, re.compile('|'.join(re.escape(term.lower()) for term in sorted(terms, key=len, reverse=True))))
+        for name, terms in frozen_items
+    )
+
+
+def label_patterns(key_items: Dict[str, Sequence[str]]) -> Tuple[Tuple[str, re.Pattern], ...]:
+    """Compiled "label contains any term" pattern per key item (cached per term set)."""
+    return _compile_label_patterns(tuple((name, tuple(terms)) for name, terms in key_items.items()))
+
+
+def _first_matches(labels: Sequence, patterns: Tuple[Tuple[str, re.Pattern], ...],
+                   names: Sequence[str]) -> Dict[str, int]:
+    labels = pd.Series(list(labels), dtype=object)
+    is_str = _is_str(labels.to_numpy()).astype(bool)
+    if not is_str.any():
+        return {}
+    lowered = labels.where(is_str, None).str.lower()
+    found = {}
+    for name, pattern in patterns:
+        if name not in names:
+            continue
+        hits = lowered.str.contains(pattern, na=False).to_numpy()
+        if hits.any():
+            found[name] = int(hits.argmax())
+    return found
+
+
+def find_label_rows(df: pd.DataFrame, key_items: Dict[str, Sequence[str]]) -> Dict[str, int]:
+    """Row position of the first row whose label contains a term of each key item.
+
+    Labels are looked up in the index first, then in the first column for the
+    items not found there. Only string labels match.
+
+    Returns:
+        Mapping of key item name to row position
+    """
+    patterns = label_patterns(key_items)
+    names = list(key_items)
+    found = _first_matches(df.index, patterns, names)
+    if df.shape[1] > 0:
+        missing = [name for name in names if name not in found]
+        if missing:
+            found.update(_first_matches(df.iloc[:, 0], patterns, missing))
+    # Keep the key item order
+    return {name: found[name] for name in names if name in found}
+
+
+def row_values(numeric_df: pd.DataFrame, position: int) -> np.ndarray:
+    """Values of a row, without the label column, as floats (NaN if not numeric)."""
+    values = numeric_df.iloc[position, 1:]
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+
+
+def to_list(values: np.ndarray, decimals: Optional[int] = None) -> List[Optional[float]]:
+    """JSON-friendly list: NaN becomes None, optionally rounded."""
+    if decimals is not None:
+        values = np.round(values, decimals)
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def safe_ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0,
+               decimals: Optional[int] = 2) -> List[Optional[float]]:
+    """Element-wise ``numerator / denominator * scale``; None where undefined."""
+    valid = (denominator != 0) & ~np.isnan(denominator) & ~np.isnan(numerator)
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=valid)
+    return to_list(out * scale, decimals)
+
+
+def growth_rate_matrix(values: np.ndarray) -> np.ndarray:
+    """Period-over-period growth in percent for each row of a 2-D array (NaN where undefined)."""
+    previous, current = values[:, :-1], values[:, 1:]
+    valid = (previous != 0) & ~np.isnan(previous) & ~np.isnan(current)
+    rates = np.full(previous.shape, np.nan)
+    np.divide(current - previous, np.abs(previous), out=rates, where=valid)
+    return np.round(rates * 100, 2)
@@ -58,16 +58,27 @@ class AWSPDFProcessor:
     def _process_document_async(self, document_id, s3_key, language):
         """עיבוד מסמך (במערכת אמיתית יהיה אסינכרוני)"""
         try:
-            # חילוץ טקסט
-            textract_result = self.textract_service.analyze_document(
-                self.s3_service.bucket_name,
-                s3_key
-            )
-
-            # חילוץ טבלאות
+            # ניתוח אחד של המסמך ב-Textract, משותף לטקסט, לטבלאות ולטפסים.
+            # PDF (גם מרובה עמודים) מנותח בעבודה אסינכרונית, תמונה בקריאה סינכרונית
+            if s3_key.lower().endswith('.pdf'):
+                graph = self.textract_service.analyze_blocks_async(
+                    self.s3_service.bucket_name,
+                    s3_key,
+                    page_callback=lambda page, blocks: self.logger.debug(
+                        f"Textract page {page} received for {document_id} ({len(blocks)} blocks)")
+                )
+            else:
+                graph = self.textract_service.analyze_blocks(
+                    self.s3_service.bucket_name,
+                    s3_key
+                )
+            textract_result = graph.to_result()
+
+            # חילוץ טבלאות מאותו ניתוח
             tables = self.table_extractor.extract_tables(
                 self.s3_service.bucket_name,
-                s3_key
+                s3_key,
+                graph=graph
             )
 
             # ניתוח התוכן באמצעות AI
@@ -77,6 +88,7 @@ class AWSPDFProcessor:
             processed_data = {
                 'text_content': textract_result['text'],
                 'tables': tables,
+                'forms': textract_result['forms'],
                 'ai_analysis': ai_analysis
             }
 
@@ -132,21 +132,20 @@ class DocumentProcessor:
                     pass
 
         # Analyze tables
-        for page_num, tables in dataframes.items():
+        # All tables of the document are analyzed in one batch
+        table_refs = [(page_num, table_data) for page_num, tables in dataframes.items() for table_data in tables]
+        frames = [table_data['dataframe'] for _, table_data in table_refs]
+        analyses = self.financial_analyzer.analyze_financial_tables(
+            frames, [self.financial_analyzer.classify_table(df) for df in frames]
+        )
+
+        for page_num in dataframes:
             result['tables_analysis'][page_num] = []
-
-            for table_data in tables:
-                df = table_data['dataframe']
-                table_type = self.financial_analyzer.classify_table(df)
-
-                analysis = self.financial_analyzer.analyze_financial_table(
-                    df, table_type
-                )
-
-                result['tables_analysis'][page_num].append({
-                    'table_id': table_data['metadata'].get('id', 0),
-                    'analysis': analysis
-                })
+        for (page_num, table_data), analysis in zip(table_refs, analyses):
+            result['tables_analysis'][page_num].append({
+                'table_id': table_data['metadata'].get('id', 0),
+                'analysis': analysis
+            })
 
         return result
 
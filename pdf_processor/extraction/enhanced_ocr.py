@@ -2,13 +2,12 @@ import os
 import tempfile
 import logging
 import pytesseract
-from pdf2image import convert_from_path
-import cv2
-import numpy as np
 from PIL import Image
 import io
 from pathlib import Path
 
+from .image_preprocessing import get_image_preprocessor
+
 logger = logging.getLogger(__name__)
 
 class EnhancedOCR:
@@ -27,6 +26,9 @@ class EnhancedOCR:
         self.default_language = self.config.get('default_language', 'eng')
         self.additional_languages = self.config.get('additional_languages', ['heb'])
         
+        # Shared preprocessing pipeline (quality probe, cached page rasters)
+        self.preprocessor = get_image_preprocessor(self.config.get('preprocessing'))
+        
         # Specify tesseract configuration
         self.tesseract_config = '--psm 6'  # Assume a single uniform block of text
         
@@ -38,7 +40,7 @@ class EnhancedOCR:
         """Process an image with OCR.
         
         Args:
-            image: PIL Image object or path to image
+            image: PIL Image object, PageRaster or path to image
             language: Language code (e.g., 'eng', 'heb', 'auto')
             
         Returns:
@@ -89,19 +91,14 @@ class EnhancedOCR:
             Extracted text
         """
         try:
-            # Convert PDF page to image
-            images = convert_from_path(
-                pdf_path,
-                first_page=page_number + 1,
-                last_page=page_number + 1
-            )
+            # Rasterize once; the page is shared with the table detectors
+            raster = self.preprocessor.page_raster(pdf_path, page_number)
             
-            if not images:
+            if raster is None:
                 self.logger.warning(f"Failed to convert PDF page {page_number} to image")
                 return ""
                 
-            # Process the image
-            return self.process_image(images[0], language)
+            return self.process_image(raster, language)
         except Exception as e:
             self.logger.error(f"Error processing PDF page {page_number}: {str(e)}")
             return ""
@@ -109,36 +106,17 @@ class EnhancedOCR:
     def _preprocess_image(self, image):
         """Preprocess image to improve OCR accuracy.
         
+        Contrast enhancement and denoising only run when the quality probe
+        finds them necessary; the products are cached on the page raster.
+        
         Args:
-            image: PIL Image
+            image: PIL Image or PageRaster
             
         Returns:
             Preprocessed PIL Image
         """
-        # Convert PIL image to OpenCV format
-        img = np.array(image)
-        
-        # Convert to grayscale if the image is color
-        if len(img.shape) == 3:
-            gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = img
-            
-        # Apply adaptive thresholding
-        binary = cv2.adaptiveThreshold(
-            gray, 
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            11,
-            2
-        )
-        
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(binary, h=10)
-        
-        # Convert back to PIL Image
-        return Image.fromarray(denoised)
+        raster = self.preprocessor.raster(image)
+        return raster.to_pil('ocr_binary')
     
     def _contains_hebrew(self, text):
         """Check if text contains Hebrew characters."""
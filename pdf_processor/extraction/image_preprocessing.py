@@ -0,0 +1,321 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from pdf2image import convert_from_path
+from PIL import Image
+
+from .page_geometry import PageTransform, apply_page_geometry, estimate_page_geometry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREPROCESSING_CONFIG = {
+    'dpi': 300,                     # Rasterization DPI shared by OCR and table detection
+    'denoise': 'auto',              # 'auto' (probe decides), 'always' or 'never'
+    'denoise_method': 'median',     # 'median', 'bilateral' or 'nlmeans' (slow, legacy)
+    'contrast': 'auto',             # 'auto', 'always' or 'never' (CLAHE)
+    'probe_max_side': 800,          # Quality probe runs on a thumbnail of this size
+    'noise_threshold': 6.0,         # Estimated noise sigma above which we denoise
+    'contrast_threshold': 90.0,     # Intensity spread (p98 - p2) below which we enhance
+    'page_cache_bytes': 256 << 20,  # Memory budget for rasterized pages (and their products)
+    'correct_geometry': True,       # Detect and undo page rotation/skew once per page
+    'geometry_max_side': 1000,      # Rotation/skew are estimated on a thumbnail of this size
+    'max_skew_angle': 10.0,         # Largest skew (degrees) searched for
+    'min_skew_angle': 0.5,          # Smaller skews are left alone (OCR copes with them)
+    'check_upside_down': False,     # Also run Tesseract OSD on upright-looking pages
+}
+
+
+class PageRaster:
+    """A page image plus lazily computed, cached preprocessing products.
+
+    Every downstream consumer (OCR, table detection) asks the raster for the
+    product it needs (``gray``, ``enhanced``, ``ocr_binary`` ...); each product
+    is computed at most once per page.
+    """
+
+    def __init__(self, image: Any, color_order: str = 'RGB',
+                 preprocessor: Optional['ImagePreprocessor'] = None,
+                 dpi: Optional[int] = None, transform: Optional[PageTransform] = None):
+        """Wrap a page image.
+
+        Args:
+            image: PIL Image or NumPy array
+            color_order: Channel order of color arrays ('RGB' for PIL/pdf2image, 'BGR' for cv2)
+            preprocessor: Pipeline configuration to use for derived products
+            dpi: Rasterization DPI, when the image was rendered from a PDF
+            transform: Geometry correction already applied to the image
+        """
+        if isinstance(image, Image.Image):
+            image = np.array(image.convert('RGB') if image.mode not in ('RGB', 'L') else image)
+            color_order = 'RGB'
+        self.image = image
+        self.color_order = color_order
+        self.preprocessor = preprocessor or get_image_preprocessor()
+        # Only set for rasterized PDF pages; other images have no PDF coordinates
+        self.pdf_dpi = dpi
+        self.dpi = dpi or self.preprocessor.config['dpi']
+        self.transform = transform or PageTransform(dpi=self.dpi)
+        self._products: Dict[str, Any] = {}
+        # Re-entrant: building one product may request others (gray -> quality -> ...)
+        self._lock = threading.RLock()
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.image.shape
+
+    def product(self, name: str, builder: Callable[['PageRaster'], Any]) -> Any:
+        """Return a cached product, building it on first use."""
+        if name not in self._products:
+            with self._lock:
+                if name not in self._products:
+                    self._products[name] = builder(self)
+        return self._products[name]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the image and the array products built so far."""
+        # Products may share arrays (gray is the image for gray pages, enhanced is gray for clean ones)
+        arrays = {id(a): a for a in [self.image, *self._products.values()] if isinstance(a, np.ndarray)}
+        return sum(a.nbytes for a in arrays.values())
+
+    def invalidate(self) -> None:
+        """Drop all derived products (e.g. after the base image was replaced)."""
+        with self._lock:
+            self._products.clear()
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.product('gray', self.preprocessor.to_grayscale)
+
+    @property
+    def quality(self) -> Dict[str, Any]:
+        return self.product('quality', self.preprocessor.probe_quality)
+
+    @property
+    def enhanced(self) -> np.ndarray:
+        """Grayscale after the (probe-selected) contrast and denoise steps."""
+        return self.product('enhanced', self.preprocessor.enhance)
+
+    @property
+    def ocr_binary(self) -> np.ndarray:
+        """Adaptive binarization (dark text on white) for OCR."""
+        return self.product('ocr_binary', self.preprocessor.binarize_for_ocr)
+
+    @property
+    def binary_inv(self) -> np.ndarray:
+        """Inverted adaptive binarization (white text) with fine noise removed."""
+        return self.product('binary_inv', self.preprocessor.binarize_inverted)
+
+    @property
+    def line_mask_binary(self) -> np.ndarray:
+        """Global inverted threshold used for ruling-line detection."""
+        return self.product('line_mask_binary', self.preprocessor.binarize_for_lines)
+
+    @property
+    def is_pdf_page(self) -> bool:
+        """Whether the image is a PDF page rendered at a known DPI."""
+        return self.pdf_dpi is not None
+
+    def to_pdf_bbox(self, bbox) -> Optional[list]:
+        """Map an [x0, y0, x1, y1] pixel box on this raster to PDF points (None if not a PDF page)."""
+        if not self.is_pdf_page:
+            return None
+        return self.transform.to_pdf(bbox)
+
+    def to_pil(self, product: str = 'ocr_binary') -> Image.Image:
+        return Image.fromarray(getattr(self, product))
+
+
+class ImagePreprocessor:
+    """Configurable page preprocessing pipeline shared by OCR and table detection.
+
+    A quality probe on a downsampled copy of the page decides whether contrast
+    enhancement and denoising are needed; clean born-digital rasters skip them.
+    Denoising defaults to a median filter instead of non-local means.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """Initialize the preprocessor.
+
+        Args:
+            config: Overrides for DEFAULT_PREPROCESSING_CONFIG
+        """
+        self.config = {**DEFAULT_PREPROCESSING_CONFIG, **(config or {})}
+        self.logger = logging.getLogger(__name__)
+        self._pages: 'OrderedDict[Tuple[str, int, int], PageRaster]' = OrderedDict()
+        self._pages_lock = threading.Lock()
+
+    # ------------------------------------------------------------------ rasters
+
+    def raster(self, image: Any, color_order: str = 'RGB') -> PageRaster:
+        """Wrap an in-memory image (reuses an existing PageRaster as-is)."""
+        if isinstance(image, PageRaster):
+            return image
+        return PageRaster(image, color_order=color_order, preprocessor=self)
+
+    def page_raster(self, pdf_path: str, page_number: int, dpi: Optional[int] = None) -> Optional[PageRaster]:
+        """Rasterize a PDF page once and share it between all consumers.
+
+        Args:
+            pdf_path: Path to PDF file
+            page_number: Page number (0-based)
+            dpi: Rasterization DPI (defaults to the pipeline DPI)
+
+        Returns:
+            Cached PageRaster, or None if the page could not be rendered
+        """
+        dpi = dpi or self.config['dpi']
+        # The file's mtime and size are part of the key so a document replaced at
+        # the same path is rendered again instead of served from the cache
+        stat = os.stat(pdf_path)
+        key = (str(pdf_path), stat.st_mtime_ns, stat.st_size, page_number, dpi)
+        with self._pages_lock:
+            cached = self._pages.get(key)
+            if cached is not None:
+                self._pages.move_to_end(key)
+                return cached
+
+        images = convert_from_path(pdf_path, first_page=page_number + 1,
+                                   last_page=page_number + 1, dpi=dpi)
+        if not images:
+            return None
+
+        raster = PageRaster(images[0], preprocessor=self, dpi=dpi)
+        if self.config['correct_geometry']:
+            raster = self.correct_geometry(raster)
+
+        with self._pages_lock:
+            for stale in [k for k in self._pages if k[0] == key[0] and k[1:3] != key[1:3]]:
+                del self._pages[stale]
+            self._pages[key] = raster
+            self._evict()
+        return raster
+
+    def _evict(self) -> None:
+        """Drop least recently used pages until the cache fits its byte budget.
+
+        Sizes are re-measured on every call since products are built after a
+        page was cached. The newest page is always kept.
+        """
+        total = sum(raster.nbytes for raster in self._pages.values())
+        while len(self._pages) > 1 and total > self.config['page_cache_bytes']:
+            _, oldest = self._pages.popitem(last=False)
+            total -= oldest.nbytes
+
+    def release(self, pdf_path: Optional[str] = None) -> None:
+        """Drop cached pages of one document (or of all documents)."""
+        with self._pages_lock:
+            if pdf_path is None:
+                self._pages.clear()
+                return
+            for key in [key for key in self._pages if key[0] == str(pdf_path)]:
+                del self._pages[key]
+
+    def correct_geometry(self, raster: PageRaster) -> PageRaster:
+        """Undo page rotation and skew (estimated once on a thumbnail).
+
+        Returns the same raster when the page is already upright, otherwise a new
+        raster over the corrected image whose transform maps boxes back to the
+        original page.
+        """
+        geometry = estimate_page_geometry(raster.gray, self.config)
+        if not geometry['rotation'] and not geometry['skew_angle']:
+            return raster
+
+        self.logger.info(f"Correcting page geometry: rotation={geometry['rotation']}, "
+                         f"skew={geometry['skew_angle']:.2f}")
+        image, transform = apply_page_geometry(raster.image, geometry['rotation'],
+                                               geometry['skew_angle'], dpi=raster.dpi)
+        return PageRaster(image, color_order=raster.color_order, preprocessor=self,
+                          dpi=raster.pdf_dpi, transform=transform)
+
+    # ----------------------------------------------------------------- products
+
+    def to_grayscale(self, raster: PageRaster) -> np.ndarray:
+        image = raster.image
+        if image.ndim == 2:
+            return image
+        if image.shape[2] == 4:
+            code = cv2.COLOR_RGBA2GRAY if raster.color_order == 'RGB' else cv2.COLOR_BGRA2GRAY
+        else:
+            code = cv2.COLOR_RGB2GRAY if raster.color_order == 'RGB' else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(image, code)
+
+    def probe_quality(self, raster: PageRaster) -> Dict[str, Any]:
+        """Estimate noise and contrast on a thumbnail and decide which steps to run."""
+        gray = raster.gray
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.config['probe_max_side'] / float(max(height, width)))
+        thumb = gray if scale >= 1.0 else cv2.resize(
+            gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA)
+
+        # Noise sigma from the median absolute Laplacian response (robust to text edges)
+        laplacian = cv2.Laplacian(thumb, cv2.CV_32F)
+        noise_sigma = float(np.median(np.abs(laplacian)) * 1.4826)
+        low, high = np.percentile(thumb, (2, 98))
+        spread = float(high - low)
+
+        decide = lambda mode, needed: mode == 'always' or (mode == 'auto' and needed)
+        quality = {
+            'noise_sigma': round(noise_sigma, 2),
+            'contrast_spread': spread,
+            'needs_denoise': decide(self.config['denoise'], noise_sigma > self.config['noise_threshold']),
+            'needs_contrast': decide(self.config['contrast'], spread < self.config['contrast_threshold']),
+        }
+        self.logger.debug(f"Page quality probe: {quality}")
+        return quality
+
+    def enhance(self, raster: PageRaster) -> np.ndarray:
+        gray = raster.gray
+        quality = raster.quality
+
+        if quality['needs_contrast']:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            gray = clahe.apply(gray)
+
+        if quality['needs_denoise']:
+            method = self.config['denoise_method']
+            if method == 'bilateral':
+                gray = cv2.bilateralFilter(gray, 5, 50, 50)
+            elif method == 'nlmeans':
+                gray = cv2.fastNlMeansDenoising(gray, h=10)
+            else:
+                gray = cv2.medianBlur(gray, 3)
+
+        return gray
+
+    def binarize_for_ocr(self, raster: PageRaster) -> np.ndarray:
+        return cv2.adaptiveThreshold(raster.enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY, 11, 2)
+
+    def binarize_inverted(self, raster: PageRaster) -> np.ndarray:
+        binary = cv2.adaptiveThreshold(raster.enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                       cv2.THRESH_BINARY_INV, 11, 2)
+        # Fine noise removal using morphological opening
+        return cv2.morphologyEx(binary, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8), iterations=1)
+
+    def binarize_for_lines(self, raster: PageRaster) -> np.ndarray:
+        _, binary = cv2.threshold(raster.gray, 150, 255, cv2.THRESH_BINARY_INV)
+        return binary
+
+
+_default_preprocessor = None
+_default_lock = threading.Lock()
+
+
+def get_image_preprocessor(config: Optional[Dict[str, Any]] = None) -> ImagePreprocessor:
+    """Return the process-wide preprocessor (a new one if a config is given)."""
+    global _default_preprocessor
+    if config:
+        return ImagePreprocessor(config)
+    if _default_preprocessor is None:
+        with _default_lock:
+            if _default_preprocessor is None:
+                _default_preprocessor = ImagePreprocessor()
+    return _default_preprocessor
@@ -0,0 +1,199 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    pytesseract = None
+    TESSERACT_AVAILABLE = False
+
+
+class PageTransform:
+    """Geometry correction applied to a page raster.
+
+    Holds the 3x3 matrix mapping original raster pixels to corrected raster
+    pixels, so boxes found on the corrected page can be mapped back to the
+    original raster and to PDF coordinates.
+    """
+
+    def __init__(self, rotation: int = 0, skew_angle: float = 0.0,
+                 matrix: Optional[np.ndarray] = None, dpi: int = 300):
+        """Create a transform.
+
+        Args:
+            rotation: Clockwise rotation (0, 90, 180, 270) applied to make the page upright
+            skew_angle: Residual skew in degrees that was undone
+            matrix: 3x3 original->corrected pixel matrix (identity if None)
+            dpi: DPI of the original raster (for PDF point conversion)
+        """
+        self.rotation = rotation
+        self.skew_angle = skew_angle
+        self.matrix = np.eye(3) if matrix is None else matrix
+        self.inverse = np.linalg.inv(self.matrix)
+        self.dpi = dpi
+
+    @property
+    def is_identity(self) -> bool:
+        return self.rotation == 0 and abs(self.skew_angle) < 1e-6
+
+    def to_original(self, bbox: Sequence[float]) -> List[float]:
+        """Map an [x0, y0, x1, y1] box on the corrected raster to the original raster."""
+        x0, y0, x1, y1 = bbox
+        corners = np.array([[x0, y0, 1], [x1, y0, 1], [x0, y1, 1], [x1, y1, 1]], dtype=float)
+        mapped = corners @ self.inverse.T
+        xs, ys = mapped[:, 0] / mapped[:, 2], mapped[:, 1] / mapped[:, 2]
+        return [float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())]
+
+    def to_pdf(self, bbox: Sequence[float]) -> List[float]:
+        """Map a corrected-raster box to PDF points (top-left origin, as PyMuPDF)."""
+        scale = 72.0 / self.dpi
+        return [round(value * scale, 2) for value in self.to_original(bbox)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rotation': self.rotation,
+            'skew_angle': round(self.skew_angle, 2),
+            'matrix': self.matrix.tolist(),
+            'dpi': self.dpi,
+        }
+
+
+def _thumbnail(gray: np.ndarray, max_side: int) -> np.ndarray:
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / float(max(height, width)))
+    if scale >= 1.0:
+        return gray
+    return cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def _profile_score(binary: np.ndarray, angle: float) -> float:
+    """Sharpness of the horizontal projection profile after rotating by angle."""
+    if angle:
+        height, width = binary.shape
+        matrix = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), angle, 1.0)
+        binary = cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_NEAREST,
+                                borderValue=0)
+    profile = binary.sum(axis=1, dtype=np.float64)
+    return float(np.sum(np.diff(profile) ** 2))
+
+
+def estimate_skew(binary: np.ndarray, max_angle: float = 10.0) -> float:
+    """Projection-profile skew search (coarse 1 degree, then 0.1 degree refinement).
+
+    Args:
+        binary: Thumbnail with text as non-zero pixels
+        max_angle: Largest skew (degrees) considered
+
+    Returns:
+        Counter-clockwise angle in degrees that straightens the text lines
+    """
+    coarse = np.arange(-max_angle, max_angle + 0.5, 1.0)
+    best = max(coarse, key=lambda angle: _profile_score(binary, angle))
+    fine = np.arange(best - 0.9, best + 0.95, 0.1)
+    return float(max(fine, key=lambda angle: _profile_score(binary, angle)))
+
+
+def _is_sideways(binary: np.ndarray) -> bool:
+    """Whether text lines run vertically in a thumbnail (text pixels non-zero)."""
+    mask = (binary > 0).astype(np.uint8)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    if count < 10:
+        return False
+    # Smear length just below a typical character size
+    sizes = np.maximum(stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT])
+    length = max(2, int(np.median(sizes) * 0.8))
+    along_rows = cv2.connectedComponents(cv2.dilate(mask, np.ones((1, length), np.uint8)))[0]
+    along_cols = cv2.connectedComponents(cv2.dilate(mask, np.ones((length, 1), np.uint8)))[0]
+    return along_cols < along_rows * 0.7
+
+
+def estimate_orientation(binary: np.ndarray, gray: np.ndarray,
+                         check_upside_down: bool = False) -> int:
+    """Estimate the clockwise rotation (0/90/180/270) that makes the page upright.
+
+    Characters within a word are much closer together than text lines are, so
+    smearing along the reading direction merges far more components than
+    smearing across it; this separates upright from sideways pages (tables
+    included). Tesseract OSD (when available) resolves the remaining 180 degree
+    ambiguity; it only runs for sideways pages unless check_upside_down is set.
+    """
+    sideways = _is_sideways(binary)
+
+    if TESSERACT_AVAILABLE and (sideways or check_upside_down):
+        try:
+            osd = pytesseract.image_to_osd(gray, output_type=pytesseract.Output.DICT)
+            rotation = int(osd.get('rotate', 0)) % 360
+            # Trust OSD when it agrees with the projection profile
+            if (rotation in (90, 270)) == sideways:
+                return rotation
+        except Exception as e:
+            logger.debug(f"Tesseract OSD unavailable for orientation detection: {str(e)}")
+
+    return 90 if sideways else 0
+
+
+def estimate_page_geometry(gray: np.ndarray, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Estimate rotation and skew of a grayscale page on a thumbnail."""
+    thumb = _thumbnail(gray, config.get('geometry_max_side', 1000))
+    _, binary = cv2.threshold(thumb, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    if binary.sum() < 0.001 * binary.size:
+        # Blank page: nothing to straighten
+        return {'rotation': 0, 'skew_angle': 0.0}
+
+    rotation = estimate_orientation(binary, thumb, config.get('check_upside_down', False))
+    if rotation:
+        binary = np.ascontiguousarray(np.rot90(binary, k=-(rotation // 90)))
+
+    skew = estimate_skew(binary, config.get('max_skew_angle', 10.0))
+    if abs(skew) < config.get('min_skew_angle', 0.5):
+        skew = 0.0
+    return {'rotation': rotation, 'skew_angle': round(skew, 2)}
+
+
+def apply_page_geometry(image: np.ndarray, rotation: int, skew_angle: float,
+                        dpi: int = 300) -> (np.ndarray, PageTransform):
+    """Rotate/deskew a full-resolution raster and return the applied transform.
+
+    Args:
+        image: Full resolution page (grayscale or color)
+        rotation: Clockwise rotation making the page upright (multiple of 90)
+        skew_angle: Counter-clockwise deskew angle in degrees
+        dpi: Raster DPI
+
+    Returns:
+        Tuple: (corrected image, PageTransform)
+    """
+    height, width = image.shape[:2]
+    matrix = np.eye(3)
+
+    quarter_turns = (rotation // 90) % 4
+    if quarter_turns:
+        # Negative k makes np.rot90 turn clockwise
+        image = np.ascontiguousarray(np.rot90(image, k=-quarter_turns))
+        for _ in range(quarter_turns):
+            turn = np.array([[0, -1, height - 1], [1, 0, 0], [0, 0, 1]], dtype=float)
+            matrix = turn @ matrix
+            width, height = height, width
+
+    if skew_angle:
+        rotation_matrix = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), skew_angle, 1.0)
+        # Grow the canvas so no corner of the page is cut off
+        cos, sin = abs(rotation_matrix[0, 0]), abs(rotation_matrix[0, 1])
+        new_width = int(height * sin + width * cos)
+        new_height = int(height * cos + width * sin)
+        rotation_matrix[0, 2] += new_width / 2.0 - width / 2.0
+        rotation_matrix[1, 2] += new_height / 2.0 - height / 2.0
+        fill = 255 if image.ndim == 2 else (255,) * image.shape[2]
+        image = cv2.warpAffine(image, rotation_matrix, (new_width, new_height),
+                               flags=cv2.INTER_LINEAR, borderValue=fill)
+        matrix = np.vstack([rotation_matrix, [0, 0, 1]]) @ matrix
+
+    return image, PageTransform(rotation, skew_angle, matrix, dpi)
@@ -6,6 +6,21 @@ import logging
 import os
 from typing import Dict, List, Tuple, Any, Optional
 
+from .image_preprocessing import get_image_preprocessor
+
+# Financial indicators (dollar amounts, percentages, financial vocabulary)
+# compiled once into a single alternation so each page is scanned only once
+_FINANCIAL_INDICATORS = re.compile(
+    '|'.join([
+        r'\$[\d,]+\.?\d*',  # Dollar amounts
+        r'\d+\.\d+%',        # Percentages
+        r'(?:revenue|profit|income|balance|assets|liabilities|equity|cash flow)',
+        r'(?:fiscal|quarter|annual|year)',
+        r'(?:statement|report|audit)'
+    ]),
+    re.IGNORECASE
+)
+
 class PDFTextExtractor:
     """Extract and structure text content from PDF documents.
 
@@ -21,6 +36,8 @@ class PDFTextExtractor:
         """
         self.language = language
         self.logger = logging.getLogger(__name__)
+        # Pages are rasterized, rotated and deskewed once and shared with the table extractors
+        self.preprocessor = get_image_preprocessor()
 
     def extract_document(self, pdf_path: str) -> Dict[int, Dict[str, Any]]:
         """Extract all text and metadata from a PDF document.
@@ -95,17 +112,13 @@ class PDFTextExtractor:
     def _process_page_with_ocr(self, pdf_path: str, page_num: int) -> Dict[int, Dict[str, Any]]:
         """Process a single page with OCR when direct extraction fails."""
         try:
-            # Convert PDF page to image
-            images = pdf2image.convert_from_path(
-                pdf_path,
-                first_page=page_num+1,
-                last_page=page_num+1
-            )
+            # Shared page raster (orientation and skew already corrected)
+            raster = self.preprocessor.page_raster(pdf_path, page_num)
 
-            if not images:
+            if raster is None:
                 return {page_num: {"text": "", "blocks": [], "images": [], "dimensions": {"width": 0, "height": 0}}}
 
-            image = images[0]
+            image = raster.to_pil('gray')
 
             # Run OCR
             text = pytesseract.image_to_string(
@@ -134,11 +147,12 @@ class PDFTextExtractor:
         document = {}
         try:
             # Convert all pages to images
-            images = pdf2image.convert_from_path(pdf_path)
+            page_count = pdf2image.pdfinfo_from_path(pdf_path).get("Pages", 0)
 
-            for page_num, image in enumerate(images):
+            for page_num in range(page_count):
                 try:
-                    # Process each page as an image
+                    # Process each page as an image (rotation/skew corrected once per page)
+                    image = self.preprocessor.page_raster(pdf_path, page_num).to_pil('gray')
                     text = pytesseract.image_to_string(image, lang=self.language)
 
                     # Process text into blocks
@@ -209,17 +223,4 @@ class PDFTextExtractor:
         Returns:
             Boolean indicating if text contains financial indicators
         """
-        # Financial indicators: dollar signs, percentages, numbers with commas
-        financial_patterns = [
-            r'\$[\d,]+\.?\d*',  # Dollar amounts
-            r'\d+\.\d+%',        # Percentages
-            r'(?:revenue|profit|income|balance|assets|liabilities|equity|cash flow)',
-            r'(?:fiscal|quarter|annual|year)',
-            r'(?:statement|report|audit)'
-        ]
-
-        for pattern in financial_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-
-        return False
\ No newline at end of file
+        return bool(text) and _FINANCIAL_INDICATORS.search(text) is not None
\ No newline at end of file
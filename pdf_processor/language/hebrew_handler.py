@@ -2,8 +2,25 @@ import re
 import unicodedata
 import logging
 
+from .term_matcher import get_term_matcher
+
 logger = logging.getLogger(__name__)
 
+# Diacritics (nikud) are dropped and final letter forms mapped to regular forms
+_HEBREW_NORMALIZATION_TABLE = str.maketrans(
+    {'ך': 'כ', 'ם': 'מ', 'ן': 'נ', 'ף': 'פ', 'ץ': 'צ',
+     **{chr(code): None for code in (0x05B0, 0x05B1, 0x05B2, 0x05B3, 0x05B4, 0x05B5,
+                                     0x05B6, 0x05B7, 0x05B8, 0x05B9, 0x05BB, 0x05BC,
+                                     0x05BD, 0x05BF, 0x05C1, 0x05C2)}}
+)
+
+
+def normalize_hebrew_text(text):
+    """Remove nikud and replace final letter forms (single translate pass)."""
+    if not text:
+        return text
+    return text.translate(_HEBREW_NORMALIZATION_TABLE)
+
 class HebrewHandler:
     """Handler for Hebrew language text processing."""
 
@@ -74,22 +91,7 @@ class HebrewHandler:
         if not text:
             return text
 
-        # Remove diacritics (nikud)
-        normalized = ''.join(c for c in text if c not in self.hebrew_diacritics)
-
-        # Replace final forms with regular forms
-        final_forms_map = {
-            'ך': 'כ',
-            'ם': 'מ',
-            'ן': 'נ',
-            'ף': 'פ',
-            'ץ': 'צ'
-        }
-
-        for final, regular in final_forms_map.items():
-            normalized = normalized.replace(final, regular)
-
-        return normalized
+        return normalize_hebrew_text(text)
 
     def fix_mixed_direction(self, text):
         """Fix mixed direction text (Hebrew + English/numbers).
@@ -149,18 +151,10 @@ class HebrewHandler:
         if not text:
             return {}
 
-        # Normalize the text
-        normalized = self.normalize_hebrew(text)
-
-        # Initialize results
-        results = {category: [] for category in self.financial_terms.keys()}
-
-        # Check each category
-        for category, terms in self.financial_terms.items():
-            for term in terms:
-                normalized_term = self.normalize_hebrew(term)
-                if normalized_term in normalized:
-                    results[category].append(term)
+        # Single pass over the normalized text with the shared term matcher
+        matcher = get_term_matcher(self.financial_terms, lowercase=False,
+                                   normalizer=normalize_hebrew_text)
+        results = matcher.category_terms(text)
 
         # Filter out empty categories
         return {k: v for k, v in results.items() if v}
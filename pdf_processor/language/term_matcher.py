@@ -0,0 +1,164 @@
+import re
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TermMatcher:
+    """Multilingual multi-term matcher compiled into a single regular expression.
+
+    All terms are merged into one character trie which is emitted as a nested
+    regex alternation, so the engine only follows the trie branch matching the
+    current character. Scanning is therefore linear in the text length (times the
+    longest term), independent of how many terms are registered.
+
+    Matching has the same semantics as ``term in text`` for every term
+    (or ``\\bterm\\b`` when ``word_boundary`` is set): overlapping and nested terms
+    are all reported.
+    """
+
+    def __init__(self, terms_by_category: Dict[str, List[str]],
+                 lowercase: bool = True,
+                 word_boundary: bool = False,
+                 normalizer: Optional[Callable[[str], str]] = None):
+        """Build the matcher.
+
+        Args:
+            terms_by_category: Mapping of category name to its list of terms
+            lowercase: Match case-insensitively
+            word_boundary: Only match terms delimited by word boundaries
+            normalizer: Optional function applied to both terms and text
+        """
+        self.lowercase = lowercase
+        self.word_boundary = word_boundary
+        self.normalizer = normalizer
+        self.terms_by_category = {
+            category: list(terms) for category, terms in terms_by_category.items()
+        }
+
+        # Normalized form -> original terms (several originals may normalize alike)
+        self._originals: Dict[str, List[str]] = {}
+        for terms in self.terms_by_category.values():
+            for term in terms:
+                key = self._prepare(term)
+                if key and term not in self._originals.setdefault(key, []):
+                    self._originals[key].append(term)
+
+        keys = sorted(self._originals)
+        # For every term, the other terms it contains (found whenever it is found)
+        self._contained = {key: self._contained_terms(key, keys) for key in keys}
+
+        body = self._trie_pattern(keys) if keys else r'(?!x)x'
+        if word_boundary:
+            body = r'\b' + body + r'\b'
+        self._scanner = re.compile(r'(?=(' + body + r'))')
+        self._search = re.compile(body)
+
+    def _prepare(self, text: str) -> str:
+        if self.normalizer:
+            text = self.normalizer(text)
+        return text.lower() if self.lowercase else text
+
+    def _contained_terms(self, key: str, keys: List[str]) -> Tuple[str, ...]:
+        contained = []
+        for other in keys:
+            if other == key or len(other) > len(key) or other not in key:
+                continue
+            if self.word_boundary and not re.search(r'\b' + re.escape(other) + r'\b', key):
+                continue
+            contained.append(other)
+        return tuple(contained)
+
+    @staticmethod
+    def _trie_pattern(keys: List[str]) -> str:
+        """Emit a regex equivalent to a trie of the given strings (longest first)."""
+        trie: Dict = {}
+        for key in keys:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def emit(node: Dict) -> str:
+            is_end = '' in node
+            branches = [re.escape(char) + emit(child)
+                        for char, child in sorted(node.items()) if char != '']
+            if not branches:
+                return ''
+            if len(branches) == 1:
+                pattern = branches[0]
+                grouped = '(?:' + pattern + ')' if len(pattern) > 1 and is_end else pattern
+            else:
+                grouped = '(?:' + '|'.join(branches) + ')'
+            # Greedy optional group prefers the longer term at each position
+            return grouped + '?' if is_end else grouped
+
+        return emit(trie)
+
+    def find_terms(self, text: str) -> Set[str]:
+        """Return the set of original terms present in the text (one pass)."""
+        if not text:
+            return set()
+
+        found_keys = set()
+        for match in self._scanner.finditer(self._prepare(text)):
+            key = match.group(1)
+            if key in found_keys:
+                continue
+            found_keys.add(key)
+            found_keys.update(self._contained[key])
+
+        found = set()
+        for key in found_keys:
+            found.update(self._originals[key])
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        """Whether at least one term occurs in the text."""
+        return bool(text) and self._search.search(self._prepare(text)) is not None
+
+    def category_terms(self, text: str) -> Dict[str, List[str]]:
+        """Return the matched terms per category, in the categories' term order."""
+        found = self.find_terms(text)
+        return {
+            category: [term for term in terms if term in found]
+            for category, terms in self.terms_by_category.items()
+        }
+
+    def category_counts(self, text: str) -> Dict[str, int]:
+        """Return the number of matched terms per category."""
+        return {
+            category: len(terms)
+            for category, terms in self.category_terms(text).items()
+        }
+
+
+@lru_cache(maxsize=32)
+def _build_matcher(frozen_terms: Tuple[Tuple[str, Tuple[str, ...]], ...],
+                   lowercase: bool, word_boundary: bool,
+                   normalizer: Optional[Callable[[str], str]]) -> TermMatcher:
+    logger.debug(f"Compiling term matcher for {len(frozen_terms)} categories")
+    return TermMatcher({category: list(terms) for category, terms in frozen_terms},
+                       lowercase=lowercase, word_boundary=word_boundary,
+                       normalizer=normalizer)
+
+
+def get_term_matcher(terms_by_category: Dict[str, List[str]],
+                     lowercase: bool = True,
+                     word_boundary: bool = False,
+                     normalizer: Optional[Callable[[str], str]] = None) -> TermMatcher:
+    """Return the process-wide matcher for a term list, compiling it on first use.
+
+    Args:
+        terms_by_category: Mapping of category name to its list of terms
+        lowercase: Match case-insensitively
+        word_boundary: Only match terms delimited by word boundaries
+        normalizer: Optional module-level function applied to terms and text
+
+    Returns:
+        Shared TermMatcher instance
+    """
+    frozen = tuple((category, tuple(terms)) for category, terms in terms_by_category.items())
+    return _build_matcher(frozen, lowercase, word_boundary, normalizer)
@@ -1,16 +1,19 @@
 # pdf_processor/tables/advanced_table_detector.py
 import cv2
 import numpy as np
-from transformers import DetrImageProcessor, TableTransformerForObjectDetection
-import torch
+from utils.lazy_imports import lazy_import
+
+# torch and transformers take seconds to import; load them when the detector is built
+transformers = lazy_import("transformers")
+torch = lazy_import("torch")
 from PIL import Image
 
 class AdvancedTableDetector:
     """Advanced table detection using TableTransformer."""
     
     def __init__(self):
-        self.processor = DetrImageProcessor.from_pretrained("microsoft/table-transformer-detection")
-        self.model = TableTransformerForObjectDetection.from_pretrained("microsoft/table-transformer-detection")
+        self.processor = transformers.DetrImageProcessor.from_pretrained("microsoft/table-transformer-detection")
+        self.model = transformers.TableTransformerForObjectDetection.from_pretrained("microsoft/table-transformer-detection")
         
     def detect_tables(self, image_path):
         """Detect tables in document image."""
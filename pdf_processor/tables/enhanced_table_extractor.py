@@ -6,11 +6,13 @@ from pathlib import Path
 import os
 from pdf2image import convert_from_path
 from PIL import Image
-import torch # Added import
+from utils.lazy_imports import lazy_import
 import cv2 # Added import for color conversion
 # Assuming standard installation paths for table-transformer and transformers
 # Adjust imports if necessary based on actual library structure
-from transformers import DetrFeatureExtractor, TableTransformerForObjectDetection
+# torch and transformers take seconds to import; load them when a model is first used
+torch = lazy_import("torch")
+transformers = lazy_import("transformers")
 # We might need a separate structure recognition model or the detection model might handle both
 # For now, let's assume we need both detection and structure recognition models.
 # Using example model names, replace if different ones were installed/intended.
@@ -43,12 +45,12 @@ class EnhancedTableExtractor:
         try:
             self.logger.info(f"Loading Table-Transformer models: Detection='{self.DETECTION_MODEL_NAME}', Structure='{self.STRUCTURE_MODEL_NAME}'")
             # Load models and feature extractor
-            self.feature_extractor = DetrFeatureExtractor() # Default feature extractor
-            self.detection_model = TableTransformerForObjectDetection.from_pretrained(self.DETECTION_MODEL_NAME)
+            self.feature_extractor = transformers.DetrFeatureExtractor() # Default feature extractor
+            self.detection_model = transformers.TableTransformerForObjectDetection.from_pretrained(self.DETECTION_MODEL_NAME)
             # Assuming structure recognition is also handled by a TableTransformerForObjectDetection model type
             # Or it might be a different class from table_transformer library itself.
             # Adjust the class if necessary.
-            self.structure_model = TableTransformerForObjectDetection.from_pretrained(self.STRUCTURE_MODEL_NAME)
+            self.structure_model = transformers.TableTransformerForObjectDetection.from_pretrained(self.STRUCTURE_MODEL_NAME)
             # TODO: Add device placement (e.g., .to('cuda') if GPU is available)
             self.logger.info("Table-Transformer models loaded successfully.")
         except Exception as e:
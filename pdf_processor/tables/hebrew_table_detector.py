@@ -8,6 +8,8 @@ from pytesseract import Output
 import re
 from pdf2image import convert_from_path
 
+from ..extraction.image_preprocessing import get_image_preprocessor
+
 logger = logging.getLogger(__name__)
 
 class HebrewTableDetector:
@@ -39,6 +41,9 @@ class HebrewTableDetector:
         self.text_alignment_col_threshold = self.config.get('text_alignment_col_threshold', 2) # Min cols for text alignment detection
 
 
+        # Shared preprocessing pipeline (grayscale/binary products cached per page)
+        self.preprocessor = get_image_preprocessor(self.config.get('preprocessing'))
+
         # OCR configuration
         self.psm = self.config.get('psm', 6)  # Assume a single uniform block of text by default
 
@@ -70,12 +75,12 @@ class HebrewTableDetector:
         self.isin_pattern = re.compile(r'\b[A-Z]{2}[A-Z0-9]{9}[0-9]\b')
 
 
-    def detect_tables(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def detect_tables(self, image: Any) -> List[Dict[str, Any]]:
         """
         Detect financial tables in an image.
 
         Args:
-            image: NumPy array containing the image
+            image: NumPy array (BGR) containing the image, or a shared PageRaster
 
         Returns:
             List of detected tables with metadata
@@ -85,7 +90,7 @@ class HebrewTableDetector:
             processed_image, gray_image = self._preprocess_image(image)
 
             # Detect table regions using multiple strategies
-            table_regions_lines = self._detect_table_regions_by_lines(processed_image, image.shape)
+            table_regions_lines = self._detect_table_regions_by_lines(processed_image, gray_image.shape)
             table_regions_text = self._detect_tables_by_text_alignment(processed_image)
 
             # Combine and deduplicate regions (simple overlap check for now)
@@ -149,40 +154,18 @@ class HebrewTableDetector:
             self.logger.error(f"Error detecting Hebrew tables: {str(e)}", exc_info=True)
             return []
 
-    def _preprocess_image(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    def _preprocess_image(self, image: Any) -> Tuple[np.ndarray, np.ndarray]:
         """
         Preprocess image for table detection.
 
         Args:
-            image: Input image
+            image: Input image (BGR array) or PageRaster
 
         Returns:
             Tuple: (Preprocessed binary image, Grayscale image)
         """
-        # Convert to grayscale
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        elif len(image.shape) == 3 and image.shape[2] == 4: # Handle RGBA
-            gray = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
-        else:
-            gray = image.copy() # Assume already grayscale
-
-        # Apply adaptive thresholding (Gaussian works well generally)
-        binary = cv2.adaptiveThreshold(
-            gray,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY_INV, # Invert: Text becomes white, background black
-            11, # Block size (needs to be odd)
-            2   # Constant subtracted from the mean
-        )
-
-        # Noise removal using morphological opening
-        kernel_size = 2 # Small kernel for fine noise
-        kernel = np.ones((kernel_size, kernel_size), np.uint8)
-        binary_opened = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1)
-
-        return binary_opened, gray
+        raster = self.preprocessor.raster(image, color_order='BGR')
+        return raster.binary_inv, raster.gray
 
     def _detect_table_regions_by_lines(self, binary_image: np.ndarray, original_shape: Tuple[int, int, ...]) -> List[Tuple[int, int, int, int]]:
         """ Detect potential table regions using horizontal and vertical lines. """
@@ -1,9 +1,7 @@
 # from PyPDF2 import PdfReader, PdfWriter # Replaced by pypdf
 from pypdf import PdfReader # Import from pypdf
-import pdf2image
 import pytesseract
 import pandas as pd
-import numpy as np
 import cv2
 from typing import List, Dict, Any, Tuple, Optional
 import logging
@@ -11,6 +9,8 @@ import tempfile
 import os
 import re
 
+from ..extraction.image_preprocessing import PageRaster, get_image_preprocessor
+
 class TableExtractor:
     """Extract and structure tabular data from PDF documents.
     
@@ -27,6 +27,9 @@ class TableExtractor:
         """
         self.logger = logging.getLogger(__name__)
         self.language = language
+        # Shared preprocessing pipeline: pages are rasterized once and their
+        # grayscale/binary products reused by OCR and the other detectors
+        self.preprocessor = get_image_preprocessor()
         
     def extract_tables(self, pdf_path: str, page_numbers: Optional[List[int]] = None) -> Dict[int, List[Dict[str, Any]]]:
         """Extract tables from specified pages in a PDF.
@@ -142,79 +145,84 @@ class TableExtractor:
         tables = []
         
         try:
-            # Convert PDF page to image
-            images = pdf2image.convert_from_path(
-                pdf_path,
-                first_page=page_num+1,
-                last_page=page_num+1,
-                dpi=300  # Higher DPI for better quality
-            )
+            # Rasterize the page once (shared with OCR and other detectors)
+            raster = self.preprocessor.page_raster(pdf_path, page_num, dpi=300)
             
-            if not images:
+            if raster is None:
                 return []
                 
-            # Process the image to find tables
-            image = images[0]
-            
-            # Convert PIL image to OpenCV format
-            open_cv_image = np.array(image)
-            open_cv_image = open_cv_image[:, :, ::-1].copy()  # RGB to BGR
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply threshold to make table lines more visible
-            _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
-            
-            # Detect horizontal and vertical lines
-            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-            
-            horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel, iterations=3)
-            vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel, iterations=3)
+            tables = self._detect_line_tables(raster, "cv")
+        except Exception as e:
+            self.logger.warning(f"CV-based table extraction failed: {str(e)}")
             
-            # Combine horizontal and vertical lines
-            table_mask = cv2.add(horizontal_lines, vertical_lines)
+        return tables
+    
+    def _detect_line_tables(self, raster: PageRaster, extraction_method: str) -> List[Dict[str, Any]]:
+        """Detect ruled tables on a page raster and OCR each table region.
+        
+        Args:
+            raster: Shared page raster (grayscale and binary products are cached)
+            extraction_method: Value recorded in each table's "extraction_method"
             
-            # Find contours
-            contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        Returns:
+            List of dictionaries containing table data and metadata
+        """
+        tables = []
+        gray = raster.gray
+        
+        # Threshold that makes table lines more visible (cached on the raster)
+        binary = raster.line_mask_binary
+        
+        # Detect horizontal and vertical lines
+        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+        
+        horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel, iterations=3)
+        vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel, iterations=3)
+        
+        # Combine horizontal and vertical lines
+        table_mask = cv2.add(horizontal_lines, vertical_lines)
+        
+        # Find contours
+        contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        # Process each contour as a potential table
+        for idx, contour in enumerate(contours):
+            x, y, w, h = cv2.boundingRect(contour)
             
-            # Process each contour as a potential table
-            for idx, contour in enumerate(contours):
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Filter small rectangles
-                if w < 100 or h < 100:
-                    continue
-                    
-                # Extract table region from the original image
-                table_region = gray[y:y+h, x:x+w]
-                
-                # Apply OCR on the table region
-                table_text = pytesseract.image_to_string(
-                    table_region, 
-                    lang=self.language,
-                    config='--psm 6'  # Assume a uniform block of text
-                )
-                
-                # Process the table text into structured data
-                header, rows = self._process_table_ocr_text(table_text)
+            # Filter small rectangles
+            if w < 100 or h < 100:
+                continue
                 
-                if rows:  # Only add if we found rows
-                    table = {
-                        "id": idx,
-                        "bbox": [x, y, x+w, y+h],
-                        "header": header,
-                        "rows": rows,
-                        "row_count": len(rows) + (1 if header else 0),
-                        "col_count": len(header) if header else (len(rows[0]) if rows else 0),
-                        "extraction_method": "cv"
-                    }
-                    
-                    tables.append(table)
-        except Exception as e:
-            self.logger.warning(f"CV-based table extraction failed: {str(e)}")
+            # Extract table region from the original image
+            table_region = gray[y:y+h, x:x+w]
+            
+            # Apply OCR on the table region
+            table_text = pytesseract.image_to_string(
+                table_region, 
+                lang=self.language,
+                config='--psm 6'  # Assume a uniform block of text
+            )
             
+            # Process the table text into structured data
+            header, rows = self._process_table_ocr_text(table_text)
+            
+            if rows:  # Only add if we found rows
+                table = {
+                    "id": idx,
+                    "bbox": [x, y, x+w, y+h],
+                    "header": header,
+                    "rows": rows,
+                    "row_count": len(rows) + (1 if header else 0),
+                    "col_count": len(header) if header else (len(rows[0]) if rows else 0),
+                    "extraction_method": extraction_method
+                }
+                # Box on the original (uncorrected) page in PDF points; plain
+                # image files have no PDF page to map onto
+                if raster.is_pdf_page:
+                    table["pdf_bbox"] = raster.to_pdf_bbox([x, y, x+w, y+h])
+                tables.append(table)
+                
         return tables
     
     def _process_table_ocr_text(self, text: str) -> Tuple[List[str], List[List[str]]]:
@@ -698,58 +706,9 @@ class TableExtractor:
                 self.logger.error(f"Failed to read image: {image_path}")
                 return []
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Apply threshold to make table lines more visible
-            _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
-            
-            # Detect horizontal and vertical lines
-            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-            
-            horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel, iterations=3)
-            vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel, iterations=3)
-            
-            # Combine horizontal and vertical lines
-            table_mask = cv2.add(horizontal_lines, vertical_lines)
-            
-            # Find contours
-            contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            # Process each contour as a potential table
-            for idx, contour in enumerate(contours):
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Filter small rectangles
-                if w < 100 or h < 100:
-                    continue
-                    
-                # Extract table region from the original image
-                table_region = gray[y:y+h, x:x+w]
-                
-                # Apply OCR on the table region
-                table_text = pytesseract.image_to_string(
-                    table_region, 
-                    lang=self.language,
-                    config='--psm 6'  # Assume a uniform block of text
-                )
-                
-                # Process the table text into structured data
-                header, rows = self._process_table_ocr_text(table_text)
-                
-                if rows:  # Only add if we found rows
-                    table = {
-                        "id": idx,
-                        "bbox": [x, y, x+w, y+h],
-                        "header": header,
-                        "rows": rows,
-                        "row_count": len(rows) + (1 if header else 0),
-                        "col_count": len(header) if header else (len(rows[0]) if rows else 0),
-                        "extraction_method": "image"
-                    }
-                    
-                    tables.append(table)
+            raster = self.preprocessor.raster(img, color_order='BGR')
+            gray = raster.gray
+            tables = self._detect_line_tables(raster, "image")
                     
             # If no tables found with line detection, try text-based detection
             if not tables:
@@ -1,6 +1,7 @@
 import os
 import json
-from enhanced_financial_extractor import extract_isin_numbers, extract_financial_metadata, analyze_portfolio
+from enhanced_financial_extractor import extract_isin_numbers, extract_financial_metadata
+from services.portfolio_artifacts import save_portfolio_analysis
 
 def process_existing_documents(uploads_dir="uploads"):
     """Process existing documents with enhanced extraction"""
@@ -46,13 +47,8 @@ def process_existing_documents(uploads_dir="uploads"):
         
         print(f"  Enhanced financial data saved to {os.path.basename(enhanced_financial_path)}")
         
-        # Analyze portfolio
-        analysis = analyze_portfolio(financial_data)
-        
-        # Save analysis
-        analysis_path = os.path.join(uploads_dir, f"{doc_id}_portfolio_analysis.json")
-        with open(analysis_path, 'w', encoding='utf-8') as f:
-            json.dump(analysis, f, indent=2, ensure_ascii=False)
+        # Analyze portfolio and save the analysis (same file the API serves)
+        analysis_path = save_portfolio_analysis(uploads_dir, doc_id, financial_data)
         
         print(f"  Portfolio analysis saved to {os.path.basename(analysis_path)}")
     
@@ -61,7 +61,8 @@ except ImportError:
 
 try:
     from project_organized.features.pdf_processing.service import PDFProcessingService
-    container.register('pdf_processing', PDFProcessingService())
+    container.register('pdf_processing', PDFProcessingService(
+        document_service=container.get('document_upload')))
 except ImportError:
     logger.warning("PDFProcessingService not available")
 
@@ -79,6 +80,8 @@ except ImportError:
 
 try:
     from project_organized.features.document_export.service import DocumentExportService
-    container.register('document_export', DocumentExportService())
+    upload_service = container.get('document_upload')
+    container.register('document_export', DocumentExportService(
+        catalog=upload_service.catalog if upload_service else None))
 except ImportError:
     logger.warning("DocumentExportService not available")
@@ -9,7 +9,9 @@ logger = logging.getLogger(__name__)
 class DocumentExportService:
     """Service for exporting document data"""
     
-    def __init__(self, extraction_dir='extractions', export_dir='exports'):
+    def __init__(self, extraction_dir='extractions', export_dir='exports', catalog=None):
+        # Optional DocumentCatalog used to look up a document's extraction file
+        self.catalog = catalog
         # Use absolute paths to avoid permission issues
         self.extraction_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', extraction_dir))
         self.export_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', export_dir))
@@ -91,16 +93,13 @@ class DocumentExportService:
         Returns:
             List of financial data entries or None if not found
         """
-        # Look for extraction file
-        extraction_files = [f for f in os.listdir(self.extraction_dir) 
-                           if f.startswith(document_id) and f.endswith('_extraction.json')]
-        
-        if not extraction_files:
+        # Look up the extraction file (catalog record, else its conventional name)
+        extraction_path = self._get_extraction_path(document_id)
+        if not extraction_path:
             logger.error(f"No extraction file found for document {document_id}")
             return None
         
         # Get extraction data
-        extraction_path = os.path.join(self.extraction_dir, extraction_files[0])
         try:
             with open(extraction_path, 'r', encoding='utf-8') as f:
                 extraction_data = json.load(f)
@@ -128,3 +127,12 @@ class DocumentExportService:
         except Exception as e:
             logger.error(f"Error reading extraction data: {e}")
             return None
+
+    def _get_extraction_path(self, document_id):
+        """Path of a document's extraction file, or None if it does not exist"""
+        if self.catalog is not None:
+            document = self.catalog.get(document_id)
+            if document and document.get('extraction_path') and os.path.exists(document['extraction_path']):
+                return document['extraction_path']
+        extraction_path = os.path.join(self.extraction_dir, f"{document_id}_extraction.json")
+        return extraction_path if os.path.exists(extraction_path) else None
@@ -1,5 +1,6 @@
 """API endpoints for document upload feature."""
 from flask import Blueprint, request, jsonify
+from .catalog import SORT_COLUMNS
 from .service import DocumentUploadService
 
 # Create blueprint for this feature
@@ -37,9 +38,33 @@ def upload_document():
 
 @upload_bp.route('/', methods=['GET'])
 def list_documents():
-    """List all uploaded documents"""
-    documents = service.list_documents()
-    return jsonify({'documents': documents})
+    """List uploaded documents
+
+    Query parameters: limit, offset, sort (upload_date, filename, status,
+    updated_at), order (asc/desc), status, q (filename contains)
+    """
+    sort = request.args.get('sort', 'upload_date')
+    if sort not in SORT_COLUMNS:
+        return jsonify({'error': f"sort must be one of {', '.join(SORT_COLUMNS)}"}), 400
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    status = request.args.get('status')
+    query = request.args.get('q')
+
+    documents = service.list_documents(
+        limit=limit,
+        offset=offset,
+        sort=sort,
+        descending=request.args.get('order', 'desc').lower() != 'asc',
+        status=status,
+        query=query
+    )
+    return jsonify({
+        'documents': documents,
+        'total': service.count_documents(status=status, query=query),
+        'limit': limit,
+        'offset': offset
+    })
 
 @upload_bp.route('/<document_id>', methods=['GET'])
 def get_document(document_id):
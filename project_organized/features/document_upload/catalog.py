@@ -0,0 +1,254 @@
+"""Indexed document catalog for the document upload feature.
+
+Document records used to be one JSON file per document under
+``uploads/records``, so listing read every record and lookups fell back to
+directory scans. The catalog keeps them in a local SQLite database with
+indexes for the listing sort and filter columns; it is updated on upload and
+on every status change.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = 'catalog.sqlite3'
+
+# Columns stored as such; any other record fields are kept in ``extra``
+COLUMNS = ('document_id', 'filename', 'path', 'upload_date', 'status', 'language', 'extraction_path')
+SORT_COLUMNS = ('upload_date', 'filename', 'status', 'updated_at')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    path TEXT,
+    upload_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    language TEXT,
+    extraction_path TEXT,
+    extra TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents (upload_date);
+CREATE INDEX IF NOT EXISTS idx_documents_status_upload_date ON documents (status, upload_date);
+CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents (filename);
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class DocumentCatalog:
+    """SQLite-backed catalog of uploaded documents"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # One connection shared by the request threads, serialized by a lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_row(document):
+        extra = {k: v for k, v in document.items() if k not in COLUMNS}
+        row = {column: document.get(column) for column in COLUMNS}
+        row['filename'] = row['filename'] or ''
+        row['upload_date'] = row['upload_date'] or datetime.now().isoformat()
+        row['status'] = row['status'] or 'uploaded'
+        row['extra'] = json.dumps(extra) if extra else None
+        row['updated_at'] = datetime.now().isoformat()
+        return row
+
+    @staticmethod
+    def _from_row(row):
+        document = {column: row[column] for column in COLUMNS if row[column] is not None}
+        if row['extra']:
+            document.update(json.loads(row['extra']))
+        return document
+
+    def upsert(self, document):
+        """Insert or replace a document record
+
+        Args:
+            document: Record dict with at least ``document_id``
+        """
+        row = self._to_row(document)
+        names = ', '.join(row)
+        placeholders = ', '.join(f':{name}' for name in row)
+        with self._lock, self._conn:
+            self._conn.execute(f"INSERT OR REPLACE INTO documents ({names}) VALUES ({placeholders})", row)
+
+    def update_status(self, document_id, status, **fields):
+        """Update a document's status (and any other record fields)
+
+        A single ``UPDATE`` of the row, so concurrent status changes cannot
+        overwrite each other's fields; fields outside ``COLUMNS`` are merged
+        into ``extra``.
+
+        Returns:
+            The updated record, or None if the document is not in the catalog
+        """
+        columns = {k: v for k, v in fields.items() if k in COLUMNS and k not in ('document_id', 'status')}
+        extra = {k: v for k, v in fields.items() if k not in COLUMNS}
+        assignments = ['status = :status', 'updated_at = :updated_at']
+        assignments += [f"{column} = :{column}" for column in columns]
+        params = {**columns, 'status': status, 'updated_at': datetime.now().isoformat(),
+                  'document_id': document_id}
+        if extra:
+            assignments.append("extra = json_patch(COALESCE(extra, '{}'), :extra)")
+            params['extra'] = json.dumps(extra)
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE documents SET {', '.join(assignments)} WHERE document_id = :document_id", params)
+            if cursor.rowcount == 0:
+                return None
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return self._from_row(row)
+
+    def get(self, document_id):
+        """Get a document record by ID (primary key lookup)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    @staticmethod
+    def _where(status=None, query=None):
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if query:
+            clauses.append("filename LIKE ? ESCAPE '\\'")
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def list(self, limit=None, offset=0, sort='upload_date', descending=True, status=None, query=None):
+        """List document records
+
+        Args:
+            limit: Maximum number of records (None for all)
+            offset: Number of records to skip
+            sort: One of ``SORT_COLUMNS``
+            descending: Sort order
+            status: Only documents with this status
+            query: Only documents whose filename contains this text
+
+        Returns:
+            List of document records
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}, expected one of {SORT_COLUMNS}")
+        where, params = self._where(status, query)
+        order = 'DESC' if descending else 'ASC'
+        sql = f"SELECT * FROM documents{where} ORDER BY {sort} {order}, document_id {order}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def count(self, status=None, query=None):
+        """Number of documents matching the same filters as ``list``"""
+        where, params = self._where(status, query)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM documents{where}", params).fetchone()[0]
+
+    def _get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_legacy_files(self, upload_dir, extraction_dir=None, force=False):
+        """One-time import of the JSON record files and record-less uploads
+
+        Imports ``<upload_dir>/records/*.json`` and ``doc_*.pdf`` files in
+        ``upload_dir`` that have no record. Runs once per catalog unless
+        ``force`` is set; existing catalog entries are never overwritten.
+
+        Returns:
+            Number of imported documents
+        """
+        if not force and self._get_meta('legacy_import') is not None:
+            return 0
+
+        documents = {}
+        record_dir = os.path.join(upload_dir, 'records')
+        if os.path.isdir(record_dir):
+            for filename in os.listdir(record_dir):
+                if not filename.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(record_dir, filename), 'r') as f:
+                        document = json.load(f)
+                    documents[document['document_id']] = document
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Skipping unreadable document record {filename}: {e}")
+
+        if os.path.isdir(upload_dir):
+            for filename in os.listdir(upload_dir):
+                if not (filename.startswith('doc_') and filename.endswith('.pdf')):
+                    continue
+                parts = filename.split('_')
+                document_id = parts[0] + '_' + parts[1]
+                if document_id not in documents:
+                    path = os.path.join(upload_dir, filename)
+                    documents[document_id] = {
+                        'document_id': document_id,
+                        'filename': filename.replace(document_id + '_', ''),
+                        'path': path,
+                        'upload_date': datetime.fromtimestamp(os.path.getmtime(path)).isoformat(),
+                        'status': 'uploaded'
+                    }
+
+        imported = 0
+        for document_id, document in documents.items():
+            if extraction_dir and 'extraction_path' not in document:
+                extraction_path = os.path.join(extraction_dir, f"{document_id}_extraction.json")
+                if os.path.exists(extraction_path):
+                    document['extraction_path'] = extraction_path
+            if self.get(document_id) is None:
+                self.upsert(document)
+                imported += 1
+
+        self._set_meta('legacy_import', datetime.now().isoformat())
+        logger.info(f"Imported {imported} legacy document records into {self.db_path}")
+        return imported
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import legacy document records into the catalog")
+    parser.add_argument('upload_dir', help="Uploads directory (containing records/)")
+    parser.add_argument('--extraction-dir', help="Extractions directory")
+    parser.add_argument('--db', help="Catalog path (default: <upload_dir>/catalog.sqlite3)")
+    parser.add_argument('--force', action='store_true', help="Import again even if already done")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = DocumentCatalog(args.db or os.path.join(args.upload_dir, CATALOG_FILENAME))
+    print(f"Imported {catalog.import_legacy_files(args.upload_dir, args.extraction_dir, force=args.force)} documents")
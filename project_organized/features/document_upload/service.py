@@ -3,19 +3,30 @@ import os
 import uuid
 import json
 import logging
+import sqlite3
 from datetime import datetime
 from werkzeug.utils import secure_filename
 
+from .catalog import CATALOG_FILENAME, DocumentCatalog
+
 logger = logging.getLogger(__name__)
 
 class DocumentUploadService:
     """Service for handling document uploads and management"""
     
-    def __init__(self, upload_dir='uploads', extraction_dir='extractions'):
+    def __init__(self, upload_dir='uploads', extraction_dir='extractions', catalog=None):
         self.upload_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', upload_dir))
         self.extraction_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', extraction_dir))
         os.makedirs(self.upload_dir, exist_ok=True)
         os.makedirs(self.extraction_dir, exist_ok=True)
+
+        # Document records live in an indexed catalog; record files from
+        # earlier versions are imported the first time it is opened
+        if catalog is None:
+            db_path = os.environ.get('DOCUMENT_CATALOG_PATH') or os.path.join(self.upload_dir, CATALOG_FILENAME)
+            catalog = DocumentCatalog(db_path)
+            catalog.import_legacy_files(self.upload_dir, self.extraction_dir)
+        self.catalog = catalog
     
     def handle_upload(self, file, language='heb+eng'):
         """Handle a file upload
@@ -41,6 +52,9 @@ class DocumentUploadService:
             
             logger.info(f"Saved document {document_id} to {file_path}")
             
+            # Create a sample extraction for testing
+            extraction_path = self._create_sample_extraction(document_id, original_filename)
+
             # Create document record
             document = {
                 'document_id': document_id,
@@ -48,15 +62,10 @@ class DocumentUploadService:
                 'path': file_path,
                 'upload_date': datetime.now().isoformat(),
                 'status': 'uploaded',
-                'language': language
+                'language': language,
+                'extraction_path': extraction_path
             }
-            
-            # In a real application, this would be saved to a database
-            # For now, we'll save to a JSON file
-            self._save_document_record(document)
-            
-            # Create a sample extraction for testing
-            self._create_sample_extraction(document_id, original_filename)
+            self.catalog.upsert(document)
             
             # Queue for processing (in this simple version, we return immediately)
             # In a production system, this would trigger an async job
@@ -66,75 +75,31 @@ class DocumentUploadService:
             logger.error(f"Error handling upload: {e}")
             return None
     
-    def list_documents(self):
-        """List all documents
-        
+    def list_documents(self, limit=None, offset=0, sort='upload_date', descending=True, status=None, query=None):
+        """List documents
+
+        Args:
+            limit: Maximum number of documents (None for all)
+            offset: Number of documents to skip
+            sort: Sort column (upload_date, filename, status, updated_at)
+            descending: Sort order
+            status: Only documents with this status
+            query: Only documents whose filename contains this text
+
         Returns:
             List of document records
         """
-        # In a real application, this would query a database
-        # For now, we'll read all document records from JSON files
         try:
-            documents = []
-            record_dir = os.path.join(self.upload_dir, 'records')
-            
-            if os.path.exists(record_dir):
-                for filename in os.listdir(record_dir):
-                    if filename.endswith('.json'):
-                        try:
-                            with open(os.path.join(record_dir, filename), 'r') as f:
-                                doc = json.load(f)
-                                documents.append(doc)
-                        except:
-                            pass
-            
-            # If we found documents in records, return them
-            if documents:
-                return documents
-                
-            # Fallback: Look for PDF files in uploads directory
-            if os.path.exists(self.upload_dir):
-                for filename in [f for f in os.listdir(self.upload_dir) if f.endswith('.pdf')]:
-                    if filename.startswith('doc_'):
-                        doc_id = filename.split('_')[0] + '_' + filename.split('_')[1]
-                        documents.append({
-                            'document_id': doc_id,
-                            'filename': filename.replace(doc_id + '_', ''),
-                            'path': os.path.join(self.upload_dir, filename),
-                            'upload_date': datetime.now().isoformat(),
-                            'status': 'uploaded'
-                        })
-                    else:
-                        documents.append({
-                            'document_id': f"doc_{uuid.uuid4().hex[:8]}",
-                            'filename': filename,
-                            'path': os.path.join(self.upload_dir, filename),
-                            'upload_date': datetime.now().isoformat(),
-                            'status': 'uploaded'
-                        })
-            
-            # Also check for any sample extractions
-            if os.path.exists(self.extraction_dir):
-                for filename in os.listdir(self.extraction_dir):
-                    if filename.endswith('sample_extraction.json'):
-                        try:
-                            doc_id = filename.split('_')[0] + '_' + filename.split('_')[1]
-                            if not any(d['document_id'] == doc_id for d in documents):
-                                documents.append({
-                                    'document_id': doc_id,
-                                    'filename': 'sample_document.pdf',
-                                    'path': os.path.join(self.extraction_dir, filename),
-                                    'upload_date': datetime.now().isoformat(),
-                                    'status': 'processed'
-                                })
-                        except:
-                            pass
-            
-            return documents
-        except Exception as e:
+            return self.catalog.list(limit=limit, offset=offset, sort=sort, descending=descending,
+                                     status=status, query=query)
+        except sqlite3.Error as e:
             logger.error(f"Error listing documents: {e}")
             return []
-    
+
+    def count_documents(self, status=None, query=None):
+        """Number of documents matching the ``list_documents`` filters"""
+        return self.catalog.count(status=status, query=query)
+
     def get_document(self, document_id):
         """Get a document by ID
         
@@ -144,35 +109,24 @@ class DocumentUploadService:
         Returns:
             Document record or None if not found
         """
-        record = self._get_document_record(document_id)
-        if record:
-            return record
-            
-        # Fallback: Look for file directly
-        for filename in [f for f in os.listdir(self.upload_dir) if os.path.isfile(os.path.join(self.upload_dir, f))]:
-            if filename.startswith(document_id) and filename.endswith('.pdf'):
-                return {
-                    'document_id': document_id,
-                    'filename': filename.replace(document_id + '_', ''),
-                    'path': os.path.join(self.upload_dir, filename),
-                    'upload_date': datetime.now().isoformat(),
-                    'status': 'uploaded'
-                }
-                
-        # Also check for sample extractions
-        if os.path.exists(self.extraction_dir):
-            for filename in os.listdir(self.extraction_dir):
-                if filename.startswith(document_id) and filename.endswith('sample_extraction.json'):
-                    return {
-                        'document_id': document_id,
-                        'filename': 'sample_document.pdf',
-                        'path': os.path.join(self.extraction_dir, filename),
-                        'upload_date': datetime.now().isoformat(),
-                        'status': 'processed'
-                    }
-        
-        return None
-    
+        return self.catalog.get(document_id)
+
+    def update_status(self, document_id, status, **fields):
+        """Update the processing status of a document
+
+        Args:
+            document_id: The document ID
+            status: New status, e.g. 'processing', 'processed', 'failed'
+            **fields: Other record fields to update
+
+        Returns:
+            Updated document record or None if not found
+        """
+        document = self.catalog.update_status(document_id, status, **fields)
+        if document is None:
+            logger.warning(f"Cannot update status of unknown document {document_id}")
+        return document
+
     def get_financial_data(self, document_id):
         """Get financial data for a document
         
@@ -211,31 +165,6 @@ class DocumentUploadService:
             }
         ]
     
-    def _save_document_record(self, document):
-        """Save a document record"""
-        # In a real application, this would save to a database
-        # For now, we'll create a file for each document
-        record_dir = os.path.join(self.upload_dir, 'records')
-        os.makedirs(record_dir, exist_ok=True)
-        
-        file_path = os.path.join(record_dir, f"{document['document_id']}.json")
-        
-        with open(file_path, 'w') as f:
-            json.dump(document, f, indent=2)
-    
-    def _get_document_record(self, document_id):
-        """Get a document record by ID"""
-        record_dir = os.path.join(self.upload_dir, 'records')
-        file_path = os.path.join(record_dir, f"{document_id}.json")
-        
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return None
-        
     def _create_sample_extraction(self, document_id, filename):
         """Create a sample extraction for testing"""
         extraction_file = os.path.join(self.extraction_dir, f"{document_id}_extraction.json")
@@ -251,3 +180,4 @@ class DocumentUploadService:
             json.dump(extraction_content, f, indent=2)
             
         logger.info(f"Created sample extraction at {extraction_file}")
+        return extraction_file
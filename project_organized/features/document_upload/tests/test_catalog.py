@@ -0,0 +1,97 @@
+"""Tests for the document catalog"""
+import json
+import os
+
+from project_organized.features.document_upload.catalog import DocumentCatalog
+
+
+def make_document(document_id, filename, upload_date, status='uploaded'):
+    return {
+        'document_id': document_id,
+        'filename': filename,
+        'path': f"/uploads/{document_id}_{filename}",
+        'upload_date': upload_date,
+        'status': status,
+        'language': 'eng',
+        'page_count': 3
+    }
+
+
+def test_list_is_sorted_filtered_and_paginated(tmp_path):
+    catalog = DocumentCatalog(str(tmp_path / 'catalog.sqlite3'))
+    catalog.upsert(make_document('doc_1', 'january.pdf', '2025-01-10T10:00:00'))
+    catalog.upsert(make_document('doc_2', 'february.pdf', '2025-02-10T10:00:00', status='processed'))
+    catalog.upsert(make_document('doc_3', 'march.pdf', '2025-03-10T10:00:00'))
+
+    assert [d['document_id'] for d in catalog.list()] == ['doc_3', 'doc_2', 'doc_1']
+    assert [d['document_id'] for d in catalog.list(limit=1, offset=1)] == ['doc_2']
+    assert [d['document_id'] for d in catalog.list(sort='filename', descending=False)] == ['doc_2', 'doc_1', 'doc_3']
+    assert [d['document_id'] for d in catalog.list(status='uploaded')] == ['doc_3', 'doc_1']
+    assert catalog.count(query='uary') == 2
+
+    # Fields outside the indexed columns are kept
+    assert catalog.get('doc_1')['page_count'] == 3
+
+
+def test_update_status(tmp_path):
+    catalog = DocumentCatalog(str(tmp_path / 'catalog.sqlite3'))
+    catalog.upsert(make_document('doc_1', 'january.pdf', '2025-01-10T10:00:00'))
+
+    catalog.update_status('doc_1', 'processed', isin_count=4)
+    catalog.update_status('doc_1', 'processed', extraction_path='/extractions/doc_1.json')
+
+    document = catalog.get('doc_1')
+    assert document['status'] == 'processed'
+    assert document['isin_count'] == 4
+    assert document['page_count'] == 3
+    assert document['extraction_path'] == '/extractions/doc_1.json'
+    assert catalog.update_status('doc_missing', 'processed') is None
+
+
+def test_legacy_records_are_imported_once(tmp_path):
+    upload_dir = tmp_path / 'uploads'
+    (upload_dir / 'records').mkdir(parents=True)
+    record = make_document('doc_1', 'january.pdf', '2025-01-10T10:00:00')
+    (upload_dir / 'records' / 'doc_1.json').write_text(json.dumps(record))
+    # An upload without a record file
+    (upload_dir / 'doc_2_february.pdf').write_bytes(b'%PDF-1.4')
+
+    catalog = DocumentCatalog(str(tmp_path / 'catalog.sqlite3'))
+
+    assert catalog.import_legacy_files(str(upload_dir)) == 2
+    assert catalog.get('doc_1') == record
+    assert catalog.get('doc_2')['filename'] == 'february.pdf'
+
+    os.remove(upload_dir / 'doc_2_february.pdf')
+    (upload_dir / 'doc_3_march.pdf').write_bytes(b'%PDF-1.4')
+    assert catalog.import_legacy_files(str(upload_dir)) == 0
+    assert catalog.get('doc_3') is None
+
+
+def test_processing_pipeline_updates_the_catalog_status(tmp_path, monkeypatch):
+    from project_organized.features.document_upload.service import DocumentUploadService
+    from project_organized.features.pdf_processing.service import PDFProcessingService
+
+    catalog = DocumentCatalog(str(tmp_path / 'catalog.sqlite3'))
+    catalog.upsert(make_document('doc_1', 'january.pdf', '2025-01-10T10:00:00'))
+    catalog.upsert(make_document('doc_2', 'february.pdf', '2025-02-10T10:00:00'))
+    monkeypatch.chdir(tmp_path)
+    pipeline = PDFProcessingService(document_service=DocumentUploadService(catalog=catalog))
+
+    extraction_path = tmp_path / 'doc_1_extraction.json'
+    extraction_path.write_text('{}')
+    seen = []
+
+    def process_document(file_path, document_id):
+        seen.append(catalog.get(document_id)['status'])
+        return str(extraction_path) if document_id == 'doc_1' else None
+
+    monkeypatch.setattr(pipeline.processor, 'process_document', process_document)
+
+    assert pipeline.process_document('/uploads/doc_1_january.pdf', 'doc_1')['status'] == 'completed'
+    assert pipeline.process_document('/uploads/doc_2_february.pdf', 'doc_2') is None
+
+    assert seen == ['processing', 'processing']
+    assert catalog.get('doc_1')['status'] == 'processed'
+    assert catalog.get('doc_1')['extraction_path'] == str(extraction_path)
+    assert catalog.get('doc_2')['status'] == 'failed'
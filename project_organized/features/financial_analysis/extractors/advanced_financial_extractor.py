@@ -5,6 +5,8 @@ import logging
 from datetime import datetime
 import pandas as pd
 
+from .financial_tokenizer import FinancialTokenizer, TokenStream, is_potential_table_row
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -41,6 +43,45 @@ class AdvancedFinancialExtractor:
             'interest', 'dividend', 'yield', 'profit', 'loss', 'revenue',
             'expense', 'cost', 'fee', 'tax', 'payment', 'allocation'
         ]
+        
+        # Single-pass lexer shared by all extraction steps
+        self.tokenizer = FinancialTokenizer()
+        
+        # Per-occurrence patterns, compiled once instead of per call
+        self.quantity_terms = ['quantity', 'shares', 'units', 'volume', 'amount', 'balance', 'holding']
+        # (matched against lowercased contexts, so no IGNORECASE needed)
+        self.quantity_regex = re.compile(
+            r'(' + '|'.join(map(re.escape, self.quantity_terms)) + r')\s*[:=]?\s*' + self.number_pattern)
+        
+        currency_pattern = f'(?:{self.currency_symbols}|{self.currency_codes})'
+        self.price_terms = ['price', 'rate', 'value', 'cost', 'nav', 'market value']
+        self.price_patterns = [
+            (term, [
+                # Term followed by currency and number
+                re.compile(r'(?i)' + re.escape(term) + r'\s*[:=]?\s*' + currency_pattern + r'\s*' + self.number_pattern),
+                # Term followed by number and currency
+                re.compile(r'(?i)' + re.escape(term) + r'\s*[:=]?\s*' + self.number_pattern + r'\s*' + currency_pattern),
+            ])
+            for term in self.price_terms
+        ]
+        self.number_regex = re.compile(self.number_pattern)
+        self.currency_symbol_regex = re.compile(self.currency_symbols)
+        self.currency_code_regex = re.compile(self.currency_codes)
+        
+        # Prefixes checked right before a number/date token (anchored at the token)
+        self.portfolio_value_prefixes = [
+            re.compile(r'(?i)total\s+(?:portfolio|asset|holding|fund)?\s*value\s*[:=]?\s*$'),
+            re.compile(r'(?i)(?:portfolio|asset|holding|fund)?\s*total\s*[:=]?\s*$'),
+        ]
+        self.valuation_date_prefix = re.compile(r'(?i)(?:valuation|statement|as of|as at)\s*date\s*[:=]?\s*$')
+        self.account_patterns = [
+            re.compile(r'(?i)account\s*(?:number|no|#)?\s*[:=]?\s*([A-Za-z0-9\-]+)'),
+            re.compile(r'(?i)(?:a/c|acct)\.?\s*(?:number|no|#)?\s*[:=]?\s*([A-Za-z0-9\-]+)')
+        ]
+        self.client_patterns = [
+            re.compile(r'(?i)client\s*(?:name)?\s*[:=]?\s*([A-Z][A-Za-z\.\, ]{2,50})'),
+            re.compile(r'(?i)(?:name|account holder)\s*[:=]?\s*([A-Z][A-Za-z\.\, ]{2,50})')
+        ]
     
     def extract_from_document(self, document_id, extraction_dir='extractions', output_dir='financial_data'):
         """Extract financial data from a document extraction"""
@@ -82,21 +123,25 @@ class AdvancedFinancialExtractor:
         return result
     
     def extract_data(self, text, page_texts=None):
-        """Extract all financial data from text"""
-        if page_texts is None:
-            page_texts = [text]
+        """Extract all financial data from text
+        
+        The text is tokenized once; every extraction step below consumes the
+        resulting token stream, and extracted items carry a 'span' (offsets and
+        page id) for highlighting.
+        """
+        stream = self.tokenizer.tokenize(text, page_texts)
         
         # Basic extraction
-        isins = self._extract_isins(text)
-        currencies = self._extract_currencies(text)
-        percentages = self._extract_percentages(text)
-        dates = self._extract_dates(text)
+        isins = self._extract_isins(stream)
+        currencies = self._extract_currencies(stream)
+        percentages = self._extract_percentages(stream)
+        dates = self._extract_dates(stream)
         
         # Advanced extraction
-        securities = self._extract_securities(text, page_texts)
-        tables = self._extract_table_data(text)
-        summary_data = self._extract_summary_data(text)
-        financial_metrics = self._extract_financial_metrics(text)
+        securities = self._extract_securities(stream, stream.page_texts)
+        tables = self._extract_table_data(stream)
+        summary_data = self._extract_summary_data(stream)
+        financial_metrics = self._extract_financial_metrics(stream)
         
         # Create structured result
         result = {
@@ -113,53 +158,43 @@ class AdvancedFinancialExtractor:
         
         return result
     
+    def _tokens(self, source, page_texts=None):
+        """Accept either raw text or an existing token stream"""
+        if isinstance(source, TokenStream):
+            return source
+        return self.tokenizer.tokenize(source, page_texts)
+    
+    @staticmethod
+    def _context(text, start, end, radius):
+        return text[max(0, start - radius):min(len(text), end + radius)]
+    
     def _extract_isins(self, text):
-        """Extract ISIN numbers from text"""
-        isins = re.findall(self.isin_pattern, text)
-        unique_isins = list(set(isins))  # Remove duplicates
+        """Extract ISIN numbers from text (unique, in order of first appearance)"""
+        stream = self._tokens(text)
+        unique_isins = list(dict.fromkeys(token.value for token in stream.of_kind('isin')))
         logger.info(f"Extracted {len(unique_isins)} unique ISINs")
         return unique_isins
     
     def _extract_currencies(self, text):
         """Extract currency amounts from text"""
-        # Look for currency symbol followed by number
-        symbol_amounts = re.findall(f'{self.currency_symbols}\s*{self.number_pattern}', text)
-        
-        # Look for number followed by currency code
-        code_amounts = re.findall(f'{self.number_pattern}\s*{self.currency_codes}', text)
-        
+        stream = self._tokens(text)
         currencies = []
         
-        # Process symbol amounts
-        for match in symbol_amounts:
-            if isinstance(match, tuple):
-                amount = match[-1]  # Last group in the tuple is usually the number
-            else:
-                amount = re.search(self.number_pattern, match).group(0)
-            
-            symbol = re.search(self.currency_symbols, match).group(0)
-            
+        # Symbol amounts first, then amounts followed by a currency code
+        for token in stream.of_kind('symbol_amount'):
             currencies.append({
-                'amount': amount,
-                'symbol': symbol,
-                'type': 'symbol_amount'
+                'amount': token.value,
+                'symbol': token.unit,
+                'type': 'symbol_amount',
+                'span': token.span()
             })
         
-        # Process code amounts
-        for match in code_amounts:
-            if isinstance(match, tuple):
-                amount = match[0]  # First group in the tuple is usually the number
-                code_match = re.search(self.currency_codes, match[-1])
-            else:
-                amount = re.search(self.number_pattern, match).group(0)
-                code_match = re.search(self.currency_codes, match)
-            
-            code = code_match.group(0) if code_match else ""
-            
+        for token in stream.of_kind('code_amount'):
             currencies.append({
-                'amount': amount,
-                'code': code,
-                'type': 'code_amount'
+                'amount': token.value,
+                'code': token.unit,
+                'type': 'code_amount',
+                'span': token.span()
             })
         
         logger.info(f"Extracted {len(currencies)} currency amounts")
@@ -167,20 +202,15 @@ class AdvancedFinancialExtractor:
     
     def _extract_percentages(self, text):
         """Extract percentage values from text"""
+        stream = self._tokens(text)
         percentages = []
         
-        for match in re.finditer(self.percentage_pattern, text):
-            # Get the percentage value
-            percentage_value = match.group(1)
-            
-            # Get context (20 chars before and after)
-            start = max(0, match.start() - 20)
-            end = min(len(text), match.end() + 20)
-            context = text[start:end]
-            
+        for token in stream.of_kind('percent'):
             percentages.append({
-                'value': percentage_value,
-                'context': context
+                'value': token.value,
+                # Context: 20 chars before and after
+                'context': self._context(stream.text, token.start, token.end, 20),
+                'span': token.span()
             })
         
         logger.info(f"Extracted {len(percentages)} percentages")
@@ -188,25 +218,19 @@ class AdvancedFinancialExtractor:
     
     def _extract_dates(self, text):
         """Extract dates from text"""
+        stream = self._tokens(text)
         dates = []
         
-        for pattern in self.date_patterns:
-            for match in re.finditer(pattern, text):
-                date_str = match.group(0)
-                
-                # Get context (30 chars before and after)
-                start = max(0, match.start() - 30)
-                end = min(len(text), match.end() + 30)
-                context = text[start:end]
-                
-                # Try to identify date type from context
-                date_type = self._identify_date_type(context)
-                
-                dates.append({
-                    'date': date_str,
-                    'type': date_type,
-                    'context': context
-                })
+        for token in stream.of_kind('date'):
+            # Context: 30 chars before and after
+            context = self._context(stream.text, token.start, token.end, 30)
+            
+            dates.append({
+                'date': token.value,
+                'type': self._identify_date_type(context),
+                'context': context,
+                'span': token.span()
+            })
         
         logger.info(f"Extracted {len(dates)} dates")
         return dates
@@ -230,82 +254,77 @@ class AdvancedFinancialExtractor:
     
     def _extract_securities(self, text, page_texts):
         """Extract securities information (ISIN with associated data)"""
-        securities = []
+        stream = self._tokens(text, page_texts)
         
-        # Find all ISINs
-        isins = re.findall(self.isin_pattern, text)
-        unique_isins = list(set(isins))  # Remove duplicates
+        # Group ISIN tokens by ISIN, keeping first-appearance order
+        tokens_by_isin = {}
+        for token in stream.of_kind('isin'):
+            tokens_by_isin.setdefault(token.value, []).append(token)
         
-        for isin in unique_isins:
-            # Find all occurrences of this ISIN
-            security_data = self._extract_security_data(isin, text, page_texts)
-            securities.append(security_data)
+        securities = [
+            self._extract_security_data(isin, stream, tokens)
+            for isin, tokens in tokens_by_isin.items()
+        ]
         
         logger.info(f"Extracted data for {len(securities)} securities")
         return securities
     
-    def _extract_security_data(self, isin, text, page_texts):
-        """Extract data for a specific security (ISIN)"""
-        # Find occurrences across all pages
+    def _extract_security_data(self, isin, stream, tokens):
+        """Extract data for a specific security (ISIN) from its tokens"""
         occurrences = []
         
-        for i, page_text in enumerate(page_texts):
-            positions = [m.start() for m in re.finditer(re.escape(isin), page_text)]
-            for pos in positions:
-                # Get context (100 chars before and after)
-                start = max(0, pos - 100)
-                end = min(len(page_text), pos + 100)
-                context = page_text[start:end]
-                
-                occurrences.append({
-                    'page_index': i,
-                    'position': pos,
-                    'context': context
-                })
-        
-        # Extract name
-        name = self._extract_security_name(isin, text, occurrences)
-        
-        # Extract quantities
-        quantities = self._extract_security_quantities(isin, text, occurrences)
-        
-        # Extract prices
-        prices = self._extract_security_prices(isin, text, occurrences)
+        for token in tokens:
+            if stream.aligned:
+                page_text = stream.page_texts[token.page]
+                pos = token.page_offset
+            else:
+                page_text = stream.text
+                pos = token.start
+            
+            # Get context (100 chars before and after)
+            start = max(0, pos - 100)
+            end = min(len(page_text), pos + 100)
+            
+            occurrences.append({
+                'page_index': token.page,
+                'position': pos,
+                'context': page_text[start:end],
+                'span': token.span()
+            })
         
-        # Extract currency
-        currency = self._extract_security_currency(isin, text, occurrences)
+        # Prices are shared by the price and currency lookups
+        prices = self._extract_security_prices(isin, stream, occurrences)
         
-        # Create security data
         security_data = {
             'isin': isin,
-            'name': name,
-            'quantities': quantities,
+            'name': self._extract_security_name(isin, stream, occurrences, tokens),
+            'quantities': self._extract_security_quantities(isin, stream, occurrences),
             'prices': prices,
-            'currency': currency,
+            'currency': self._extract_security_currency(isin, stream, occurrences, prices),
             'occurrences': occurrences
         }
         
         return security_data
     
-    def _extract_security_name(self, isin, text, occurrences):
+    def _extract_security_name(self, isin, stream, occurrences, tokens=()):
         """Extract security name based on ISIN occurrences"""
         # Try different approaches to find the name
         
         # Look for patterns like "NAME (ISIN: XX0000000000)" or "NAME, ISIN XX0000000000"
-        name_pattern1 = r'([A-Z][A-Za-z0-9\.\, ]{2,50})[\s\(](?:ISIN:?\s*)?' + re.escape(isin)
-        name_pattern2 = re.escape(isin) + r'(?:\s*:)?\s*([A-Z][A-Za-z0-9\.\, ]{2,50})'
+        name_pattern1 = re.compile(r'([A-Z][A-Za-z0-9\.\, ]{2,50})[\s\(](?:ISIN:?\s*)?' + re.escape(isin))
+        name_pattern2 = re.compile(re.escape(isin) + r'(?:\s*:)?\s*([A-Z][A-Za-z0-9\.\, ]{2,50})')
         
         # Try to find name in occurrences contexts
         for occurrence in occurrences:
             context = occurrence['context']
             
             # Try pattern 1
-            match = re.search(name_pattern1, context)
+            match = name_pattern1.search(context)
             if match:
                 return match.group(1).strip()
             
             # Try pattern 2
-            match = re.search(name_pattern2, context)
+            match = name_pattern2.search(context)
             if match:
                 return match.group(1).strip()
             
@@ -313,93 +332,71 @@ class AdvancedFinancialExtractor:
             isin_pos = context.find(isin)
             if isin_pos > 0:
                 # Look at text before ISIN
-                before_text = context[:isin_pos].strip()
-                words = before_text.split()
+                words = context[:isin_pos].split()
                 
-                # If we have words before the ISIN
-                if words:
-                    # Take the last 1-4 words that start with uppercase
-                    name_words = []
-                    for word in reversed(words):
-                        if re.match(r'^[A-Z]', word) and len(name_words) < 4:
-                            name_words.insert(0, word)
-                    
-                    if name_words:
-                        return ' '.join(name_words)
+                # Take the last 1-4 words that start with uppercase
+                name_words = []
+                for word in reversed(words):
+                    if re.match(r'^[A-Z]', word) and len(name_words) < 4:
+                        name_words.insert(0, word)
+                
+                if name_words:
+                    return ' '.join(name_words)
         
-        # If no name found in occurrences, try searching in the whole text
+        # If no name found in occurrences, look around the ISIN in the whole text
+        text = stream.text
         for pattern in [name_pattern1, name_pattern2]:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1).strip()
+            for token in tokens:
+                match = pattern.search(text, max(0, token.start - 120), token.end + 60)
+                if match:
+                    return match.group(1).strip()
         
         # Default response if no name found
         return "Unknown"
     
-    def _extract_security_quantities(self, isin, text, occurrences):
+    def _extract_security_quantities(self, isin, stream, occurrences):
         """Extract quantities associated with this security"""
         quantities = []
         
-        # Quantity-related terms
-        quantity_terms = ['quantity', 'shares', 'units', 'volume', 'amount', 'balance', 'holding']
-        
-        # Look in contexts for quantities
+        # Look in contexts for quantity terms followed by numbers
         for occurrence in occurrences:
             context = occurrence['context'].lower()
             
-            # Look for quantity terms followed by numbers
-            for term in quantity_terms:
-                # Pattern: term followed by number
-                pattern = r'(?i)' + re.escape(term) + r'\s*[:=]?\s*' + self.number_pattern
-                for match in re.finditer(pattern, context):
-                    if isinstance(match.group(1), tuple):
-                        quantity = match.group(1)[0]  # First capture group
-                    else:
-                        quantity = match.group(1)
-                    
-                    quantities.append({
-                        'value': quantity,
-                        'term': term,
-                        'context': match.group(0)
-                    })
+            # Report matches grouped by term, in term order
+            matches = sorted(self.quantity_regex.finditer(context),
+                             key=lambda m: self.quantity_terms.index(m.group(1)))
+            for match in matches:
+                quantities.append({
+                    'value': match.group(2),
+                    'term': match.group(1),
+                    'context': match.group(0)
+                })
         
         return quantities
     
-    def _extract_security_prices(self, isin, text, occurrences):
+    def _extract_security_prices(self, isin, stream, occurrences):
         """Extract prices associated with this security"""
         prices = []
         
-        # Price-related terms
-        price_terms = ['price', 'rate', 'value', 'cost', 'nav', 'market value']
-        
-        # Look in contexts for prices
+        # Look in contexts for price terms with currency and numbers
         for occurrence in occurrences:
             context = occurrence['context'].lower()
             
-            # Look for price terms with currency and numbers
-            for term in price_terms:
-                # Pattern: term followed by currency symbol/code and number
-                currency_pattern = f'(?:{self.currency_symbols}|{self.currency_codes})'
-                
-                # Term followed by currency and number
-                pattern1 = r'(?i)' + re.escape(term) + r'\s*[:=]?\s*' + currency_pattern + r'\s*' + self.number_pattern
-                
-                # Term followed by number and currency
-                pattern2 = r'(?i)' + re.escape(term) + r'\s*[:=]?\s*' + self.number_pattern + r'\s*' + currency_pattern
+            for term, patterns in self.price_patterns:
+                if term not in context:
+                    continue
                 
                 # Check both patterns
-                for pattern in [pattern1, pattern2]:
-                    for match in re.finditer(pattern, context):
+                for pattern in patterns:
+                    for match in pattern.finditer(context):
                         match_text = match.group(0)
                         
                         # Extract the number
-                        number_match = re.search(self.number_pattern, match_text)
+                        number_match = self.number_regex.search(match_text)
                         if number_match:
-                            price_value = number_match.group(0)
-                            
                             # Extract the currency
-                            currency_symbol_match = re.search(self.currency_symbols, match_text)
-                            currency_code_match = re.search(self.currency_codes, match_text)
+                            currency_symbol_match = self.currency_symbol_regex.search(match_text)
+                            currency_code_match = self.currency_code_regex.search(match_text)
                             
                             currency = None
                             if currency_symbol_match:
@@ -408,7 +405,7 @@ class AdvancedFinancialExtractor:
                                 currency = currency_code_match.group(0)
                             
                             prices.append({
-                                'value': price_value,
+                                'value': number_match.group(0),
                                 'currency': currency,
                                 'term': term,
                                 'context': match_text
@@ -416,61 +413,47 @@ class AdvancedFinancialExtractor:
         
         return prices
     
-    def _extract_security_currency(self, isin, text, occurrences):
+    def _extract_security_currency(self, isin, stream, occurrences, prices=None):
         """Extract currency associated with this security"""
-        currencies = set()
+        currencies = []
         
         # Get currencies from prices
-        prices = self._extract_security_prices(isin, text, occurrences)
+        if prices is None:
+            prices = self._extract_security_prices(isin, stream, occurrences)
         for price in prices:
             if price.get('currency'):
-                currencies.add(price['currency'])
+                currencies.append(price['currency'])
         
         # If no currency found in prices, look in contexts
         if not currencies:
             for occurrence in occurrences:
                 context = occurrence['context']
                 
-                # Look for currency symbols
-                symbol_matches = re.findall(self.currency_symbols, context)
-                for symbol in symbol_matches:
-                    currencies.add(symbol)
-                
-                # Look for currency codes
-                code_matches = re.findall(self.currency_codes, context)
-                for code in code_matches:
-                    currencies.add(code)
+                # Look for currency symbols and codes
+                currencies.extend(self.currency_symbol_regex.findall(context))
+                currencies.extend(self.currency_code_regex.findall(context))
         
-        return list(currencies)
+        return list(dict.fromkeys(currencies))
     
     def _extract_table_data(self, text):
         """Extract and process table data from text"""
-        # Split text into lines
-        lines = text.split('\n')
+        stream = self._tokens(text)
         
-        # Find potential tables (consecutive lines with similar structure)
+        # Find potential tables (runs of consecutive table-like lines)
         tables = []
         current_table = []
+        previous_line = None
         
-        for line in lines:
-            # Skip empty lines
-            if not line.strip():
-                if current_table:
-                    if len(current_table) >= 3:  # Minimum 3 rows for a table
-                        tables.append(current_table)
-                    current_table = []
-                continue
-            
-            # Check if line has a table-like structure
-            if self._is_potential_table_row(line):
-                current_table.append(line)
-            elif current_table:
+        for token in stream.of_kind('table_row'):
+            if current_table and token.line != previous_line + 1:
                 if len(current_table) >= 3:  # Minimum 3 rows for a table
                     tables.append(current_table)
                 current_table = []
+            current_table.append(token.text)
+            previous_line = token.line
         
         # Don't forget the last table
-        if current_table and len(current_table) >= 3:
+        if len(current_table) >= 3:
             tables.append(current_table)
         
         # Process each potential table
@@ -486,29 +469,7 @@ class AdvancedFinancialExtractor:
     
     def _is_potential_table_row(self, line):
         """Check if a line might be part of a table"""
-        # Check for multiple spaces (column separators)
-        if '  ' in line and line.count('  ') >= 2:
-            return True
-        
-        # Check for tab separators
-        if '\t' in line:
-            return True
-        
-        # Check for consistent separators like | or ;
-        for sep in ['|', ';']:
-            if sep in line and line.count(sep) >= 2:
-                return True
-        
-        # Check for potential comma-separated data
-        if ',' in line:
-            # Avoid interpreting normal text as CSV
-            comma_count = line.count(',')
-            word_count = len(line.split())
-            # If commas are more frequent than in normal text
-            if comma_count >= 2 and comma_count >= word_count / 5:
-                return True
-        
-        return False
+        return is_potential_table_row(line)
     
     def _parse_table(self, table_lines):
         """Parse a potential table into structured data"""
@@ -595,43 +556,41 @@ class AdvancedFinancialExtractor:
         # No suitable parsing found
         return None
     
+    def _match_before(self, stream, prefix, token, keyword, window=80):
+        """Match a prefix pattern that must end right where a token starts"""
+        window_start = max(0, token.start - window)
+        # Cheap substring check before running the regex
+        if stream.lowered.rfind(keyword, window_start, token.start) < 0:
+            return None
+        return prefix.search(stream.text, window_start, token.start)
+    
     def _extract_summary_data(self, text):
         """Extract summary financial data from text"""
+        stream = self._tokens(text)
+        text = stream.text
         summary = {}
         
-        # Look for common summary data patterns
-        
-        # Total portfolio value
-        portfolio_value_patterns = [
-            r'(?i)total\s+(?:portfolio|asset|holding|fund)?\s*value\s*[:=]?\s*' + 
-            f'(?:{self.currency_symbols})?\s*{self.number_pattern}',
-            
-            r'(?i)(?:portfolio|asset|holding|fund)?\s*total\s*[:=]?\s*' + 
-            f'(?:{self.currency_symbols})?\s*{self.number_pattern}'
-        ]
-        
-        for pattern in portfolio_value_patterns:
-            match = re.search(pattern, text)
-            if match:
-                value_match = re.search(self.number_pattern, match.group(0))
-                currency_match = re.search(self.currency_symbols, match.group(0))
-                
-                if value_match:
+        # Total portfolio value: a number (optionally with currency symbol) after a "total" label
+        value_tokens = stream.of_kind('number', 'symbol_amount', 'code_amount')
+        for prefix in self.portfolio_value_prefixes:
+            for token in value_tokens:
+                match = self._match_before(stream, prefix, token, 'total')
+                if match:
+                    value = token.value
+                    value_end = token.start + token.text.find(value) + len(value)
                     summary['total_portfolio_value'] = {
-                        'value': value_match.group(0),
-                        'currency': currency_match.group(0) if currency_match else None,
-                        'context': match.group(0)
+                        'value': value,
+                        'currency': token.unit if token.kind == 'symbol_amount' else None,
+                        'context': text[match.start():value_end],
+                        'span': token.span()
                     }
                     break
+            if 'total_portfolio_value' in summary:
+                break
         
         # Account number
-        account_patterns = [
-            r'(?i)account\s*(?:number|no|#)?\s*[:=]?\s*([A-Za-z0-9\-]+)',
-            r'(?i)(?:a/c|acct)\.?\s*(?:number|no|#)?\s*[:=]?\s*([A-Za-z0-9\-]+)'
-        ]
-        
-        for pattern in account_patterns:
-            match = re.search(pattern, text)
+        for pattern in self.account_patterns:
+            match = pattern.search(text)
             if match:
                 summary['account_number'] = {
                     'value': match.group(1),
@@ -640,13 +599,8 @@ class AdvancedFinancialExtractor:
                 break
         
         # Client name
-        client_patterns = [
-            r'(?i)client\s*(?:name)?\s*[:=]?\s*([A-Z][A-Za-z\.\, ]{2,50})',
-            r'(?i)(?:name|account holder)\s*[:=]?\s*([A-Z][A-Za-z\.\, ]{2,50})'
-        ]
-        
-        for pattern in client_patterns:
-            match = re.search(pattern, text)
+        for pattern in self.client_patterns:
+            match = pattern.search(text)
             if match:
                 summary['client_name'] = {
                     'value': match.group(1),
@@ -654,70 +608,66 @@ class AdvancedFinancialExtractor:
                 }
                 break
         
-        # Valuation date
-        date_patterns = [
-            r'(?i)(?:valuation|statement|as of|as at)\s*date\s*[:=]?\s*(' + 
-            '|'.join(self.date_patterns) + ')'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
+        # Valuation date: first date token labelled as valuation/statement date
+        for token in stream.of_kind('date'):
+            match = self._match_before(stream, self.valuation_date_prefix, token, 'date')
             if match:
-                date_match = None
-                for date_pattern in self.date_patterns:
-                    date_match = re.search(date_pattern, match.group(1))
-                    if date_match:
-                        summary['valuation_date'] = {
-                            'value': date_match.group(0),
-                            'context': match.group(0)
-                        }
-                        break
-                if date_match:
-                    break
+                summary['valuation_date'] = {
+                    'value': token.value,
+                    'context': text[match.start():token.end],
+                    'span': token.span()
+                }
+                break
         
         logger.info(f"Extracted {len(summary)} summary data points")
         return summary
     
     def _extract_financial_metrics(self, text):
         """Extract financial metrics and ratios from text"""
+        stream = self._tokens(text)
         metrics = {}
         
         # Asset allocation
-        allocation_section = self._extract_section(text, 
-                                                ['asset allocation', 'allocation by asset', 'allocation by class'], 
+        allocation_section = self._extract_section(stream,
+                                                ['asset allocation', 'allocation by asset', 'allocation by class'],
                                                 ['performance', 'holdings', 'securities'])
         
         if allocation_section:
-            allocation_data = self._extract_allocation_data(allocation_section)
+            allocation_data = self._extract_allocation_data(stream, allocation_section)
             if allocation_data:
                 metrics['asset_allocation'] = allocation_data
         
         # Currency breakdown
-        currency_section = self._extract_section(text, 
-                                                ['currency allocation', 'currency breakdown', 'allocation by currency'], 
+        currency_section = self._extract_section(stream,
+                                                ['currency allocation', 'currency breakdown', 'allocation by currency'],
                                                 ['asset allocation', 'performance', 'holdings'])
         
         if currency_section:
-            currency_data = self._extract_allocation_data(currency_section)
+            currency_data = self._extract_allocation_data(stream, currency_section)
             if currency_data:
                 metrics['currency_allocation'] = currency_data
         
         # Performance metrics
-        performance_section = self._extract_section(text, 
-                                                 ['performance', 'return', 'yield', 'growth'], 
+        performance_section = self._extract_section(stream,
+                                                 ['performance', 'return', 'yield', 'growth'],
                                                  ['holdings', 'securities', 'allocation'])
         
         if performance_section:
-            performance_data = self._extract_performance_data(performance_section)
+            start, end = performance_section
+            performance_data = self._extract_performance_data(stream.text[start:end])
             if performance_data:
                 metrics['performance'] = performance_data
         
         logger.info(f"Extracted {len(metrics)} financial metric categories")
         return metrics
     
-    def _extract_section(self, text, section_headers, end_markers):
-        """Extract a section of text based on headers and end markers"""
-        text_lower = text.lower()
+    def _extract_section(self, stream, section_headers, end_markers):
+        """Locate a section based on headers and end markers
+        
+        Returns:
+            (start, end) offsets of the section in the text, or None
+        """
+        text_lower = stream.lowered
         
         # Find section start
         start_pos = -1
@@ -731,29 +681,24 @@ class AdvancedFinancialExtractor:
             return None
         
         # Find section end
-        end_pos = len(text)
+        end_pos = len(text_lower)
         for marker in end_markers:
-            pos = text_lower.find(marker, start_pos + 1)
+            pos = text_lower.find(marker, start_pos + 1, end_pos)
             if pos >= 0 and pos < end_pos:
                 end_pos = pos
         
-        # Extract the section (with reasonable max length)
+        # Limit the section to a reasonable length
         max_length = 2000  # Avoid extremely long sections
-        section_length = min(end_pos - start_pos, max_length)
-        
-        return text[start_pos:start_pos + section_length]
+        return start_pos, start_pos + min(end_pos - start_pos, max_length)
     
-    def _extract_allocation_data(self, section_text):
-        """Extract allocation data (asset class or currency)"""
+    def _extract_allocation_data(self, stream, section):
+        """Extract allocation data (asset class or currency) from a section's percentages"""
         allocation_data = []
+        start, end = section
         
-        # Look for percentage patterns in the section
-        for match in re.finditer(self.percentage_pattern, section_text):
-            percentage = match.group(1)
-            
+        for token in stream.between(start, end, 'percent'):
             # Get context before the percentage (likely the category name)
-            start = max(0, match.start() - 50)
-            context_before = section_text[start:match.start()].strip()
+            context_before = stream.text[max(start, token.start - 50):token.start].strip()
             
             # Try to identify the category name
             category = self._identify_category(context_before)
@@ -761,7 +706,8 @@ class AdvancedFinancialExtractor:
             if category:
                 allocation_data.append({
                     'category': category,
-                    'percentage': percentage
+                    'percentage': token.value,
+                    'span': token.span()
                 })
         
         return allocation_data
@@ -3,7 +3,6 @@ import json
 import os
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedFinancialExtractor:
@@ -6,19 +6,24 @@ import json
 import sys
 import logging
 from datetime import datetime
-import pandas as pd
+from utils.lazy_imports import lazy_import
+
+# pandas is only needed to build DataFrames from extracted tables
+pd = lazy_import("pandas")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f"financial_extraction_{datetime.now().strftime('%Y%m%d')}.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("financial_extractor")
 
+def configure_logging():
+    """Log to the console and a dated file (CLI only; importing this module configures nothing)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f"financial_extraction_{datetime.now().strftime('%Y%m%d')}.log"),
+            logging.StreamHandler()
+        ]
+    )
+
 def load_extracted_text(json_path):
     """Load OCR-extracted text from a JSON file"""
     with open(json_path, 'r', encoding='utf-8') as f:
@@ -215,6 +220,7 @@ def convert_tables_to_dataframes(tables):
     return dataframes
 
 def main():
+    configure_logging()
     if len(sys.argv) < 2:
         print("Usage: python financial_data_extractor.py <ocr_json_file> [output_format]")
         print("Example: python financial_data_extractor.py '2. Messos 28.02.2025_ocr.json' [json|csv]")
@@ -0,0 +1,240 @@
+import re
+import logging
+from bisect import bisect_right
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Building blocks shared with AdvancedFinancialExtractor
+NUMBER_PATTERN = r'(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
+CURRENCY_SYMBOLS = r'[$€£₪]'
+CURRENCY_CODES = r'USD|EUR|GBP|ILS|NIS'
+MONTH_DATE_PATTERN = r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2},? \d{4}\b'
+DATE_PATTERN = (
+    r'\d{1,2}/\d{1,2}/\d{2,4}'          # 31/12/2023
+    r'|\d{1,2}-\d{1,2}-\d{2,4}'         # 31-12-2023
+    r'|\d{1,2}\.\d{1,2}\.\d{2,4}'       # 31.12.2023
+    r'|' + MONTH_DATE_PATTERN           # February 28, 2023
+)
+
+# One alternation, tried left to right at each position: the first matching
+# kind wins and its characters are consumed, so tokens never overlap (except
+# "$1,000 USD", which yields a symbol amount and a code amount sharing the
+# number). The leading lookahead lets the engine skip positions no token can
+# start at.
+_TOKEN_REGEX = re.compile(
+    r'(?=[A-Z$€£₪0-9\n])(?:'
+    r'(?P<isin>\b[A-Z]{2}[A-Z0-9]{10}\b)'
+    r'|(?P<symbol_amount>(?P<symbol>' + CURRENCY_SYMBOLS + r')\s*(?P<symbol_value>' + NUMBER_PATTERN + r')'
+    r'(?:\s*\b(?P<symbol_code>' + CURRENCY_CODES + r')\b)?)'
+    r'|(?P<date>' + DATE_PATTERN + r')'
+    r'|(?P<percent>(?P<percent_value>(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d*)?) ?%)'
+    r'|(?P<code_amount>(?P<code_value>' + NUMBER_PATTERN + r')\s*\b(?P<code>' + CURRENCY_CODES + r')\b)'
+    r'|(?P<number>' + NUMBER_PATTERN + r')'
+    r'|(?P<newline>\n)'
+    r')'
+)
+
+TOKEN_KINDS = ('isin', 'symbol_amount', 'code_amount', 'percent', 'date', 'number', 'table_row')
+
+
+class Token(NamedTuple):
+    """A typed span of the document text.
+
+    ``start``/``end`` are offsets into the tokenized text; ``page`` and
+    ``page_offset`` locate the span inside ``page_texts`` (None when the text
+    could not be aligned with the pages).
+    """
+    kind: str
+    text: str
+    start: int
+    end: int
+    value: str
+    unit: Optional[str] = None
+    page: Optional[int] = None
+    page_offset: Optional[int] = None
+    line: int = 0
+
+    def span(self) -> Dict[str, Optional[int]]:
+        """Position info for UI highlighting."""
+        return {'start': self.start, 'end': self.end,
+                'page': self.page, 'page_offset': self.page_offset}
+
+
+def is_potential_table_row(line: str) -> bool:
+    """Check if a line might be part of a table"""
+    # Multiple spaces (column separators) or tabs
+    if line.count('  ') >= 2 or '\t' in line:
+        return True
+
+    # Consistent separators like | or ;
+    if line.count('|') >= 2 or line.count(';') >= 2:
+        return True
+
+    # Comma-separated data (commas more frequent than in normal text)
+    comma_count = line.count(',')
+    if comma_count >= 2 and comma_count >= len(line.split()) / 5:
+        return True
+
+    return False
+
+
+class TokenStream:
+    """Result of a single tokenizer pass over a document."""
+
+    def __init__(self, text: str, tokens: List[Token], page_texts: Sequence[str],
+                 page_starts: Optional[List[int]]):
+        self.text = text
+        self.tokens = tokens
+        self.page_texts = list(page_texts)
+        self.page_starts = page_starts
+        self._by_kind: Dict[str, List[Token]] = {}
+        self._lowered = None
+
+    @property
+    def aligned(self) -> bool:
+        """Whether token offsets could be mapped onto page_texts."""
+        return self.page_starts is not None
+
+    @property
+    def lowered(self) -> str:
+        if self._lowered is None:
+            self._lowered = self.text.lower()
+        return self._lowered
+
+    def of_kind(self, *kinds: str) -> List[Token]:
+        """Tokens of the given kinds, in document order."""
+        key = '|'.join(kinds)
+        if key not in self._by_kind:
+            self._by_kind[key] = [token for token in self.tokens if token.kind in kinds]
+        return self._by_kind[key]
+
+    def between(self, start: int, end: int, *kinds: str) -> Iterator[Token]:
+        """Tokens of the given kinds lying inside [start, end)."""
+        for token in self.of_kind(*kinds):
+            if token.start >= end:
+                break
+            if token.start >= start and token.end <= end:
+                yield token
+
+    def to_list(self, kinds: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Serializable token list (numbers are left out unless requested)."""
+        kinds = kinds or [kind for kind in TOKEN_KINDS if kind != 'number']
+        return [
+            {'kind': token.kind, 'text': token.text, 'value': token.value,
+             'unit': token.unit, **token.span()}
+            for token in self.of_kind(*kinds)
+        ]
+
+
+class FinancialTokenizer:
+    """Lexer emitting typed financial spans in one pass over the text.
+
+    Produces ISIN, amount (currency symbol or code), percentage, date, number
+    and table-row-candidate tokens with character offsets and page ids, so all
+    extractors work from the same token stream instead of rescanning the text.
+    """
+
+    def tokenize(self, text: str, page_texts: Optional[Sequence[str]] = None) -> TokenStream:
+        """Tokenize a document.
+
+        Args:
+            text: Full document text
+            page_texts: Per-page texts (text is usually their concatenation)
+
+        Returns:
+            TokenStream with tokens in document order
+        """
+        text = text or ''
+        if page_texts is None:
+            page_texts = [text]
+        page_starts = self._align_pages(text, page_texts)
+
+        tokens: List[Token] = []
+        append = tokens.append
+        line_number = 0
+        line_start = 0
+        line_first_token = 0
+        page = 0
+        page_count = len(page_starts) if page_starts else 0
+
+        for match in _TOKEN_REGEX.finditer(text):
+            kind = match.lastgroup
+            start = match.start()
+
+            if kind == 'newline':
+                self._add_table_row(tokens, line_first_token, text, line_start, start,
+                                    line_number, page_starts)
+                line_number += 1
+                line_start = start + 1
+                line_first_token = len(tokens)
+                continue
+
+            # lastgroup names the outer (kind) group of the winning alternative
+            end = match.end()
+            if kind == 'symbol_amount':
+                value, unit = match.group('symbol_value'), match.group('symbol')
+                end = match.end('symbol_value')
+            elif kind == 'code_amount':
+                value, unit = match.group('code_value'), match.group('code')
+            elif kind == 'percent':
+                value, unit = match.group('percent_value'), '%'
+            else:
+                value, unit = match.group(), None
+
+            page_id = page_offset = None
+            if page_count:
+                while page + 1 < page_count and start >= page_starts[page + 1]:
+                    page += 1
+                page_id, page_offset = page, start - page_starts[page]
+
+            append(Token(kind, text[start:end], start, end, value, unit,
+                         page_id, page_offset, line_number))
+
+            if kind == 'symbol_amount' and match.group('symbol_code'):
+                # "$1,000 USD": the number followed by the code is a code amount too
+                code_start = match.start('symbol_value')
+                code_offset = page_offset + code_start - start if page_id is not None else None
+                append(Token('code_amount', text[code_start:match.end()], code_start, match.end(),
+                             value, match.group('symbol_code'), page_id, code_offset, line_number))
+
+        self._add_table_row(tokens, line_first_token, text, line_start, len(text),
+                            line_number, page_starts)
+
+        logger.debug(f"Tokenized {len(text)} characters into {len(tokens)} tokens")
+        return TokenStream(text, tokens, page_texts, page_starts)
+
+    @staticmethod
+    def _align_pages(text: str, page_texts: Sequence[str]) -> Optional[List[int]]:
+        """Offset of each page inside text, or None if the pages are not in it."""
+        starts = []
+        cursor = 0
+        for page_text in page_texts:
+            position = text.find(page_text, cursor) if page_text else cursor
+            if position < 0:
+                return None
+            starts.append(position)
+            cursor = position + len(page_text)
+        return starts
+
+    @staticmethod
+    def _add_table_row(tokens: List[Token], index: int, text: str, start: int, end: int,
+                       line_number: int, page_starts: Optional[List[int]]) -> None:
+        """Emit a table-row candidate ahead of the tokens found on its line."""
+        line = text[start:end]
+        if not line.strip() or not is_potential_table_row(line):
+            return
+        page_id = page_offset = None
+        if page_starts:
+            page_id = max(0, bisect_right(page_starts, start) - 1)
+            page_offset = start - page_starts[page_id]
+        tokens.insert(index, Token('table_row', line, start, end, line, None,
+                                   page_id, page_offset, line_number))
+
+
+_default_tokenizer = FinancialTokenizer()
+
+
+def tokenize(text: str, page_texts: Optional[Sequence[str]] = None) -> TokenStream:
+    """Tokenize with the shared tokenizer instance."""
+    return _default_tokenizer.tokenize(text, page_texts)
@@ -7,6 +7,7 @@ import json
 import sys
 import re
 import logging
+from collections import Counter
 from datetime import datetime
 
 # Configure logging
@@ -49,9 +50,26 @@ def extract_text_with_ocr(pdf_path, language="heb+eng", dpi=300):
         logger.error(traceback.format_exc())
         return None
 
+# Patterns used to build the question answering index
+ISIN_PATTERN = re.compile(r'[A-Z]{2}[A-Z0-9]{9}[0-9]')
+TICKER_PATTERNS = [
+    re.compile(r'\b[A-Z]{1,5}\b'),  # Basic US stock pattern (1-5 uppercase letters)
+    re.compile(r'\b[A-Z]{1,4}\.[A-Z]{1,2}\b')  # International pattern like "AAPL.US"
+]
+# Common words that match the ticker patterns
+TICKER_STOP_WORDS = {'THE', 'AND', 'FOR', 'INC', 'LTD', 'LLC', 'ETF', 'USD', 'EUR', 'GBP', 'CHF'}
+PARAGRAPH_SPLIT = re.compile(r'\n\s*\n')
+WORD_PATTERN = re.compile(r'\w+')
+
+
 class OCRQuestionAnswering:
     def __init__(self, pdf_path=None, extracted_text=None, language="heb+eng"):
-        """Initialize with either a PDF path or pre-extracted text"""
+        """Initialize with either a PDF path or pre-extracted text
+
+        The document is indexed once here (identifiers, tables and a keyword
+        index over paragraphs), so each question is answered by lookups
+        instead of rescanning the text.
+        """
         self.document = None
         self.all_text = ""
         
@@ -62,9 +80,65 @@ class OCRQuestionAnswering:
         
         # Prepare the document text
         if self.document:
-            for page_num, page_data in self.document.items():
-                self.all_text += page_data.get("text", "") + "\n\n"
-    
+            self.all_text = "".join(page_data.get("text", "") + "\n\n" for page_data in self.document.values())
+        self._build_index()
+
+    def _build_index(self):
+        """Scan the document text once for everything ``ask`` needs"""
+        text = self.all_text
+
+        self.isins = ISIN_PATTERN.findall(text)
+
+        tickers = []
+        for pattern in TICKER_PATTERNS:
+            tickers.extend(pattern.findall(text))
+        self.tickers = [m for m in tickers if m not in TICKER_STOP_WORDS]
+
+        # Simple table detection based on whitespace patterns
+        self.tables = []
+        lines = text.split('\n')
+        for i in range(len(lines) - 3):  # Need at least 3 consecutive lines
+            line = lines[i]
+            if len(line.strip()) > 20 and '  ' in line and '  ' in lines[i+1] and '  ' in lines[i+2]:
+                self.tables.append(line[:50] + "...")
+
+        # Paragraphs worth returning, and word -> paragraph positions
+        self.paragraphs = [para for para in PARAGRAPH_SPLIT.split(text) if len(para.strip()) >= 20]
+        self._word_index = {}
+        for position, para in enumerate(self.paragraphs):
+            for word in set(WORD_PATTERN.findall(para.lower())):
+                self._word_index.setdefault(word, []).append(position)
+        # Keyword -> paragraph positions, including words that only contain it
+        self._keyword_cache = {}
+        # Question keywords -> best paragraph
+        self._answer_cache = {}
+
+    def _paragraphs_with(self, keyword):
+        """Positions of the paragraphs containing a keyword (as a word or part of one)"""
+        positions = self._keyword_cache.get(keyword)
+        if positions is None:
+            found = set(self._word_index.get(keyword, ()))
+            for word, word_positions in self._word_index.items():
+                if keyword in word and word != keyword:
+                    found.update(word_positions)
+            positions = self._keyword_cache[keyword] = found
+        return positions
+
+    def _best_paragraph(self, question):
+        """The first paragraph matching the most question keywords, or None"""
+        keywords = tuple(w for w in WORD_PATTERN.findall(question) if len(w) > 3)
+        if keywords in self._answer_cache:
+            return self._answer_cache[keywords]
+        scores = Counter()
+        for keyword in keywords:
+            scores.update(self._paragraphs_with(keyword))
+        paragraph = None
+        if scores:
+            best = min(scores, key=lambda position: (-scores[position], position))
+            paragraph = self.paragraphs[best]
+        self._answer_cache[keywords] = paragraph
+        return paragraph
+
     def ask(self, question):
         """Ask a question about the document"""
         if not self.document:
@@ -77,70 +151,26 @@ class OCRQuestionAnswering:
             return f"The document has {len(self.document)} pages."
             
         elif "isin" in question or "international securities identification number" in question:
-            # Look for ISIN patterns (12 characters, usually 2 letters followed by numbers)
-            isin_pattern = r'[A-Z]{2}[A-Z0-9]{9}[0-9]'
-            matches = re.findall(isin_pattern, self.all_text)
-            if matches:
-                return f"I found these potential ISIN numbers: {', '.join(matches)}"
+            if self.isins:
+                return f"I found these potential ISIN numbers: {', '.join(self.isins)}"
             else:
                 return "I couldn't find any ISIN numbers in the document."
         
         elif "ticker" in question or "symbol" in question:
-            # Try to extract stock tickers - various patterns
-            ticker_patterns = [
-                r'\b[A-Z]{1,5}\b',  # Basic US stock pattern (1-5 uppercase letters)
-                r'\b[A-Z]{1,4}\.[A-Z]{1,2}\b'  # International pattern like "AAPL.US"
-            ]
-            all_matches = []
-            for pattern in ticker_patterns:
-                matches = re.findall(pattern, self.all_text)
-                all_matches.extend(matches)
-            
-            if all_matches:
-                # Filter out common words that might match the pattern
-                common_words = {'THE', 'AND', 'FOR', 'INC', 'LTD', 'LLC', 'ETF', 'USD', 'EUR', 'GBP', 'CHF'}
-                filtered_matches = [m for m in all_matches if m not in common_words]
-                if filtered_matches:
-                    return f"I found these potential ticker symbols: {', '.join(filtered_matches)}"
-            
+            if self.tickers:
+                return f"I found these potential ticker symbols: {', '.join(self.tickers)}"
             return "I couldn't identify any clear ticker symbols in the document."
                 
         elif "table" in question:
-            # Simple table detection based on whitespace patterns
-            potential_tables = []
-            lines = self.all_text.split('\n')
-            for i, line in enumerate(lines):
-                if i < len(lines) - 3:  # Need at least 3 consecutive lines
-                    if len(line.strip()) > 20 and '  ' in line:
-                        # Check if next lines have similar spacing
-                        if '  ' in lines[i+1] and '  ' in lines[i+2]:
-                            # This might be a table
-                            table_preview = line[:50] + "..."
-                            potential_tables.append(table_preview)
-            
-            if potential_tables:
-                return f"I found {len(potential_tables)} potential tables in the document. Here's a preview of one: {potential_tables[0]}"
+            if self.tables:
+                return f"I found {len(self.tables)} potential tables in the document. Here's a preview of one: {self.tables[0]}"
             else:
                 return "I couldn't detect any obvious tables in the text."
                 
         else:
-            # Split into paragraphs and find relevant ones
-            paragraphs = re.split(r'\n\s*\n', self.all_text)
-            keywords = [w for w in question.split() if len(w) > 3]
-            
-            scored_paragraphs = []
-            for para in paragraphs:
-                if len(para.strip()) < 20:  # Skip short paragraphs
-                    continue
-                
-                score = sum(1 for kw in keywords if kw in para.lower())
-                if score > 0:
-                    scored_paragraphs.append((para, score))
-            
-            scored_paragraphs.sort(key=lambda x: x[1], reverse=True)
-            
-            if scored_paragraphs:
-                return f"Based on your question, this might be relevant:\n\n{scored_paragraphs[0][0]}"
+            paragraph = self._best_paragraph(question)
+            if paragraph is not None:
+                return f"Based on your question, this might be relevant:\n\n{paragraph}"
             else:
                 return "I couldn't find information related to your question."
 
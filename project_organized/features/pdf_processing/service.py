@@ -8,14 +8,23 @@ logger = logging.getLogger(__name__)
 class PDFProcessingService:
     """Service for processing PDF documents"""
     
-    def __init__(self, extraction_dir='extractions'):
+    def __init__(self, extraction_dir='extractions', document_service=None):
         self.processor = EnhancedPDFProcessor()
         self.extraction_dir = extraction_dir
         os.makedirs(extraction_dir, exist_ok=True)
+        # Keeps the document catalog's status in step with processing
+        self.document_service = document_service
     
+    def _set_status(self, document_id, status, **fields):
+        if document_id and self.document_service is not None:
+            self.document_service.update_status(document_id, status, **fields)
+
     def process_document(self, file_path, document_id=None):
         """Process a document and return extraction results
         
+        The document's catalog status moves to 'processing', then 'processed'
+        or 'failed' (when a document service is configured and an ID is given).
+
         Args:
             file_path: Path to the PDF file
             document_id: Optional document ID
@@ -24,24 +33,32 @@ class PDFProcessingService:
             Dict with extraction results
         """
         logger.info(f"Processing document: {file_path}")
+        self._set_status(document_id, 'processing')
         
-        extraction_path = self.processor.process_document(file_path, document_id)
+        try:
+            extraction_path = self.processor.process_document(file_path, document_id)
+        except Exception:
+            self._set_status(document_id, 'failed')
+            raise
         
         if not extraction_path:
             logger.error("Document processing failed")
+            self._set_status(document_id, 'failed')
             return None
             
         # Read the extraction results
         try:
             with open(extraction_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                
-            return {
-                'document_id': document_id,
-                'extraction_path': extraction_path,
-                'content_length': len(content),
-                'status': 'completed'
-            }
         except Exception as e:
             logger.error(f"Error reading extraction results: {e}")
+            self._set_status(document_id, 'failed')
             return None
+
+        self._set_status(document_id, 'processed', extraction_path=extraction_path)
+        return {
+            'document_id': document_id,
+            'extraction_path': extraction_path,
+            'content_length': len(content),
+            'status': 'completed'
+        }
@@ -0,0 +1,57 @@
+"""Tests for OCR question answering"""
+import sys
+import unittest
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from project_organized.features.pdf_processing.ocr import OCRQuestionAnswering
+
+DOCUMENT = {
+    0: {"page_num": 1, "text": (
+        "Portfolio statement for the quarter\n\n"
+        "Holdings include Apple Inc US0378331005 and AAPL.US shares.\n\n"
+        "Security name        Quantity      Value\n"
+        "Apple Inc            100           19000\n"
+        "Microsoft Corp       50            21000\n"
+        "Total                              40000\n"
+    )},
+    1: {"page_num": 2, "text": (
+        "Management fees were charged monthly on the portfolio value.\n\n"
+        "The portfolio value increased due to strong equity returns and fees were waived."
+    )},
+}
+
+
+class TestOCRQuestionAnswering(unittest.TestCase):
+    """Test cases for the indexed question answering"""
+
+    def setUp(self):
+        self.qa = OCRQuestionAnswering(extracted_text=DOCUMENT)
+
+    def test_identifier_and_table_answers(self):
+        self.assertEqual(self.qa.ask("How many pages?"), "The document has 2 pages.")
+        self.assertEqual(self.qa.ask("What is the ISIN?"),
+                         "I found these potential ISIN numbers: US0378331005")
+        self.assertIn("AAPL.US", self.qa.ask("Which ticker symbols?"))
+        self.assertTrue(self.qa.ask("Any tables?").startswith("I found 2 potential tables"))
+
+    def test_keyword_answers_use_best_then_first_paragraph(self):
+        answer = self.qa.ask("Were portfolio fees waived?")
+        self.assertTrue(answer.endswith("strong equity returns and fees were waived."))
+        # Tie: the first matching paragraph wins; keywords also match inside longer words
+        answer = self.qa.ask("what about management")
+        self.assertIn("Management fees were charged monthly", answer)
+        self.assertIn("Holdings include", self.qa.ask("holding"))
+        self.assertEqual(self.qa.ask("dividends received"),
+                         "I couldn't find information related to your question.")
+
+    def test_no_document(self):
+        self.assertEqual(OCRQuestionAnswering().ask("anything"), "No document loaded")
+
+
+if __name__ == '__main__':
+    unittest.main()
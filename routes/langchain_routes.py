@@ -8,15 +8,14 @@ from datetime import datetime
 from shared.database import db as mongo_db # Renamed to avoid conflict if needed later
 # Removed unused SQLAlchemy Document model import
 # from models.document_models import Document
-from agent_framework.coordinator import AgentCoordinator
-from agent_framework.memory_agent import MemoryAgent
+from agent_framework.registry import registry
 
 # Create blueprint
 langchain_bp = Blueprint('langchain', __name__, url_prefix='/api')
 
-# Create agent instances
-memory_agent = MemoryAgent()
-agent_coordinator = AgentCoordinator()
+# Shared agent instances, built on first use (once per process)
+memory_agent = registry.proxy("memory_agent")
+agent_coordinator = registry.proxy("agent_coordinator")
 
 # Removed in-memory chat_sessions dictionary
 
@@ -1,7 +1,7 @@
 # routes/query.py
 from flask import Blueprint, request, jsonify
 import logging
-from transformers import pipeline
+from agent_framework.registry import registry
 from pymongo import MongoClient
 import re
 
@@ -21,12 +21,17 @@ query_api = Blueprint('query_api', __name__)
 logger = logging.getLogger(__name__)
 
 # Placeholder for NLP pipeline (replace with actual model loading)
-# Example: Using a question-answering pipeline
-try:
-    qa_pipeline = pipeline("question-answering", model="distilbert-base-cased-distilled-squad")
-except Exception as e:
-    logger.error(f"Failed to load QA pipeline: {e}")
-    qa_pipeline = None # Handle cases where the model fails to load
+# Example: Using a question-answering pipeline. Loaded on first query (or by
+# worker warm-up), not at import, since transformers and the model take seconds.
+def _load_qa_pipeline():
+    try:
+        from transformers import pipeline
+        return pipeline("question-answering", model="distilbert-base-cased-distilled-squad")
+    except Exception as e:
+        logger.error(f"Failed to load QA pipeline: {e}")
+        return None # Handle cases where the model fails to load
+
+registry.register("qa_pipeline", _load_qa_pipeline, fork_safe=True)
 
 # MongoDB connection
 def get_db():
@@ -44,6 +49,7 @@ def get_db():
 @query_api.route('/document/<document_id>/query', methods=['POST'])
 def query_document(document_id):
     """Process natural language query about a document."""
+    qa_pipeline = registry.get("qa_pipeline")
     if not qa_pipeline:
         return jsonify({
             'status': 'error',
@@ -101,6 +107,7 @@ def query_document(document_id):
 def process_query_with_nlp(query, context):
     """Process a natural language query against document context using NLP."""
     # Use the loaded QA pipeline
+    qa_pipeline = registry.get("qa_pipeline")
     if qa_pipeline:
         try:
             result = qa_pipeline(question=query, context=context)
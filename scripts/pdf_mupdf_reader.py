@@ -192,6 +192,78 @@ def extract_financial_data(text):
         "possible_table_rows": table_rows
     }
 
+def analyze_page_content(page, text):
+    """
+    ניתוח עמוד בודד: טבלאות ומידע פיננסי
+    
+    Args:
+        page: אובייקט עמוד של PyMuPDF
+        text: הטקסט שחולץ מהעמוד
+    
+    Returns:
+        מילון עם תוצאות הניתוח של העמוד
+    """
+    # בדיקה אם יש טבלאות בעמוד
+    tables = extract_tables_from_page(page)
+    
+    # ניתוח המידע הפיננסי
+    financial_data = extract_financial_data(text)
+    
+    return {
+        "text": text[:1000] + "..." if len(text) > 1000 else text,  # קיצור הטקסט לתצוגה
+        "text_length": len(text),
+        "tables_count": len(tables),
+        "tables": tables,
+        "financial_data": financial_data
+    }
+
+def get_pdf_info(pdf_path):
+    """
+    מספר העמודים והמטא-דאטה של קובץ PDF
+    
+    Args:
+        pdf_path: נתיב לקובץ PDF
+    
+    Returns:
+        מילון עם total_pages ו-metadata
+    """
+    with fitz.open(pdf_path) as doc:
+        return {"total_pages": len(doc), "metadata": doc.metadata or {}}
+
+def analyze_pdf_page(pdf_path, page_num):
+    """
+    ניתוח עמוד בודד מתוך קובץ PDF (לשימוש במאגר תהליכים - כל עמוד בנפרד)
+    
+    Args:
+        pdf_path: נתיב לקובץ PDF
+        page_num: מספר העמוד (מתחיל מ-1)
+    
+    Returns:
+        מילון עם תוצאות הניתוח של העמוד, כמו ב-analyze_pdf_content
+    """
+    with fitz.open(pdf_path) as doc:
+        page = doc[page_num - 1]
+        text = page.get_text()
+        if not text.strip():
+            text = extract_text_from_image(page)
+        return analyze_page_content(page, text or "[לא נמצא טקסט בעמוד זה]")
+
+def extract_tables_from_pdf_page(pdf_path, page_num):
+    """
+    חילוץ טבלאות מעמוד בקובץ PDF לפי נתיב
+    
+    Args:
+        pdf_path: נתיב לקובץ PDF
+        page_num: מספר העמוד (מתחיל מ-1)
+    
+    Returns:
+        רשימה של טבלאות שזוהו, או None אם מספר העמוד אינו תקין
+    """
+    with fitz.open(pdf_path) as doc:
+        if page_num < 1 or page_num > len(doc):
+            return None
+        return extract_tables_from_page(doc[page_num - 1])
+
 def analyze_pdf_content(pdf_path, page_numbers=None, output_dir=None):
     """
     ניתוח תוכן ה-PDF וחילוץ מידע
@@ -232,21 +304,7 @@ def analyze_pdf_content(pdf_path, page_numbers=None, output_dir=None):
         
         # ניתוח כל עמוד
         for page_num, text in pages_text.items():
-            # בדיקה אם יש טבלאות בעמוד
-            page = doc[page_num - 1]
-            tables = extract_tables_from_page(page)
-            
-            # ניתוח המידע הפיננסי
-            financial_data = extract_financial_data(text)
-            
-            # שמירת התוצאות
-            results["pages"][str(page_num)] = {
-                "text": text[:1000] + "..." if len(text) > 1000 else text,  # קיצור הטקסט לתצוגה
-                "text_length": len(text),
-                "tables_count": len(tables),
-                "tables": tables,
-                "financial_data": financial_data
-            }
+            results["pages"][str(page_num)] = analyze_page_content(doc[page_num - 1], text)
         
         doc.close()
     except Exception as e:
@@ -1,4 +1,3 @@
-import boto3
 import os
 import logging
 from datetime import datetime
@@ -11,6 +10,10 @@ from config.aws_config import (
     DYNAMODB_CUSTOM_TABLES_TABLE,
     DYNAMODB_REGION
 )
+from utils.lazy_imports import lazy_import
+
+# The AWS SDK is imported when the first client is created
+boto3 = lazy_import("boto3")
 
 class DynamoDBService:
     """שירות לאחסון נתונים מובנים ב-DynamoDB"""
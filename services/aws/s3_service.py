@@ -1,10 +1,13 @@
-import boto3
 import os
 import logging
 from botocore.exceptions import ClientError
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from config.aws_config import S3_BUCKET_NAME, S3_REGION
+from utils.lazy_imports import lazy_import
+
+# The AWS SDK is imported when the first client is created
+boto3 = lazy_import("boto3")
 
 class S3Service:
     """שירות לאחסון וניהול מסמכים ב-S3"""
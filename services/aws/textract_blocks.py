@@ -0,0 +1,125 @@
+"""
+גרף בלוקים של תשובת Textract
+
+תשובת ``analyze_document`` היא רשימה שטוחה של בלוקים (PAGE, LINE, WORD, TABLE,
+CELL, KEY_VALUE_SET, ...) שמקושרים זה לזה לפי מזהה דרך ``Relationships``.
+המחלקה בונה פעם אחת מילון מזהה -> בלוק, ומפיקה ממנו שורות טקסט, טבלאות וזוגות
+מפתח-ערך של טפסים במעבר ליניארי על הבלוקים, במקום לסרוק את כל הרשימה עבור כל תא.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class TextractBlockGraph:
+    """בלוקים של Textract לפי מזהה, עבור מסמך אחד"""
+
+    def __init__(self, blocks: Optional[Iterable[Dict[str, Any]]] = None):
+        self.blocks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        if blocks:
+            self.add_blocks(blocks)
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any]) -> "TextractBlockGraph":
+        """בניית גרף מתשובת ``analyze_document`` / ``detect_document_text``"""
+        return cls(response.get('Blocks', []))
+
+    def add_blocks(self, blocks: Iterable[Dict[str, Any]]) -> None:
+        """הוספת בלוקים (למשל עמוד נוסף של תוצאות עבודה אסינכרונית)"""
+        for block in blocks:
+            self.blocks[block['Id']] = block
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def of_type(self, block_type: str) -> List[Dict[str, Any]]:
+        return [block for block in self.blocks.values() if block['BlockType'] == block_type]
+
+    def related(self, block: Dict[str, Any], relationship_type: str = 'CHILD') -> List[Dict[str, Any]]:
+        """הבלוקים המקושרים לבלוק בקשר מסוג נתון, לפי הסדר של Textract"""
+        result = []
+        for relationship in block.get('Relationships', []):
+            if relationship['Type'] == relationship_type:
+                for block_id in relationship['Ids']:
+                    child = self.blocks.get(block_id)
+                    if child is not None:
+                        result.append(child)
+        return result
+
+    def block_text(self, block: Dict[str, Any]) -> str:
+        """טקסט של בלוק מורכב (תא, מפתח, ערך) מתוך המילים שלו"""
+        words = []
+        for child in self.related(block):
+            if child['BlockType'] == 'WORD':
+                words.append(child['Text'])
+            elif child['BlockType'] == 'SELECTION_ELEMENT' and child.get('SelectionStatus') == 'SELECTED':
+                words.append('X')
+        return ' '.join(words)
+
+    # --- טקסט ---
+
+    def lines(self, page: Optional[int] = None) -> List[str]:
+        """שורות הטקסט לפי סדר הקריאה (של עמוד אחד, אם צוין)"""
+        return [
+            block['Text'] for block in self.blocks.values()
+            if block['BlockType'] == 'LINE' and (page is None or block.get('Page', 1) == page)
+        ]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines())
+
+    def page_numbers(self) -> List[int]:
+        return sorted({block.get('Page', 1) for block in self.blocks.values() if block['BlockType'] == 'PAGE'})
+
+    # --- טבלאות ---
+
+    def tables(self) -> List[Dict[str, Any]]:
+        """כל הטבלאות במסמך, כמטריצה של שורה ראשונה (כותרת) ושאר השורות"""
+        return [self._table(block) for block in self.of_type('TABLE')]
+
+    def _table(self, table_block: Dict[str, Any]) -> Dict[str, Any]:
+        cells = [cell for cell in self.related(table_block) if cell['BlockType'] == 'CELL']
+
+        max_row = max((cell['RowIndex'] for cell in cells), default=0)
+        max_col = max((cell['ColumnIndex'] for cell in cells), default=0)
+
+        # יצירת מטריצה ומילוי התאים (אינדקסים מתחילים מ-1 ב-Textract)
+        table_data = [['' for _ in range(max_col)] for _ in range(max_row)]
+        for cell in cells:
+            table_data[cell['RowIndex'] - 1][cell['ColumnIndex'] - 1] = self.block_text(cell)
+
+        header = table_data[0] if table_data else []
+        rows = table_data[1:] if len(table_data) > 1 else []
+
+        return {
+            'id': table_block['Id'],
+            'page': table_block.get('Page', 1),
+            'header': header,
+            'rows': rows,
+            'row_count': len(table_data),
+            'col_count': max_col
+        }
+
+    # --- טפסים ---
+
+    def key_values(self) -> Dict[str, str]:
+        """זוגות מפתח-ערך של טפסים (FORMS). מפתח שמופיע כמה פעמים שומר את הערך הראשון"""
+        pairs: Dict[str, str] = {}
+        for block in self.blocks.values():
+            if block['BlockType'] != 'KEY_VALUE_SET' or 'KEY' not in block.get('EntityTypes', []):
+                continue
+            key = self.block_text(block).strip().rstrip(':').strip()
+            if not key:
+                continue
+            value = ' '.join(self.block_text(value_block) for value_block in self.related(block, 'VALUE'))
+            pairs.setdefault(key, value.strip())
+        return pairs
+
+    def to_result(self) -> Dict[str, Any]:
+        """טקסט, טבלאות וטפסים במבנה שמחזיר ``TextractService.analyze_document``"""
+        return {
+            'text': self.text,
+            'tables': self.tables(),
+            'forms': self.key_values()
+        }
@@ -1,22 +1,167 @@
-import boto3
 import os
 import logging
+import threading
+import time
+import uuid
 import sys
+from collections import deque
+from concurrent.futures import Future
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from config.aws_config import TEXTRACT_REGION
+from config.aws_config import (
+    S3_BUCKET_NAME, TEXTRACT_REGION, TEXTRACT_ENDPOINT_URL, TEXTRACT_MAX_CONCURRENT_JOBS,
+    TEXTRACT_POLL_INITIAL_SECONDS, TEXTRACT_POLL_MAX_SECONDS, TEXTRACT_JOB_TIMEOUT_SECONDS
+)
+from utils.lazy_imports import lazy_import
+from services.aws.textract_blocks import TextractBlockGraph
+
+# The AWS SDK is imported when the first client is created
+boto3 = lazy_import("boto3")
+PyPDF2 = lazy_import("PyPDF2")
+
+# מספר התוצאות המרבי בעמוד של Get* (מגבלת Textract)
+JOB_RESULTS_PAGE_SIZE = 1000
+
+# גודל המסמך המרבי שנשלח כ-Bytes לקריאה הסינכרונית (מגבלת Textract)
+SYNC_DOCUMENT_MAX_BYTES = 10 * 1024 * 1024
+
+
+class TextractJobError(Exception):
+    """עבודת Textract אסינכרונית נכשלה או חרגה מהזמן המותר"""
+
+
+class _Job:
+    def __init__(self, service, start, analysis):
+        self.service = service
+        self.start = start
+        self.analysis = analysis
+        self.future = Future()
+        self.job_id = None
+        self.delay = service.poll_initial
+        self.next_poll = 0.0
+        self.deadline = None
+
+
+class _JobPoller:
+    """בדיקת הסטטוס של כל העבודות האסינכרוניות בתהליך מ-thread רקע אחד
+
+    עבודה מתחילה רק כשיש מקום (``TEXTRACT_MAX_CONCURRENT_JOBS``) ותופסת אותו עד
+    שהיא מסתיימת. הקוראים מקבלים Future ולא ישנים בזמן ההמתנה; קריאת התוצאות
+    עצמן אינה תופסת מקום.
+    """
+
+    def __init__(self, max_jobs):
+        self.max_jobs = max_jobs
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._active = []
+        self._thread = None
+
+    def submit(self, service, start, analysis):
+        """הוספת עבודה לתור
+
+        Args:
+            service: ה-TextractService שמריץ את העבודה
+            start: מתחיל את העבודה ומחזיר את מזהה העבודה
+            analysis: האם זו עבודת ניתוח (Get* של ניתוח ולא של זיהוי טקסט)
+
+        Returns:
+            Future שמתקבל בו (מזהה העבודה, העמוד הראשון של התוצאות)
+        """
+        job = _Job(service, start, analysis)
+        with self._cond:
+            self._pending.append(job)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="textract-job-poller", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return job.future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._active = [job for job in self._active if not job.future.done()]
+                to_start = []
+                while self._pending and len(self._active) < self.max_jobs:
+                    job = self._pending.popleft()
+                    if job.future.set_running_or_notify_cancel():
+                        self._active.append(job)
+                        to_start.append(job)
+                now = time.monotonic()
+                due = [job for job in self._active if job.job_id and job.next_poll <= now]
+                if not to_start and not due:
+                    waiting = [job.next_poll for job in self._active if job.job_id]
+                    self._cond.wait(max(min(waiting) - now, 0) if waiting else None)
+                    continue
+
+            for job in to_start:
+                self._start(job)
+            for job in due:
+                self._poll(job)
+
+    def _start(self, job):
+        try:
+            job.job_id = job.start()
+        except Exception as e:
+            job.future.set_exception(e)
+            return
+        job.deadline = time.monotonic() + job.service.job_timeout
+        job.next_poll = time.monotonic()
+
+    def _poll(self, job):
+        service = job.service
+        try:
+            response = service._get_job_results(job.job_id, job.analysis)
+            status = response['JobStatus']
+            if status in ('SUCCEEDED', 'PARTIAL_SUCCESS'):
+                if status == 'PARTIAL_SUCCESS':
+                    service.logger.warning(f"Textract job {job.job_id} partially succeeded: {response.get('Warnings')}")
+                job.future.set_result((job.job_id, response))
+                return
+            if status == 'FAILED':
+                raise TextractJobError(f"Textract job {job.job_id} failed: {response.get('StatusMessage', '')}")
+            now = time.monotonic()
+            if now + job.delay > job.deadline:
+                raise TextractJobError(f"Textract job {job.job_id} did not finish within {service.job_timeout}s")
+        except Exception as e:
+            job.future.set_exception(e)
+            return
+        job.next_poll = now + job.delay
+        job.delay = min(job.delay * 2, service.poll_max)
+
+
+_poller = _JobPoller(TEXTRACT_MAX_CONCURRENT_JOBS)
+
 
 class TextractService:
     """שירות OCR מבוסס AWS Textract"""
 
-    def __init__(self):
-        self.textract = boto3.client(
+    def __init__(self, client=None, s3_client=None, staging_bucket=S3_BUCKET_NAME):
+        self.textract = client or boto3.client(
             'textract',
             aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=TEXTRACT_REGION
+            region_name=TEXTRACT_REGION,
+            endpoint_url=TEXTRACT_ENDPOINT_URL
         )
+        # עבודות אסינכרוניות קוראות מסמכים רק מ-S3; קבצים מקומיים מועלים לכאן זמנית
+        self._s3 = s3_client
+        self.staging_bucket = staging_bucket
+        self.poll_initial = TEXTRACT_POLL_INITIAL_SECONDS
+        self.poll_max = TEXTRACT_POLL_MAX_SECONDS
+        self.job_timeout = TEXTRACT_JOB_TIMEOUT_SECONDS
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = boto3.client(
+                's3',
+                aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+                region_name=TEXTRACT_REGION
+            )
+        return self._s3
+
     def extract_text_from_s3(self, bucket_name, document_key):
         """חילוץ טקסט ממסמך המאוחסן ב-S3"""
         try:
@@ -40,8 +185,20 @@ class TextractService:
             self.logger.error(f"Error in Textract: {str(e)}")
             raise
 
-    def extract_text_from_file(self, file_path):
-        """חילוץ טקסט מקובץ מקומי"""
+    def extract_text_from_file(self, file_path, page_callback=None):
+        """חילוץ טקסט מקובץ מקומי
+
+        קבצי PDF מרובי עמודים עוברים דרך עבודה אסינכרונית; תמונות ו-PDF של עמוד
+        אחד נשלחים ישירות ל-``detect_document_text``.
+
+        Args:
+            file_path: נתיב הקובץ
+            page_callback: נקרא עם (מספר עמוד, שורות העמוד) לכל עמוד שמתקבל
+                (PDF מרובה עמודים בלבד)
+        """
+        if file_path.lower().endswith('.pdf') and not self._fits_sync_call(file_path):
+            return self.extract_text_from_local_pdf(file_path, page_callback=page_callback)
+
         try:
             with open(file_path, 'rb') as document:
                 bytes_data = document.read()
@@ -63,8 +220,142 @@ class TextractService:
             self.logger.error(f"Error in Textract: {str(e)}")
             raise
 
-    def analyze_document(self, bucket_name, document_key):
-        """ניתוח מתקדם של מסמך וזיהוי טבלאות"""
+    def _fits_sync_call(self, file_path):
+        """האם PDF מקומי הוא בן עמוד אחד וקטן מספיק לקריאה הסינכרונית"""
+        if os.path.getsize(file_path) > SYNC_DOCUMENT_MAX_BYTES:
+            return False
+        try:
+            return len(PyPDF2.PdfReader(file_path).pages) == 1
+        except Exception as e:
+            self.logger.warning(f"Could not count pages of {file_path}, using an asynchronous job: {str(e)}")
+            return False
+
+    def extract_text_from_local_pdf(self, file_path, page_callback=None):
+        """חילוץ טקסט מ-PDF מקומי בעבודה אסינכרונית (העלאה זמנית ל-S3)"""
+        document_key = f"textract-staging/{uuid.uuid4()}/{os.path.basename(file_path)}"
+        self.s3.upload_file(file_path, self.staging_bucket, document_key)
+        try:
+            lines = []
+            for page_number, blocks in self.iter_job_pages(self.staging_bucket, document_key):
+                page_lines = [block['Text'] for block in blocks if block['BlockType'] == 'LINE']
+                lines.extend(page_lines)
+                if page_callback:
+                    page_callback(page_number, page_lines)
+            return "".join(line + "\n" for line in lines)
+        finally:
+            try:
+                self.s3.delete_object(Bucket=self.staging_bucket, Key=document_key)
+            except Exception as e:
+                self.logger.warning(f"Could not remove staged Textract input {document_key}: {str(e)}")
+
+    # --- עבודות אסינכרוניות ---
+
+    def start_job(self, bucket_name, document_key, feature_types=None):
+        """התחלת עבודה אסינכרונית: זיהוי טקסט, או ניתוח אם צוינו ``feature_types``
+
+        Returns:
+            מזהה העבודה
+        """
+        document_location = {'S3Object': {'Bucket': bucket_name, 'Name': document_key}}
+        if feature_types:
+            response = self.textract.start_document_analysis(
+                DocumentLocation=document_location,
+                FeatureTypes=list(feature_types)
+            )
+        else:
+            response = self.textract.start_document_text_detection(DocumentLocation=document_location)
+        job_id = response['JobId']
+        self.logger.info(f"Started Textract job {job_id} for s3://{bucket_name}/{document_key}")
+        return job_id
+
+    def _get_job_results(self, job_id, analysis, next_token=None):
+        kwargs = {'JobId': job_id, 'MaxResults': JOB_RESULTS_PAGE_SIZE}
+        if next_token:
+            kwargs['NextToken'] = next_token
+        if analysis:
+            return self.textract.get_document_analysis(**kwargs)
+        return self.textract.get_document_text_detection(**kwargs)
+
+    def submit_job(self, bucket_name, document_key, feature_types=None):
+        """הגשת עבודה אסינכרונית בלי להמתין לה
+
+        העבודה מתחילה כשמתפנה מקום (``TEXTRACT_MAX_CONCURRENT_JOBS``) והסטטוס שלה
+        נבדק עם השהיה שגדלה מ-thread רקע משותף.
+
+        Returns:
+            Future שמתקבל בו (מזהה העבודה, העמוד הראשון של התוצאות); נכשל עם
+            TextractJobError אם העבודה נכשלה או לא הסתיימה בזמן
+        """
+        return _poller.submit(
+            self, lambda: self.start_job(bucket_name, document_key, feature_types), bool(feature_types))
+
+    def wait_for_job(self, job_id, analysis=False):
+        """המתנה לסיום עבודה שכבר התחילה
+
+        Returns:
+            העמוד הראשון של התוצאות
+
+        Raises:
+            TextractJobError: אם העבודה נכשלה או לא הסתיימה בזמן
+        """
+        _, response = _poller.submit(self, lambda: job_id, analysis).result()
+        return response
+
+    def iter_job_blocks(self, job_id, analysis=False, response=None):
+        """הבלוקים של עבודה שהסתיימה, עמוד תוצאות אחר עמוד לפי ``NextToken``"""
+        if response is None:
+            response = self.wait_for_job(job_id, analysis)
+        while True:
+            for block in response.get('Blocks', []):
+                yield block
+            next_token = response.get('NextToken')
+            if not next_token:
+                return
+            response = self._get_job_results(job_id, analysis, next_token)
+
+    def iter_job_pages(self, bucket_name, document_key, feature_types=None):
+        """הרצת עבודה אסינכרונית והחזרת (מספר עמוד, בלוקים) לכל עמוד במסמך
+
+        כל עמוד מוחזר ברגע שכל הבלוקים שלו התקבלו, כך שהעיבוד יכול להתחיל לפני
+        שכל התוצאות נקראו. העבודה תופסת מקום רק עד שהיא מסתיימת, לא בזמן קריאת
+        התוצאות.
+        """
+        analysis = bool(feature_types)
+        job_id, response = self.submit_job(bucket_name, document_key, feature_types).result()
+        page_number, page_blocks = None, []
+        for block in self.iter_job_blocks(job_id, analysis, response=response):
+            block_page = block.get('Page', 1)
+            if page_blocks and block_page != page_number:
+                yield page_number, page_blocks
+                page_blocks = []
+            page_number = block_page
+            page_blocks.append(block)
+        if page_blocks:
+            yield page_number, page_blocks
+
+    def analyze_blocks_async(self, bucket_name, document_key, feature_types=('TABLES', 'FORMS'),
+                             page_callback=None):
+        """ניתוח מסמך מרובה עמודים ב-S3 בעבודה אסינכרונית, כגרף בלוקים
+
+        Args:
+            bucket_name: שם ה-bucket
+            document_key: מפתח המסמך
+            feature_types: סוגי הניתוח (TABLES/FORMS); ריק = זיהוי טקסט בלבד
+            page_callback: נקרא עם (מספר עמוד, בלוקים) לכל עמוד שמתקבל
+        """
+        graph = TextractBlockGraph()
+        try:
+            for page_number, blocks in self.iter_job_pages(bucket_name, document_key, feature_types):
+                graph.add_blocks(blocks)
+                if page_callback:
+                    page_callback(page_number, blocks)
+            return graph
+        except Exception as e:
+            self.logger.error(f"Error in Textract job: {str(e)}")
+            raise
+
+    def analyze_blocks(self, bucket_name, document_key, feature_types=('TABLES', 'FORMS')):
+        """ניתוח מסמך ב-S3 בקריאה אחת, כגרף בלוקים שמשותף לכל המפענחים"""
         try:
             response = self.textract.analyze_document(
                 Document={
@@ -73,72 +364,13 @@ class TextractService:
                         'Name': document_key
                     }
                 },
-                FeatureTypes=['TABLES', 'FORMS']
+                FeatureTypes=list(feature_types)
             )
-
-            # חילוץ מבנה הטבלאות וטקסט
-            result = {
-                'text': [],
-                'tables': []
-            }
-
-            # מעבר על כל הבלוקים ברשומה
-            for block in response['Blocks']:
-                if block['BlockType'] == 'LINE':
-                    result['text'].append(block['Text'])
-                elif block['BlockType'] == 'TABLE':
-                    table = self._extract_table_structure(block, response['Blocks'])
-                    result['tables'].append(table)
-
-            result['text'] = "\n".join(result['text'])
-            return result
+            return TextractBlockGraph.from_response(response)
         except Exception as e:
             self.logger.error(f"Error in Textract analysis: {str(e)}")
             raise
 
-    def _extract_table_structure(self, table_block, all_blocks):
-        """חילוץ מבנה טבלה מבלוקים של Textract"""
-        table_id = table_block['Id']
-        cells = []
-
-        # איסוף כל תאי הטבלה
-        for block in all_blocks:
-            if block['BlockType'] == 'CELL' and 'Relationships' in block:
-                for relationship in block['Relationships']:
-                    if relationship['Type'] == 'CHILD':
-                        parent_id = block.get('Id')
-                        if parent_id:
-                            cell_contents = []
-                            for child_id in relationship['Ids']:
-                                for child_block in all_blocks:
-                                    if child_block['Id'] == child_id and child_block['BlockType'] == 'WORD':
-                                        cell_contents.append(child_block['Text'])
-                            if block.get('RowIndex') and block.get('ColumnIndex'):
-                                cells.append({
-                                    'row_index': block['RowIndex'],
-                                    'column_index': block['ColumnIndex'],
-                                    'text': ' '.join(cell_contents)
-                                })
-
-        # ארגון התאים למבנה שורות ועמודות
-        max_row = max([cell['row_index'] for cell in cells]) if cells else 0
-        max_col = max([cell['column_index'] for cell in cells]) if cells else 0
-
-        # יצירת מטריצה ריקה
-        table_data = [['' for _ in range(max_col)] for _ in range(max_row)]
-
-        # מילוי המטריצה בתוכן התאים
-        for cell in cells:
-            row = cell['row_index'] - 1  # אינדקסים מתחילים מ-1 ב-Textract
-            col = cell['column_index'] - 1
-            table_data[row][col] = cell['text']
-
-        # הפרדה בין כותרת ושורות
-        header = table_data[0] if table_data else []
-        rows = table_data[1:] if len(table_data) > 1 else []
-
-        return {
-            'id': table_id,
-            'header': header,
-            'rows': rows
-        }
\ No newline at end of file
+    def analyze_document(self, bucket_name, document_key):
+        """ניתוח מתקדם של מסמך וזיהוי טבלאות וטפסים"""
+        return self.analyze_blocks(bucket_name, document_key).to_result()
@@ -0,0 +1,293 @@
+"""
+Precomputed portfolio analysis artifacts for processed documents.
+
+A completed document's holdings never change, so the portfolio analysis is
+computed once when processing finishes and stored next to the other results
+as ``<id>_portfolio_analysis.json`` (the file ``process_documents.py`` writes
+offline). Custom tables are stored per table specification under
+``<id>_custom_tables/<spec hash>.json``, at most ``MAX_CUSTOM_TABLES`` per
+document (the least recently used are evicted). Both are removed when the document is
+reprocessed, and rebuilt when ``<id>_financial.json`` is newer than they are
+(``process_documents.py`` rewrites it in place).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# Top holdings listed in the analysis
+TOP_HOLDINGS = 10
+
+# Stored custom table specifications per document; least recently used ones are evicted
+MAX_CUSTOM_TABLES = int(os.environ.get("PORTFOLIO_MAX_CUSTOM_TABLES", 50))
+
+logger = logging.getLogger(__name__)
+
+# Shared across requests so compiled frames and results are reused per data version
+_table_generator = None
+_table_generator_lock = threading.Lock()
+
+
+def financial_path(upload_folder: str, document_id: str) -> str:
+    return os.path.join(upload_folder, f"{document_id}_financial.json")
+
+
+def analysis_path(upload_folder: str, document_id: str) -> str:
+    return os.path.join(upload_folder, f"{document_id}_portfolio_analysis.json")
+
+
+def custom_tables_dir(upload_folder: str, document_id: str) -> str:
+    return os.path.join(upload_folder, f"{document_id}_custom_tables")
+
+
+def spec_key(table_spec: Any) -> str:
+    """Stable key for a custom table specification (key order does not matter)."""
+    canonical = json.dumps(table_spec, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def custom_table_path(upload_folder: str, document_id: str, table_spec: Any) -> str:
+    return os.path.join(custom_tables_dir(upload_folder, document_id), f"{spec_key(table_spec)}.json")
+
+
+def _write_json(path: str, data: Any) -> None:
+    # Write to a unique temp file and rename, so readers never see a partial file
+    # and concurrent writers of the same artifact do not share a temp file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _is_current(path: str, upload_folder: str, document_id: str) -> bool:
+    """Whether an artifact exists and is not older than the document's financial data."""
+    try:
+        artifact_mtime = os.stat(path).st_mtime_ns
+        source_mtime = os.stat(financial_path(upload_folder, document_id)).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    return artifact_mtime >= source_mtime
+
+
+def data_version(upload_folder: str, document_id: str) -> Optional[tuple]:
+    """Version key of a document's financial data: (document id, mtime of ``_financial.json``).
+
+    Returns:
+        The version, or None if the document has no financial data
+    """
+    try:
+        return (document_id, os.stat(financial_path(upload_folder, document_id)).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+
+def load_financial_data(upload_folder: str, document_id: str) -> Any:
+    with open(financial_path(upload_folder, document_id), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def holding_records(financial_data: Any) -> List[Dict[str, Any]]:
+    """Holdings as a list of records (the file holds a list, or a dict keyed by ISIN)."""
+    if isinstance(financial_data, dict):
+        return [{"isin": isin, **item} for isin, item in financial_data.items()]
+    return list(financial_data or [])
+
+
+def analyze_holdings(financial_data: Any) -> Dict[str, Any]:
+    """Portfolio analysis of extracted holdings.
+
+    Field names and number formats of the different extractors are normalized
+    the same way as for the holdings store. A holding's value is its market
+    value, or quantity x price when the statement has no value column.
+
+    Args:
+        financial_data: Holdings (list, or dict keyed by ISIN)
+
+    Returns:
+        Dict with security_count, total_value, asset_allocation,
+        currency_allocation (value and percentage per key) and top_holdings
+    """
+    from agent_framework.holdings_store import HoldingsStore
+
+    normalize = HoldingsStore().normalize_holding
+    holdings = []
+    for record in holding_records(financial_data):
+        fact = normalize(record)
+        if fact is None:
+            continue
+        value = fact["value"]
+        if value is None and fact["quantity"] is not None and fact["price"] is not None:
+            value = fact["quantity"] * fact["price"]
+        holdings.append((fact, value))
+
+    total_value = sum(value for _, value in holdings if value is not None)
+
+    def allocation(field: str) -> Dict[str, Dict[str, float]]:
+        values = defaultdict(float)
+        for fact, value in holdings:
+            if value is not None:
+                values[fact[field] or "Unknown"] += value
+        return {
+            key: {"value": value, "percentage": round(value / total_value * 100, 2) if total_value else 0}
+            for key, value in sorted(values.items(), key=lambda item: item[1], reverse=True)
+        }
+
+    valued = sorted((item for item in holdings if item[1] is not None), key=lambda item: item[1], reverse=True)
+    top_holdings = [
+        {
+            "isin": fact["isin"],
+            "name": fact["security_name"] or "Unknown",
+            "market_value": value,
+            "percentage": round(value / total_value * 100, 2) if total_value else 0,
+        }
+        for fact, value in valued[:TOP_HOLDINGS]
+    ]
+
+    return {
+        "security_count": len(holdings),
+        "total_value": total_value,
+        "asset_allocation": allocation("security_type"),
+        "currency_allocation": allocation("currency"),
+        "top_holdings": top_holdings,
+        "performance": {},
+        "risk_metrics": {},
+    }
+
+
+def build_custom_table(
+    financial_data: Any, table_spec: Dict[str, Any], version: Optional[tuple] = None
+) -> Dict[str, Any]:
+    """Table of the holdings for a specification (columns, filters, sort_by, group_by).
+
+    Args:
+        financial_data: Holdings (list or dict keyed by ISIN)
+        table_spec: Table specification
+        version: Data version of ``financial_data`` (see :func:`data_version`);
+            lets the generator reuse the compiled holdings across specifications
+
+    Returns:
+        {"columns": [...], "data": [records]}
+
+    Raises:
+        ValueError: If the specification cannot be applied
+    """
+    global _table_generator
+    from agent_framework.table_generator import CustomTableGenerator
+
+    with _table_generator_lock:
+        if _table_generator is None:
+            _table_generator = CustomTableGenerator()
+        table = _table_generator.generate_custom_table(
+            holding_records(financial_data), table_spec, data_version=version
+        )
+    if "error" in table:
+        raise ValueError(f"Invalid table specification: {table['error']}")
+    columns = table["headers"]
+    return {
+        "columns": columns,
+        "data": [dict(zip(columns, row)) for row in table["rows"]],
+    }
+
+
+def save_portfolio_analysis(upload_folder: str, document_id: str, financial_data: Any = None) -> str:
+    """Compute the portfolio analysis of a document and store it.
+
+    Args:
+        upload_folder: Folder holding the document's result files
+        document_id: Document ID
+        financial_data: Holdings (list or dict keyed by ISIN); read from
+            ``<id>_financial.json`` if omitted
+
+    Returns:
+        Path of the written ``_portfolio_analysis.json``
+    """
+    if financial_data is None:
+        financial_data = load_financial_data(upload_folder, document_id)
+    path = analysis_path(upload_folder, document_id)
+    _write_json(path, analyze_holdings(financial_data))
+    logger.info(f"Portfolio analysis saved for {document_id}: {path}")
+    return path
+
+
+def ensure_portfolio_analysis(upload_folder: str, document_id: str) -> Optional[str]:
+    """Path of the stored analysis, (re)computing it when missing or older than the financial data.
+
+    Returns:
+        The path, or None if the document has no financial data
+    """
+    path = analysis_path(upload_folder, document_id)
+    if _is_current(path, upload_folder, document_id):
+        return path
+    if not os.path.exists(financial_path(upload_folder, document_id)):
+        return None
+    return save_portfolio_analysis(upload_folder, document_id)
+
+
+def ensure_custom_table(upload_folder: str, document_id: str, table_spec: Any) -> Optional[str]:
+    """Path of the stored custom table for ``table_spec``, generating it when missing or stale.
+
+    Returns:
+        The path, or None if the document has no financial data
+    """
+    path = custom_table_path(upload_folder, document_id, table_spec)
+    if _is_current(path, upload_folder, document_id):
+        _touch(path)
+        return path
+    if not os.path.exists(financial_path(upload_folder, document_id)):
+        return None
+
+    version = data_version(upload_folder, document_id)
+    table = build_custom_table(load_financial_data(upload_folder, document_id), table_spec, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_json(path, table)
+    _evict_custom_tables(os.path.dirname(path), keep=path)
+    return path
+
+
+def _touch(path: str) -> None:
+    # Last use is recorded in the access time; the modification time is left alone
+    # because staleness checks and the response cache compare it
+    try:
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+    except FileNotFoundError:
+        pass
+
+
+def _evict_custom_tables(tables_dir: str, keep: str) -> None:
+    """Remove the least recently used stored tables beyond ``MAX_CUSTOM_TABLES``."""
+    tables = []
+    for entry in os.scandir(tables_dir):
+        if entry.name.endswith(".json") and entry.path != keep:
+            try:
+                tables.append((entry.stat().st_atime_ns, entry.path))
+            except FileNotFoundError:
+                continue
+    excess = len(tables) + 1 - MAX_CUSTOM_TABLES
+    if excess <= 0:
+        return
+    for _, table_path in sorted(tables)[:excess]:
+        try:
+            os.remove(table_path)
+        except FileNotFoundError:
+            pass
+    logger.debug(f"Evicted {excess} stored custom tables from {tables_dir}")
+
+
+def invalidate_artifacts(upload_folder: str, document_id: str) -> None:
+    """Remove stored analysis and custom tables (called when a document is reprocessed)."""
+    path = analysis_path(upload_folder, document_id)
+    if os.path.exists(path):
+        os.remove(path)
+    shutil.rmtree(custom_tables_dir(upload_folder, document_id), ignore_errors=True)
@@ -0,0 +1,169 @@
+"""
+Per-document processing progress over Redis pub/sub.
+
+The Celery task publishes progress events (pages OCR'd, ISINs found, tables
+extracted, completed/failed) to a per-document channel and keeps the latest
+event under a key with a TTL. The web app streams them to the browser as
+Server-Sent Events, so clients no longer poll the status endpoints and an idle
+document costs no database reads.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "document_progress:"
+STATE_PREFIX = "document_progress_state:"
+# How long the last event of a document is kept for late subscribers
+STATE_TTL = int(os.environ.get("PROGRESS_STATE_TTL", 24 * 3600))
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = float(os.environ.get("PROGRESS_HEARTBEAT_INTERVAL", 15))
+# Streams are closed after this many seconds; EventSource reconnects by itself
+MAX_STREAM_SECONDS = float(os.environ.get("PROGRESS_MAX_STREAM_SECONDS", 30 * 60))
+
+TERMINAL_STAGES = {"completed", "failed"}
+
+
+def channel_name(document_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{document_id}"
+
+
+def state_key(document_id: str) -> str:
+    return f"{STATE_PREFIX}{document_id}"
+
+
+def is_terminal(event: Optional[Dict[str, Any]]) -> bool:
+    return bool(event) and event.get("stage") in TERMINAL_STAGES
+
+
+def create_redis_client(url: Optional[str] = None):
+    """Redis client for progress events (PROGRESS_REDIS_URL, else the Celery broker)."""
+    if not REDIS_AVAILABLE:
+        raise ImportError("redis package is required for progress events")
+    if url is None:
+        from config import Config
+        url = os.environ.get("PROGRESS_REDIS_URL") or Config.CELERY_BROKER_URL
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+class ProgressPublisher:
+    """Publishes progress events for documents.
+
+    Publishing never raises: progress is best-effort and must not fail the
+    processing task.
+    """
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = create_redis_client()
+        return self._client
+
+    def publish(self, document_id: str, stage: str, **data: Any) -> Dict[str, Any]:
+        """Publish an event and store it as the document's latest state.
+
+        Args:
+            document_id: Document the event belongs to
+            stage: Processing stage, e.g. "ocr", "isins", "completed"
+            **data: Stage details (counts, paths, error message)
+
+        Returns:
+            The published event
+        """
+        event = {
+            "document_id": document_id,
+            "stage": stage,
+            "timestamp": datetime.utcnow().isoformat(),
+            **data,
+        }
+        try:
+            payload = json.dumps(event, ensure_ascii=False)
+            pipe = self.client.pipeline()
+            pipe.set(state_key(document_id), payload, ex=STATE_TTL)
+            pipe.publish(channel_name(document_id), payload)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not publish progress for {document_id} ({stage}): {e}")
+        return event
+
+    def progress_callback(self, document_id: str, stage: str) -> Callable[[int, int], None]:
+        """Callable(done, total) that publishes ``stage`` events, e.g. per OCR'd page."""
+        def callback(done: int, total: int) -> None:
+            self.publish(document_id, stage, done=done, total=total)
+        return callback
+
+
+def get_latest_event(document_id: str, client=None) -> Optional[Dict[str, Any]]:
+    """Latest stored event for a document, or None."""
+    client = client or create_redis_client()
+    payload = client.get(state_key(document_id))
+    return json.loads(payload) if payload else None
+
+
+def stream_progress(document_id: str, client=None,
+                    initial_state: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+                    heartbeat: float = HEARTBEAT_INTERVAL,
+                    max_seconds: float = MAX_STREAM_SECONDS) -> Iterator[Optional[Dict[str, Any]]]:
+    """Yield progress events for a document until it completes or fails.
+
+    The latest stored event is yielded first, so a client that connects late
+    still sees the current state. ``None`` is yielded when nothing happened
+    for ``heartbeat`` seconds so the caller can send a keep-alive.
+
+    Args:
+        document_id: Document to follow
+        client: Redis client (created from config if omitted)
+        initial_state: Fallback for documents with no stored event (e.g. a
+            single database read for documents processed before the TTL);
+            called at most once
+        heartbeat: Seconds to wait for a message before yielding ``None``
+        max_seconds: Stop after this long, the client is expected to reconnect
+    """
+    client = client or create_redis_client()
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    # Subscribe before reading the snapshot so no event falls in between
+    pubsub.subscribe(channel_name(document_id))
+    try:
+        latest = get_latest_event(document_id, client)
+        if latest is None and initial_state is not None:
+            latest = initial_state()
+        if latest is not None:
+            yield latest
+            if is_terminal(latest):
+                return
+
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=heartbeat)
+            if message is None:
+                yield None
+                continue
+            if message.get("type") != "message":
+                continue
+            event = json.loads(message["data"])
+            yield event
+            if is_terminal(event):
+                return
+    finally:
+        pubsub.close()
+
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """Format an event (or a ``None`` heartbeat) as a Server-Sent Events frame."""
+    if event is None:
+        return ": keepalive\n\n"
+    return f"event: {event.get('stage', 'progress')}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
@@ -3,8 +3,11 @@ import logging
 from typing import List, Dict, Any, Optional, Union
 import json
 import requests
-from huggingface_hub import HfApi, HfFolder
-import google.generativeai as genai
+from utils.lazy_imports import lazy_import
+
+# Provider SDKs are imported when first used
+huggingface_hub = lazy_import("huggingface_hub")
+genai = lazy_import("google.generativeai")
 
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
@@ -47,7 +50,7 @@ class AIModel:
                     return False
                 
                 # בדיקת הרשאות ל-Hugging Face
-                api = HfApi(token=HUGGINGFACE_API_KEY)
+                api = huggingface_hub.HfApi(token=HUGGINGFACE_API_KEY)
                 models = api.list_models(filter="text-generation", limit=1)
                 return len(list(models)) > 0
                 
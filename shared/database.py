@@ -2,8 +2,11 @@ import os
 import logging
 from datetime import datetime, timezone # Added timezone
 from typing import Dict, Any, Optional, List
-import boto3
 from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+from utils.lazy_imports import lazy_import
+
+# The AWS SDK is imported when the first client is created
+boto3 = lazy_import("boto3")
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -0,0 +1,410 @@
+"""
+Shared client for the Hugging Face Inference API.
+
+The insights, classification and summarization services used to create their
+own LangChain ``HuggingFaceHub`` clients and send one blocking request per
+prompt. ``HFInferenceGateway`` is shared by all of them:
+
+- requests go through a pool of keep-alive HTTP connections
+- identical requests (model, parameters, input) that are in flight at the same
+  time are sent once and share the result (coalescing)
+- results are cached per request in an LRU cache; every caller gets its own
+  copy of a cached or shared result. Clients whose callers keep their own
+  result cache (the map-reduce services) are created with ``cache=False``
+- at most ``max_concurrency`` requests run at a time; requests for the same
+  model and parameters that queue up meanwhile are sent as one request with a
+  list of inputs (micro-batching), for tasks whose endpoint accepts lists
+
+``HFModelClient`` wraps one model with a LangChain-style ``invoke(prompt)``.
+"""
+
+import asyncio
+import copy
+import hashlib
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+from shared.result_cache import ChunkResultCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = os.environ.get("HF_INFERENCE_API_BASE", "https://api-inference.huggingface.co")
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("HF_MAX_CONCURRENCY", "4"))
+DEFAULT_BATCH_SIZE = int(os.environ.get("HF_BATCH_SIZE", "8"))
+# Extra time a request waits for others to join its batch (0 = only batch what is already queued)
+DEFAULT_BATCH_WAIT = float(os.environ.get("HF_BATCH_WAIT_MS", "0")) / 1000
+DEFAULT_CACHE_ENTRIES = int(os.environ.get("HF_CACHE_MAX_ENTRIES", "1024"))
+DEFAULT_TIMEOUT = float(os.environ.get("HF_TIMEOUT_SECONDS", "120"))
+
+# Tasks whose inference endpoints accept a list of inputs
+BATCHABLE_TASKS = {"summarization", "zero-shot-classification", "text-classification",
+                   "translation", "feature-extraction"}
+# Default parameters per task
+TASK_PARAMETERS = {
+    # Only the completion, not the prompt followed by the completion
+    "text-generation": {"return_full_text": False},
+}
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# Errors of a reused keep-alive connection the server has closed meanwhile
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class HFInferenceError(Exception):
+    """An error response of the inference API"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Hugging Face inference error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class _ConnectionPool:
+    """Keep-alive HTTP(S) connections to one host, at most ``size`` in use at a time."""
+
+    def __init__(self, base_url: str, size: int, timeout: float):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.path_prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        self.created += 1
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    @contextmanager
+    def connection(self):
+        """Yields ``(connection, reused)``; the connection is kept if no error occurred."""
+        with self._slots:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            if connection is None:
+                connection = self._connect()
+            try:
+                yield connection, reused
+            except BaseException:
+                connection.close()
+                raise
+            with self._lock:
+                self._idle.append(connection)
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class _Request:
+    __slots__ = ("key", "inputs", "future", "cache")
+
+    def __init__(self, key: str, inputs: Any, future: Future, cache: bool = True):
+        self.key = key
+        self.inputs = inputs
+        self.future = future
+        self.cache = cache
+
+
+class HFInferenceGateway:
+    """Pooled, coalescing, caching and batching client of the inference API (see module docstring).
+
+    Args:
+        api_token: API token (``HUGGINGFACE_API_KEY`` if omitted)
+        api_base: API base URL, e.g. a local server in tests
+        max_concurrency: Maximum number of requests in flight (and pooled connections)
+        batch_size: Maximum inputs per batched request
+        batch_wait: Seconds a batchable request waits for others to join its batch
+        cache: Result cache; an in-memory LRU if omitted, ``False`` to disable
+        timeout: Request timeout in seconds
+        max_retries: Retries of rate-limited / unavailable responses
+        backoff: First retry delay in seconds (doubles with each retry)
+    """
+
+    def __init__(self, api_token: Optional[str] = None, api_base: str = DEFAULT_API_BASE,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, batch_size: int = DEFAULT_BATCH_SIZE,
+                 batch_wait: float = DEFAULT_BATCH_WAIT, cache: Any = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_retries: int = 3, backoff: float = 1.0):
+        self.api_token = api_token if api_token is not None else os.environ.get("HUGGINGFACE_API_KEY")
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        if cache is None:
+            cache = ChunkResultCache(cache_dir=None, max_entries=DEFAULT_CACHE_ENTRIES)
+        self.cache = cache or None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = {"requests": 0, "http_requests": 0, "cache_hits": 0, "coalesced": 0, "batched_inputs": 0}
+
+        self._pool = _ConnectionPool(api_base, self.max_concurrency, timeout)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="hf-inference")
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        # (model, parameters, batchable) -> queued requests
+        self._queues: Dict[tuple, deque] = {}
+
+    @staticmethod
+    def _key(model: str, parameters: Optional[Dict[str, Any]], inputs: Any) -> str:
+        payload = json.dumps([model, parameters or {}, inputs], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, model: str, inputs: Any, parameters: Optional[Dict[str, Any]] = None,
+               batch: bool = False, cache: bool = True) -> Future:
+        """Queue one input for a model.
+
+        Args:
+            model: Model repository ID
+            inputs: The input (prompt / text) of one request
+            parameters: Task parameters
+            batch: Whether the endpoint of the model accepts a list of inputs
+            cache: Whether to use the gateway's result cache for this request
+                (in-flight requests are coalesced either way)
+
+        Returns:
+            Future resolving to the model output for this input (a copy the
+            caller may modify; the cached and in-flight results are shared)
+        """
+        key = self._key(model, parameters, inputs)
+        group = None
+        with self._lock:
+            self.stats["requests"] += 1
+            if cache and self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    self.stats["cache_hits"] += 1
+                    future = Future()
+                    future.set_result(copy.deepcopy(cached))
+                    return future
+            shared = self._in_flight.get(key)
+            if shared is not None:
+                self.stats["coalesced"] += 1
+            else:
+                shared = self._in_flight[key] = Future()
+                group = (model, json.dumps(parameters or {}, sort_keys=True), batch)
+                self._queues.setdefault(group, deque()).append(_Request(key, inputs, shared, cache))
+        if group is not None:
+            self._executor.submit(self._drain, group)
+        return _copied(shared)
+
+    def infer(self, model: str, inputs: Any, parameters: Optional[Dict[str, Any]] = None,
+              batch: bool = False, cache: bool = True) -> Any:
+        """Blocking ``submit(...).result()``."""
+        return self.submit(model, inputs, parameters, batch, cache).result()
+
+    def infer_many(self, model: str, inputs: Sequence[Any], parameters: Optional[Dict[str, Any]] = None,
+                   batch: bool = False, cache: bool = True) -> List[Any]:
+        """Run several inputs concurrently (batched if ``batch``); outputs in input order.
+
+        Raises the first error after all inputs are done.
+        """
+        futures = [self.submit(model, item, parameters, batch, cache) for item in inputs]
+        return [future.result() for future in futures]
+
+    async def ainfer(self, model: str, inputs: Any, parameters: Optional[Dict[str, Any]] = None,
+                     batch: bool = False, cache: bool = True) -> Any:
+        """Await the output of one input without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(model, inputs, parameters, batch, cache))
+
+    def client(self, model: str, task: str, parameters: Optional[Dict[str, Any]] = None,
+               cache: bool = True) -> "HFModelClient":
+        """A client for one model and task (batched if the task's endpoint accepts lists).
+
+        ``cache=False`` bypasses the gateway's result cache, for callers that
+        cache results themselves.
+        """
+        return HFModelClient(self, model, task, parameters, cache)
+
+    # --- dispatch ---
+
+    def _drain(self, group: tuple) -> None:
+        """Worker: send the requests queued for a group (one batch, or one request)."""
+        model, parameters_json, batchable = group
+        if batchable and self.batch_wait:
+            time.sleep(self.batch_wait)
+        with self._lock:
+            queue = self._queues.get(group)
+            if not queue:
+                # Already sent with an earlier batch
+                return
+            size = self.batch_size if batchable else 1
+            requests = [queue.popleft() for _ in range(min(size, len(queue)))]
+            if not queue:
+                del self._queues[group]
+
+        parameters = json.loads(parameters_json)
+        try:
+            if len(requests) == 1:
+                outputs = [self._post(model, requests[0].inputs, parameters)]
+            else:
+                with self._lock:
+                    self.stats["batched_inputs"] += len(requests)
+                outputs = self._post(model, [request.inputs for request in requests], parameters)
+                if not isinstance(outputs, list) or len(outputs) != len(requests):
+                    raise HFInferenceError(200, f"expected {len(requests)} outputs for a batch, got {outputs!r:.200}")
+        except BaseException as e:
+            self._finish(requests, error=e)
+            return
+        self._finish(requests, outputs=outputs)
+
+    def _finish(self, requests: List[_Request], outputs: Optional[List[Any]] = None,
+                error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            for i, request in enumerate(requests):
+                self._in_flight.pop(request.key, None)
+                if error is None and request.cache and self.cache is not None:
+                    self.cache.put(request.key, outputs[i])
+        for i, request in enumerate(requests):
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(outputs[i])
+
+    def _post(self, model: str, inputs: Any, parameters: Dict[str, Any]) -> Any:
+        body = {"inputs": inputs, "options": {"wait_for_model": True}}
+        if parameters:
+            body["parameters"] = parameters
+        data = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if self.api_token:
+            headers["Authorization"] = f"Bearer {self.api_token}"
+        path = f"{self._pool.path_prefix}/models/{model}"
+
+        attempt = 0
+        while True:
+            status, payload = self._send(path, data, headers)
+            if status < 400:
+                return json.loads(payload)
+            message = payload.decode("utf-8", "replace")[:500]
+            if status not in RETRY_STATUS or attempt >= self.max_retries:
+                raise HFInferenceError(status, message)
+            delay = self.backoff * (2 ** attempt)
+            logger.warning(f"Hugging Face inference returned {status} for {model}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, path: str, data: bytes, headers: Dict[str, str]):
+        for retry_stale in (True, False):
+            try:
+                with self._pool.connection() as (connection, reused):
+                    with self._lock:
+                        self.stats["http_requests"] += 1
+                    connection.request("POST", path, body=data, headers=headers)
+                    response = connection.getresponse()
+                    return response.status, response.read()
+            except _STALE_CONNECTION_ERRORS:
+                if not (retry_stale and reused):
+                    raise
+                logger.debug("Keep-alive connection was closed by the server; reconnecting")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._pool.close()
+
+
+def output_text(output: Any, prompt: Optional[str] = None) -> str:
+    """The text of a model output (generation, summary, translation or top label)."""
+    while isinstance(output, list) and output:
+        output = output[0]
+    if isinstance(output, dict):
+        if "generated_text" in output:
+            text = output["generated_text"]
+            # Some endpoints ignore return_full_text
+            if prompt and text.startswith(prompt):
+                text = text[len(prompt):]
+            return text
+        for field in ("summary_text", "translation_text"):
+            if field in output:
+                return output[field]
+        if output.get("labels"):
+            return output["labels"][0]
+        if "label" in output:
+            return output["label"]
+    return output if isinstance(output, str) else ""
+
+
+def _copied(shared: Future) -> Future:
+    """A future resolving to a private copy of the result of a shared one."""
+    future = Future()
+
+    def done(source: Future) -> None:
+        try:
+            future.set_result(copy.deepcopy(source.result()))
+        except BaseException as e:
+            future.set_exception(e)
+
+    shared.add_done_callback(done)
+    return future
+
+
+class HFModelClient:
+    """One model of the gateway with a LangChain-style ``invoke(prompt) -> str``."""
+
+    def __init__(self, gateway: HFInferenceGateway, model: str, task: str,
+                 parameters: Optional[Dict[str, Any]] = None, cache: bool = True):
+        self.gateway = gateway
+        self.model = model
+        self.task = task
+        self.parameters = {**TASK_PARAMETERS.get(task, {}), **(parameters or {})}
+        self.batch = task in BATCHABLE_TASKS
+        self.cache = cache
+
+    def predict(self, inputs: Any) -> Any:
+        """Raw model output for one input."""
+        return self.gateway.infer(self.model, inputs, self.parameters, self.batch, self.cache)
+
+    def predict_many(self, inputs: Sequence[Any]) -> List[Any]:
+        """Raw model outputs for several inputs, run concurrently."""
+        return self.gateway.infer_many(self.model, inputs, self.parameters, self.batch, self.cache)
+
+    def submit(self, prompt: str) -> Future:
+        """Send a prompt without waiting; the future resolves to the output text."""
+        result = Future()
+
+        def done(output: Future) -> None:
+            try:
+                result.set_result(output_text(output.result(), prompt))
+            except BaseException as e:
+                result.set_exception(e)
+
+        self.gateway.submit(self.model, prompt, self.parameters, self.batch,
+                            self.cache).add_done_callback(done)
+        return result
+
+    def invoke(self, prompt: str) -> str:
+        return self.submit(prompt).result()
+
+    def invoke_many(self, prompts: Sequence[str]) -> List[str]:
+        """Output texts of several prompts, run concurrently."""
+        futures = [self.submit(prompt) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    async def ainvoke(self, prompt: str) -> str:
+        return await asyncio.wrap_future(self.submit(prompt))
+
+
+_gateway: Optional[HFInferenceGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_inference_gateway() -> HFInferenceGateway:
+    """The gateway shared by the process (created on first use)."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = HFInferenceGateway()
+    return _gateway
@@ -0,0 +1,261 @@
+"""
+Map-reduce execution of LLM prompts over full documents.
+
+The document is split into chunks, one "map" prompt is run per chunk, and the
+partial results are combined by "reduce" prompts in groups of ``fan_in`` until a
+single result is left. All calls of a tree level run concurrently through a
+rate-limit-aware scheduler, so latency grows with the depth of the reduce tree
+rather than with document length. Map and reduce results are cached by prompt
+hash: re-running an edited document only pays for the changed chunks and the
+reduce nodes above them.
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+from shared.result_cache import ChunkResultCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+
+DEFAULT_MIN_INTERVAL = float(os.environ.get("LLM_MIN_REQUEST_INTERVAL", "0"))
+DEFAULT_FAN_IN = int(os.environ.get("LLM_REDUCE_FAN_IN", "4"))
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_RATE_LIMIT_MARKERS = ("rate limit", "too many requests", "currently loading", "service unavailable")
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """Split text into chunks of at most ``max_chars``, preferring paragraph and line breaks.
+
+    Args:
+        text: Document text
+        max_chars: Maximum chunk size in characters
+
+    Returns:
+        List of non-empty chunks in document order
+    """
+    chunks: List[str] = []
+    current = ""
+
+    def pieces():
+        for paragraph in _PARAGRAPH_BREAK.split(text):
+            if len(paragraph) <= max_chars:
+                yield paragraph
+                continue
+            for line in paragraph.split("\n"):
+                # Hard-wrap lines that are longer than a whole chunk
+                for start in range(0, len(line), max_chars):
+                    yield line[start:start + max_chars]
+
+    for piece in pieces():
+        if not piece.strip():
+            continue
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an LLM client error means "slow down" rather than a real failure."""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status_code", None)
+    if status in (429, 503):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine from synchronous code (e.g. a Flask view).
+
+    Uses a worker thread when called from inside a running event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result: dict = {}
+
+    def runner():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:  # re-raised in the calling thread
+            result["error"] = e
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+class RateLimitedScheduler:
+    """Runs blocking LLM calls in worker threads with bounded concurrency.
+
+    Requests are spaced at least ``min_interval`` seconds apart. A rate-limit
+    error pauses *all* callers for an exponentially growing cooldown before the
+    call is retried, instead of every task hammering the API on its own.
+
+    The limits hold across threads and event loops: calls run on the
+    scheduler's own pool of ``max_concurrency`` threads, and the pacing state
+    is guarded by a thread lock, so one scheduler can be shared by every
+    request of a service (each ``run_sync`` call runs its own event loop).
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 min_interval: float = DEFAULT_MIN_INTERVAL,
+                 max_retries: int = 4, backoff: float = 1.0, max_backoff: float = 30.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = {"requests": 0, "rate_limited": 0}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-call")
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def _wait_turn(self):
+        # Re-check after sleeping: a cooldown may have been started meanwhile
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._next_start - now
+                if delay <= 0:
+                    self._next_start = now + self.min_interval
+                    self.stats["requests"] += 1
+                    return
+            time.sleep(delay)
+
+    def _cool_down(self, seconds: float):
+        with self._lock:
+            self.stats["rate_limited"] += 1
+            self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+    def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        attempt = 0
+        while True:
+            self._wait_turn()
+            try:
+                return func(*args)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                logger.warning(f"LLM rate limited ({e}); retrying in {delay:.1f}s")
+                self._cool_down(delay)
+                attempt += 1
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call ``func(*args)`` in a worker thread, retrying on rate-limit errors.
+
+        Args:
+            func: Blocking callable, e.g. ``llm.invoke``
+            *args: Arguments for ``func``
+
+        Returns:
+            The return value of ``func``
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self._call, func, *args))
+
+
+class MapReduceLLM:
+    """Map a prompt over document chunks and reduce the partial results hierarchically.
+
+    Args:
+        invoke: Blocking ``prompt -> str`` callable (e.g. a LangChain LLM's ``invoke``)
+        map_prompt: Builds the prompt for one chunk of text
+        reduce_prompt: Builds the prompt that combines a group of partial results
+            (only needed when calling ``reduce``/``run``)
+        chunk_chars: Maximum characters per chunk
+        fan_in: Number of partial results combined by one reduce call
+        scheduler: Shared scheduler; a new one is created when omitted
+        cache: Partial result cache; pass ``None`` to disable caching
+        namespace: Cache key prefix (model name, prompt version)
+    """
+
+    def __init__(self, invoke: Callable[[str], Any],
+                 map_prompt: Callable[[str], str],
+                 reduce_prompt: Optional[Callable[[List[str]], str]] = None,
+                 chunk_chars: int = 3000, fan_in: int = DEFAULT_FAN_IN,
+                 scheduler: Optional[RateLimitedScheduler] = None,
+                 cache: Optional[ChunkResultCache] = None,
+                 namespace: str = ""):
+        self.invoke = invoke
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.chunk_chars = chunk_chars
+        self.fan_in = max(2, fan_in)
+        self.scheduler = scheduler or RateLimitedScheduler()
+        self.cache = cache
+        self.namespace = namespace
+        self.stats = {"chunks": 0, "llm_calls": 0, "cache_hits": 0, "reduce_levels": 0}
+
+    def _key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\n{prompt}".encode("utf-8")).hexdigest()
+
+    async def _call(self, prompt: str) -> str:
+        key = self._key(prompt)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        self.stats["llm_calls"] += 1
+        result = await self.scheduler.run(self.invoke, prompt)
+        text = getattr(result, "content", result)
+        text = (text or "").strip()
+        # Empty answers are not cached so they are retried next time
+        if self.cache is not None and text:
+            self.cache.put(key, text)
+        return text
+
+    async def map(self, text: str) -> List[str]:
+        """Run the map prompt over every chunk of ``text`` concurrently.
+
+        Returns:
+            Partial results in chunk order
+        """
+        chunks = split_text(text, self.chunk_chars)
+        self.stats["chunks"] += len(chunks)
+        return list(await asyncio.gather(*(self._call(self.map_prompt(chunk)) for chunk in chunks)))
+
+    async def reduce(self, partials: Sequence[str]) -> str:
+        """Combine partial results ``fan_in`` at a time until one result is left."""
+        level = [p for p in partials if p]
+        if not level:
+            return ""
+        while len(level) > 1:
+            self.stats["reduce_levels"] += 1
+            groups = [level[i:i + self.fan_in] for i in range(0, len(level), self.fan_in)]
+            level = list(await asyncio.gather(*(
+                self._call(self.reduce_prompt(group)) if len(group) > 1 else self._identity(group[0])
+                for group in groups
+            )))
+        return level[0]
+
+    @staticmethod
+    async def _identity(value: str) -> str:
+        return value
+
+    async def run(self, text: str) -> str:
+        """Map over the whole document, then reduce to a single result."""
+        return await self.reduce(await self.map(text))
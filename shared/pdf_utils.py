@@ -6,7 +6,7 @@ import re
 import os
 import tempfile
 import logging
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Union
 import pdf2image
 
 # הגדרת לוגר
@@ -17,6 +17,11 @@ TESSERACT_PATH = os.environ.get('TESSERACT_PATH', '/usr/bin/tesseract')
 if TESSERACT_PATH:
     pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
 
+# Pages with less text than this in the text layer are OCR'd
+MIN_TEXT_LAYER_CHARS = 100
+# Consecutive pages rasterized by one pdf2image call (bounds memory for long scans)
+OCR_BATCH_PAGES = int(os.environ.get('PDF_OCR_BATCH_PAGES', 8))
+
 # Simple function to extract text from PDF - used by tests
 def extract_text_from_pdf(file_path: str) -> str:
     """
@@ -42,9 +47,105 @@ def extract_text_from_pdf(file_path: str) -> str:
         logger.error(f"Error extracting text from PDF: {e}")
         return ""
 
+class PDFDocumentSession:
+    """
+    מסמך PDF פתוח עם שכבת טקסט ופלט OCR שמורים לכל עמוד.
+    
+    הקובץ נפתח פעם אחת, וכל עמוד מחולץ (ובמידת הצורך עובר OCR) פעם אחת בלבד,
+    גם כשכמה שיטות חילוץ (טקסט, טבלאות, מידע פיננסי) רצות על אותו מסמך.
+    עמודים רצופים שדורשים OCR מומרים לתמונות בקריאה אחת ל-pdf2image.
+    
+    שימוש:
+        with processor.open(pdf_path) as session:
+            text = processor.extract_text(session)
+            tables = processor.extract_tables(session)
+    """
+    
+    def __init__(self, processor: "PDFProcessor", pdf_path: str):
+        self.processor = processor
+        self.pdf_path = pdf_path
+        self._file = open(pdf_path, "rb")
+        try:
+            self._reader = PdfReader(self._file)
+            self.page_count = len(self._reader.pages)
+        except Exception:
+            self._file.close()
+            raise
+        self._text_layer: Dict[int, str] = {}
+        self._ocr_text: Dict[int, str] = {}
+        self._page_texts: Optional[List[str]] = None
+        self._text: Optional[str] = None
+    
+    def text_layer(self, page_num: int) -> str:
+        """טקסט מוטמע של עמוד (אינדקס מ-0), מחולץ פעם אחת"""
+        if page_num not in self._text_layer:
+            self._text_layer[page_num] = self._reader.pages[page_num].extract_text() or ""
+        return self._text_layer[page_num]
+    
+    def needs_ocr(self, page_num: int) -> bool:
+        return self.processor.ocr_enabled and len(self.text_layer(page_num)) < MIN_TEXT_LAYER_CHARS
+    
+    def ocr_text(self, page_num: int) -> str:
+        """פלט OCR של עמוד (אינדקס מ-0), מחושב פעם אחת"""
+        if page_num not in self._ocr_text:
+            self._ocr_pages([page_num])
+        return self._ocr_text[page_num]
+    
+    def _ocr_pages(self, page_nums: List[int]) -> None:
+        """OCR לעמודים שעוד לא עברו OCR, ברצפים של עד OCR_BATCH_PAGES עמודים"""
+        pending = sorted(p for p in set(page_nums) if p not in self._ocr_text)
+        batches: List[List[int]] = []
+        for page_num in pending:
+            if batches and page_num == batches[-1][-1] + 1 and len(batches[-1]) < OCR_BATCH_PAGES:
+                batches[-1].append(page_num)
+            else:
+                batches.append([page_num])
+        
+        for batch in batches:
+            texts = self.processor._ocr_page_range(self.pdf_path, batch[0], batch[-1])
+            for page_num, text in zip(batch, texts):
+                self._ocr_text[page_num] = text
+    
+    def page_texts(self) -> List[str]:
+        """הטקסט של כל עמוד: שכבת הטקסט, או OCR לעמודים עם מעט טקסט"""
+        if self._page_texts is None:
+            ocr_pages = []
+            for page_num in range(self.page_count):
+                logger.info(f"מעבד עמוד {page_num + 1}/{self.page_count}")
+                if self.needs_ocr(page_num):
+                    logger.info(f"משתמש ב-OCR עבור עמוד {page_num + 1}")
+                    ocr_pages.append(page_num)
+            self._ocr_pages(ocr_pages)
+            self._page_texts = [
+                self._ocr_text[page_num] if page_num in ocr_pages else self.text_layer(page_num)
+                for page_num in range(self.page_count)
+            ]
+        return self._page_texts
+    
+    @property
+    def text(self) -> str:
+        """הטקסט המלא של המסמך (כמו extract_text)"""
+        if self._text is None:
+            self._text = "".join(page_text + "\n\n" for page_text in self.page_texts()).strip()
+        return self._text
+    
+    def close(self) -> None:
+        self._file.close()
+    
+    def __enter__(self) -> "PDFDocumentSession":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
 class PDFProcessor:
     """
     מעבד קבצי PDF - מחלץ טקסט, טבלאות ומידע פיננסי מדוחות.
+    
+    שיטות החילוץ מקבלות נתיב לקובץ או PDFDocumentSession (ראו ``open``).
+    כדי לחלץ כמה סוגי מידע מאותו קובץ, השתמשו ב-``scan`` או בסשן משותף,
+    כך שכל עמוד עובר OCR פעם אחת בלבד.
     """
     
     def __init__(self, ocr_enabled: bool = True, lang: str = "heb+eng"):
@@ -74,55 +175,82 @@ class PDFProcessor:
                 logger.warning(f"OCR לא זמין: {e}. מבטל OCR.")
                 self.ocr_enabled = False
     
-    def extract_text(self, pdf_path: str) -> str:
+    def open(self, pdf_path: str) -> PDFDocumentSession:
         """
-        חילוץ טקסט מקובץ PDF
+        פתיחת סשן מסמך: הקובץ נפתח פעם אחת והטקסט וה-OCR של כל עמוד נשמרים
+        
+        Args:
+            pdf_path: נתיב לקובץ PDF
+            
+        Returns:
+            PDFDocumentSession: יש לסגור (או להשתמש ב-with)
+        """
+        return PDFDocumentSession(self, pdf_path)
+    
+    def scan(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        חילוץ טקסט, טבלאות ומידע פיננסי במעבר אחד על הקובץ
         
         Args:
             pdf_path: נתיב לקובץ PDF
             
+        Returns:
+            Dict: text, tables, financial_data ו-page_count
+        """
+        logger.info(f"סורק את {pdf_path}")
+        try:
+            with self.open(pdf_path) as session:
+                return {
+                    "text": self.extract_text(session),
+                    "tables": self.extract_tables(session),
+                    "financial_data": self.extract_financial_data(session),
+                    "page_count": session.page_count
+                }
+        except Exception as e:
+            logger.error(f"שגיאה בסריקת PDF: {e}")
+            return {
+                "text": "",
+                "tables": [],
+                "financial_data": self._financial_data_from_text(""),
+                "page_count": 0
+            }
+    
+    def _document_text(self, source: Union[str, PDFDocumentSession]) -> str:
+        """הטקסט המלא מנתיב או מסשן פתוח"""
+        if isinstance(source, PDFDocumentSession):
+            return source.text
+        with self.open(source) as session:
+            return session.text
+    
+    def extract_text(self, pdf_path: Union[str, PDFDocumentSession]) -> str:
+        """
+        חילוץ טקסט מקובץ PDF
+        
+        Args:
+            pdf_path: נתיב לקובץ PDF או סשן פתוח
+            
         Returns:
             str: הטקסט המחולץ
         """
-        logger.info(f"מחלץ טקסט מ-{pdf_path}")
+        logger.info(f"מחלץ טקסט מ-{getattr(pdf_path, 'pdf_path', pdf_path)}")
         
         try:
-            # פתיחת קובץ PDF
-            with open(pdf_path, "rb") as file:
-                reader = PdfReader(file)
-                text = ""
-                
-                # חילוץ טקסט מכל עמוד
-                for page_num, page in enumerate(reader.pages):
-                    logger.info(f"מעבד עמוד {page_num + 1}/{len(reader.pages)}")
-                    
-                    # ניסיון לחלץ טקסט ישירות
-                    page_text = page.extract_text() or ""
-                    
-                    # אם הטקסט חסר או OCR מופעל, מנסה OCR
-                    if self.ocr_enabled and (not page_text or len(page_text) < 100):
-                        logger.info(f"משתמש ב-OCR עבור עמוד {page_num + 1}")
-                        page_text = self._extract_text_with_ocr(pdf_path, page_num)
-                    
-                    text += page_text + "\n\n"
-                
-                return text.strip()
-                
+            return self._document_text(pdf_path)
         except Exception as e:
             logger.error(f"שגיאה בחילוץ טקסט מ-PDF: {e}")
             return ""
     
-    def extract_tables(self, pdf_path: str) -> List[Dict[str, Any]]:
+    def extract_tables(self, pdf_path: Union[str, PDFDocumentSession]) -> List[Dict[str, Any]]:
         """
         חילוץ טבלאות מקובץ PDF
         
         Args:
-            pdf_path: נתיב לקובץ PDF
+            pdf_path: נתיב לקובץ PDF או סשן פתוח (הטקסט לא מחולץ שוב)
             
         Returns:
             List[Dict]: רשימת טבלאות מחולצות עם מטה-דאטה
         """
-        logger.info(f"מחלץ טבלאות מ-{pdf_path}")
+        logger.info(f"מחלץ טבלאות מ-{getattr(pdf_path, 'pdf_path', pdf_path)}")
         
         # רשימת הטבלאות שיוחזרו
         tables = []
@@ -150,46 +278,39 @@ class PDFProcessor:
             logger.error(f"שגיאה בחילוץ טבלאות מ-PDF: {e}")
             return []
     
-    def extract_financial_data(self, pdf_path: str) -> Dict[str, Any]:
+    def extract_financial_data(self, pdf_path: Union[str, PDFDocumentSession]) -> Dict[str, Any]:
         """
         חילוץ מידע פיננסי ספציפי מדוחות
         
         Args:
-            pdf_path: נתיב לקובץ PDF
+            pdf_path: נתיב לקובץ PDF או סשן פתוח (הטקסט לא מחולץ שוב)
             
         Returns:
             Dict: מידע פיננסי מחולץ
         """
-        logger.info(f"מחלץ מידע פיננסי מ-{pdf_path}")
-        
-        financial_data = {
-            "amounts": [],
-            "percentages": [],
-            "dates": [],
-            "securities": []
-        }
+        logger.info(f"מחלץ מידע פיננסי מ-{getattr(pdf_path, 'pdf_path', pdf_path)}")
         
         try:
             # מחלץ טקסט מלא
             full_text = self.extract_text(pdf_path)
+            return self._financial_data_from_text(full_text)
             
+        except Exception as e:
+            logger.error(f"שגיאה בחילוץ מידע פיננסי מ-PDF: {e}")
+            return self._financial_data_from_text("")
+    
+    def _financial_data_from_text(self, full_text: str) -> Dict[str, Any]:
+        """מידע פיננסי (סכומים, אחוזים, תאריכים, ניירות ערך) מטקסט"""
+        return {
             # חיפוש סכומי כסף
-            financial_data["amounts"] = self._extract_money_amounts(full_text)
-            
+            "amounts": self._extract_money_amounts(full_text),
             # חיפוש אחוזים
-            financial_data["percentages"] = self._extract_percentages(full_text)
-            
+            "percentages": self._extract_percentages(full_text),
             # חיפוש תאריכים
-            financial_data["dates"] = self._extract_dates(full_text)
-            
+            "dates": self._extract_dates(full_text),
             # חיפוש מספרי ISIN וקודי ניירות ערך
-            financial_data["securities"] = self._extract_securities_identifiers(full_text)
-            
-            return financial_data
-            
-        except Exception as e:
-            logger.error(f"שגיאה בחילוץ מידע פיננסי מ-PDF: {e}")
-            return financial_data
+            "securities": self._extract_securities_identifiers(full_text)
+        }
     
     def _extract_text_with_ocr(self, pdf_path: str, page_num: int) -> str:
         """
@@ -202,32 +323,44 @@ class PDFProcessor:
         Returns:
             str: הטקסט המחולץ
         """
-        try:
-            logger.info(f"Starting OCR for page {page_num+1} of {pdf_path}")
+        return self._ocr_page_range(pdf_path, page_num, page_num)[0]
+    
+    def _ocr_page_range(self, pdf_path: str, first_page: int, last_page: int) -> List[str]:
+        """
+        OCR לרצף עמודים עם המרה אחת לתמונות
+        
+        Args:
+            pdf_path: נתיב לקובץ PDF
+            first_page: העמוד הראשון (אינדקס מ-0)
+            last_page: העמוד האחרון (כולל)
             
-            # Convert PDF page to image
+        Returns:
+            List[str]: הטקסט של כל עמוד ברצף
+        """
+        page_count = last_page - first_page + 1
+        try:
+            logger.info(f"Starting OCR for pages {first_page+1}-{last_page+1} of {pdf_path}")
             images = pdf2image.convert_from_path(
                 pdf_path,
-                first_page=page_num+1,
-                last_page=page_num+1
+                first_page=first_page+1,
+                last_page=last_page+1
             )
-            
-            if not images:
-                logger.warning(f"No images generated from page {page_num+1}")
-                return ""
-            
-            # Get the first (and only) image
-            image = images[0]
-            
-            # Extract text with pytesseract
-            extracted_text = pytesseract.image_to_string(image, lang=self.lang)
-            
-            return extracted_text
-            
         except Exception as e:
             logger.error(f"שגיאה ב-OCR: {e}")
-            # במקרה של כישלון, החזר מחרוזת שמציינת את הבעיה
-            return f"[OCR נכשל: {str(e)}]"
+            return [f"[OCR נכשל: {str(e)}]"] * page_count
+        
+        texts = []
+        for offset in range(page_count):
+            if offset >= len(images):
+                logger.warning(f"No images generated from page {first_page+offset+1}")
+                texts.append("")
+                continue
+            try:
+                texts.append(pytesseract.image_to_string(images[offset], lang=self.lang))
+            except Exception as e:
+                logger.error(f"שגיאה ב-OCR: {e}")
+                texts.append(f"[OCR נכשל: {str(e)}]")
+        return texts
     
     def _identify_table_patterns(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,75 @@
+"""
+Content-hash keyed cache for LLM results.
+
+Used by the chunked instrument extractor, the map-reduce runner and the
+inference gateway: an in-memory LRU, optionally backed by one JSON file per
+entry so results survive restarts.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get("LLM_CHUNK_CACHE_DIR", os.path.join("data", "llm_cache"))
+
+
+class ChunkResultCache:
+    """Chunk results keyed by content hash: in-memory LRU backed by JSON files.
+
+    Values can be anything JSON-serializable (instrument lists, partial summaries).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, max_entries: int = 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        path = self._path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable chunk cache entry {path}: {e}")
+            return None
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist chunk cache entry {key}: {e}")
+
+    def _remember(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
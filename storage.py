@@ -1,9 +1,12 @@
 # file: storage.py
 import os
 import logging
-import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 from config import Config # Assuming AWS keys/bucket might be configured here later
+from utils.lazy_imports import lazy_import
+
+# The AWS SDK is imported when the first client is created
+boto3 = lazy_import("boto3")
 
 logger = logging.getLogger("storage")
 
@@ -5,6 +5,8 @@ import logging
 from celery_worker import celery_app
 from config import Config
 from database import update_document_status # Add DB import
+from agent_framework.registry import get_service
+from services import portfolio_artifacts
 
 # Import our processing modules (ensure these are importable in the Celery worker context)
 from ocr_text_extractor import extract_text_with_ocr
@@ -29,15 +31,25 @@ def process_document_task(self, file_path, document_id, original_filename, langu
     """
     logger.info(f"Starting background processing for document: {document_id} ({original_filename})")
     upload_folder = Config.UPLOAD_FOLDER # Use config for consistency
+    # Progress events for the SSE stream (/api/documents/<id>/events)
+    progress = get_service("progress_publisher")
 
     try:
+        # Analyses of a previous run are stale once the document is reprocessed
+        portfolio_artifacts.invalidate_artifacts(upload_folder, document_id)
+
         # 1. Perform OCR
         logger.info(f"Starting OCR processing: {document_id}")
-        document = extract_text_with_ocr(file_path, language=language)
+        progress.publish(document_id, "processing", task_id=self.request.id)
+        document = extract_text_with_ocr(
+            file_path, language=language,
+            progress_callback=progress.progress_callback(document_id, "ocr")
+        )
 
         if not document:
             logger.error(f"OCR processing failed or returned no data for {document_id}")
             # Optionally, update status in DB here
+            progress.publish(document_id, "failed", error="OCR processing failed")
             return {"status": "failed", "error": "OCR processing failed"}
 
         # Save extracted text
@@ -53,6 +65,7 @@ def process_document_task(self, file_path, document_id, original_filename, langu
 
         # Extract ISIN numbers
         isin_numbers = extract_isin_numbers(all_text)
+        progress.publish(document_id, "isins", page_count=len(document), isin_count=len(isin_numbers))
 
         # Extract associated data for each ISIN
         financial_data = []
@@ -67,8 +80,16 @@ def process_document_task(self, file_path, document_id, original_filename, langu
             json.dump(financial_data, f, indent=2, ensure_ascii=False)
         logger.info(f"Financial data extraction completed: {document_id}")
 
+        # Portfolio analysis is computed once here and served as-is by /advanced_analysis
+        try:
+            portfolio_artifacts.save_portfolio_analysis(upload_folder, document_id, financial_data)
+        except Exception as e:
+            # The endpoint computes it on first request instead
+            logger.warning(f"Portfolio analysis failed for {document_id}: {str(e)}")
+
         # 3. Extract tables
         tables = extract_tables_from_text(all_text)
+        progress.publish(document_id, "tables", table_count=len(tables))
 
         # Save tables (if any found)
         tables_path = None
@@ -99,6 +120,10 @@ def process_document_task(self, file_path, document_id, original_filename, langu
         # --- DB UPDATE ON SUCCESS END ---
 
         logger.info(f"Successfully processed document: {document_id}")
+        progress.publish(
+            document_id, "completed",
+            page_count=len(document), isin_count=len(isin_numbers), table_count=len(tables)
+        )
         # Return value is still useful for direct task result inspection if needed
         return {
             "status": "completed",
@@ -125,6 +150,7 @@ def process_document_task(self, file_path, document_id, original_filename, langu
         if not update_success:
              logger.error(f"Failed to update database status to 'failed' for {document_id} after task error.")
         # --- DB UPDATE ON FAILURE END ---
+        progress.publish(document_id, "failed", error=error_message)
 
         # Clean up potentially partially created files? (Consider carefully)
         # Example:
@@ -0,0 +1,23 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def aws_config(monkeypatch):
+    """The AWS settings module, importable as ``config.aws_config``.
+
+    The root config.py module shadows the config/ directory (which has no
+    __init__.py), so the settings file is loaded by path and registered under
+    its package name for the services that import it.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "config.aws_config", os.path.join(PROJECT_ROOT, "config", "aws_config.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setitem(sys.modules, "config.aws_config", module)
+    return module
@@ -0,0 +1,149 @@
+import json
+import sqlite3
+import time
+
+from agents.base.base_agent import BaseAgent
+from agents.memory.memory_manager import MemoryManager
+from agents.memory.memory_store import open_agent_memory
+
+
+class DocumentAgent(BaseAgent):
+    memory_namespaces = ("documents",)
+
+
+def stored_rows(path):
+    with sqlite3.connect(path) as conn:
+        return {(ns, key): json.loads(value)
+                for ns, key, value in conn.execute("SELECT namespace, key, value FROM memory")}
+
+
+class TestAgentMemory:
+    def test_writes_are_batched_and_stored_per_entry(self, tmp_path):
+        memory = open_agent_memory(str(tmp_path / "agent.json"), namespaces=("documents",),
+                                   flush_interval=0, max_pending=1000)
+        for n in range(50):
+            memory["documents"][f"doc{n}"] = {"n": n}
+        memory["last_run"] = "today"
+
+        # Nothing written until the batch is flushed
+        assert stored_rows(str(tmp_path / "agent.sqlite")) == {}
+        assert memory["documents"]["doc7"] == {"n": 7}
+
+        memory.flush()
+        rows = stored_rows(str(tmp_path / "agent.sqlite"))
+        assert len(rows) == 51
+        assert rows[("documents", "doc7")] == {"n": 7}
+        assert rows[("", "last_run")] == "today"
+
+    def test_save_persists_in_place_changes(self, tmp_path):
+        agent = DocumentAgent("docs", memory_path=str(tmp_path / "docs.json"))
+        agent.memory["documents"]["a"] = {"status": "new"}
+        agent.flush_memory()
+
+        agent.memory["documents"]["a"]["status"] = "done"
+        agent._save_memory()
+
+        reopened = DocumentAgent("docs", memory_path=str(tmp_path / "docs.json"))
+        assert reopened.memory["documents"]["a"] == {"status": "done"}
+        assert "a" in reopened.memory["documents"]
+        assert list(reopened.memory["documents"]) == ["a"]
+
+    def test_timed_flush_persists_in_place_changes(self, tmp_path):
+        path = str(tmp_path / "agent.json")
+        memory = open_agent_memory(path, namespaces=("documents",), flush_interval=0.05)
+        memory["documents"]["a"] = {"status": "new"}
+        memory.flush()
+
+        memory["documents"]["a"]["status"] = "done"
+        memory["last_run"] = "today"  # arms the flush timer
+        time.sleep(0.3)
+
+        rows = stored_rows(str(tmp_path / "agent.sqlite"))
+        assert rows[("documents", "a")] == {"status": "done"}
+        assert rows[("", "last_run")] == "today"
+
+    def test_evicting_the_read_cache_keeps_in_place_changes(self, tmp_path):
+        memory = open_agent_memory(str(tmp_path / "agent.json"), namespaces=("documents",),
+                                   flush_interval=0, max_pending=2)
+        for n in range(30):
+            memory["documents"][f"doc{n}"] = {"n": n}
+        memory.flush()
+
+        # Edited in place, then enough writes go through to evict the read cache
+        memory["documents"]["doc0"]["n"] = -1
+        for n in range(30, 60):
+            memory["documents"][f"doc{n}"] = {"n": n}
+        memory.flush()
+
+        rows = stored_rows(str(tmp_path / "agent.sqlite"))
+        assert rows[("documents", "doc0")] == {"n": -1}
+        assert len(rows) == 60
+
+    def test_unchanged_entries_are_not_rewritten(self, tmp_path):
+        memory = open_agent_memory(str(tmp_path / "agent.json"), flush_interval=0)
+        memory["a"] = 1
+        memory.flush()
+
+        writes = []
+        write_many = memory.backend.write_many
+        memory.backend.write_many = lambda batch: writes.append(batch) or write_many(batch)
+        assert memory["a"] == 1
+        memory.save()
+        assert writes == []
+
+    def test_flush_writes_only_entries_read_or_written_since_the_last_one(self, tmp_path):
+        memory = open_agent_memory(str(tmp_path / "agent.json"), namespaces=("documents",),
+                                   flush_interval=0)
+        for n in range(5):
+            memory["documents"][f"doc{n}"] = {"n": n}
+        memory.flush()
+
+        writes = []
+        write_many = memory.backend.write_many
+        memory.backend.write_many = lambda batch: writes.append(batch) or write_many(batch)
+        memory["documents"]["doc3"]["n"] = -3
+        memory.flush()
+        memory.flush()
+
+        assert writes == [[("documents", "doc3", {"n": -3})]]
+        # Materializing the whole memory does not mark anything dirty
+        memory.to_dict()
+        memory.flush()
+        assert len(writes) == 1
+
+    def test_legacy_json_memory_is_imported(self, tmp_path):
+        legacy = tmp_path / "docs.json"
+        legacy.write_text(json.dumps({"documents": {"a": 1, "b": 2}, "counter": 3}))
+
+        agent = DocumentAgent("docs", memory_path=str(legacy))
+        assert agent.get_result("counter") == 3
+        assert dict(agent.memory["documents"]) == {"a": 1, "b": 2}
+        assert ("documents", "b") in stored_rows(str(tmp_path / "docs.sqlite"))
+
+    def test_delete_and_clear(self, tmp_path):
+        agent = DocumentAgent("docs", memory_path=str(tmp_path / "docs.json"))
+        agent.store_result("x", 1)
+        agent.memory["documents"]["a"] = 1
+        del agent.memory["documents"]["a"]
+        assert not agent.has_memory("missing")
+        assert "a" not in agent.memory["documents"]
+        assert agent.list_memories() == ["documents", "x"]
+
+        agent.clear_memory()
+        assert agent.list_memories() == ["documents"]
+        assert len(agent.memory["documents"]) == 0
+
+
+def test_memory_manager_global_memory(tmp_path):
+    manager = MemoryManager(str(tmp_path))
+    assert manager.save_global_memory("theme", "dark")
+    assert manager.get_global_memory("theme") == "dark"
+    manager.flush()
+
+    agent = DocumentAgent("financial", memory_path=manager.get_agent_memory_path("financial"))
+    agent.memory["documents"]["a"] = {"isins": 2}
+    agent.flush_memory()
+
+    memories = MemoryManager(str(tmp_path)).list_all_memories()
+    assert memories["global"]["theme"] == "dark"
+    assert memories["financial"] == {"documents": {"a": {"isins": 2}}}
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.async_runtime import BlockingRuntime
+
+
+def test_blocking_calls_do_not_block_the_event_loop():
+    runtime = BlockingRuntime(max_workers=4)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(runtime.run(time.sleep, 0.2) for _ in range(4)))
+        elapsed = time.perf_counter() - start
+        ticking.cancel()
+        return results, elapsed, ticks
+
+    try:
+        results, elapsed, ticks = asyncio.run(main())
+    finally:
+        runtime.shutdown()
+    assert results == [None] * 4
+    assert elapsed < 0.6
+    assert ticks >= 5
+
+
+@pytest.fixture
+def database():
+    pytest.importorskip("werkzeug")
+    return pytest.importorskip("database")
+
+
+@pytest.fixture
+def sync_db(database, monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    mock_db = mongomock.MongoClient().db
+    monkeypatch.setattr(database, "db", mock_db)
+    monkeypatch.setattr(database, "MOTOR_AVAILABLE", False)
+    mock_db.financial_instruments.insert_many([
+        {"tenant_id": "t1", "document_id": "doc1", "isin": "US1", "name": "Bond", "type": "bond", "value": 100},
+        {"tenant_id": "t1", "document_id": "doc1", "isin": "US2", "name": "Stock", "type": "stock", "value": 50},
+        {"tenant_id": "t2", "document_id": "doc1", "isin": "US3", "name": "Other", "type": "bond", "value": 5},
+    ])
+    mock_db.document_summaries.insert_one({"tenant_id": "t1", "document_id": "doc1", "risk": "low"})
+    return mock_db
+
+
+def test_query_agent_falls_back_to_executor_without_motor(sync_db):
+    from agents.query.query_agent import QueryAgent
+
+    result = asyncio.run(QueryAgent().process(
+        {"type": "query_instruments", "tenant_id": "t1", "query_criteria": {"type": "bond"}}))
+    assert [i["isin"] for i in result["results"]] == ["US1"]
+
+
+def test_chatbot_answers_independent_intents_concurrently(sync_db):
+    from agents.chatbot.chatbot_agent import ChatbotAgent
+
+    chatbot = ChatbotAgent()
+    response = asyncio.run(chatbot.process({
+        "type": "user_message",
+        "tenant_id": "t1",
+        "user_input": "show summary for document doc1 and list instruments for document doc1 type bond",
+    }))
+    summary, instruments = response["response_text"].split("\n\n")
+    assert summary.startswith("Summary for doc1:") and '"risk": "low"' in summary
+    assert instruments == "Found 1 instruments:\n- Bond (US1), Type: bond, Value: 100 "
+
+
+def test_async_queries_use_motor_database(database, monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+
+    async def main():
+        async_db = mongomock_motor.AsyncMongoMockClient()["test"]
+        await async_db.document_summaries.insert_one({"tenant_id": "t1", "document_id": "doc1", "risk": "low"})
+        database.set_async_db(async_db)
+        try:
+            return await database.get_document_summary_async("doc1", "t1")
+        finally:
+            database.set_async_db(None)
+
+    monkeypatch.setattr(database, "get_document_summary", lambda *args: pytest.fail("blocking call"))
+    assert asyncio.run(main())["risk"] == "low"
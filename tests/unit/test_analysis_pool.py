@@ -0,0 +1,49 @@
+import asyncio
+import io
+
+import pytest
+
+from api.analysis_pool import AnalysisPool, PoolBusyError, UploadTooLargeError, save_upload
+
+
+class FakeUpload:
+    def __init__(self, data, filename="../statement.pdf"):
+        self.filename = filename
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._buffer.read(size)
+
+
+def test_admission_is_bounded():
+    pool = AnalysisPool(max_workers=1, max_pending=2, retry_after=7)
+    with pool.admit(), pool.admit():
+        assert pool.pending == 2
+        with pytest.raises(PoolBusyError) as exc_info:
+            with pool.admit():
+                pass
+        assert exc_info.value.retry_after == 7
+    assert pool.pending == 0
+
+
+def test_run_offloads_to_worker_process():
+    pool = AnalysisPool(max_workers=2, max_pending=4)
+
+    async def main():
+        return await asyncio.gather(*(pool.run(pow, n, 2) for n in range(5)))
+
+    try:
+        assert asyncio.run(main()) == [0, 1, 4, 9, 16]
+    finally:
+        pool.shutdown()
+
+
+def test_save_upload_streams_to_disk(tmp_path):
+    data = b"%PDF-1.4" + b"x" * (3 * 1024 * 1024)
+    path = asyncio.run(save_upload(FakeUpload(data), str(tmp_path)))
+    # Client-supplied directories are stripped from the name
+    assert path == str(tmp_path / "statement.pdf")
+    assert (tmp_path / "statement.pdf").read_bytes() == data
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload(FakeUpload(data), str(tmp_path), max_bytes=1024))
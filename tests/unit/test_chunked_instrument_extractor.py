@@ -0,0 +1,142 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from chunked_instrument_extractor import (
+    ChunkedInstrumentExtractor,
+    GeminiRestClient,
+    merge_instruments,
+    split_into_chunks,
+)
+from shared.result_cache import ChunkResultCache
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Answers generateContent requests with the ISINs found in the prompt."""
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            prompt = body["contents"][0]["parts"][0]["text"]
+            document = prompt.split("Document Text:\n---\n", 1)[1]
+            time.sleep(0.05)
+
+            if "FAIL" in document:
+                self.send_response(500)
+                self.end_headers()
+                return
+
+            instruments = [
+                {"isin": isin, "name": f"Security {isin[-3:]}", "type": None,
+                 "value": None, "currency": "USD", "percentage_in_portfolio": None}
+                for isin in dict.fromkeys(re.findall(r"\b[A-Z]{2}[A-Z0-9]{9}\d\b", document))
+            ]
+            payload = {"candidates": [{
+                "content": {"parts": [{"text": json.dumps(instruments)}]},
+                "finishReason": "STOP",
+            }]}
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeminiHandler)
+    server.lock = threading.Lock()
+    server.requests = server.in_flight = server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_extractor(server, tmp_path, max_concurrency=2):
+    client = GeminiRestClient("test-key", api_base=f"http://127.0.0.1:{server.server_port}",
+                              max_retries=0)
+    return ChunkedInstrumentExtractor(client.generate,
+                                      cache=ChunkResultCache(str(tmp_path / "cache")),
+                                      max_concurrency=max_concurrency)
+
+
+PAGES = [
+    "Cover page without holdings",
+    "Apple Inc US0378331005\nMicrosoft US5949181045",
+    "Nestle CH0038863350\nApple again US0378331005",
+    "Roche CH0012032048",
+    "UBS CH0244767585",
+]
+
+
+class TestChunkedInstrumentExtractor:
+    def test_merges_and_deduplicates_by_isin(self, stub_server, tmp_path):
+        extractor = make_extractor(stub_server, tmp_path)
+        instruments = asyncio.run(extractor.extract(PAGES))
+
+        assert [i["isin"] for i in instruments] == [
+            "US0378331005", "US5949181045", "CH0038863350", "CH0012032048", "CH0244767585"]
+        # The cover page has no ISIN and is never sent
+        assert stub_server.requests == 4
+        assert stub_server.max_in_flight <= 2
+
+    def test_unchanged_pages_are_not_resent(self, stub_server, tmp_path):
+        asyncio.run(make_extractor(stub_server, tmp_path).extract(PAGES))
+        stub_server.requests = 0
+
+        edited = list(PAGES)
+        edited[3] = "Roche Holding CH0012032048 (updated)"
+        # A new extractor instance still sees the on-disk cache
+        extractor = make_extractor(stub_server, tmp_path)
+        instruments = asyncio.run(extractor.extract(edited))
+
+        assert stub_server.requests == 1
+        assert extractor.stats["cache_hits"] == 3
+        assert len(instruments) == 5
+
+    def test_failed_chunks_are_not_cached(self, stub_server, tmp_path):
+        pages = ["FAIL US0378331005", "Nestle CH0038863350"]
+        extractor = make_extractor(stub_server, tmp_path)
+
+        instruments = asyncio.run(extractor.extract(pages))
+        assert [i["isin"] for i in instruments] == ["CH0038863350"]
+        assert extractor.stats["failures"] == 1
+
+        asyncio.run(extractor.extract(pages))
+        assert stub_server.requests == 3
+
+
+def test_long_pages_split_on_sections():
+    page = "\n\n".join(f"Section {n}\n" + "Holding US0378331005 " * 20 for n in range(10))
+    chunks = split_into_chunks([page], max_chars=1000)
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 1000 for chunk in chunks)
+    assert {chunk.pages[0] for chunk in chunks} == {0}
+
+
+def test_merge_fills_missing_fields():
+    merged = merge_instruments([
+        [{"isin": "us0378331005", "name": "Apple", "value": None}],
+        [{"isin": "US0378331005", "name": "Apple Inc", "value": 150.0}],
+    ])
+    assert merged == [{"isin": "US0378331005", "name": "Apple", "type": None, "value": 150.0,
+                       "currency": None, "percentage_in_portfolio": None}]
@@ -0,0 +1,74 @@
+from advanced_financial_extractor import AdvancedFinancialExtractor
+from project_organized.features.financial_analysis.extractors.financial_tokenizer import FinancialTokenizer
+
+
+PAGES = [
+    "Portfolio statement\nValuation date: 28.02.2025\nApple Inc US0378331005 quantity: 150 price: $182.50\n",
+    "Asset Allocation\nEquities 60.5%\nBonds 39.5%\nTotal portfolio value: $1,234,567.00\n\n"
+    "Name  Nominal  Value\nApple  150  27,375 USD\nNestle  20  2,100 EUR\n",
+]
+TEXT = "".join(PAGES)
+
+
+class TestFinancialTokenizer:
+    def test_tokens_carry_offsets_and_pages(self):
+        stream = FinancialTokenizer().tokenize(TEXT, PAGES)
+
+        isin = stream.of_kind('isin')[0]
+        assert TEXT[isin.start:isin.end] == 'US0378331005'
+        assert isin.page == 0
+        assert PAGES[0][isin.page_offset:isin.page_offset + 12] == 'US0378331005'
+
+        amount = stream.of_kind('code_amount')[0]
+        assert (amount.value, amount.unit, amount.page) == ('27,375', 'USD', 1)
+        assert PAGES[1][amount.page_offset:].startswith('27,375 USD')
+
+    def test_tokens_do_not_overlap(self):
+        tokens = [t for t in FinancialTokenizer().tokenize(TEXT).tokens if t.kind != 'table_row']
+        assert all(a.end <= b.start for a, b in zip(tokens, tokens[1:]))
+
+    def test_symbol_amount_with_currency_code_keeps_both_amounts(self):
+        text = "Cash balance $1,000 USD and €250"
+        stream = FinancialTokenizer().tokenize(text)
+
+        symbol, code, euro = stream.of_kind('symbol_amount', 'code_amount')
+        assert (symbol.kind, symbol.text, symbol.value, symbol.unit) == ('symbol_amount', '$1,000', '1,000', '$')
+        assert (code.kind, code.text, code.value, code.unit) == ('code_amount', '1,000 USD', '1,000', 'USD')
+        assert text[code.start:code.end] == '1,000 USD'
+        assert (euro.text, euro.unit) == ('€250', '€')
+        assert not stream.of_kind('number')
+
+    def test_unaligned_pages_have_no_page_ids(self):
+        stream = FinancialTokenizer().tokenize(TEXT, ["something else"])
+        assert not stream.aligned
+        assert all(token.page is None for token in stream.tokens)
+
+
+class TestExtractDataFromTokens:
+    def test_extract_data(self):
+        result = AdvancedFinancialExtractor().extract_data(TEXT, PAGES)
+
+        assert result['isins'] == ['US0378331005']
+        assert [c['amount'] for c in result['currencies']] == [
+            '182.50', '1,234,567.00', '27,375', '2,100']
+        assert [p['value'] for p in result['percentages']] == ['60.5', '39.5']
+        assert result['dates'][0]['date'] == '28.02.2025'
+        assert result['summary']['valuation_date']['value'] == '28.02.2025'
+        assert result['summary']['total_portfolio_value']['value'] == '1,234,567.00'
+        assert result['summary']['total_portfolio_value']['currency'] == '$'
+        assert [a['percentage'] for a in result['metrics']['asset_allocation']] == ['60.5', '39.5']
+        assert result['tables'][0]['headers'] == ['Name', 'Nominal', 'Value']
+
+        security = result['securities'][0]
+        assert security['name'] == 'Apple Inc'
+        assert security['quantities'][0]['value'] == '150'
+        assert security['prices'][0]['value'] == '182.50'
+        assert security['occurrences'][0]['page_index'] == 0
+
+    def test_spans_point_at_source_text(self):
+        result = AdvancedFinancialExtractor().extract_data(TEXT, PAGES)
+        for item in result['currencies'] + result['percentages'] + result['dates']:
+            span = item['span']
+            source = PAGES[span['page']]
+            assert source[span['page_offset']:span['page_offset'] + span['end'] - span['start']] \
+                == TEXT[span['start']:span['end']]
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from shared.hf_inference import HFInferenceError, HFInferenceGateway
+
+
+class FakeHFHandler(BaseHTTPRequestHandler):
+    """Answers /models/<model> like the inference API: generation, summaries (lists too) or 503 once."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = body["inputs"]
+            server.bodies.append(body)
+            time.sleep(server.delay)
+
+            if "unavailable" in self.path and not server.failed_once:
+                server.failed_once = True
+                return self._reply(503, {"error": "Model is currently loading"})
+            if self.path.endswith("/summarizer"):
+                outputs = [{"summary_text": f"summary of {text}"}
+                           for text in (inputs if isinstance(inputs, list) else [inputs])]
+                return self._reply(200, outputs)
+            return self._reply(200, [{"generated_text": f"answer to {inputs.split()[-1]}"}])
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def hf_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHFHandler)
+    server.lock = threading.Lock()
+    server.requests = server.in_flight = server.max_in_flight = server.connections = 0
+    server.bodies = []
+    server.delay = 0.05
+    server.failed_once = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_gateway(hf_server):
+    gateways = []
+
+    def make(**kwargs):
+        gateway = HFInferenceGateway(api_token="test", api_base=f"http://127.0.0.1:{hf_server.server_port}",
+                                     backoff=0.01, **kwargs)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+def test_identical_prompts_are_sent_once(hf_server, make_gateway):
+    llm = make_gateway(max_concurrency=4).client("generator", task="text-generation")
+
+    threads = [threading.Thread(target=llm.invoke, args=("What about ISIN?",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert llm.invoke("What about ISIN?") == "answer to ISIN?"
+
+    assert hf_server.requests == 1
+    assert hf_server.bodies[0]["parameters"] == {"return_full_text": False}
+
+
+def test_queued_summaries_are_batched_within_the_concurrency_limit(hf_server, make_gateway):
+    llm = make_gateway(max_concurrency=2, batch_size=4).client("summarizer", task="summarization")
+    texts = [f"text {i}" for i in range(12)]
+
+    assert llm.invoke_many(texts) == [f"summary of {text}" for text in texts]
+    assert hf_server.max_in_flight <= 2
+    assert hf_server.requests < len(texts)
+    assert any(isinstance(body["inputs"], list) for body in hf_server.bodies)
+    # Requests reuse the pooled keep-alive connections
+    assert hf_server.connections <= 2
+
+
+def test_unavailable_model_is_retried_and_errors_are_not_cached(hf_server, make_gateway):
+    gateway = make_gateway(max_retries=1)
+    assert gateway.client("unavailable", task="text-generation").invoke("status?") == "answer to status?"
+    assert hf_server.requests == 2
+
+    strict = make_gateway(max_retries=0)
+    hf_server.failed_once = False
+    with pytest.raises(HFInferenceError) as error:
+        strict.infer("unavailable", "again")
+    assert error.value.status_code == 503
+    assert strict.infer("unavailable", "again") == [{"generated_text": "answer to again"}]
+
+
+def test_health_and_comparison_prompts_run_concurrently(hf_server, make_gateway):
+    from features.financial_insights.services.financial_analysis_service import FinancialAnalyzer
+
+    hf_server.delay = 0.3
+    analyzer = FinancialAnalyzer(gateway=make_gateway(max_concurrency=4))
+    current = {"revenue": {"total": "$1,250,000"}, "expenses": {"total": "$875,000"},
+               "assets": {"total": "$3,000,000", "current": "$950,000"},
+               "liabilities": {"total": "$1,500,000", "current": "$600,000"}}
+    comparisons = {period: analyzer.get_comparison_data({}, period)
+                   for period in ("previous-year", "industry-average")}
+
+    start = time.perf_counter()
+    result = analyzer.analyze(current, comparisons)
+    elapsed = time.perf_counter() - start
+
+    assert hf_server.requests == 3 and hf_server.max_in_flight == 3
+    assert elapsed < 0.6
+    assert result["health"]["assessment"] == "answer to clear."
+    assert result["health"]["metrics"]["current_ratio"] == 1.58
+    assert result["comparisons"]["previous-year"]["changes"]["revenue"] == "19.05%"
+
+
+def test_shared_and_cached_outputs_are_copied_per_caller(hf_server, make_gateway):
+    gateway = make_gateway()
+    first, second = (gateway.submit("summarizer", "same text") for _ in range(2))
+    first.result()[0]["summary_text"] = "edited"
+
+    assert second.result() == [{"summary_text": "summary of same text"}]
+    assert gateway.infer("summarizer", "same text") == [{"summary_text": "summary of same text"}]
+    assert hf_server.requests == 1
+
+
+def test_uncached_clients_skip_the_gateway_cache(hf_server, make_gateway):
+    from features.summarization.services.summarization_service import Summarizer
+
+    gateway = make_gateway()
+    # Map-reduce services keep their own result cache
+    assert Summarizer(gateway=gateway).llm.cache is False
+
+    uncached = gateway.client("summarizer", task="summarization", cache=False)
+    assert uncached.invoke("same text") == "summary of same text"
+    assert uncached.invoke("same text") == "summary of same text"
+    assert hf_server.requests == 2
+
+    # Nothing was stored for cached callers either
+    assert gateway.client("summarizer", task="summarization").invoke("same text") == "summary of same text"
+    assert hf_server.requests == 3
+    assert gateway.stats["cache_hits"] == 0
+
+
+def test_financial_health_route_runs_requested_comparisons(hf_server, make_gateway, monkeypatch):
+    from flask import Flask
+
+    from features.financial_insights.api import insights_routes as routes
+    from features.financial_insights.services.financial_analysis_service import FinancialAnalyzer
+
+    analyzer = FinancialAnalyzer(gateway=make_gateway(max_concurrency=4))
+    monkeypatch.setattr(routes.financial_analysis_service, "get_analyzer", lambda: analyzer)
+    app = Flask(__name__)
+    app.register_blueprint(routes.insights_routes)
+
+    response = app.test_client().get(
+        "/api/analysis/financial-health?documentId=doc1&compareTo=previous-year&compareTo=industry-average")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["metrics"]["current_ratio"] == 1.58
+    assert set(body["comparisons"]) == {"previous-year", "industry-average"}
+    assert hf_server.requests == 3 and hf_server.max_in_flight == 3
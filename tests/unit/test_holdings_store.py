@@ -0,0 +1,71 @@
+import sqlite3
+from datetime import datetime
+
+from agent_framework.holdings_store import HoldingsStore
+
+
+def test_append_and_load_window(tmp_path):
+    store = HoldingsStore(str(tmp_path))
+    store.append_document("tenant-1", "doc-jan", "2025-01-31", [
+        {"isin": "US0378331005", "name": "Apple", "type": "stock", "value": "1'500.00"},
+        {"isin": "XS2530201644", "name": "Bond A", "type": "bond", "value": 500},
+    ])
+    store.append_document("tenant-1", "doc-feb", datetime(2025, 2, 28), [
+        {"isin": "US0378331005", "name": "Apple", "type": "stock", "value": 2000, "percentage_in_portfolio": 100},
+    ])
+
+    window = store.load_window("tenant-1", since="2025-02-01")
+    assert list(window["document_id"]) == ["doc-feb"]
+
+    january = store.load_window("tenant-1", until="2025-01-31")
+    assert sorted(january["value"]) == [500.0, 1500.0]
+    # Weights are derived from values when the statement has none
+    assert sorted(january["weight"]) == [25.0, 75.0]
+
+    assert store.composition("tenant-1") == {"stock": 100.0}
+    assert store.composition("tenant-1", as_of="2025-01-31") == {"bond": 25.0, "stock": 75.0}
+
+
+def test_reingesting_document_replaces_rows(tmp_path):
+    store = HoldingsStore(str(tmp_path))
+    rows = [{"isin": "CH1908490000", "value": 100}]
+    store.append_document("tenant-1", "doc-1", "2025-03-31", rows)
+    store.append_document("tenant-1", "doc-1", "2025-03-31", rows)
+    assert len(store.load_window("tenant-1")) == 1
+    assert not store.has_data("tenant-2")
+
+
+def test_missing_store_directory_is_created(tmp_path):
+    base_dir = tmp_path / "data" / "holdings"
+    store = HoldingsStore(str(base_dir))
+    assert not store.has_data("tenant-1")
+
+    store.append_document("tenant-1", "doc-1", "2025-03-31", [{"isin": "CH1908490000", "value": 100}])
+    assert store.has_data("tenant-1")
+    assert (base_dir / "tenant-1.sqlite").exists()
+
+
+def test_repeated_isin_lines_are_kept(tmp_path):
+    store = HoldingsStore(str(tmp_path))
+    store.append_document("tenant-1", "doc-1", "2025-03-31", [
+        {"isin": "CH1908490000", "value": 100},
+        {"isin": "CH1908490000", "value": 300},
+    ])
+
+    window = store.load_window("tenant-1")
+    assert sorted(window["value"]) == [100.0, 300.0]
+    assert store.document_ids("tenant-1") == {"doc-1"}
+
+
+def test_partition_without_line_index_is_migrated(tmp_path):
+    with sqlite3.connect(tmp_path / "tenant-1.sqlite") as conn:
+        conn.execute("CREATE TABLE holdings (date TEXT NOT NULL, isin TEXT NOT NULL, document_id TEXT NOT NULL, "
+                     "security_name TEXT, security_type TEXT, currency TEXT, quantity REAL, price REAL, value REAL, "
+                     "weight REAL, yield_percent REAL, performance REAL, PRIMARY KEY (date, isin, document_id))")
+        conn.execute("CREATE INDEX idx_holdings_date ON holdings (date)")
+        conn.execute("INSERT INTO holdings (date, isin, document_id, value) VALUES ('2025-01-31', 'US1', 'old', 5)")
+
+    store = HoldingsStore(str(tmp_path))
+    store.append_document("tenant-1", "new", "2025-02-28", [{"isin": "US1", "value": 1}, {"isin": "US1", "value": 2}])
+
+    assert list(store.load_window("tenant-1")["value"]) == [5.0, 1.0, 2.0]
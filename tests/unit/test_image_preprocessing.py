@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from pdf_processor.extraction.image_preprocessing import ImagePreprocessor
+
+
+def _text_page(noise_sigma=0.0):
+    page = np.full((1100, 850), 255, np.uint8)
+    for y in range(40, 1100, 50):
+        cv2.putText(page, "Portfolio XS2530201644 1'234.50", (40, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    if noise_sigma:
+        rng = np.random.default_rng(0)
+        page = np.clip(page + rng.normal(0, noise_sigma, page.shape), 0, 255).astype(np.uint8)
+    return page
+
+
+def test_clean_page_skips_denoise():
+    raster = ImagePreprocessor().raster(_text_page())
+    assert raster.quality["needs_denoise"] is False
+    # Enhanced product is the untouched grayscale for clean pages
+    assert raster.enhanced is raster.gray
+
+
+def test_noisy_page_is_denoised():
+    raster = ImagePreprocessor().raster(_text_page(noise_sigma=30))
+    assert raster.quality["needs_denoise"] is True
+    assert raster.ocr_binary.shape == raster.gray.shape
+
+
+def test_products_are_cached_per_page():
+    raster = ImagePreprocessor({"denoise": "never"}).raster(_text_page(noise_sigma=30))
+    assert raster.quality["needs_denoise"] is False
+    assert raster.binary_inv is raster.binary_inv
+
+
+@pytest.fixture
+def rendered_pages(monkeypatch):
+    from PIL import Image
+    from pdf_processor.extraction import image_preprocessing
+
+    calls = []
+
+    def fake_convert(path, first_page, last_page, dpi):
+        calls.append((path, first_page))
+        return [Image.fromarray(_text_page())]
+
+    monkeypatch.setattr(image_preprocessing, "convert_from_path", fake_convert)
+    return calls
+
+
+def test_replaced_file_is_rendered_again(tmp_path, rendered_pages):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4 first upload")
+    preprocessor = ImagePreprocessor({"correct_geometry": False})
+
+    first = preprocessor.page_raster(str(pdf), 0)
+    assert preprocessor.page_raster(str(pdf), 0) is first
+    assert len(rendered_pages) == 1
+
+    pdf.write_bytes(b"%PDF-1.4 second upload, same path")
+    assert preprocessor.page_raster(str(pdf), 0) is not first
+    assert len(rendered_pages) == 2
+    assert len(preprocessor._pages) == 1
+
+
+def test_page_cache_is_capped_by_bytes(tmp_path, rendered_pages):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    page_bytes = _text_page().nbytes
+    preprocessor = ImagePreprocessor({"correct_geometry": False, "page_cache_bytes": 2 * page_bytes})
+
+    for page in range(4):
+        preprocessor.page_raster(str(pdf), page)
+    assert [key[3] for key in preprocessor._pages] == [2, 3]
+
+    # Products count against the budget too
+    preprocessor.page_raster(str(pdf), 3).binary_inv
+    preprocessor.page_raster(str(pdf), 0)
+    assert [key[3] for key in preprocessor._pages] == [0]
+
+
+def test_only_pdf_pages_map_to_pdf_points(tmp_path, rendered_pages):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    preprocessor = ImagePreprocessor({"correct_geometry": False})
+
+    page = preprocessor.page_raster(str(pdf), 0, dpi=144)
+    assert page.is_pdf_page
+    assert page.to_pdf_bbox([0, 0, 144, 288]) == pytest.approx([0, 0, 72, 144])
+
+    # A scanned image file has no known DPI, so no PDF box
+    image = preprocessor.raster(_text_page())
+    assert not image.is_pdf_page
+    assert image.to_pdf_bbox([0, 0, 144, 288]) is None
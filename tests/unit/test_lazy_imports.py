@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dev_tools import importtime_report
+from dev_tools.importtime_report import parse_importtime, summarize
+from utils.lazy_imports import is_available, is_loaded, lazy_import
+
+
+def test_lazy_module_defers_import(tmp_path, monkeypatch):
+    (tmp_path / "slow_sdk.py").write_text("VALUE = 42\n\ndef double(x):\n    return 2 * x\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_sdk", raising=False)
+
+    module = lazy_import("slow_sdk")
+    assert "slow_sdk" not in sys.modules
+    assert not is_loaded(module)
+
+    assert module.VALUE == 42
+    assert module.double(4) == 8
+    assert "slow_sdk" in sys.modules
+    assert is_loaded(module)
+
+
+def test_lazy_import_of_missing_module_fails_on_use():
+    module = lazy_import("definitely_not_installed_sdk")
+    assert not is_available("definitely_not_installed_sdk")
+    with pytest.raises(ImportError):
+        module.anything
+
+
+def test_importtime_report_parsing():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   json.decoder",
+        "import time:       300 |        400 | json",
+        "import time:      5000 |       5000 | torch",
+        "Traceback (most recent call last):",
+    ])
+    entries = parse_importtime(output)
+    assert entries == [("json.decoder", 100, 100), ("json", 300, 400), ("torch", 5000, 5000)]
+
+    summary = summarize(entries)
+    assert summary["total_us"] == 5400
+    assert summary["packages"] == [("torch", 5000), ("json", 400)]
+    assert summary["modules"][0][0] == "torch"
+
+
+def test_importtime_report_fails_when_the_import_fails(tmp_path, monkeypatch, capsys):
+    (tmp_path / "broken_startup.py").write_text("import json\nraise NameError('wraps')\n")
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+
+    assert importtime_report.main(["broken_startup", "--budget", "10"]) == 1
+    assert "NameError: wraps" in capsys.readouterr().err
+
+
+def test_app_imports_and_answers_health_without_heavy_sdks(tmp_path):
+    pytest.importorskip("flask")
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    code = (
+        "import sys, app\n"
+        "response = app.create_app().test_client().get('/health')\n"
+        "print(response.status_code, response.get_json()['status'])\n"
+        "print(sorted(m for m in ('celery', 'pymongo', 'pandas', 'torch') if m in sys.modules))\n"
+    )
+    # Run from tmp_path: the app creates its log file and upload folder in the working directory
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            timeout=120, env={**os.environ, "PYTHONPATH": root})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["200 ok", "[]"]
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from shared.result_cache import ChunkResultCache
+from shared.map_reduce_llm import MapReduceLLM, RateLimitedScheduler, run_sync, split_text
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeLLM:
+    """Echoes the chunk numbers it was asked about; optionally rate-limits the first calls."""
+
+    def __init__(self, rate_limited_calls=0, delay=0.05):
+        self.prompts = []
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+        self.rate_limited_calls = rate_limited_calls
+        self.delay = delay
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+            if self.rate_limited_calls:
+                self.rate_limited_calls -= 1
+                raise RateLimitError("Too Many Requests")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if prompt.startswith("MAP:"):
+                return "S" + prompt.split("Chunk ", 1)[1].split()[0]
+            return "+".join(prompt[len("REDUCE:"):].split("|"))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+DOCUMENT = "\n\n".join(f"Chunk {n} " + "x" * 80 for n in range(16))
+
+
+def make_runner(llm, cache=None, max_concurrency=8):
+    return MapReduceLLM(
+        llm.invoke,
+        map_prompt=lambda chunk: f"MAP:{chunk}",
+        reduce_prompt=lambda parts: "REDUCE:" + "|".join(parts),
+        chunk_chars=100,
+        fan_in=4,
+        scheduler=RateLimitedScheduler(max_concurrency=max_concurrency, backoff=0.01),
+        cache=cache,
+    )
+
+
+class TestMapReduceLLM:
+    def test_reads_whole_document_and_reduces_as_a_tree(self):
+        llm = FakeLLM()
+        runner = make_runner(llm)
+
+        result = asyncio.run(runner.run(DOCUMENT))
+
+        assert result == "+".join(f"S{n}" for n in range(16))
+        # 16 map calls, then 4 reduce calls, then 1
+        assert runner.stats == {"chunks": 16, "llm_calls": 21, "cache_hits": 0, "reduce_levels": 2}
+        assert 1 < llm.max_in_flight <= 8
+
+    def test_edited_document_only_recomputes_changed_path(self, tmp_path):
+        cache = ChunkResultCache(str(tmp_path))
+        asyncio.run(make_runner(FakeLLM(), cache).run(DOCUMENT))
+
+        edited = DOCUMENT.replace("Chunk 5 ", "Chunk 5b ")
+        llm = FakeLLM()
+        runner = make_runner(llm, ChunkResultCache(str(tmp_path)))
+        result = asyncio.run(runner.run(edited))
+
+        assert "S5b" in result
+        # The changed chunk, its reduce group and the root
+        assert len(llm.prompts) == 3
+        assert runner.stats["cache_hits"] == 15 + 3
+
+    def test_rate_limit_errors_are_retried(self):
+        llm = FakeLLM(rate_limited_calls=3)
+        runner = make_runner(llm, max_concurrency=2)
+
+        assert asyncio.run(runner.run(DOCUMENT)) == "+".join(f"S{n}" for n in range(16))
+        assert runner.scheduler.stats["rate_limited"] == 3
+
+    def test_other_errors_propagate(self):
+        def invoke(prompt):
+            raise ValueError("bad request")
+
+        runner = MapReduceLLM(invoke, map_prompt=str, reduce_prompt="".join,
+                              scheduler=RateLimitedScheduler(backoff=0.01))
+        with pytest.raises(ValueError):
+            asyncio.run(runner.run("some text"))
+
+
+def test_shared_scheduler_limits_callers_on_separate_threads():
+    # Each caller runs its own event loop through run_sync, like concurrent Flask requests
+    llm = FakeLLM(delay=0.005)
+    scheduler = RateLimitedScheduler(max_concurrency=1, backoff=0.01)
+    results = []
+
+    def caller():
+        runner = MapReduceLLM(llm.invoke, map_prompt=lambda chunk: f"MAP:{chunk}",
+                              reduce_prompt=lambda parts: "REDUCE:" + "|".join(parts),
+                              chunk_chars=100, scheduler=scheduler)
+        results.append(run_sync(runner.run(DOCUMENT)))
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["+".join(f"S{n}" for n in range(16))] * 4
+    assert llm.max_in_flight == 1
+    assert scheduler.stats["requests"] == 4 * 21
+
+
+def test_split_text_respects_limit_and_keeps_order():
+    text = "para one\n\n" + "line\n" * 50 + "\n\n" + "y" * 250
+    chunks = split_text(text, 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert chunks[0].startswith("para one")
+    assert "".join(chunks).replace("\n", "").endswith("y" * 250)
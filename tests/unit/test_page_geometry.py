@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from pdf_processor.extraction.page_geometry import apply_page_geometry, estimate_page_geometry
+
+
+@pytest.fixture
+def upright_page():
+    page = np.full((1650, 1275), 255, np.uint8)
+    words = ["Holdings", "USD", "XS2530201644", "1,234.50", "total", "bond"]
+    for i, y in enumerate(range(60, 1600, 32)):
+        line = " ".join(words[(i + k) % len(words)] for k in range(4))
+        cv2.putText(page, line, (50, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 1)
+    return page
+
+
+def test_upright_page_is_left_alone(upright_page):
+    geometry = estimate_page_geometry(upright_page, {"check_upside_down": False})
+    assert geometry == {"rotation": 0, "skew_angle": 0.0}
+
+
+def test_skew_is_detected(upright_page):
+    matrix = cv2.getRotationMatrix2D((637, 825), 3.0, 1.0)
+    skewed = cv2.warpAffine(upright_page, matrix, (1275, 1650), borderValue=255)
+    geometry = estimate_page_geometry(skewed, {})
+    assert geometry["rotation"] == 0
+    assert geometry["skew_angle"] == pytest.approx(-3.0, abs=0.3)
+
+
+def test_sideways_page_is_rotated_back(upright_page):
+    sideways = np.ascontiguousarray(np.rot90(upright_page))
+    geometry = estimate_page_geometry(sideways, {})
+    assert geometry["rotation"] in (90, 270)
+
+    corrected, transform = apply_page_geometry(sideways, 90, 0.0, dpi=300)
+    assert np.array_equal(corrected, upright_page)
+    # Boxes on the corrected page map back to the original raster and PDF points
+    x, y, _ = transform.matrix @ np.array([300.0, 600.0, 1.0])
+    assert transform.to_original([x, y, x, y]) == pytest.approx([300.0, 600.0, 300.0, 600.0])
+    assert transform.to_pdf([x, y, x, y]) == pytest.approx([72.0, 144.0, 72.0, 144.0])
@@ -0,0 +1,67 @@
+import pytest
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+pytest.importorskip("pytesseract")
+
+from shared import pdf_utils
+from shared.pdf_utils import PDFProcessor
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    """Five pages without a text layer, like a scanned statement."""
+    writer = PyPDF2.PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(width=200, height=200)
+    path = tmp_path / "scan.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+@pytest.fixture
+def ocr_calls(monkeypatch):
+    calls = {"convert": [], "ocr": 0}
+
+    def convert_from_path(path, first_page, last_page, **kwargs):
+        calls["convert"].append((first_page, last_page))
+        return [f"image{n}" for n in range(first_page, last_page + 1)]
+
+    def image_to_string(image, lang=None):
+        calls["ocr"] += 1
+        return f"{image}: ISIN US0378331005  100.00 $   5%\n"
+
+    monkeypatch.setattr(pdf_utils.pdf2image, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(pdf_utils.pytesseract, "image_to_string", image_to_string)
+    monkeypatch.setattr(pdf_utils, "OCR_BATCH_PAGES", 2)
+    return calls
+
+
+def make_processor():
+    processor = PDFProcessor(ocr_enabled=False)
+    processor.ocr_enabled = True  # skip the tesseract binary check
+    return processor
+
+
+def test_scan_ocrs_each_page_once(scanned_pdf, ocr_calls):
+    result = make_processor().scan(scanned_pdf)
+
+    assert ocr_calls["ocr"] == 5
+    # Consecutive pages are rasterized together, in batches of OCR_BATCH_PAGES
+    assert ocr_calls["convert"] == [(1, 2), (3, 4), (5, 5)]
+    assert result["page_count"] == 5
+    assert "image5" in result["text"]
+    assert result["financial_data"]["securities"][0]["value"] == "US0378331005"
+
+
+def test_session_is_shared_between_extraction_methods(scanned_pdf, ocr_calls):
+    processor = make_processor()
+    with processor.open(scanned_pdf) as session:
+        assert session.ocr_text(2) == "image3: ISIN US0378331005  100.00 $   5%\n"
+        text = processor.extract_text(session)
+        processor.extract_tables(session)
+        processor.extract_financial_data(session)
+
+    assert ocr_calls["ocr"] == 5
+    assert text == processor.extract_text(scanned_pdf)
+    assert ocr_calls["ocr"] == 10  # a plain path opens a fresh session
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+
+import pytest
+
+from services import portfolio_artifacts
+
+HOLDINGS = [
+    {"isin": "US0378331005", "name": "Apple Inc", "type": "stock", "currency": "USD", "market_value": "1'500.00"},
+    {"isin": "CH0012032048", "name": "Roche Holding", "type": "stock", "currency": "CHF",
+     "quantity": "10", "price": "250.00"},
+    {"isin": "XS2530201644", "name": "Bond A", "type": "bond", "currency": "USD", "market_value": 500},
+]
+
+
+def write_financial(folder, holdings, mtime=None):
+    path = folder / "doc1_financial.json"
+    path.write_text(json.dumps(holdings))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def upload_folder(tmp_path):
+    write_financial(tmp_path, HOLDINGS, mtime=1_700_000_000)
+    return str(tmp_path)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_analysis_is_computed_from_the_holdings(upload_folder):
+    path = portfolio_artifacts.ensure_portfolio_analysis(upload_folder, "doc1")
+    assert path.endswith("doc1_portfolio_analysis.json")
+
+    analysis = read(path)
+    assert analysis["security_count"] == 3
+    assert analysis["total_value"] == 4500.0
+    assert analysis["asset_allocation"] == {
+        "stock": {"value": 4000.0, "percentage": 88.89},
+        "bond": {"value": 500.0, "percentage": 11.11},
+    }
+    assert analysis["currency_allocation"]["CHF"] == {"value": 2500.0, "percentage": 55.56}
+    assert [h["isin"] for h in analysis["top_holdings"]] == ["CH0012032048", "US0378331005", "XS2530201644"]
+
+    mtime = os.stat(path).st_mtime_ns
+    assert portfolio_artifacts.ensure_portfolio_analysis(upload_folder, "doc1") == path
+    assert os.stat(path).st_mtime_ns == mtime
+    assert portfolio_artifacts.ensure_portfolio_analysis(upload_folder, "missing") is None
+
+
+def test_custom_tables_are_stored_per_spec(upload_folder):
+    spec = {"columns": ["isin", "currency"], "filters": [{"field": "type", "operator": "=", "value": "stock"}]}
+    path = portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", spec)
+    assert read(path) == {
+        "columns": ["isin", "currency"],
+        "data": [{"isin": "US0378331005", "currency": "USD"}, {"isin": "CH0012032048", "currency": "CHF"}],
+    }
+
+    # Same spec with different key order hits the stored table
+    assert portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", dict(reversed(list(spec.items())))) == path
+    assert portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["name"]}) != path
+
+
+def test_rewritten_financial_data_rebuilds_artifacts(upload_folder, tmp_path):
+    analysis = portfolio_artifacts.ensure_portfolio_analysis(upload_folder, "doc1")
+    table = portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["isin"]})
+
+    write_financial(tmp_path, HOLDINGS[:1])
+    assert read(portfolio_artifacts.ensure_portfolio_analysis(upload_folder, "doc1"))["security_count"] == 1
+    assert read(portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["isin"]}))["data"] == [
+        {"isin": "US0378331005"}]
+
+    portfolio_artifacts.invalidate_artifacts(upload_folder, "doc1")
+    assert not os.path.exists(analysis)
+    assert not os.path.exists(table)
+
+
+def test_tables_share_the_compiled_holdings_of_a_data_version(upload_folder, tmp_path):
+    version = portfolio_artifacts.data_version(upload_folder, "doc1")
+    assert version == ("doc1", 1_700_000_000 * 10**9)
+    assert portfolio_artifacts.data_version(upload_folder, "missing") is None
+
+    portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["isin"]})
+    portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["name"]})
+    generator = portfolio_artifacts._table_generator
+    assert list(generator._frame_cache).count(version) == 1
+
+    write_financial(tmp_path, HOLDINGS[:1], mtime=1_800_000_000)
+    assert portfolio_artifacts.data_version(upload_folder, "doc1") != version
+
+
+def test_stored_tables_are_capped_per_document(upload_folder, monkeypatch):
+    monkeypatch.setattr(portfolio_artifacts, "MAX_CUSTOM_TABLES", 2)
+    first = portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["isin"]})
+    second = portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["name"]})
+    os.utime(first, ns=(1, os.stat(first).st_mtime_ns))
+    os.utime(second, ns=(2, os.stat(second).st_mtime_ns))
+
+    # Reusing the first table makes the second one the least recently used
+    mtime = os.stat(first).st_mtime_ns
+    assert portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["isin"]}) == first
+    assert os.stat(first).st_mtime_ns == mtime
+
+    third = portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", {"columns": ["type"]})
+    tables_dir = portfolio_artifacts.custom_tables_dir(upload_folder, "doc1")
+    assert sorted(os.listdir(tables_dir)) == sorted([os.path.basename(first), os.path.basename(third)])
+    assert not os.path.exists(second)
+
+
+def test_concurrent_first_requests_write_one_complete_file(upload_folder):
+    spec = {"columns": ["isin", "name"]}
+    errors = []
+
+    def request():
+        try:
+            portfolio_artifacts.ensure_custom_table(upload_folder, "doc1", spec)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    tables_dir = portfolio_artifacts.custom_tables_dir(upload_folder, "doc1")
+    assert len(os.listdir(tables_dir)) == 1
+    assert len(read(portfolio_artifacts.custom_table_path(upload_folder, "doc1", spec))["data"]) == 3
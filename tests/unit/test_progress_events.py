@@ -0,0 +1,98 @@
+import json
+from collections import defaultdict
+
+from services.progress_events import ProgressPublisher, format_sse, stream_progress
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.messages = []
+        self.closed = False
+
+    def subscribe(self, channel):
+        self.server.subscribers[channel].append(self)
+
+    def get_message(self, timeout=None):
+        if self.messages:
+            return self.messages.pop(0)
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis commands used."""
+
+    def __init__(self):
+        self.values = {}
+        self.subscribers = defaultdict(list)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def publish(self, channel, payload):
+        for pubsub in self.subscribers[channel]:
+            pubsub.messages.append({"type": "message", "data": payload})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+def test_stream_replays_latest_state_then_follows_until_terminal():
+    client = FakeRedis()
+    publisher = ProgressPublisher(client)
+    publisher.publish("doc1", "queued")
+
+    stream = stream_progress("doc1", client=client, heartbeat=0)
+    assert next(stream)["stage"] == "queued"
+    assert next(stream) is None  # heartbeat while idle
+
+    publisher.progress_callback("doc1", "ocr")(1, 3)
+    publisher.publish("doc1", "completed", isin_count=4)
+    assert next(stream)["done"] == 1
+    assert next(stream)["isin_count"] == 4
+    assert list(stream) == []
+
+
+def test_initial_state_used_only_without_stored_state():
+    client = FakeRedis()
+    calls = []
+
+    def from_db():
+        calls.append(1)
+        return {"document_id": "old", "stage": "completed"}
+
+    assert [e["stage"] for e in stream_progress("old", client=client, initial_state=from_db)] == ["completed"]
+    assert calls == [1]
+
+    ProgressPublisher(client).publish("new", "failed", error="boom")
+    assert list(stream_progress("new", client=client, initial_state=from_db))[0]["error"] == "boom"
+    assert calls == [1]
+
+
+def test_publish_failures_are_swallowed():
+    class Broken:
+        def pipeline(self):
+            raise ConnectionError("redis down")
+
+    event = ProgressPublisher(Broken()).publish("doc1", "ocr", done=1)
+    assert event["stage"] == "ocr"
+
+
+def test_format_sse():
+    assert format_sse(None) == ": keepalive\n\n"
+    frame = format_sse({"stage": "tables", "table_count": 2})
+    event_line, data_line = frame.strip().split("\n")
+    assert event_line == "event: tables"
+    assert json.loads(data_line[len("data: "):]) == {"stage": "tables", "table_count": 2}
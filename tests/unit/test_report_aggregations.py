@@ -0,0 +1,69 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("werkzeug")
+database = pytest.importorskip("database")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    mock_db = mongomock.MongoClient().db
+    monkeypatch.setattr(database, "db", mock_db)
+    rows = [("A", "US1", 100), ("A", "US2", 50), ("A", "US2", 25), ("B", "US1", 120), ("B", "US3", 10),
+            ("C", "US2", 75), ("other", "US1", 1)]
+    mock_db.financial_instruments.insert_many([
+        {"tenant_id": "t1", "document_id": doc, "isin": isin, "name": f"Name {isin}", "value": value, "currency": "USD"}
+        for doc, isin, value in rows
+    ])
+    mock_db.financial_instruments.insert_one({"tenant_id": "t2", "document_id": "A", "isin": "US9", "value": 5})
+    mock_db.document_summaries.insert_one({"tenant_id": "t1", "document_id": "A", "risk": "low"})
+    return mock_db
+
+
+def test_comparison_groups_by_isin_and_diffs_against_base(db):
+    result = database.aggregate_document_comparison("t1", "A", ["B", "C"], limit=2)
+
+    us1, us2 = result["instruments"]
+    assert (us1["isin"], us1["base_value"]) == ("US1", 100)
+    assert [(c["document_id"], c["value"], c["change"], c["status"]) for c in us1["changes"]] == [
+        ("B", 120, 20, "changed"), ("C", None, -100, "removed")]
+    # Two rows of US2 in document A are summed
+    assert us2["base_value"] == 75
+    assert [c["status"] for c in us2["changes"]] == ["removed", "unchanged"]
+
+    assert result["totals"]["A"] == {"total_value": 175, "instrument_count": 3, "summary": {"document_id": "A", "risk": "low"}}
+    assert result["totals"]["C"]["total_value"] == 75
+
+    next_page = database.aggregate_document_comparison("t1", "A", ["B", "C"], limit=2, cursor=result["next_cursor"])
+    assert [(i["isin"], i["changes"][0]["status"]) for i in next_page["instruments"]] == [("US3", "added")]
+    assert next_page["next_cursor"] is None
+
+
+def test_instrument_table_pages_by_cursor(db):
+    first = database.aggregate_instrument_table("t1", "A", limit=2)
+    second = database.aggregate_instrument_table("t1", "A", limit=2, cursor=first["next_cursor"])
+
+    assert [row["value"] for row in first["instruments"] + second["instruments"]] == [100, 50, 25]
+    assert second["next_cursor"] is None
+    assert "tenant_id" not in first["instruments"][0]
+
+
+def test_summary_lookup_field_is_indexed(db):
+    database.ensure_indexes(db)
+
+    indexes = db.document_summaries.index_information()
+    assert indexes["document"]["key"] == [("document_id", 1)]
+    assert indexes["tenant_document"]["key"] == [("tenant_id", 1), ("document_id", 1)]
+
+
+def test_criteria_cannot_widen_the_tenant_or_document_filter(db):
+    page = database.aggregate_instrument_table("t1", "A", {"tenant_id": "t2", "document_id": "B"})
+
+    assert [row["isin"] for row in page["instruments"]] == ["US1", "US2", "US2"]
+
+
+def test_documents_without_instruments_get_zero_totals(db):
+    result = database.aggregate_document_comparison("t1", "A", ["empty"])
+
+    assert result["totals"]["empty"] == {"total_value": 0, "instrument_count": 0, "summary": None}
+    assert result["totals"]["A"]["total_value"] == 175
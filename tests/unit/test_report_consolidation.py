@@ -0,0 +1,88 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from agents.financial.consolidated_reports_agent import ConsolidatedReportsAgent
+from agents.financial.report_consolidation import ReportConsolidator
+
+
+@pytest.fixture
+def report_files(tmp_path):
+    january = tmp_path / "january.csv"
+    january.write_text(
+        "ISIN,Market Value,Quantity,Valuation Date\n"
+        'US0378331005,"1,234.50",10,2024-01-31\n'
+        'US5949181045,"2,000.00",5,2024-01-31\n'
+    )
+    february = tmp_path / "february.csv"
+    february.write_text(
+        "isin,market value ,Account\n"
+        "US0378331005,1300,00123\n"
+    )
+    notes = tmp_path / "notes.txt"
+    notes.write_text("not a report")
+    return [str(january), str(february), str(notes)]
+
+
+def test_files_are_aligned_to_one_typed_schema(report_files):
+    consolidator = ReportConsolidator(max_workers=2)
+    try:
+        consolidated, summary = consolidator.consolidate(report_files)
+    finally:
+        consolidator.close()
+
+    assert summary["columns"] == {
+        "isin": "string", "market_value": "float", "quantity": "integer",
+        "valuation_date": "datetime", "account": "string",
+    }
+    assert list(consolidated.columns) == list(summary["columns"]) + ["source_file"]
+    assert consolidated["market_value"].tolist() == [1234.5, 2000.0, 1300.0]
+    assert str(consolidated["quantity"].dtype) == "Int64" and consolidated["quantity"].isna().tolist() == [False, False, True]
+    # Codes keep their leading zeros
+    assert consolidated["account"].tolist()[2] == "00123"
+
+    assert summary["total_records"] == 3 and summary["total_files_processed"] == 2
+    assert list(summary["failed_files"]) == [report_files[2]]
+    assert summary["numeric_summary"]["market_value"] == {
+        "count": 3, "sum": 4534.5, "min": 1234.5, "max": 2000.0, "mean": 1511.5}
+    assert summary["numeric_summary"]["quantity"]["count"] == 2
+
+
+def test_blank_column_in_one_file_keeps_the_column_numeric(tmp_path):
+    files = []
+    for name, values in (("a", ["1.5", "2.25"]), ("b", ["3", "4"]), ("c", ["n/a", ""])):
+        path = tmp_path / f"{name}.csv"
+        path.write_text("isin,value\n" + "".join(f"X{name}{i},{v}\n" for i, v in enumerate(values)))
+        files.append(str(path))
+
+    consolidated, summary = ReportConsolidator(max_workers=1).consolidate(files)
+
+    assert summary["columns"]["value"] == "float"
+    assert consolidated["value"].tolist()[:4] == [1.5, 2.25, 3.0, 4.0]
+    assert consolidated["value"].isna().tolist()[4:] == [True, True]
+    assert summary["numeric_summary"]["value"]["count"] == 4
+
+
+def test_parquet_output_matches_in_memory_result(report_files, tmp_path):
+    pytest.importorskip("pyarrow")
+    output_path = str(tmp_path / "out" / "consolidated.parquet")
+    consolidator = ReportConsolidator(max_workers=1)
+
+    expected, expected_summary = consolidator.consolidate(report_files)
+    frame, summary = consolidator.consolidate(report_files, output_path=output_path)
+
+    assert frame is None and summary["output_path"] == output_path
+    assert summary["numeric_summary"] == expected_summary["numeric_summary"]
+    written = pd.read_parquet(output_path)
+    pd.testing.assert_frame_equal(written, expected, check_dtype=False, check_categorical=False)
+    # Only the output is left behind, not the spilled parts
+    assert [p.name for p in (tmp_path / "out").iterdir()] == ["consolidated.parquet"]
+
+
+def test_agent_returns_records(report_files):
+    agent = ConsolidatedReportsAgent(max_workers=1)
+    records, summary = asyncio.run(agent.process({"report_files": report_files}))
+
+    assert len(records) == summary["total_records"] == 3
+    assert records[2]["quantity"] is None and records[2]["source_file"] == report_files[1]
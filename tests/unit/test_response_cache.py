@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+
+from utils.response_cache import ResponseCache, choose_encoding
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data))
+
+
+def test_cached_body_is_reused_until_file_changes(tmp_path):
+    path = tmp_path / "doc1_financial.json"
+    write_json(path, [{"isin": "US0378331005"}])
+    cache = ResponseCache()
+    builds = []
+
+    def payload(data):
+        builds.append(1)
+        return {"isin_count": len(data), "financial_data": data}
+
+    entry = cache.build(("doc1", "financial"), str(path), payload)
+    assert json.loads(entry.body) == {"isin_count": 1, "financial_data": [{"isin": "US0378331005"}]}
+    assert cache.get(("doc1", "financial")) is entry
+    assert builds == [1]
+
+    # Reprocessing rewrites the file: the entry goes stale and the ETag changes
+    write_json(path, [{"isin": "US0378331005"}, {"isin": "CH0012032048"}])
+    os.utime(path, ns=(entry.fingerprint[0] + 10**9, entry.fingerprint[0] + 10**9))
+    assert cache.get(("doc1", "financial")) is None
+    rebuilt = cache.build(("doc1", "financial"), str(path), payload)
+    assert rebuilt.etag != entry.etag
+
+
+def test_etag_matching_and_compressed_variants(tmp_path):
+    path = tmp_path / "doc1_tables.json"
+    write_json(path, [{"rows": list(range(500))}])
+    entry = ResponseCache().build(("doc1", "tables"), str(path), lambda tables: tables)
+
+    assert entry.matches(entry.etag)
+    assert entry.matches(f'W/{entry.etag_for("gzip")}')
+    assert entry.matches('"other", ' + entry.etag)
+    assert not entry.matches('"other"')
+    assert entry.etag_for("gzip") != entry.etag
+
+    assert gzip.decompress(entry.encoded("gzip")) == entry.body
+    assert entry.encoded("gzip") is entry.encoded("gzip")
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate", 10_000) == "gzip"
+    assert choose_encoding("gzip;q=0, deflate", 10_000) is None
+    assert choose_encoding("gzip", 100) is None  # too small to bother
+    assert choose_encoding(None, 10_000) is None
+
+
+def test_lru_eviction_and_invalidation(tmp_path):
+    cache = ResponseCache(max_entries=2)
+    for n in range(3):
+        path = tmp_path / f"doc{n}.json"
+        write_json(path, {"n": n})
+        cache.build((f"doc{n}", "financial"), str(path), lambda data: data)
+
+    assert cache.get(("doc0", "financial")) is None
+    assert cache.get(("doc2", "financial")) is not None
+
+    cache.invalidate("doc2")
+    assert cache.get(("doc2", "financial")) is None
+    assert cache.get(("doc1", "financial")) is not None
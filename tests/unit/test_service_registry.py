@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from agent_framework.registry import ServiceRegistry
+
+
+class Counter:
+    builds = 0
+
+    def __init__(self):
+        Counter.builds += 1
+        self.value = Counter.builds
+
+
+@pytest.fixture
+def registry():
+    Counter.builds = 0
+    registry = ServiceRegistry()
+    registry.register("shared", Counter, fork_safe=True)
+    registry.register("per_worker", Counter)
+    return registry
+
+
+def test_services_are_built_lazily_once(registry):
+    assert not registry.is_loaded("shared")
+    assert registry.get("shared") is registry.get("shared")
+    assert Counter.builds == 1
+
+
+def test_proxy_resolves_on_use(registry):
+    proxy = registry.proxy("per_worker")
+    assert Counter.builds == 0
+    assert proxy.value == 1
+    assert registry.is_loaded("per_worker")
+
+
+def test_preload_respects_fork_safety_and_reports_failures(registry):
+    def broken():
+        raise RuntimeError("no model")
+
+    registry.register("broken", broken, fork_safe=True)
+
+    report = registry.preload(fork_safe_only=True)
+    assert set(report["loaded"]) == {"shared"}
+    assert report["failed"] == {"broken": "no model"}
+    assert not registry.is_loaded("per_worker")
+
+    report = registry.preload(["per_worker", "missing"])
+    assert set(report["loaded"]) == {"per_worker"}
+    assert report["failed"] == {"missing": "not registered"}
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_fork_unsafe_services_are_rebuilt_after_fork(registry):
+    shared = registry.get("shared")
+    per_worker = registry.get("per_worker")
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            ok = registry.get("shared") is shared and registry.get("per_worker") is not per_worker
+            os.write(write_end, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 1) == b"1"
+    # The parent keeps its own instance
+    assert registry.get("per_worker") is per_worker
+
+
+def test_available_returns_none_when_the_service_cannot_be_built(registry):
+    def broken():
+        raise RuntimeError("no API key")
+
+    registry.register("broken", broken)
+    assert registry.available("broken") is None
+    assert registry.available("missing") is None
+    assert registry.available("shared") is registry.get("shared")
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from pdf_processor.analysis.financial_analyzer import FinancialAnalyzer
+from pdf_processor.analysis.statement_vectors import coerce_numeric_frame, find_label_rows
+
+
+def test_coercion_matches_scalar_conversion():
+    analyzer = FinancialAnalyzer()
+    df = pd.DataFrame({
+        'Item': ['Revenue', 'Net income', 'Tax'],
+        '2022': ['1,000', '(200)', '10K'],
+        '2023': ['$1,200', None, 'n/a'],
+        'ILS': ['5 ש"ח', '1.5M', ' 3 '],
+    })
+
+    numeric = coerce_numeric_frame(df)
+
+    for col in df.columns:
+        expected = df[col].map(analyzer._try_numeric_conversion)
+        for got, want in zip(numeric[col], expected):
+            assert (pd.isna(got) and pd.isna(want)) or got == want
+    assert numeric['2022'].tolist() == [1000.0, -200.0, 10000.0]
+    assert numeric['2023'].dtype == object
+    assert list(numeric.select_dtypes(include=['number']).columns) == ['2022', 'ILS']
+
+
+def test_label_rows_use_index_then_first_column():
+    df = pd.DataFrame({'label': ['Total revenue', 'Gross profit', 'Net income'], '2023': [1, 2, 3]},
+                      index=['x', 'Operating income', 'y'])
+    items = FinancialAnalyzer.INCOME_STATEMENT_ITEMS
+
+    assert find_label_rows(df, items) == {'revenue': 0, 'gross_profit': 1, 'operating_income': 1, 'net_income': 2}
+
+
+def test_statement_analysis_on_text_tables():
+    df = pd.DataFrame({
+        'Item': ['Revenue', 'Cost of sales', 'Gross profit', 'Net income'],
+        '2022': ['1,000', '(600)', '400', '100'],
+        '2023': ['1,250', '(700)', '550', '0'],
+    })
+
+    [analysis] = FinancialAnalyzer().analyze_financial_tables([df], ['income_statement'])
+
+    income = analysis['income_analysis']
+    assert income['revenue'] == [1000.0, 1250.0]
+    assert income['gross_profit_margin'] == [40.0, 44.0]
+    assert income['net_income_margin'] == [10.0, 0.0]
+    assert analysis['growth_rates']['0'] == [25.0]
+    # 100 -> 0 is -100%, and a zero base has no growth rate
+    assert analysis['growth_rates']['3'] == [-100.0]
+    assert np.isclose(analysis['statistics']['2023']['mean'], 275.0)
@@ -0,0 +1,65 @@
+import pytest
+
+from agent_framework.table_generator import CustomTableGenerator
+
+
+@pytest.fixture
+def holdings():
+    return [
+        {"security_type": "bond", "name": "Corp A", "yield_percent": 5.3, "qty": 5},
+        {"security_type": "bond", "name": "Corp B", "yield_percent": 6.1},
+        {"security_type": "bond", "name": "Treasury", "yield_percent": 4.2, "qty": 3},
+        {"security_type": "stock", "name": "Bank Y", "yield_percent": "n/a", "qty": 7},
+    ]
+
+
+class TestCustomTableGenerator:
+    def test_filter_and_sort(self, holdings):
+        """Filters are combined and results sorted on a typed key"""
+        spec = {
+            "columns": ["name", "yield_percent"],
+            "filters": [
+                {"field": "security_type", "operator": "=", "value": "bond"},
+                {"field": "yield_percent", "operator": ">", "value": 5},
+            ],
+            "sort_by": {"field": "yield_percent", "direction": "desc"},
+        }
+        table = CustomTableGenerator().generate_custom_table(holdings, spec)
+        assert table["headers"] == ["name", "yield_percent"]
+        assert table["rows"] == [["Corp B", "6.1"], ["Corp A", "5.3"]]
+        assert table["filters_applied"] == 2
+
+    def test_contains_is_case_insensitive(self, holdings):
+        spec = {"columns": ["name"], "filters": [{"field": "name", "operator": "contains", "value": "CORP"}]}
+        table = CustomTableGenerator().generate_custom_table(holdings, spec)
+        assert table["rows"] == [["Corp A"], ["Corp B"]]
+
+    def test_group_by_aggregates_numeric_values(self, holdings):
+        spec = {"columns": ["qty", "yield_percent"], "group_by": "security_type"}
+        table = CustomTableGenerator().generate_custom_table(holdings, spec)
+        assert table["headers"] == [
+            "security_type",
+            "sum_qty",
+            "avg_qty",
+            "count_qty",
+            "sum_yield_percent",
+            "avg_yield_percent",
+            "count_yield_percent",
+        ]
+        assert table["metadata"]["grouped_by"] == "security_type"
+        bond, stock = table["rows"]
+        assert bond[:4] == ["bond", "8", "4.0", "2"]
+        assert float(bond[4]) == pytest.approx(15.6)
+        assert float(bond[5]) == pytest.approx(5.2)
+        assert bond[6] == "3"
+        # Text values are only counted
+        assert stock == ["stock", "7", "7.0", "1", "", "", "1"]
+
+    def test_results_cached_per_data_version(self, holdings):
+        generator = CustomTableGenerator()
+        spec = {"columns": ["name"]}
+        first = generator.generate_custom_table(holdings, spec, data_version="doc-1:v1")
+        holdings.append({"name": "New"})
+        # Same version -> cached result, new version -> recomputed
+        assert generator.generate_custom_table(holdings, spec, data_version="doc-1:v1") == first
+        assert generator.generate_custom_table(holdings, spec, data_version="doc-1:v2")["count"] == 5
@@ -0,0 +1,34 @@
+import re
+
+from pdf_processor.language.term_matcher import TermMatcher, get_term_matcher
+
+
+TERMS = {
+    "income_statement": ["revenue", "income", "net income", "tax", "הכנסות", "מס", "מס הכנסה"],
+    "cash_flow": ["cash", "cash flow", "dividend", "דיבידנד"],
+}
+
+
+class TestTermMatcher:
+    def test_matches_same_terms_as_substring_scan(self):
+        matcher = TermMatcher(TERMS)
+        text = "Net Income rose; Cash Flow from dividends. מס הכנסה והכנסות"
+        expected = {t for terms in TERMS.values() for t in terms if t in text.lower()}
+        assert matcher.find_terms(text) == expected
+
+    def test_word_boundary_mode(self):
+        matcher = TermMatcher(TERMS, word_boundary=True)
+        text = "syntax cashflow cash dividends"
+        expected = {
+            t for terms in TERMS.values() for t in terms
+            if re.search(r"\b" + re.escape(t) + r"\b", text)
+        }
+        assert matcher.find_terms(text) == expected == {"cash"}
+
+    def test_category_counts(self):
+        counts = TermMatcher(TERMS).category_counts("net income and cash flow")
+        assert counts == {"income_statement": 2, "cash_flow": 2}
+        assert not TermMatcher(TERMS).contains_any("nothing relevant here")
+
+    def test_matcher_is_shared_per_term_list(self):
+        assert get_term_matcher(TERMS) is get_term_matcher(dict(TERMS))
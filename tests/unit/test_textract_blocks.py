@@ -0,0 +1,52 @@
+import json
+import os
+
+from services.aws.textract_blocks import TextractBlockGraph
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'textract_analyze_document.json')
+
+
+def load_graph():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return TextractBlockGraph.from_response(json.load(f))
+
+
+def test_lines_tables_and_forms_from_recorded_response():
+    result = load_graph().to_result()
+
+    assert result['text'].splitlines() == ["Portfolio Statement", "Client: A. Cohen", "ISIN Description Value"]
+    assert result['tables'] == [{
+        'id': 'table-1',
+        'page': 1,
+        'header': ['ISIN', 'Description', 'Value'],
+        'rows': [['US0378331005', 'Apple Inc', '1,250.00']],
+        'row_count': 2,
+        'col_count': 3
+    }]
+    assert result['forms'] == {'Client': 'A. Cohen', 'Currency': 'USD'}
+
+
+def test_blocks_from_later_pages_are_merged():
+    graph = load_graph()
+    graph.add_blocks([
+        {'BlockType': 'PAGE', 'Id': 'page-2', 'Page': 2},
+        {'BlockType': 'LINE', 'Id': 'line-p2', 'Text': 'Total 1,250.00', 'Page': 2},
+    ])
+
+    assert graph.page_numbers() == [1, 2]
+    assert graph.lines(page=2) == ['Total 1,250.00']
+    assert graph.text.endswith('Total 1,250.00')
+
+
+def test_table_extractor_reuses_existing_analysis(aws_config):
+    from pdf_processor.aws.aws_table_extractor import AWSTableExtractor
+
+    class NoCallTextract:
+        def analyze_document(self, **kwargs):
+            raise AssertionError("Textract must not be called again")
+
+    extractor = AWSTableExtractor.__new__(AWSTableExtractor)
+    extractor.textract = NoCallTextract()
+
+    tables = extractor.extract_tables('bucket', 'doc.pdf', graph=load_graph())
+    assert tables[0]['rows'] == [['US0378331005', 'Apple Inc', '1,250.00']]
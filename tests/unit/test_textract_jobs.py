@@ -0,0 +1,102 @@
+import pytest
+
+
+@pytest.fixture
+def textract_service(aws_config):
+    from services.aws import textract_service
+    return textract_service
+
+
+def page_blocks(page, lines):
+    blocks = [{'BlockType': 'PAGE', 'Id': f'page-{page}', 'Page': page}]
+    for i, text in enumerate(lines):
+        blocks.append({'BlockType': 'LINE', 'Id': f'line-{page}-{i}', 'Text': text, 'Page': page})
+    return blocks
+
+
+class StubTextract:
+    """Local Textract stub: the job is in progress for a number of polls, then paginated."""
+
+    def __init__(self, result_pages, polls_in_progress=1, status='SUCCEEDED'):
+        self.result_pages = result_pages
+        self.polls_in_progress = polls_in_progress
+        self.status = status
+        self.started = []
+        self.get_calls = []
+
+    def start_document_text_detection(self, DocumentLocation):
+        self.started.append(DocumentLocation['S3Object'])
+        return {'JobId': 'job-1'}
+
+    def get_document_text_detection(self, JobId, MaxResults, NextToken=None):
+        self.get_calls.append(NextToken)
+        if self.polls_in_progress:
+            self.polls_in_progress -= 1
+            return {'JobStatus': 'IN_PROGRESS'}
+        index = int(NextToken) if NextToken else 0
+        response = {'JobStatus': self.status, 'Blocks': self.result_pages[index]}
+        if self.status == 'FAILED':
+            response['StatusMessage'] = 'Unsupported document'
+        if index + 1 < len(self.result_pages):
+            response['NextToken'] = str(index + 1)
+        return response
+
+
+def make_service(module, stub):
+    service = module.TextractService(client=stub, s3_client=object(), staging_bucket='bucket')
+    service.poll_initial = 0
+    service.poll_max = 0
+    return service
+
+
+def test_job_pages_follow_next_token_and_split_by_page(textract_service):
+    # Page 2 is split across two result pages
+    blocks = page_blocks(1, ['a', 'b']) + page_blocks(2, ['c', 'd']) + page_blocks(3, ['e'])
+    stub = StubTextract([blocks[:5], blocks[5:]], polls_in_progress=2)
+
+    pages = list(make_service(textract_service, stub).iter_job_pages('bucket', 'statement.pdf'))
+
+    assert [number for number, _ in pages] == [1, 2, 3]
+    assert [b['Text'] for b in pages[1][1] if b['BlockType'] == 'LINE'] == ['c', 'd']
+    assert stub.started == [{'Bucket': 'bucket', 'Name': 'statement.pdf'}]
+    assert stub.get_calls == [None, None, None, '1']
+
+
+def test_failed_job_raises(textract_service):
+    stub = StubTextract([[]], polls_in_progress=0, status='FAILED')
+
+    with pytest.raises(textract_service.TextractJobError, match='Unsupported document'):
+        list(make_service(textract_service, stub).iter_job_pages('bucket', 'statement.pdf'))
+
+
+def test_job_slot_is_released_before_results_are_read(textract_service, monkeypatch):
+    monkeypatch.setattr(textract_service, '_poller', textract_service._JobPoller(1))
+    blocks = page_blocks(1, ['a']) + page_blocks(2, ['b'])
+    service = make_service(textract_service, StubTextract([blocks[:2], blocks[2:]]))
+
+    pages = service.iter_job_pages('bucket', 'first.pdf')
+    assert next(pages)[0] == 1
+
+    # The first document's results are still being read; a second job can run meanwhile
+    job_id, response = service.submit_job('bucket', 'second.pdf').result(timeout=5)
+    assert response['JobStatus'] == 'SUCCEEDED'
+    assert [number for number, _ in pages] == [2]
+
+
+def test_single_page_pdf_uses_the_synchronous_call(textract_service, tmp_path):
+    from PyPDF2 import PdfWriter
+
+    class SyncTextract:
+        def detect_document_text(self, Document):
+            assert Document['Bytes'].startswith(b'%PDF')
+            return {'Blocks': page_blocks(1, ['Total 1,000'])}
+
+    writer = PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    path = tmp_path / 'statement.pdf'
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+    # No S3 client: a staged upload would fail
+    service = textract_service.TextractService(client=SyncTextract(), s3_client=object(), staging_bucket='bucket')
+    assert service.extract_text_from_file(str(path)) == 'Total 1,000\n'
@@ -2,9 +2,17 @@
 Utilities package
 """
 
-# Import common utilities
-try:
-    from .pdf_processor import PDFProcessor
-except ImportError as e:
-    import logging
-    logging.warning(f"Could not import PDFProcessor: {e}")
+
+def __getattr__(name):
+    # Import common utilities on first use, so importing a light submodule
+    # (e.g. utils.lazy_imports) does not load the PDF/OCR stack
+    if name == "PDFProcessor":
+        try:
+            from .pdf_processor import PDFProcessor
+        except ImportError as e:
+            import logging
+            logging.warning(f"Could not import PDFProcessor: {e}")
+            raise AttributeError(name) from e
+        globals()["PDFProcessor"] = PDFProcessor
+        return PDFProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
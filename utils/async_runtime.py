@@ -0,0 +1,83 @@
+"""
+Execution runtime for blocking work called from coroutines.
+
+Agent ``process`` methods are coroutines, but much of what they do (pymongo
+queries, pandas file I/O) is blocking. Calling it directly inside a coroutine
+stalls the event loop, so every other chat user waits behind one slow query.
+``run_blocking`` runs such calls in a bounded thread pool shared by the
+process instead; independent calls can then be awaited together with
+``asyncio.gather``.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of threads for blocking agent work (DB calls, pandas I/O)
+AGENT_EXECUTOR_WORKERS = int(os.environ.get("AGENT_EXECUTOR_WORKERS", "0")) or min(32, (os.cpu_count() or 1) + 4)
+
+
+class BlockingRuntime:
+    """Bounded thread pool for blocking calls made from coroutines.
+
+    At most ``max_workers`` calls run at a time; further calls wait in the
+    executor queue without blocking the event loop.
+    """
+
+    def __init__(self, max_workers: int = AGENT_EXECUTOR_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="agent-blocking")
+                    logger.info(f"Started agent executor with {self.max_workers} threads")
+        return self._executor
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run ``func(*args, **kwargs)`` in the pool and wait for the result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_runtime: Optional[BlockingRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_blocking_runtime() -> BlockingRuntime:
+    """The runtime shared by the process (created on first use)."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = BlockingRuntime()
+    return _runtime
+
+
+def shutdown_blocking_runtime() -> None:
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        runtime.shutdown()
+
+
+async def run_blocking(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call in the shared pool (see ``BlockingRuntime.run``)."""
+    return await get_blocking_runtime().run(func, *args, **kwargs)
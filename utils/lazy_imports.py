@@ -0,0 +1,82 @@
+"""
+Lazy module proxies for heavy optional dependencies.
+
+``torch = lazy_import("torch")`` binds a placeholder module; the real import
+happens on first attribute access (``torch.tensor(...)``). Modules that only
+need a heavy SDK on some code paths can import it at the top as before without
+making every process that imports them pay for it at startup.
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+from typing import Optional
+
+_import_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _import_lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        # Cache plain attributes so later lookups skip __getattr__
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return the module if it is already imported, otherwise a lazy proxy.
+
+    Args:
+        name: Dotted module name, e.g. "transformers" or "google.generativeai"
+
+    Returns:
+        The module or a ``LazyModule`` standing in for it. A missing module raises
+        ``ImportError`` on first use rather than here.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_available(name: str) -> bool:
+    """Whether a module can be imported, without importing it."""
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # Parent package missing, or a broken module spec
+        return False
+
+
+def is_loaded(module: Optional[types.ModuleType]) -> bool:
+    """Whether a (possibly lazy) module has actually been imported."""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_module"] is not None
+    return module is not None
@@ -0,0 +1,282 @@
+"""
+Response layer for document result endpoints.
+
+Result files (``<id>_financial.json``, ``<id>_tables.json``, ...) never change
+once a document is processed, yet the routes used to re-read and re-serialize
+them on every request. ``ResponseCache`` keeps the serialized (and compressed)
+response bytes per (document, view) and validates them with a single
+``os.stat`` of the source file:
+
+- strong ETags from the SHA-256 of the source file plus ``RESPONSE_VERSION``
+  (bump it when a route changes the shape of its payload)
+- ``304 Not Modified`` for ``If-None-Match`` / ``If-Modified-Since``
+- brotli (if installed) or gzip, negotiated from ``Accept-Encoding``
+- orjson serialization when available, stdlib json otherwise
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when a cached view changes its payload format
+RESPONSE_VERSION = "1"
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 256))
+# Larger bodies are served but not kept in memory
+MAX_BODY_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BODY_MB", 16)) * 1024 * 1024
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson if available)."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS, default=str)
+        except TypeError:
+            # e.g. integer keys mixed with str keys; the stdlib is more lenient
+            pass
+    return json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def file_fingerprint(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime_ns, size, inode) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Pick a content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, deflate, br;q=0.9"
+        size: Uncompressed body size in bytes
+
+    Returns:
+        "br", "gzip" or None for identity
+    """
+    if not accept_encoding or size < MIN_COMPRESS_BYTES:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in available_encodings():
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CachedBody:
+    """Serialized response for one (document, view), plus compressed variants."""
+
+    __slots__ = ("path", "fingerprint", "etag", "last_modified", "body", "_encoded", "_lock")
+
+    def __init__(self, path: str, fingerprint: Tuple[int, int, int], etag: str, body: bytes):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.etag = etag
+        # Seconds since epoch, from the source file
+        self.last_modified = fingerprint[0] / 1e9
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return file_fingerprint(self.path) == self.fingerprint
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Body in the given content coding (compressed once, then reused)."""
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = _compress(self.body, encoding)
+                    self._encoded[encoding] = data
+        return data
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Strong ETags must differ between representations
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header matches any representation of this body."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        base = self.etag[1:-1]
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag == base or tag.startswith(base + "-"):
+                return True
+        return False
+
+    def not_modified_since(self, if_modified_since: Optional[str]) -> bool:
+        if not if_modified_since:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(self.last_modified) <= since
+
+
+class ResponseCache:
+    """LRU cache of serialized responses keyed by (document_id, view)."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, version: str = RESPONSE_VERSION):
+        self.max_entries = max_entries
+        self.version = version
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        """Cached body for ``key`` if its source file is unchanged (one stat call)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not entry.is_fresh():
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry
+
+    def build(self, key: Hashable, path: str, make_payload: Callable[[Any], Any]) -> CachedBody:
+        """Read ``path``, build the response payload and cache its serialized form.
+
+        Args:
+            key: Cache key, e.g. (document_id, "financial")
+            path: Source JSON file the payload is derived from
+            make_payload: Called with the parsed file content, returns the response object
+
+        Returns:
+            The cached body
+        """
+        fingerprint = file_fingerprint(path)
+        if fingerprint is None:
+            raise FileNotFoundError(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+
+        digest = hashlib.sha256(raw).hexdigest()[:32]
+        etag = f'"{digest}-v{self.version}"'
+        body = dumps(make_payload(loads(raw)))
+        entry = CachedBody(path, fingerprint, etag, body)
+
+        if len(body) <= MAX_BODY_BYTES:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, document_id: Optional[str] = None) -> None:
+        """Drop cached views of one document (keys starting with it), or everything."""
+        with self._lock:
+            if document_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if isinstance(k, tuple) and k[:1] == (document_id,)]:
+                del self._entries[key]
+
+    def respond(self, entry: CachedBody, conditional: bool = True):
+        """Flask response for a cached body, honouring conditional and encoding headers.
+
+        Args:
+            entry: Body from ``get`` or ``build``
+            conditional: Answer 304 for matching validators (GET/HEAD routes only)
+        """
+        from flask import Response, request
+
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"), len(entry.body))
+        headers = {
+            "ETag": entry.etag_for(encoding),
+            "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+            "Cache-Control": "private, no-cache",
+            "Vary": "Accept-Encoding",
+        }
+
+        if conditional:
+            if_none_match = request.headers.get("If-None-Match")
+            if entry.matches(if_none_match) or (
+                    if_none_match is None and entry.not_modified_since(request.headers.get("If-Modified-Since"))):
+                return Response(status=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(entry.encoded(encoding), status=200, mimetype="application/json", headers=headers)
+
+    def serve(self, key: Hashable, path: str, make_payload: Callable[[Any], Any], conditional: bool = True):
+        """``respond`` with the cached body for ``key``, building it from ``path`` if needed."""
+        entry = self.get(key)
+        if entry is None or entry.path != path:
+            entry = self.build(key, path, make_payload)
+        return self.respond(entry, conditional=conditional)
+
+
+# Shared by the document result routes in app.py and enhanced_api_endpoints.py
+document_responses = ResponseCache()